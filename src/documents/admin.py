@@ -1,3 +1,5 @@
+import itertools
+
 from django.conf import settings
 from django.contrib import admin
 from guardian.admin import GuardedModelAdmin
@@ -102,9 +104,15 @@ class DocumentAdmin(GuardedModelAdmin):
     def delete_queryset(self, request, queryset):
         from documents import index
 
-        with index.open_index_writer() as writer:
-            for o in queryset:
-                index.remove_document(writer, o)
+        # Documents may belong to different tenants, each with its own index
+        for _, documents in itertools.groupby(
+            queryset.select_related("tenant").order_by("tenant_id"),
+            key=lambda doc: doc.tenant_id,
+        ):
+            documents = list(documents)
+            with index.open_document_index_writer(documents[0]) as writer:
+                for o in documents:
+                    index.remove_document(writer, o)
 
         super().delete_queryset(request, queryset)
 
@@ -12,6 +12,7 @@ class DocumentsConfig(AppConfig):
         from documents.signals import document_updated
         from documents.signals.handlers import add_inbox_tags
         from documents.signals.handlers import add_to_index
+        from documents.signals.handlers import check_near_duplicates
         from documents.signals.handlers import run_workflows_added
         from documents.signals.handlers import run_workflows_updated
         from documents.signals.handlers import set_correspondent
@@ -25,6 +26,7 @@ class DocumentsConfig(AppConfig):
         document_consumption_finished.connect(set_tags)
         document_consumption_finished.connect(set_storage_path)
         document_consumption_finished.connect(add_to_index)
+        document_consumption_finished.connect(check_near_duplicates)
         document_consumption_finished.connect(run_workflows_added)
         document_updated.connect(run_workflows_updated)
 
@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 import re
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -12,6 +13,7 @@ from pdf2image import convert_from_path
 from pikepdf import Page
 from pikepdf import PasswordError
 from pikepdf import Pdf
+from PIL import Image
 
 from documents.converters import convert_from_tiff_to_pdf
 from documents.data_models import ConsumableDocument
@@ -29,8 +31,6 @@ from paperless.config import BarcodeConfig
 if TYPE_CHECKING:
     from collections.abc import Callable
 
-    from PIL import Image
-
 logger = logging.getLogger("paperless.barcodes")
 
 
@@ -244,10 +244,50 @@ class BarcodePlugin(ConsumeTaskPlugin):
 
         return barcodes
 
+    def _read_page(
+        self,
+        reader: Callable[[Image.Image], list[str]],
+        page_number: int,
+        page_filepath: Path,
+    ) -> list[Barcode]:
+        logger.debug(f"Processing page {page_number}, image is at {page_filepath}")
+        try:
+            with Image.open(page_filepath) as page:
+                # Upscale image if configured
+                factor = self.settings.barcode_upscale
+                if factor > 1.0:
+                    logger.debug(
+                        f"Upscaling image by {factor} for better barcode detection",
+                    )
+                    x, y = page.size
+                    image = page.resize(
+                        (round(x * factor), (round(y * factor))),
+                    )
+                else:
+                    image = page
+
+                # Detect barcodes
+                return [
+                    Barcode(page_number, barcode_value, self.settings)
+                    for barcode_value in reader(image)
+                ]
+        finally:
+            # Delete temporary image file
+            page_filepath.unlink()
+
+    def _only_first_asn_needed(self) -> bool:
+        """
+        Tags and separators are read from all pages, the ASN only from the
+        first page it is found on
+        """
+        return not (self.settings.barcodes_enabled or self.settings.barcode_enable_tag)
+
     def detect(self) -> None:
         """
         Scan all pages of the PDF as images, updating barcodes and the pages
-        found on as we go
+        found on as we go.  Pages are rasterized in chunks, each by several
+        pdftoppm processes at once, and the barcodes of the pages of a chunk
+        are read in parallel.
         """
         # Bail if barcodes already exist
         if self.barcodes:
@@ -282,42 +322,42 @@ class BarcodePlugin(ConsumeTaskPlugin):
                     f"Barcodes detection will be limited to the first {barcode_max_pages} pages",
                 )
 
-            # Loop al page
-            for current_page_number in range(min(num_of_pages, barcode_max_pages)):
-                logger.debug(f"Processing page {current_page_number}")
-
-                # Convert page to image
-                page = convert_from_path(
-                    self.pdf_file,
-                    dpi=self.settings.barcode_dpi,
-                    output_folder=self.temp_dir.name,
-                    first_page=current_page_number + 1,
-                    last_page=current_page_number + 1,
-                )[0]
-
-                # Remember filename, since it is lost by upscaling
-                page_filepath = Path(page.filename)
-                logger.debug(f"Image is at {page_filepath}")
-
-                # Upscale image if configured
-                factor = self.settings.barcode_upscale
-                if factor > 1.0:
-                    logger.debug(
-                        f"Upscaling image by {factor} for better barcode detection",
-                    )
-                    x, y = page.size
-                    page = page.resize(
-                        (round(x * factor), (round(y * factor))),
+            workers = max(int(settings.THREADS_PER_WORKER), 1)
+            only_first_asn = self._only_first_asn_needed()
+            # Small chunks when the scan may stop at the first ASN
+            chunk_size = workers if only_first_asn else workers * 4
+            last_page = min(num_of_pages, barcode_max_pages)
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for first_page in range(0, last_page, chunk_size):
+                    chunk_last_page = min(first_page + chunk_size, last_page)
+
+                    # Convert the pages to images, the pages are split among
+                    # the processes
+                    page_filepaths = convert_from_path(
+                        self.pdf_file,
+                        dpi=self.settings.barcode_dpi,
+                        output_folder=self.temp_dir.name,
+                        first_page=first_page + 1,
+                        last_page=chunk_last_page,
+                        thread_count=workers,
+                        paths_only=True,
                     )
 
-                # Detect barcodes
-                for barcode_value in reader(page):
-                    self.barcodes.append(
-                        Barcode(current_page_number, barcode_value, self.settings),
-                    )
+                    for barcodes in pool.map(
+                        lambda page: self._read_page(reader, *page),
+                        zip(
+                            range(first_page, chunk_last_page),
+                            map(Path, page_filepaths),
+                        ),
+                    ):
+                        self.barcodes.extend(barcodes)
 
-                # Delete temporary image file
-                page_filepath.unlink()
+                    if only_first_asn and any(x.is_asn for x in self.barcodes):
+                        logger.debug(
+                            f"Found ASN barcode, skipping pages after {chunk_last_page}",
+                        )
+                        break
 
         # Password protected files can't be checked
         # This is the exception raised for those
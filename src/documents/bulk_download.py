@@ -1,14 +1,32 @@
 from __future__ import annotations
 
+import io
+import zipfile
 from pathlib import Path
 from typing import TYPE_CHECKING
-from typing import NoReturn
+from typing import Final
+
+from documents.storage.factory import get_storage_backend
+from paperless.tenants.utils import tenant_context
+
+# Formats which are compressed already, so deflating them only costs time
+STORED_MIME_TYPES: Final = frozenset(
+    {
+        "application/pdf",
+        "image/jpeg",
+        "image/png",
+        "image/webp",
+    },
+)
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from collections.abc import Iterable
+    from collections.abc import Iterator
     from zipfile import ZipFile
 
     from documents.models import Document
+    from paperless.tenants.models import Tenant
 
 
 class BulkArchiveStrategy:
@@ -69,39 +87,184 @@ class BulkArchiveStrategy:
 
         return in_archive_path
 
-    def add_document(self, doc: Document) -> NoReturn:
+    def _get_compress_type(self, mime_type: str) -> int:
+        if mime_type in STORED_MIME_TYPES:
+            return zipfile.ZIP_STORED
+        return self.zipf.compression
+
+    def write_file(
+        self,
+        doc: Document,
+        logical_path: str,
+        arcname: Path | str,
+        mime_type: str,
+    ) -> Iterator[None]:
+        """
+        Streams the file at the given logical path from the storage backend
+        into the zip file, yielding after each chunk.  Already compressed
+        formats are stored as they are.
+        """
+        backend = get_storage_backend()
+        zinfo = zipfile.ZipInfo(
+            str(arcname),
+            date_time=doc.modified.timetuple()[:6],
+        )
+        zinfo.compress_type = self._get_compress_type(mime_type)
+        # When streaming, the zip file can't go back to add Zip64 headers, so
+        # it needs to know whether they are needed before the file is written
+        zinfo.file_size = backend.stat(logical_path).size
+        chunk_size = backend.get_chunk_size()
+        with (
+            backend.open(logical_path) as src,
+            self.zipf.open(zinfo, mode="w") as dst,
+        ):
+            while chunk := src.read(chunk_size):
+                dst.write(chunk)
+                yield
+
+    def get_files(self, doc: Document) -> Iterator[tuple[str, Path | str, str]]:
+        """
+        Yields the logical path, name in the zip file and MIME type of each
+        file of the document to add.  Names are made unique against the files
+        added so far, so each file must be added before the next is requested.
+        """
         raise NotImplementedError  # pragma: no cover
 
+    def add_document(self, doc: Document) -> None:
+        for logical_path, arcname, mime_type in self.get_files(doc):
+            for _ in self.write_file(doc, logical_path, arcname, mime_type):
+                pass
+
 
 class OriginalsOnlyStrategy(BulkArchiveStrategy):
-    def add_document(self, doc: Document) -> None:
-        self.zipf.write(doc.source_path, self.make_unique_filename(doc))
+    def get_files(self, doc: Document) -> Iterator[tuple[str, Path | str, str]]:
+        yield doc.source_path, self.make_unique_filename(doc), doc.mime_type
 
 
 class ArchiveOnlyStrategy(BulkArchiveStrategy):
-    def add_document(self, doc: Document) -> None:
+    def get_files(self, doc: Document) -> Iterator[tuple[str, Path | str, str]]:
         if doc.has_archive_version:
             if TYPE_CHECKING:
                 assert doc.archive_path is not None
-            self.zipf.write(
+            yield (
                 doc.archive_path,
                 self.make_unique_filename(doc, archive=True),
+                "application/pdf",
             )
         else:
-            self.zipf.write(doc.source_path, self.make_unique_filename(doc))
+            yield doc.source_path, self.make_unique_filename(doc), doc.mime_type
 
 
 class OriginalAndArchiveStrategy(BulkArchiveStrategy):
-    def add_document(self, doc: Document) -> None:
+    def get_files(self, doc: Document) -> Iterator[tuple[str, Path | str, str]]:
         if doc.has_archive_version:
             if TYPE_CHECKING:
                 assert doc.archive_path is not None
-            self.zipf.write(
+            yield (
                 doc.archive_path,
                 self.make_unique_filename(doc, archive=True, folder="archive/"),
+                "application/pdf",
             )
 
-        self.zipf.write(
+        yield (
             doc.source_path,
             self.make_unique_filename(doc, folder="originals/"),
+            doc.mime_type,
         )
+
+
+class ZipStream(io.RawIOBase):
+    """
+    Write-only, unseekable file object a zip file is written to, whose
+    content is taken out as the zip file is streamed
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buffer += b
+        self._position += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        # Zip files need the position to write the offsets of their entries
+        return self._position
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def take(self) -> bytes:
+        """
+        Returns and discards the content written since the last call
+        """
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _write_zip(
+    documents: Iterable[Document],
+    strategy_class: type[BulkArchiveStrategy],
+    *,
+    compression: int,
+    follow_formatting: bool,
+    min_chunk_size: int,
+) -> Iterator[bytes]:
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, "w", compression) as zipf:
+        strategy = strategy_class(zipf, follow_formatting=follow_formatting)
+        for doc in documents:
+            for logical_path, arcname, mime_type in strategy.get_files(doc):
+                for _ in strategy.write_file(doc, logical_path, arcname, mime_type):
+                    if stream.buffered >= min_chunk_size:
+                        yield stream.take()
+    # Closing the zip file wrote its central directory
+    yield stream.take()
+
+
+def stream_zip(
+    documents: Iterable[Document],
+    strategy_class: type[BulkArchiveStrategy],
+    *,
+    compression: int,
+    follow_formatting: bool = False,
+    tenant: Tenant | None = None,
+    min_chunk_size: int | None = None,
+) -> Iterator[bytes]:
+    """
+    Yields a zip file of the documents as it is written, in chunks of at least
+    min_chunk_size bytes, which defaults to the storage chunk size.  Files are
+    read from the storage backend one chunk at a time, so neither the zip file
+    nor any of the documents are held in memory or written to disk.
+
+    The response may be streamed after the request was handled, and other
+    requests may be handled by the same thread in between chunks, so the
+    tenant is set only while each chunk is written.
+    """
+    if min_chunk_size is None:
+        min_chunk_size = get_storage_backend().get_chunk_size()
+
+    chunks = _write_zip(
+        documents,
+        strategy_class,
+        compression=compression,
+        follow_formatting=follow_formatting,
+        min_chunk_size=min_chunk_size,
+    )
+    try:
+        while True:
+            with tenant_context(tenant):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        with tenant_context(tenant):
+            chunks.close()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import hashlib
 import logging
+import shutil
 import tempfile
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -28,6 +29,7 @@ from documents.models import StoragePath
 from documents.models import Tag
 from documents.permissions import set_permissions_for_object
 from documents.plugins.helpers import DocumentsStatusManager
+from documents.statistics import update_owner
 from documents.tasks import bulk_update_documents
 from documents.tasks import consume_file
 from documents.tasks import update_document_content_maybe_archive_file
@@ -54,12 +56,13 @@ def _get_file_path_for_operation(logical_path: str) -> Path:
     from documents.storage.factory import get_storage_backend
 
     backend = get_storage_backend()
-    file_obj = backend.retrieve(logical_path)
 
     # Create temporary file
-    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    tmp_file.write(file_obj.read())
-    tmp_file.close()
+    with (
+        backend.open(logical_path) as file_obj,
+        tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file,
+    ):
+        shutil.copyfileobj(file_obj, tmp_file, backend.get_chunk_size())
 
     return Path(tmp_file.name)
 
@@ -355,9 +358,9 @@ def set_permissions(
 
     if merge:
         # If merging, only set owner for documents that don't have an owner
-        qs.filter(owner__isnull=True).update(owner=owner)
+        update_owner(qs.filter(owner__isnull=True), owner)
     else:
-        qs.update(owner=owner)
+        update_owner(qs, owner)
 
     for doc in qs:
         set_permissions_for_object(permissions=set_permissions, object=doc, merge=merge)
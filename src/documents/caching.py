@@ -14,6 +14,7 @@ from django.core.cache import cache
 from django.core.cache import caches
 
 from documents.models import Document
+from paperless.tenants.utils import get_current_tenant
 
 if TYPE_CHECKING:
     from django.core.cache.backends.base import BaseCache
@@ -121,6 +122,14 @@ class StoredLRUCache(LRUCache):
         )
 
 
+def get_classifier_cache_key(key: str) -> str:
+    """
+    Returns the given classifier key for the classifier of the current tenant
+    """
+    tenant = get_current_tenant()
+    return key if tenant is None else f"{key}_{tenant.identifier}"
+
+
 def get_suggestion_cache_key(document_id: int) -> str:
     """
     Returns the basic key for a document's suggestions
@@ -137,7 +146,9 @@ def get_suggestion_cache(document_id: int) -> SuggestionCacheData | None:
     from documents.classifier import DocumentClassifier
 
     doc_key = get_suggestion_cache_key(document_id)
-    cache_hits = cache.get_many([CLASSIFIER_VERSION_KEY, CLASSIFIER_HASH_KEY, doc_key])
+    version_key = get_classifier_cache_key(CLASSIFIER_VERSION_KEY)
+    hash_key = get_classifier_cache_key(CLASSIFIER_HASH_KEY)
+    cache_hits = cache.get_many([version_key, hash_key, doc_key])
     # The document suggestions are in the cache
     if doc_key in cache_hits:
         doc_suggestions: SuggestionCacheData = cache_hits[doc_key]
@@ -145,12 +156,12 @@ def get_suggestion_cache(document_id: int) -> SuggestionCacheData | None:
         # The classifier hash is the same
         # Then the suggestions can be used
         if (
-            CLASSIFIER_VERSION_KEY in cache_hits
-            and cache_hits[CLASSIFIER_VERSION_KEY] == DocumentClassifier.FORMAT_VERSION
-            and cache_hits[CLASSIFIER_VERSION_KEY] == doc_suggestions.classifier_version
+            version_key in cache_hits
+            and cache_hits[version_key] == DocumentClassifier.FORMAT_VERSION
+            and cache_hits[version_key] == doc_suggestions.classifier_version
         ) and (
-            CLASSIFIER_HASH_KEY in cache_hits
-            and cache_hits[CLASSIFIER_HASH_KEY] == doc_suggestions.classifier_hash
+            hash_key in cache_hits
+            and cache_hits[hash_key] == doc_suggestions.classifier_hash
         ):
             return doc_suggestions
         else:  # pragma: no cover
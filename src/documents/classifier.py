@@ -3,7 +3,11 @@ from __future__ import annotations
 import logging
 import pickle
 import re
+import threading
+import time
 import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
 from hashlib import sha256
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -24,8 +28,10 @@ from documents.caching import CLASSIFIER_HASH_KEY
 from documents.caching import CLASSIFIER_MODIFIED_KEY
 from documents.caching import CLASSIFIER_VERSION_KEY
 from documents.caching import StoredLRUCache
+from documents.caching import get_classifier_cache_key
 from documents.models import Document
 from documents.models import MatchingModel
+from paperless.tenants.utils import get_current_tenant
 
 logger = logging.getLogger("paperless.classifier")
 
@@ -50,21 +56,193 @@ class ClassifierModelCorruptError(Exception):
     pass
 
 
-def load_classifier(*, raise_exception: bool = False) -> DocumentClassifier | None:
-    if not settings.MODEL_FILE.is_file():
+@dataclass(frozen=True)
+class ClassifierCacheStats:
+    hits: int
+    misses: int
+    loads: int
+    evictions: int
+    # Seconds spent unpickling models, in total and for the most recent load
+    load_time: float
+    last_load_time: float | None
+
+
+def get_model_file(tenant=None) -> Path:
+    """
+    Returns the classification model file of the given tenant, by default the
+    current one.  Without a tenant, the global model file is used.
+    """
+    model_file = Path(settings.MODEL_FILE)
+    tenant = tenant or get_current_tenant()
+    if tenant is None:
+        return model_file
+    return model_file.parent / "classifiers" / tenant.identifier / model_file.name
+
+
+class LoadedClassifierCache:
+    """
+    Process wide LRU cache of loaded classifier models, one per model file.
+
+    A model is only unpickled again when its file is replaced or the
+    classifier format version changes. DocumentClassifier.save() replaces the
+    file with a rename, so a newly trained model always gets a new inode and
+    is picked up on the next lookup, while callers still holding the previous
+    classifier keep using it undisturbed.  At most CLASSIFIER_CACHE_SIZE
+    models are kept, the least recently used is dropped first.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Serializes loading per model file, so concurrent misses unpickle the
+        # model only once
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._entries: OrderedDict[str, tuple[tuple, DocumentClassifier]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_time = 0.0
+        self.last_load_time: float | None = None
+
+    @staticmethod
+    def get_key(model_file: Path) -> tuple:
+        stat = model_file.stat()
+        return (
+            stat.st_ino,
+            stat.st_mtime_ns,
+            stat.st_size,
+            DocumentClassifier.FORMAT_VERSION,
+        )
+
+    def _lookup(self, name: str, key: tuple) -> DocumentClassifier | None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return entry[1]
+            return None
+
+    def _store(self, name: str, key: tuple, classifier: DocumentClassifier) -> None:
+        with self._lock:
+            self._entries[name] = (key, classifier)
+            self._entries.move_to_end(name)
+            while len(self._entries) > max(settings.CLASSIFIER_CACHE_SIZE, 1):
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.debug(f"Evicted classifier model {evicted} from cache")
+
+    def get_or_load(self, model_file: Path) -> DocumentClassifier:
+        name = str(model_file)
+        key = self.get_key(model_file)
+        classifier = self._lookup(name, key)
+        if classifier is not None:
+            return classifier
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            # Another thread may have loaded the model while this one waited
+            classifier = self._lookup(name, key)
+            if classifier is not None:
+                return classifier
+            with self._lock:
+                self.misses += 1
+            classifier = self.load(model_file)
+            self._store(name, key, classifier)
+        return classifier
+
+    def load(self, model_file: Path) -> DocumentClassifier:
+        """
+        Loads the model from disk, without consulting or updating the cache
+        """
+        classifier = DocumentClassifier(model_file)
+        start = time.perf_counter()
+        classifier.load()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.loads += 1
+            self.load_time += elapsed
+            self.last_load_time = elapsed
+        logger.debug(
+            f"Loaded document classification model {model_file} in {elapsed:.3f}s",
+        )
+        return classifier
+
+    def clear(self, model_file: Path | None = None) -> None:
+        with self._lock:
+            if model_file is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(model_file), None)
+
+    def stats(self) -> ClassifierCacheStats:
+        with self._lock:
+            return ClassifierCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                loads=self.loads,
+                evictions=self.evictions,
+                load_time=self.load_time,
+                last_load_time=self.last_load_time,
+            )
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.loads = 0
+            self.evictions = 0
+            self.load_time = 0.0
+            self.last_load_time = None
+
+
+_classifier_cache = LoadedClassifierCache()
+
+
+def get_classifier_cache_stats() -> ClassifierCacheStats:
+    return _classifier_cache.stats()
+
+
+def clear_classifier_cache() -> None:
+    _classifier_cache.clear()
+    _classifier_cache.reset_stats()
+
+
+def load_classifier(
+    *,
+    raise_exception: bool = False,
+    use_cache: bool = True,
+) -> DocumentClassifier | None:
+    """
+    Returns the trained classifier of the current tenant, or None if there is
+    no usable model.
+
+    By default the classifier is shared by all callers in this process and must
+    not be modified. Pass use_cache=False to get a private copy, for example to
+    train it further.
+    """
+    model_file = get_model_file()
+    if not model_file.is_file():
+        _classifier_cache.clear(model_file)
         logger.debug(
             "Document classification model does not exist (yet), not "
             "performing automatic matching.",
         )
         return None
 
-    classifier = DocumentClassifier()
     try:
-        classifier.load()
+        if use_cache:
+            classifier = _classifier_cache.get_or_load(model_file)
+        else:
+            classifier = _classifier_cache.load(model_file)
 
     except IncompatibleClassifierVersionError as e:
         logger.info(f"Classifier version incompatible: {e.message}, will re-train")
-        Path(settings.MODEL_FILE).unlink()
+        _classifier_cache.clear(model_file)
+        model_file.unlink()
         classifier = None
         if raise_exception:
             raise e
@@ -74,7 +252,7 @@ def load_classifier(*, raise_exception: bool = False) -> DocumentClassifier | No
             "Unrecoverable error while loading document "
             "classification model, deleting model file.",
         )
-        Path(settings.MODEL_FILE).unlink
+        model_file.unlink
         classifier = None
         if raise_exception:
             raise e
@@ -98,7 +276,9 @@ class DocumentClassifier:
     # v9 - Changed from hashing to time/ids for re-train check
     FORMAT_VERSION = 9
 
-    def __init__(self) -> None:
+    def __init__(self, model_file: Path | None = None) -> None:
+        # the tenant's model file, unless given explicitly
+        self.model_file: Path = model_file or get_model_file()
         # last time a document changed and therefore training might be required
         self.last_doc_change_time: datetime | None = None
         # Hash of primary keys of AUTO matching values last used in training
@@ -132,7 +312,7 @@ class DocumentClassifier:
 
         # Catch warnings for processing
         with warnings.catch_warnings(record=True) as w:
-            with Path(settings.MODEL_FILE).open("rb") as f:
+            with self.model_file.open("rb") as f:
                 schema_version = pickle.load(f)
 
                 if schema_version != self.FORMAT_VERSION:
@@ -170,9 +350,28 @@ class DocumentClassifier:
                 ):
                     raise IncompatibleClassifierVersionError("sklearn version update")
 
+    def load_training_state(self) -> None:
+        """
+        Loads only the state used to decide if training is required.  It is
+        stored ahead of the models, so this is cheap even for large models.
+        """
+        with self.model_file.open("rb") as f:
+            schema_version = pickle.load(f)
+
+            if schema_version != self.FORMAT_VERSION:
+                raise IncompatibleClassifierVersionError(
+                    "Cannot load classifier, incompatible versions.",
+                )
+            try:
+                self.last_doc_change_time = pickle.load(f)
+                self.last_auto_type_hash = pickle.load(f)
+            except Exception as err:
+                raise ClassifierModelCorruptError from err
+
     def save(self) -> None:
-        target_file: Path = settings.MODEL_FILE
+        target_file: Path = self.model_file
         target_file_temp: Path = target_file.with_suffix(".pickle.part")
+        target_file.parent.mkdir(parents=True, exist_ok=True)
 
         with target_file_temp.open("wb") as f:
             pickle.dump(self.FORMAT_VERSION, f)
@@ -191,9 +390,10 @@ class DocumentClassifier:
 
         target_file_temp.rename(target_file)
 
-    def train(self) -> bool:
+    @staticmethod
+    def _get_training_queryset():
         # Get non-inbox documents
-        docs_queryset = (
+        return (
             Document.objects.exclude(
                 tags__is_inbox_tag=True,
             )
@@ -202,6 +402,65 @@ class DocumentClassifier:
             .order_by("pk")
         )
 
+    @staticmethod
+    def _get_auto_labels(doc: Document) -> tuple[int, int, list[int], int]:
+        """
+        Returns the document type, correspondent, tags and storage path of a
+        document, as far as they are automatically matched.  -1 stands for none.
+        """
+        dt = doc.document_type
+        cor = doc.correspondent
+        sp = doc.storage_path
+        return (
+            dt.pk if dt and dt.matching_algorithm == MatchingModel.MATCH_AUTO else -1,
+            cor.pk
+            if cor and cor.matching_algorithm == MatchingModel.MATCH_AUTO
+            else -1,
+            # Filtered here, so the prefetched tags are used
+            sorted(
+                tag.pk
+                for tag in doc.tags.all()
+                if tag.matching_algorithm == MatchingModel.MATCH_AUTO
+            ),
+            sp.pk if sp and sp.matching_algorithm == MatchingModel.MATCH_AUTO else -1,
+        )
+
+    @staticmethod
+    def _update_auto_type_hash(
+        hasher,
+        document_type: int,
+        correspondent: int,
+        tags: list[int],
+        storage_path: int,
+    ) -> None:
+        hasher.update(document_type.to_bytes(4, "little", signed=True))
+        hasher.update(correspondent.to_bytes(4, "little", signed=True))
+        for tag in tags:
+            hasher.update(tag.to_bytes(4, "little", signed=True))
+        hasher.update(storage_path.to_bytes(4, "little", signed=True))
+
+    def is_training_required(self) -> bool:
+        """
+        Checks if train() would update this classifier, without vectorizing
+        any content.  Only the training state needs to be loaded for this.
+        """
+        docs_queryset = self._get_training_queryset()
+        if not docs_queryset.exists():
+            return False
+        latest_doc_change = docs_queryset.latest("modified").modified
+        if (
+            self.last_doc_change_time is None
+            or self.last_doc_change_time < latest_doc_change
+        ):
+            return True
+        hasher = sha256()
+        for doc in docs_queryset:
+            self._update_auto_type_hash(hasher, *self._get_auto_labels(doc))
+        return self.last_auto_type_hash != hasher.digest()
+
+    def train(self) -> bool:
+        docs_queryset = self._get_training_queryset()
+
         # No documents exit to train against
         if docs_queryset.count() == 0:
             raise ValueError("No training data available.")
@@ -215,35 +474,20 @@ class DocumentClassifier:
         logger.debug("Gathering data from database...")
         hasher = sha256()
         for doc in docs_queryset:
-            y = -1
-            dt = doc.document_type
-            if dt and dt.matching_algorithm == MatchingModel.MATCH_AUTO:
-                y = dt.pk
-            hasher.update(y.to_bytes(4, "little", signed=True))
-            labels_document_type.append(y)
-
-            y = -1
-            cor = doc.correspondent
-            if cor and cor.matching_algorithm == MatchingModel.MATCH_AUTO:
-                y = cor.pk
-            hasher.update(y.to_bytes(4, "little", signed=True))
-            labels_correspondent.append(y)
-
-            tags: list[int] = list(
-                doc.tags.filter(matching_algorithm=MatchingModel.MATCH_AUTO)
-                .order_by("pk")
-                .values_list("pk", flat=True),
+            document_type, correspondent, tags, storage_path = self._get_auto_labels(
+                doc,
+            )
+            self._update_auto_type_hash(
+                hasher,
+                document_type,
+                correspondent,
+                tags,
+                storage_path,
             )
-            for tag in tags:
-                hasher.update(tag.to_bytes(4, "little", signed=True))
+            labels_document_type.append(document_type)
+            labels_correspondent.append(correspondent)
             labels_tags.append(tags)
-
-            y = -1
-            sp = doc.storage_path
-            if sp and sp.matching_algorithm == MatchingModel.MATCH_AUTO:
-                y = sp.pk
-            hasher.update(y.to_bytes(4, "little", signed=True))
-            labels_storage_path.append(y)
+            labels_storage_path.append(storage_path)
 
         labels_tags_unique = {tag for tags in labels_tags for tag in tags}
 
@@ -260,13 +504,7 @@ class DocumentClassifier:
             logger.info("No updates since last training")
             # Set the classifier information into the cache
             # Caching for 50 minutes, so slightly less than the normal retrain time
-            cache.set(
-                CLASSIFIER_MODIFIED_KEY,
-                self.last_doc_change_time,
-                CACHE_50_MINUTES,
-            )
-            cache.set(CLASSIFIER_HASH_KEY, hasher.hexdigest(), CACHE_50_MINUTES)
-            cache.set(CLASSIFIER_VERSION_KEY, self.FORMAT_VERSION, CACHE_50_MINUTES)
+            self._set_cache_state(hasher.hexdigest())
             return False
 
         # subtract 1 since -1 (null) is also part of the classes.
@@ -378,12 +616,22 @@ class DocumentClassifier:
 
         # Set the classifier information into the cache
         # Caching for 50 minutes, so slightly less than the normal retrain time
-        cache.set(CLASSIFIER_MODIFIED_KEY, self.last_doc_change_time, CACHE_50_MINUTES)
-        cache.set(CLASSIFIER_HASH_KEY, hasher.hexdigest(), CACHE_50_MINUTES)
-        cache.set(CLASSIFIER_VERSION_KEY, self.FORMAT_VERSION, CACHE_50_MINUTES)
+        self._set_cache_state(hasher.hexdigest())
 
         return True
 
+    def _set_cache_state(self, auto_type_hash: str) -> None:
+        cache.set_many(
+            {
+                get_classifier_cache_key(
+                    CLASSIFIER_MODIFIED_KEY,
+                ): self.last_doc_change_time,
+                get_classifier_cache_key(CLASSIFIER_HASH_KEY): auto_type_hash,
+                get_classifier_cache_key(CLASSIFIER_VERSION_KEY): self.FORMAT_VERSION,
+            },
+            CACHE_50_MINUTES,
+        )
+
     def _init_advanced_text_processing(self):
         if self._stop_words is None or self._stemmer is None:
             import nltk
@@ -1,6 +1,4 @@
 from datetime import datetime
-from datetime import timezone
-from pathlib import Path
 
 from django.conf import settings
 from django.core.cache import cache
@@ -10,8 +8,10 @@ from documents.caching import CACHE_50_MINUTES
 from documents.caching import CLASSIFIER_HASH_KEY
 from documents.caching import CLASSIFIER_MODIFIED_KEY
 from documents.caching import CLASSIFIER_VERSION_KEY
+from documents.caching import get_classifier_cache_key
 from documents.caching import get_thumbnail_modified_key
 from documents.classifier import DocumentClassifier
+from documents.classifier import get_model_file
 from documents.models import Document
 from documents.storage.factory import get_storage_backend
 
@@ -24,22 +24,24 @@ def suggestions_etag(request, pk: int) -> str | None:
 
     """
     # If no model file, no etag at all
-    if not settings.MODEL_FILE.exists():
+    if not get_model_file().exists():
         return None
+    version_key = get_classifier_cache_key(CLASSIFIER_VERSION_KEY)
+    hash_key = get_classifier_cache_key(CLASSIFIER_HASH_KEY)
     # Check cache information
     cache_hits = cache.get_many(
-        [CLASSIFIER_VERSION_KEY, CLASSIFIER_HASH_KEY],
+        [version_key, hash_key],
     )
     # If the version differs somehow, no etag
     if (
-        CLASSIFIER_VERSION_KEY in cache_hits
-        and cache_hits[CLASSIFIER_VERSION_KEY] != DocumentClassifier.FORMAT_VERSION
+        version_key in cache_hits
+        and cache_hits[version_key] != DocumentClassifier.FORMAT_VERSION
     ):
         return None
-    elif CLASSIFIER_HASH_KEY in cache_hits:
+    elif hash_key in cache_hits:
         # Refresh the cache and return the hash digest and the dates setting
-        cache.touch(CLASSIFIER_HASH_KEY, CACHE_5_MINUTES)
-        return f"{cache_hits[CLASSIFIER_HASH_KEY]}:{settings.NUMBER_OF_SUGGESTED_DATES}"
+        cache.touch(hash_key, CACHE_5_MINUTES)
+        return f"{cache_hits[hash_key]}:{settings.NUMBER_OF_SUGGESTED_DATES}"
     return None
 
 
@@ -50,21 +52,23 @@ def suggestions_last_modified(request, pk: int) -> datetime | None:
     unlikely that changes too often
     """
     # No file, no last modified
-    if not settings.MODEL_FILE.exists():
+    if not get_model_file().exists():
         return None
+    version_key = get_classifier_cache_key(CLASSIFIER_VERSION_KEY)
+    modified_key = get_classifier_cache_key(CLASSIFIER_MODIFIED_KEY)
     cache_hits = cache.get_many(
-        [CLASSIFIER_VERSION_KEY, CLASSIFIER_MODIFIED_KEY],
+        [version_key, modified_key],
     )
     # If the version differs somehow, no last modified
     if (
-        CLASSIFIER_VERSION_KEY in cache_hits
-        and cache_hits[CLASSIFIER_VERSION_KEY] != DocumentClassifier.FORMAT_VERSION
+        version_key in cache_hits
+        and cache_hits[version_key] != DocumentClassifier.FORMAT_VERSION
     ):
         return None
-    elif CLASSIFIER_MODIFIED_KEY in cache_hits:
+    elif modified_key in cache_hits:
         # Refresh the cache and return the last modified
-        cache.touch(CLASSIFIER_MODIFIED_KEY, CACHE_5_MINUTES)
-        return cache_hits[CLASSIFIER_MODIFIED_KEY]
+        cache.touch(modified_key, CACHE_5_MINUTES)
+        return cache_hits[modified_key]
     return None
 
 
@@ -126,16 +130,11 @@ def preview_last_modified(request, pk: int) -> datetime | None:
 
 def thumbnail_last_modified(request, pk: int) -> datetime | None:
     """
-    Returns the filesystem last modified either from cache or from filesystem.
-    Cache should be (slightly?) faster than filesystem
+    Returns the storage last modified either from cache or from the storage backend.
+    Cache should be (slightly?) faster than asking the storage backend
     """
     try:
         doc = Document.objects.only("storage_type", "modified").get(pk=pk)
-        backend = get_storage_backend()
-        thumbnail_path = doc.thumbnail_path
-
-        if not backend.exists(thumbnail_path):
-            return None
         doc_key = get_thumbnail_modified_key(pk)
 
         cache_hit = cache.get(doc_key)
@@ -143,24 +142,14 @@ def thumbnail_last_modified(request, pk: int) -> datetime | None:
             cache.touch(doc_key, CACHE_50_MINUTES)
             return cache_hit
 
-        # No cache, get the timestamp and cache the datetime
-        # Use the storage backend's get_path to resolve the actual file path
+        # No cache, get the timestamp from the storage metadata and cache the datetime
         try:
-            resolved_path = backend.get_path(thumbnail_path)
-            resolved_path_obj = Path(resolved_path)
-            # Only stat if it's an absolute path (filesystem backend)
-            if resolved_path_obj.is_absolute():
-                last_modified = datetime.fromtimestamp(
-                    resolved_path_obj.stat().st_mtime,
-                    tz=timezone.utc,
-                )
-            else:
-                # For cloud backends, use the document's modified time
-                last_modified = doc.modified
-            cache.set(doc_key, last_modified, CACHE_50_MINUTES)
-            return last_modified
-        except (FileNotFoundError, OSError):
+            info = get_storage_backend().stat(doc.thumbnail_path)
+        except OSError:
             # File doesn't exist or can't be accessed
             return None
+        last_modified = info.modified or doc.modified
+        cache.set(doc_key, last_modified, CACHE_50_MINUTES)
+        return last_modified
     except Document.DoesNotExist:  # pragma: no cover
         return None
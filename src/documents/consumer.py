@@ -1,5 +1,4 @@
 import datetime
-import hashlib
 import os
 import tempfile
 from enum import Enum
@@ -12,14 +11,18 @@ from django.contrib.auth.models import User
 from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
-from filelock import FileLock
 from rest_framework.reverse import reverse
 
 from documents.classifier import load_classifier
 from documents.data_models import ConsumableDocument
 from documents.data_models import DocumentMetadataOverrides
+from documents.data_models import FileDigest
 from documents.file_handling import create_source_path_directory
 from documents.file_handling import generate_unique_filename
+from documents.file_handling import get_document_lock_keys
+from documents.hashing import hash_file
+from documents.hashing import store_and_hash
+from documents.locks import media_lock
 from documents.loggers import LoggingMixin
 from documents.models import Correspondent
 from documents.models import CustomField
@@ -44,6 +47,8 @@ from documents.signals import document_consumption_finished
 from documents.signals import document_consumption_started
 from documents.signals.handlers import run_workflows
 from documents.templating.workflows import parse_w_workflow_placeholders
+from documents.thumbnails import THUMBNAIL_SIZES
+from documents.thumbnails import get_thumbnail_variant_path
 from documents.utils import copy_basic_file_stats
 from documents.utils import copy_file_with_basic_stats
 from documents.utils import run_subprocess
@@ -492,7 +497,7 @@ class ConsumerPlugin(
 
                 # After everything is in the database, copy the files into
                 # place. If this fails, we'll also rollback the transaction.
-                with FileLock(settings.MEDIA_LOCK):
+                with media_lock(*get_document_lock_keys(document)):
                     from documents.storage.factory import get_storage_backend
 
                     backend = get_storage_backend()
@@ -509,23 +514,26 @@ class ConsumerPlugin(
                     with Path(source_file).open("rb") as f:
                         backend.store(document.source_path, f)
 
-                    # Store thumbnail
+                    # Store thumbnail, and the other sizes rendered with it
                     with Path(thumbnail).open("rb") as f:
                         backend.store(document.thumbnail_path, f)
+                    for size in THUMBNAIL_SIZES:
+                        variant = get_thumbnail_variant_path(Path(thumbnail), size)
+                        if variant.is_file():
+                            with variant.open("rb") as f:
+                                backend.store(document.get_thumbnail_path(size), f)
 
                     if archive_path and Path(archive_path).is_file():
                         document.archive_filename = generate_unique_filename(
                             document,
                             archive_filename=True,
                         )
-                        # Store archive
-                        with Path(archive_path).open("rb") as f:
-                            backend.store(document.archive_path, f)
-
-                        with Path(archive_path).open("rb") as f:
-                            document.archive_checksum = hashlib.md5(
-                                f.read(),
-                            ).hexdigest()
+                        # Store archive, hashing it as it is stored
+                        document.archive_checksum = store_and_hash(
+                            backend,
+                            document.archive_path,
+                            archive_path,
+                        ).md5
 
                 # Don't save with the lock active. Saving will cause the file
                 # renaming logic to acquire the lock as well.
@@ -611,6 +619,20 @@ class ConsumerPlugin(
             self.filename,
         )
 
+    def _get_original_digest(self) -> FileDigest:
+        """
+        Returns the checksums of the file stored as the original, which are
+        known since the file was checked for duplicates, unless a pre-consume
+        script may have changed the working copy
+        """
+        if self.unmodified_original is not None:
+            file_for_checksum = self.unmodified_original
+        elif settings.PRE_CONSUME_SCRIPT:
+            return hash_file(self.working_copy)
+        else:
+            file_for_checksum = self.working_copy
+        return self.input_doc.digest or hash_file(file_for_checksum)
+
     def _store(
         self,
         text: str,
@@ -652,17 +674,15 @@ class ConsumerPlugin(
                     f"Error occurred parsing title override '{self.metadata.title}', falling back to original. Exception: {e}",
                 )
 
-        file_for_checksum = (
-            self.unmodified_original
-            if self.unmodified_original is not None
-            else self.working_copy
-        )
+        digest = self._get_original_digest()
+        if digest.sha256 is not None:
+            self.log.debug(f"SHA-256 checksum: {digest.sha256}")
 
         document = Document.objects.create(
             title=title[:127],
             content=text,
             mime_type=mime_type,
-            checksum=hashlib.md5(file_for_checksum.read_bytes()).hexdigest(),
+            checksum=digest.md5,
             created=create_date,
             modified=create_date,
             storage_type=storage_type,
@@ -777,10 +797,12 @@ class ConsumerPreflightPlugin(
 
     def pre_check_duplicate(self):
         """
-        Using the MD5 of the file, check this exact file doesn't already exist
+        Using the MD5 of the file, check this exact file doesn't already exist.
+        The file is hashed here unless it was while it was received.
         """
-        with Path(self.input_doc.original_file).open("rb") as f:
-            checksum = hashlib.md5(f.read()).hexdigest()
+        if self.input_doc.digest is None:
+            self.input_doc.digest = hash_file(self.input_doc.original_file)
+        checksum = self.input_doc.digest.md5
         existing_doc = Document.global_objects.filter(
             Q(checksum=checksum) | Q(archive_checksum=checksum),
         )
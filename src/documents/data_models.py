@@ -8,6 +8,17 @@ from guardian.shortcuts import get_groups_with_perms
 from guardian.shortcuts import get_users_with_perms
 
 
+@dataclasses.dataclass(frozen=True)
+class FileDigest:
+    """
+    The checksums of a file, see documents.hashing.  The SHA-256 checksum is
+    only computed if PAPERLESS_CONSUMER_ENABLE_SHA256 is enabled.
+    """
+
+    md5: str
+    sha256: str | None = None
+
+
 @dataclasses.dataclass
 class DocumentMetadataOverrides:
     """
@@ -158,6 +169,9 @@ class ConsumableDocument:
     original_file: Path
     original_path: Path | None = None
     mailrule_id: int | None = None
+    # The checksums of the original file, if they were computed while it was
+    # received, otherwise when it is checked for duplicates
+    digest: FileDigest | None = None
     mime_type: str = dataclasses.field(init=False, default=None)
 
     def __post_init__(self):
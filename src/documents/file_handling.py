@@ -1,9 +1,14 @@
 import os
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 from django.conf import settings
 
+from documents.locks import get_lock_key
+from documents.locks import media_lock
 from documents.models import Document
+from documents.storage.factory import get_storage_backend
 from documents.templating.filepath import validate_filepath_template_and_render
 from documents.templating.utils import convert_format_str_to_template_format
 
@@ -41,9 +46,73 @@ def delete_empty_directories(directory: Path, root: Path) -> None:
         directory = directory.parent
 
 
+def _get_simple_archive_filename(doc: Document) -> Path:
+    # Generate the full path using the same logic as generate_filename
+    base_generated = generate_filename(doc, archive_filename=True)
+
+    # Try to create a simple PDF version based on the original filename
+    # but preserve any directory structure from the template
+    if str(base_generated.parent) != ".":
+        # Has directory structure, preserve it
+        return base_generated.parent / (Path(doc.filename).stem + ".pdf")
+    else:
+        # No directory structure
+        return Path(Path(doc.filename).stem + ".pdf")
+
+
+def get_filename_lock_keys(doc: Document, *, archive_filename=False) -> set[str]:
+    """
+    Returns the media lock keys of the current file of the document and of
+    every filename generate_unique_filename may pick for it
+    """
+    if archive_filename:
+        prefix = "documents/archive"
+        current_filename = doc.archive_filename
+        new_filenames = [generate_filename(doc, archive_filename=True)]
+        if doc.filename:
+            new_filenames.append(_get_simple_archive_filename(doc))
+    else:
+        prefix = "documents/originals"
+        current_filename = doc.filename
+        new_filenames = [generate_filename(doc)]
+
+    filenames = (
+        [*new_filenames, current_filename] if current_filename else new_filenames
+    )
+    return {
+        get_lock_key(f"{prefix}/{filename}", doc.tenant_id) for filename in filenames
+    }
+
+
+def get_document_lock_keys(doc: Document) -> set[str]:
+    return get_filename_lock_keys(doc) | get_filename_lock_keys(
+        doc,
+        archive_filename=True,
+    )
+
+
+@contextmanager
+def lock_document_files(doc: Document) -> Iterator[None]:
+    """
+    Locks the current and new files of the document.  The document is
+    refreshed once locked, as it may have been changed while waiting, and
+    locked again if that changed its files.
+    """
+    keys = get_document_lock_keys(doc)
+    while True:
+        with media_lock(*keys):
+            doc.refresh_from_db()
+            new_keys = get_document_lock_keys(doc)
+            if new_keys <= keys:
+                yield
+                return
+        keys = new_keys
+
+
 def generate_unique_filename(doc, *, archive_filename=False) -> Path:
     """
-    Generates a unique filename for doc in settings.ORIGINALS_DIR.
+    Generates a unique filename for doc in the originals directory of the
+    storage backend.
 
     The returned filename is guaranteed to be either the current filename
     of the document if unchanged, or a new filename that does not correspondent
@@ -53,32 +122,25 @@ def generate_unique_filename(doc, *, archive_filename=False) -> Path:
     If archive_filename is True, return a unique archive filename instead.
 
     """
+    backend = get_storage_backend()
     if archive_filename:
         old_filename: Path | None = (
             Path(doc.archive_filename) if doc.archive_filename else None
         )
-        root = settings.ARCHIVE_DIR
+        prefix = "documents/archive"
     else:
         old_filename = Path(doc.filename) if doc.filename else None
-        root = settings.ORIGINALS_DIR
+        prefix = "documents/originals"
 
     # If generating archive filenames, try to make a name that is similar to
     # the original filename first.
 
     if archive_filename and doc.filename:
-        # Generate the full path using the same logic as generate_filename
-        base_generated = generate_filename(doc, archive_filename=archive_filename)
-
-        # Try to create a simple PDF version based on the original filename
-        # but preserve any directory structure from the template
-        if str(base_generated.parent) != ".":
-            # Has directory structure, preserve it
-            simple_pdf_name = base_generated.parent / (Path(doc.filename).stem + ".pdf")
-        else:
-            # No directory structure
-            simple_pdf_name = Path(Path(doc.filename).stem + ".pdf")
+        simple_pdf_name = _get_simple_archive_filename(doc)
 
-        if simple_pdf_name == old_filename or not (root / simple_pdf_name).exists():
+        if simple_pdf_name == old_filename or not backend.exists(
+            f"{prefix}/{simple_pdf_name}",
+        ):
             return simple_pdf_name
 
     counter = 0
@@ -93,7 +155,7 @@ def generate_unique_filename(doc, *, archive_filename=False) -> Path:
             # still the same as before.
             return new_filename
 
-        if (root / new_filename).exists():
+        if backend.exists(f"{prefix}/{new_filename}"):
             counter += 1
         else:
             return new_filename
@@ -0,0 +1,123 @@
+"""
+Hashing of files in chunks as they are read anyway, e.g. while they are
+stored, so a file is neither read again just to hash it nor held in memory as
+a whole.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import BinaryIO
+
+from django.conf import settings
+
+from documents.data_models import FileDigest
+
+
+class _Hasher:
+    def __init__(self, *, sha256: bool | None = None) -> None:
+        if sha256 is None:
+            sha256 = settings.CONSUMER_ENABLE_SHA256
+        self._md5 = hashlib.md5()
+        self._sha256 = hashlib.sha256() if sha256 else None
+
+    def update(self, data: bytes) -> None:
+        self._md5.update(data)
+        if self._sha256 is not None:
+            self._sha256.update(data)
+
+    def digest(self) -> FileDigest:
+        return FileDigest(
+            md5=self._md5.hexdigest(),
+            sha256=self._sha256.hexdigest() if self._sha256 is not None else None,
+        )
+
+
+def hash_bytes(data: bytes, *, sha256: bool | None = None) -> FileDigest:
+    """
+    Hashes content which is in memory already, SHA-256 only if enabled by
+    PAPERLESS_CONSUMER_ENABLE_SHA256 unless given
+    """
+    hasher = _Hasher(sha256=sha256)
+    hasher.update(data)
+    return hasher.digest()
+
+
+def hash_file(path: Path | str, *, sha256: bool | None = None) -> FileDigest:
+    """
+    Hashes a file in chunks of PAPERLESS_STORAGE_CHUNK_SIZE, SHA-256 only if
+    enabled by PAPERLESS_CONSUMER_ENABLE_SHA256 unless given
+    """
+    hasher = _Hasher(sha256=sha256)
+    with Path(path).open("rb") as f:
+        while chunk := f.read(settings.PAPERLESS_STORAGE_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+class HashingReader:
+    """
+    Wraps a binary file and hashes what is read from it.  The digest is only
+    known once the file was read from the start to the end in order, a reader
+    which seeks around or bypasses read() leaves it unknown.
+    """
+
+    def __init__(self, file_obj: BinaryIO, *, sha256: bool | None = None) -> None:
+        self._file = file_obj
+        self._sha256 = sha256
+        self._restart()
+
+    def _restart(self) -> None:
+        self._hasher = _Hasher(sha256=self._sha256)
+        self._position = 0
+        self._in_order = True
+        self._at_end = False
+
+    def read(self, size: int | None = -1) -> bytes:
+        data = self._file.read(size)
+        if self._in_order:
+            self._hasher.update(data)
+        self._position += len(data)
+        if not data or size is None or size < 0:
+            self._at_end = True
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        position = self._file.seek(offset, whence)
+        if position == 0:
+            # Read again from the start, e.g. by a retried upload
+            self._restart()
+        elif position != self._position:
+            self._in_order = False
+            self._position = position
+        return position
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def __getattr__(self, name: str):
+        return getattr(self._file, name)
+
+    @property
+    def digest(self) -> FileDigest | None:
+        if not (self._in_order and self._at_end):
+            return None
+        return self._hasher.digest()
+
+
+def store_and_hash(
+    backend,
+    path: str,
+    source: Path | str,
+    *,
+    sha256: bool | None = None,
+) -> FileDigest:
+    """
+    Stores a file with the storage backend and returns its digest, hashed
+    while the backend reads it unless the backend did not read it in order
+    """
+    with Path(source).open("rb") as f:
+        reader = HashingReader(f, sha256=sha256)
+        backend.store(path, reader)
+    return reader.digest or hash_file(source, sha256=sha256)
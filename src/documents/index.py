@@ -3,21 +3,28 @@ from __future__ import annotations
 import logging
 import math
 import re
+import threading
+from array import array
 from collections import Counter
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime
 from datetime import time
 from datetime import timedelta
 from datetime import timezone
-from shutil import rmtree
 from typing import TYPE_CHECKING
+from typing import Final
 from typing import Literal
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Prefetch
 from django.utils import timezone as django_timezone
 from django.utils.timezone import get_current_timezone
 from django.utils.timezone import now
+from guardian.models import GroupObjectPermission
+from guardian.models import UserObjectPermission
 from guardian.shortcuts import get_users_with_perms
 from whoosh import classify
 from whoosh import highlight
@@ -46,17 +53,26 @@ from whoosh.writing import AsyncWriter
 
 from documents.models import CustomFieldInstance
 from documents.models import Document
-from documents.models import Note
 from documents.models import User
+from paperless.tenants.utils import get_current_tenant
+from paperless.tenants.utils import tenant_context
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from pathlib import Path
+
     from django.db.models import QuerySet
     from whoosh.reading import IndexReader
     from whoosh.searching import ResultsPage
     from whoosh.searching import Searcher
 
+    from paperless.tenants.models import Tenant
+
 logger = logging.getLogger("paperless.index")
 
+INDEX_CHUNK_SIZE: Final[int] = 1000
+
 
 def get_schema() -> Schema:
     return Schema(
@@ -96,24 +112,44 @@ def get_schema() -> Schema:
     )
 
 
-def open_index(*, recreate=False) -> FileIndex:
+def get_index_dir(tenant: Tenant | None = None) -> Path:
+    """
+    Returns the index directory of the given tenant, by default the current
+    one.  Without a tenant, the top level index directory is used.
+    """
+    tenant = tenant or get_current_tenant()
+    if tenant is None:
+        return settings.INDEX_DIR
+    return settings.INDEX_DIR / tenant.identifier
+
+
+def open_index(*, recreate=False, tenant: Tenant | None = None) -> FileIndex:
+    index_dir = get_index_dir(tenant)
     try:
-        if exists_in(settings.INDEX_DIR) and not recreate:
-            return open_dir(settings.INDEX_DIR, schema=get_schema())
+        if exists_in(index_dir) and not recreate:
+            return open_dir(index_dir, schema=get_schema())
     except Exception:
         logger.exception("Error while opening the index, recreating.")
 
-    # create_in doesn't handle corrupted indexes very well, remove the directory entirely first
-    if settings.INDEX_DIR.is_dir():
-        rmtree(settings.INDEX_DIR)
-    settings.INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    # create_in doesn't handle corrupted indexes very well, remove the index files
+    # entirely first. Tenant indexes are subdirectories of the top level index
+    # directory, so only files are removed.
+    if index_dir.is_dir():
+        for index_file in index_dir.iterdir():
+            if index_file.is_file():
+                index_file.unlink()
+    index_dir.mkdir(parents=True, exist_ok=True)
 
-    return create_in(settings.INDEX_DIR, get_schema())
+    return create_in(index_dir, get_schema())
 
 
 @contextmanager
-def open_index_writer(*, optimize=False) -> AsyncWriter:
-    writer = AsyncWriter(open_index())
+def open_index_writer(
+    *,
+    optimize=False,
+    tenant: Tenant | None = None,
+) -> AsyncWriter:
+    writer = AsyncWriter(open_index(tenant=tenant))
 
     try:
         yield writer
@@ -125,8 +161,8 @@ def open_index_writer(*, optimize=False) -> AsyncWriter:
 
 
 @contextmanager
-def open_index_searcher() -> Searcher:
-    searcher = open_index().searcher()
+def open_index_searcher(*, tenant: Tenant | None = None) -> Searcher:
+    searcher = open_index(tenant=tenant).searcher()
 
     try:
         yield searcher
@@ -134,16 +170,22 @@ def open_index_searcher() -> Searcher:
         searcher.close()
 
 
-def update_document(writer: AsyncWriter, doc: Document) -> None:
+def update_document(
+    writer: AsyncWriter,
+    doc: Document,
+    *,
+    viewer_ids: Iterable[int] | None = None,
+) -> None:
+    """
+    Adds or replaces the document in the index.  The related objects are taken
+    from the prefetched objects, if any, see `iter_index_chunks`.
+    """
     tags = ",".join([t.name for t in doc.tags.all()])
     tags_ids = ",".join([str(t.id) for t in doc.tags.all()])
-    notes = ",".join([str(c.note) for c in Note.objects.filter(document=doc)])
-    custom_fields = ",".join(
-        [str(c) for c in CustomFieldInstance.objects.filter(document=doc)],
-    )
-    custom_fields_ids = ",".join(
-        [str(f.field.id) for f in CustomFieldInstance.objects.filter(document=doc)],
-    )
+    notes = ",".join([str(c.note) for c in doc.notes.all()])
+    custom_field_instances = doc.custom_fields.all()
+    custom_fields = ",".join([str(c) for c in custom_field_instances])
+    custom_fields_ids = ",".join([str(f.field_id) for f in custom_field_instances])
     asn: int | None = doc.archive_serial_number
     if asn is not None and (
         asn < Document.ARCHIVE_SERIAL_NUMBER_MIN
@@ -156,11 +198,12 @@ def update_document(writer: AsyncWriter, doc: Document) -> None:
             f"{Document.ARCHIVE_SERIAL_NUMBER_MAX:,}.",
         )
         asn = 0
-    users_with_perms = get_users_with_perms(
-        doc,
-        only_with_perms_in=["view_document"],
-    )
-    viewer_ids: str = ",".join([str(u.id) for u in users_with_perms])
+    if viewer_ids is None:
+        viewer_ids = [
+            u.id
+            for u in get_users_with_perms(doc, only_with_perms_in=["view_document"])
+        ]
+    viewers: str = ",".join([str(user_id) for user_id in viewer_ids])
     writer.update_document(
         id=doc.pk,
         title=doc.title,
@@ -184,21 +227,98 @@ def update_document(writer: AsyncWriter, doc: Document) -> None:
         notes=notes,
         num_notes=len(notes),
         custom_fields=custom_fields,
-        custom_field_count=len(doc.custom_fields.all()),
+        custom_field_count=len(custom_field_instances),
         has_custom_fields=len(custom_fields) > 0,
         custom_fields_id=custom_fields_ids if custom_fields_ids else None,
         owner=doc.owner.username if doc.owner else None,
         owner_id=doc.owner.id if doc.owner else None,
         has_owner=doc.owner is not None,
-        viewer_id=viewer_ids if viewer_ids else None,
+        viewer_id=viewers if viewers else None,
         checksum=doc.checksum,
         page_count=doc.page_count,
         original_filename=doc.original_filename,
-        is_shared=len(viewer_ids) > 0,
+        is_shared=len(viewers) > 0,
     )
     logger.debug(f"Index updated for document {doc.pk}.")
 
 
+def get_viewer_ids(documents: Iterable[Document]) -> dict[int, list[int]]:
+    """
+    Returns the IDs of the users allowed to view each of the documents, directly
+    or through one of their groups, like `get_users_with_perms` does for a
+    single document.  Resolved with a single query for all documents.
+    """
+    object_pks = [str(doc.pk) for doc in documents]
+    if not object_pks:
+        return {}
+    viewer_ids: dict[int, set[int]] = {int(pk): set() for pk in object_pks}
+    permission_filter = {
+        "content_type": ContentType.objects.get_for_model(Document),
+        "permission__codename": "view_document",
+        "object_pk__in": object_pks,
+    }
+    user_permissions = UserObjectPermission.objects.filter(
+        **permission_filter,
+    ).values_list("object_pk", "user_id")
+    group_permissions = GroupObjectPermission.objects.filter(
+        **permission_filter,
+        group__user__isnull=False,
+    ).values_list("object_pk", "group__user__id")
+    # Neither side may be ordered in a union
+    for object_pk, user_id in user_permissions.order_by().union(
+        group_permissions.order_by(),
+    ):
+        viewer_ids[int(object_pk)].add(user_id)
+    return {pk: sorted(user_ids) for pk, user_ids in viewer_ids.items()}
+
+
+def iter_index_chunks(
+    documents: QuerySet[Document],
+    chunk_size: int = INDEX_CHUNK_SIZE,
+) -> Iterator[list[Document]]:
+    """
+    Yields the documents in chunks ordered by ID, with everything the index
+    needs selected or prefetched, so that each chunk takes a fixed number of
+    queries regardless of its size.  Chunks are paginated by ID rather than
+    offset, so large tables are not scanned repeatedly.
+    """
+    documents = (
+        documents.select_related(
+            "correspondent",
+            "document_type",
+            "storage_path",
+            "owner",
+        )
+        .prefetch_related(
+            "tags",
+            "notes",
+            Prefetch(
+                "custom_fields",
+                queryset=CustomFieldInstance.objects.select_related("field"),
+            ),
+        )
+        .order_by("pk")
+    )
+    last_pk = None
+    while True:
+        chunk = documents if last_pk is None else documents.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def update_documents(writer: AsyncWriter, documents: list[Document]) -> None:
+    """
+    Adds or replaces a chunk of documents in the index, resolving the viewers
+    of the whole chunk at once
+    """
+    viewer_ids = get_viewer_ids(documents)
+    for document in documents:
+        update_document(writer, document, viewer_ids=viewer_ids[document.pk])
+
+
 def remove_document(writer: AsyncWriter, doc: Document) -> None:
     remove_document_by_id(writer, doc.pk)
 
@@ -207,16 +327,114 @@ def remove_document_by_id(writer: AsyncWriter, doc_id) -> None:
     writer.delete_by_term("id", doc_id)
 
 
+def get_document_tenant(document: Document) -> Tenant | None:
+    """
+    Returns the tenant whose index holds the document, which is not
+    necessarily the current tenant, e.g. in the admin
+    """
+    return document.tenant if document.tenant_id else None
+
+
+@contextmanager
+def open_document_index_writer(document: Document) -> AsyncWriter:
+    """
+    Opens the writer of the index holding the document, within the context of
+    the document's tenant
+    """
+    tenant = get_document_tenant(document) or get_current_tenant()
+    with tenant_context(tenant), open_index_writer(tenant=tenant) as writer:
+        yield writer
+
+
 def add_or_update_document(document: Document) -> None:
-    with open_index_writer() as writer:
+    with open_document_index_writer(document) as writer:
         update_document(writer, document)
 
 
 def remove_document_from_index(document: Document) -> None:
-    with open_index_writer() as writer:
+    with open_document_index_writer(document) as writer:
         remove_document(writer, document)
 
 
+class DocumentIdMapCache:
+    """
+    Maps whoosh document numbers to `Document` IDs, one array per reader.
+
+    Segments never change once written, so the mapping of a segment is read
+    once from the postings of the id field, which is much cheaper than loading
+    the stored fields of every document. The mapping of a reader is the
+    concatenation of the mappings of its segments, and is only rebuilt when
+    the set of segments changes.
+    """
+
+    MAX_SEGMENTS: Final[int] = 1024
+    MAX_READERS: Final[int] = 32
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._segments: OrderedDict[str, array] = OrderedDict()
+        self._readers: OrderedDict[tuple, array] = OrderedDict()
+
+    @staticmethod
+    def _read_segment(reader: IndexReader) -> array:
+        # Deleted documents are not in the postings and keep the ID -1
+        document_ids = array("q", [-1]) * reader.doc_count_all()
+        field = reader.schema["id"]
+        for term in field.sortable_terms(reader, "id"):
+            document_id = field.from_bytes(term)
+            for docnum in reader.postings("id", term).all_ids():
+                document_ids[docnum] = document_id
+        return document_ids
+
+    def get(self, ixreader: IndexReader) -> array:
+        leaves = list(ixreader.leaf_readers())
+        segments = [leaf.segment() for leaf, _ in leaves]
+        if any(segment is None for segment in segments):
+            # Not backed by segments, e.g. an empty index
+            document_ids = array("q")
+            for leaf, _ in leaves:
+                document_ids.extend(self._read_segment(leaf))
+            return document_ids
+
+        key = tuple(segment.segment_id() for segment in segments)
+        with self._lock:
+            document_ids = self._readers.get(key)
+            if document_ids is None:
+                # The segments are in docnum order, so their mappings line up
+                document_ids = array("q")
+                for segment_id, (leaf, _) in zip(key, leaves):
+                    segment_ids = self._segments.get(segment_id)
+                    if segment_ids is None:
+                        segment_ids = self._read_segment(leaf)
+                        self._segments[segment_id] = segment_ids
+                    self._segments.move_to_end(segment_id)
+                    document_ids.extend(segment_ids)
+                self._readers[key] = document_ids
+            self._readers.move_to_end(key)
+
+            while len(self._segments) > self.MAX_SEGMENTS:
+                self._segments.popitem(last=False)
+            while len(self._readers) > self.MAX_READERS:
+                self._readers.popitem(last=False)
+            return document_ids
+
+    def clear(self) -> None:
+        with self._lock:
+            self._segments.clear()
+            self._readers.clear()
+
+
+_document_id_map = DocumentIdMapCache()
+
+
+def get_document_ids(ixreader: IndexReader) -> array:
+    """
+    Returns an array of the `Document` ID of each whoosh document number in
+    the reader, -1 for deleted documents
+    """
+    return _document_id_map.get(ixreader)
+
+
 class MappedDocIdSet(DocIdSet):
     """
     A DocIdSet backed by a set of `Document` IDs.
@@ -228,11 +446,11 @@ class MappedDocIdSet(DocIdSet):
         document_ids = filter_queryset.order_by("id").values_list("id", flat=True)
         max_id = document_ids.last() or 0
         self.document_ids = BitSet(document_ids, size=max_id)
-        self.ixreader = ixreader
+        self.docnum_ids = get_document_ids(ixreader)
 
     def __contains__(self, docnum) -> bool:
-        document_id = self.ixreader.stored_fields(docnum)["id"]
-        return document_id in self.document_ids
+        document_id = self.docnum_ids[docnum]
+        return document_id >= 0 and document_id in self.document_ids
 
     def __bool__(self) -> Literal[True]:
         # searcher.search ignores a filter if it's "falsy".
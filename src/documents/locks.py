@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import logging
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING
+from typing import Final
+
+from django.conf import settings
+from filelock import FileLock
+from filelock import Timeout
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from redis import Redis
+
+logger = logging.getLogger("paperless.locks")
+
+# Redis locks expire in case the process holding them dies
+REDIS_LOCK_TIMEOUT: Final[int] = 10 * 60
+
+# generate_filename appends _01, _02 etc. to make names unique
+_COUNTER_SUFFIX: Final = re.compile(r"(_\d{2,})+$")
+
+
+@dataclasses.dataclass
+class MediaLockStats:
+    acquisitions: int = 0
+    contended: int = 0
+    wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+
+_stats = MediaLockStats()
+_stats_lock = threading.Lock()
+_held = threading.local()
+
+
+def get_media_lock_stats() -> MediaLockStats:
+    """
+    Returns how often, and for how long, this process waited for media locks
+    """
+    with _stats_lock:
+        return dataclasses.replace(_stats)
+
+
+def get_media_lock_dir() -> Path:
+    return Path(settings.MEDIA_LOCK).parent / "locks"
+
+
+def get_lock_key(logical_path: str | Path, tenant_id: int | None) -> str:
+    """
+    Returns the lock key of the file, which is shared by every name
+    generate_unique_filename may pick instead of it.  Extensions and counter
+    suffixes are ignored, so names differing only in those share a key.
+    Files shared by all tenants have no tenant ID.
+    """
+    path = PurePosixPath(logical_path)
+    stem = _COUNTER_SUFFIX.sub("", path.name.split(".")[0])
+    return f"{tenant_id or ''}:{path.parent}/{stem}"
+
+
+@functools.cache
+def _get_redis() -> Redis:
+    from redis import Redis
+
+    return Redis.from_url(settings._CHANNELS_REDIS_URL)
+
+
+def _get_stripe(key: str) -> int:
+    return zlib.crc32(key.encode()) % settings.MEDIA_LOCK_STRIPES
+
+
+def _get_stripe_lock(stripe: int):
+    if settings.MEDIA_LOCK_BACKEND == "redis":
+        return _get_redis().lock(
+            f"{settings._REDIS_KEY_PREFIX}paperless:media-lock:{stripe}",
+            timeout=REDIS_LOCK_TIMEOUT,
+        )
+    lock_dir = get_media_lock_dir()
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    return FileLock(lock_dir / f"{stripe:03}.lock")
+
+
+def _try_acquire(lock) -> bool:
+    try:
+        return bool(lock.acquire(blocking=False))
+    except Timeout:
+        return False
+
+
+def _record_wait(wait_time: float, *, contended: bool) -> None:
+    with _stats_lock:
+        _stats.acquisitions += 1
+        if contended:
+            _stats.contended += 1
+            _stats.wait_time += wait_time
+            _stats.max_wait_time = max(_stats.max_wait_time, wait_time)
+
+
+@contextmanager
+def media_lock(*keys: str) -> Iterator[None]:
+    """
+    Locks the media files identified by the keys, see get_lock_key, or every
+    media file if there are none.
+
+    Keys are mapped onto a fixed number of striped locks, which are lock files
+    or, when several nodes share the media directory, Redis locks.  The
+    stripes are locked in order, so locking several keys at once can not
+    deadlock.  Stripes the current thread already holds are not locked again,
+    but nested locks should not add keys, lock them all at once instead.
+    """
+    held: set[int] = _held.__dict__.setdefault("stripes", set())
+    stripes = (
+        {_get_stripe(key) for key in keys}
+        if keys
+        else set(range(settings.MEDIA_LOCK_STRIPES))
+    )
+    locks = []
+    contended = False
+    start = time.monotonic()
+    try:
+        for stripe in sorted(stripes - held):
+            lock = _get_stripe_lock(stripe)
+            if not _try_acquire(lock):
+                contended = True
+                lock.acquire()
+            locks.append((stripe, lock))
+            held.add(stripe)
+
+        wait_time = time.monotonic() - start
+        _record_wait(wait_time, contended=contended)
+        if contended:
+            logger.debug(f"Waited {wait_time:.3f}s for the media lock of {keys}")
+
+        yield
+    finally:
+        for stripe, lock in reversed(locks):
+            lock.release()
+            held.discard(stripe)
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+from contextlib import nullcontext
 from dataclasses import dataclass
 from email import message_from_bytes
 from pathlib import Path
 
-from django.conf import settings
 from django.core.mail import EmailMessage
-from filelock import FileLock
+
+from documents.locks import get_lock_key
+from documents.locks import media_lock
+from paperless.tenants.utils import get_current_tenant
 
 
 @dataclass(frozen=True)
@@ -45,7 +48,12 @@ def send_email(
     used_filenames: set[str] = set()
 
     # Something could be renaming the file concurrently so it can't be attached
-    with FileLock(settings.MEDIA_LOCK):
+    tenant = get_current_tenant()
+    lock_keys = [
+        get_lock_key(attachment.path, tenant.pk if tenant else None)
+        for attachment in attachments
+    ]
+    with media_lock(*lock_keys) if lock_keys else nullcontext():
         for attachment in attachments:
             filename = _get_unique_filename(
                 attachment.friendly_name,
@@ -22,7 +22,6 @@ from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 from django.db import transaction
 from django.utils import timezone
-from filelock import FileLock
 from guardian.models import GroupObjectPermission
 from guardian.models import UserObjectPermission
 
@@ -34,6 +33,7 @@ if settings.AUDIT_LOG_ENABLED:
 
 from documents.file_handling import delete_empty_directories
 from documents.file_handling import generate_filename
+from documents.locks import media_lock
 from documents.management.commands.mixins import CryptMixin
 from documents.models import Correspondent
 from documents.models import CustomField
@@ -229,7 +229,7 @@ class Command(CryptMixin, BaseCommand):
 
         try:
             # Prevent any ongoing changes in the documents
-            with FileLock(settings.MEDIA_LOCK):
+            with media_lock():
                 self.dump()
 
                 # We've written everything to the temporary directory in this case,
@@ -2,20 +2,24 @@ import dataclasses
 import multiprocessing
 from typing import Final
 
-import rapidfuzz
 import tqdm
 from django.core.management import BaseCommand
 from django.core.management import CommandError
 
+from documents import similarity
 from documents.management.commands.mixins import MultiProcessMixin
 from documents.management.commands.mixins import ProgressBarMixin
 from documents.models import Document
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import tenant_context
 
 
 @dataclasses.dataclass(frozen=True)
 class _WorkPackage:
-    first_doc: Document
-    second_doc: Document
+    first_pk: int
+    first_content: str
+    second_pk: int
+    second_content: str
 
 
 @dataclasses.dataclass(frozen=True)
@@ -25,22 +29,17 @@ class _WorkResult:
     ratio: float
 
     def __lt__(self, other: "_WorkResult") -> bool:
-        return self.doc_one_pk < other.doc_one_pk
+        return (self.doc_one_pk, self.doc_two_pk) < (other.doc_one_pk, other.doc_two_pk)
 
 
 def _process_and_match(work: _WorkPackage) -> _WorkResult:
     """
-    Does basic processing of document content, gets the basic ratio
-    and returns the result package
+    Gets the basic ratio of the processed content of a candidate pair and
+    returns the result package
     """
-    # Normalize the string some, lower case, whitespace, etc
-    first_string = rapidfuzz.utils.default_process(work.first_doc.content)
-    second_string = rapidfuzz.utils.default_process(work.second_doc.content)
+    match = similarity.get_ratio(work.first_content, work.second_content)
 
-    # Basic matching ratio
-    match = rapidfuzz.fuzz.ratio(first_string, second_string)
-
-    return _WorkResult(work.first_doc.pk, work.second_doc.pk, match)
+    return _WorkResult(work.first_pk, work.second_pk, match)
 
 
 class Command(MultiProcessMixin, ProgressBarMixin, BaseCommand):
@@ -49,7 +48,7 @@ class Command(MultiProcessMixin, ProgressBarMixin, BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument(
             "--ratio",
-            default=85.0,
+            default=similarity.DEFAULT_RATIO,
             type=float,
             help="Ratio to consider documents a match",
         )
@@ -59,6 +58,12 @@ class Command(MultiProcessMixin, ProgressBarMixin, BaseCommand):
             action="store_true",
             help="If set, one document of matches above the ratio WILL BE DELETED",
         )
+        parser.add_argument(
+            "--tenant",
+            default=None,
+            help="Identifier of the tenant whose documents are matched, by "
+            "default the documents of each active tenant are",
+        )
         self.add_argument_progress_bar_mixin(parser)
         self.add_argument_processes_mixin(parser)
 
@@ -77,33 +82,66 @@ class Command(MultiProcessMixin, ProgressBarMixin, BaseCommand):
             )
 
         opt_ratio = options["ratio"]
-        checked_pairs: set[tuple[int, int]] = set()
-        work_pkgs: list[_WorkPackage] = []
 
         # Ratio is a float from 0.0 to 100.0
         if opt_ratio < RATIO_MIN or opt_ratio > RATIO_MAX:
             raise CommandError("The ratio must be between 0 and 100")
 
-        all_docs = Document.objects.all().order_by("id")
+        if options["tenant"]:
+            tenants = Tenant.objects.filter(identifier=options["tenant"])
+            if not tenants.exists():
+                raise CommandError(f"Tenant {options['tenant']} does not exist")
+        else:
+            tenants = Tenant.objects.filter(is_active=True, deleted_at__isnull=True)
+
+        messages = []
+        deleted = 0
+        for tenant in tenants:
+            with tenant_context(tenant):
+                tenant_messages, maybe_delete_ids = self.match_documents(opt_ratio)
+                messages.extend(tenant_messages)
+                if options["delete"]:
+                    Document.objects.filter(pk__in=maybe_delete_ids).delete()
+                    deleted += len(maybe_delete_ids)
+
+        if len(messages) == 0:
+            messages.append(
+                self.style.SUCCESS("No matches found\n"),
+            )
+        self.stdout.writelines(
+            messages,
+        )
+        if options["delete"]:
+            self.stdout.write(
+                self.style.NOTICE(
+                    f"Deleting {deleted} documents based on ratio matches",
+                ),
+            )
+
+    def match_documents(self, opt_ratio: float) -> tuple[list[str], list[int]]:
+        """
+        Matches the documents of the current tenant and returns the messages
+        of the matches and the second document of each match
+        """
+        all_docs = Document.objects.all()
+
+        # Only pairs with enough shingles in common are compared, documents
+        # without content (e.g. password-protected) have no signature
+        signatures = similarity.update_signatures(all_docs)
+        candidates = sorted(similarity.get_candidates(signatures))
+        contents = {
+            pk: similarity.process_content(content)
+            for pk, content in all_docs.filter(
+                pk__in={pk for pair in candidates for pk in pair},
+            ).values_list("pk", "content")
+        }
 
         # Build work packages for processing
-        for first_doc in all_docs:
-            for second_doc in all_docs:
-                # doc to doc is obviously not useful
-                if first_doc.pk == second_doc.pk:
-                    continue
-                # Skip empty documents (e.g. password-protected)
-                if first_doc.content.strip() == "" or second_doc.content.strip() == "":
-                    continue
-                # Skip matching which have already been matched together
-                # doc 1 to doc 2 is the same as doc 2 to doc 1
-                doc_1_to_doc_2 = (first_doc.pk, second_doc.pk)
-                doc_2_to_doc_1 = doc_1_to_doc_2[::-1]
-                if doc_1_to_doc_2 in checked_pairs or doc_2_to_doc_1 in checked_pairs:
-                    continue
-                checked_pairs.update([doc_1_to_doc_2, doc_2_to_doc_1])
-                # Actually something useful to work on now
-                work_pkgs.append(_WorkPackage(first_doc, second_doc))
+        work_pkgs = [
+            _WorkPackage(first_pk, contents[first_pk], second_pk, contents[second_pk])
+            for first_pk, second_pk in candidates
+            if first_pk in contents and second_pk in contents
+        ]
 
         # Don't spin up a pool of 1 process
         if self.process_count == 1:
@@ -132,18 +170,4 @@ class Command(MultiProcessMixin, ProgressBarMixin, BaseCommand):
                     ),
                 )
                 maybe_delete_ids.append(result.doc_two_pk)
-
-        if len(messages) == 0:
-            messages.append(
-                self.style.SUCCESS("No matches found\n"),
-            )
-        self.stdout.writelines(
-            messages,
-        )
-        if options["delete"]:
-            self.stdout.write(
-                self.style.NOTICE(
-                    f"Deleting {len(maybe_delete_ids)} documents based on ratio matches",
-                ),
-            )
-            Document.objects.filter(pk__in=maybe_delete_ids).delete()
+        return messages, maybe_delete_ids
@@ -22,9 +22,10 @@ from django.db import IntegrityError
 from django.db import transaction
 from django.db.models.signals import m2m_changed
 from django.db.models.signals import post_save
-from filelock import FileLock
 
 from documents.file_handling import create_source_path_directory
+from documents.locks import get_lock_key
+from documents.locks import media_lock
 from documents.management.commands.mixins import CryptMixin
 from documents.models import Correspondent
 from documents.models import CustomField
@@ -385,7 +386,12 @@ class Command(CryptMixin, BaseCommand):
 
             document.storage_type = Document.STORAGE_TYPE_UNENCRYPTED
 
-            with FileLock(settings.MEDIA_LOCK):
+            lock_keys = [
+                get_lock_key(path, document.tenant_id)
+                for path in (document.source_path, document.archive_path)
+                if path
+            ]
+            with media_lock(*lock_keys):
                 if Path(document.source_path).is_file():
                     raise FileExistsError(document.source_path)
 
@@ -1,22 +1,48 @@
+from contextlib import nullcontext
+
 from django.core.management import BaseCommand
+from django.core.management import CommandError
 from django.db import transaction
 
+from documents.management.commands.mixins import MultiProcessMixin
 from documents.management.commands.mixins import ProgressBarMixin
 from documents.tasks import index_optimize
 from documents.tasks import index_reindex
+from paperless.tenants.models import Tenant
 
 
-class Command(ProgressBarMixin, BaseCommand):
+class Command(MultiProcessMixin, ProgressBarMixin, BaseCommand):
     help = "Manages the document index."
 
     def add_arguments(self, parser):
         parser.add_argument("command", choices=["reindex", "optimize"])
+        parser.add_argument(
+            "--tenant",
+            default=None,
+            help="Identifier of the tenant whose index is managed, by default "
+            "the indexes of all active tenants are",
+        )
         self.add_argument_progress_bar_mixin(parser)
+        self.add_argument_processes_mixin(parser)
 
     def handle(self, *args, **options):
         self.handle_progress_bar_mixin(**options)
-        with transaction.atomic():
+        self.handle_processes_mixin(**options)
+        tenant = None
+        if options["tenant"]:
+            try:
+                tenant = Tenant.objects.get(identifier=options["tenant"])
+            except Tenant.DoesNotExist as e:
+                raise CommandError(
+                    f"Tenant {options['tenant']} does not exist",
+                ) from e
+        # Worker processes use connections of their own, outside the transaction
+        with transaction.atomic() if self.process_count == 1 else nullcontext():
             if options["command"] == "reindex":
-                index_reindex(progress_bar_disable=self.no_progress_bar)
+                index_reindex(
+                    progress_bar_disable=self.no_progress_bar,
+                    tenant=tenant,
+                    processes=self.process_count,
+                )
             elif options["command"] == "optimize":
-                index_optimize()
+                index_optimize(tenant_id=tenant.pk if tenant else None)
@@ -9,9 +9,23 @@ class Command(ProgressBarMixin, BaseCommand):
 
     def add_arguments(self, parser):
         self.add_argument_progress_bar_mixin(parser)
+        parser.add_argument(
+            "--rehash-percent",
+            type=float,
+            default=None,
+            help=(
+                "Percentage of the files unchanged since they were last checked "
+                "which are read again to verify their checksum. Defaults to "
+                "PAPERLESS_SANITY_CHECKER_REHASH_PERCENT."
+            ),
+        )
 
     def handle(self, *args, **options):
         self.handle_progress_bar_mixin(**options)
-        messages = check_sanity(progress=self.use_progress_bar, scheduled=False)
+        messages = check_sanity(
+            progress=self.use_progress_bar,
+            scheduled=False,
+            rehash_percent=options["rehash_percent"],
+        )
 
         messages.log_messages()
@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+from django.core.management import CommandError
+
+from documents.tasks import recompute_statistics
+from paperless.tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = "Counts the documents again and corrects the document statistics."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tenant",
+            default=None,
+            help="Identifier of the tenant whose statistics are corrected, by "
+            "default the statistics of all active tenants are",
+        )
+
+    def handle(self, *args, **options):
+        tenant_id = None
+        if options["tenant"]:
+            try:
+                tenant_id = Tenant.objects.get(identifier=options["tenant"]).pk
+            except Tenant.DoesNotExist as e:
+                raise CommandError(
+                    f"Tenant {options['tenant']} does not exist",
+                ) from e
+        recompute_statistics(tenant_id=tenant_id)
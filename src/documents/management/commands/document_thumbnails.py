@@ -1,37 +1,20 @@
 import logging
-import multiprocessing
-import shutil
+from typing import Final
 
-import tqdm
-from django import db
+from celery import group
 from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
 
 from documents.management.commands.mixins import MultiProcessMixin
 from documents.management.commands.mixins import ProgressBarMixin
 from documents.models import Document
-from documents.parsers import get_parser_class_for_mime_type
+from documents.tasks import regenerate_thumbnails as regenerate_thumbnails_task
+from documents.thumbnail_regeneration import regenerate_thumbnails
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import tenant_context
 
-
-def _process_document(doc_id):
-    document: Document = Document.objects.get(id=doc_id)
-    parser_class = get_parser_class_for_mime_type(document.mime_type)
-
-    if parser_class:
-        parser = parser_class(logging_group=None)
-    else:
-        print(f"{document} No parser for mime type {document.mime_type}")  # noqa: T201
-        return
-
-    try:
-        thumb = parser.get_thumbnail(
-            document.source_path,
-            document.mime_type,
-            document.get_public_filename(),
-        )
-
-        shutil.move(thumb, document.thumbnail_path)
-    finally:
-        parser.cleanup()
+# Documents whose thumbnails are regenerated by each task when queued
+TASK_BATCH_SIZE: Final[int] = 1000
 
 
 class Command(MultiProcessMixin, ProgressBarMixin, BaseCommand):
@@ -49,6 +32,31 @@ class Command(MultiProcessMixin, ProgressBarMixin, BaseCommand):
                 "run on this specific document."
             ),
         )
+        parser.add_argument(
+            "--force",
+            default=False,
+            action="store_true",
+            help=(
+                "If set, thumbnails are also regenerated if they are newer "
+                "than the original, e.g. to create thumbnails of new sizes"
+            ),
+        )
+        parser.add_argument(
+            "--tenant",
+            default=None,
+            help="Identifier of the tenant whose thumbnails are regenerated, by "
+            "default those of each active tenant are",
+        )
+        parser.add_argument(
+            "--queue",
+            default=False,
+            action="store_true",
+            help=(
+                "If set, the thumbnails are regenerated by the task workers, "
+                f"{TASK_BATCH_SIZE} documents per task, instead of by this "
+                "command"
+            ),
+        )
         self.add_argument_progress_bar_mixin(parser)
         self.add_argument_processes_mixin(parser)
 
@@ -58,27 +66,53 @@ class Command(MultiProcessMixin, ProgressBarMixin, BaseCommand):
         self.handle_processes_mixin(**options)
         self.handle_progress_bar_mixin(**options)
 
-        if options["document"]:
-            documents = Document.objects.filter(pk=options["document"])
+        if options["tenant"]:
+            tenants = Tenant.objects.filter(identifier=options["tenant"])
+            if not tenants.exists():
+                raise CommandError(f"Tenant {options['tenant']} does not exist")
         else:
-            documents = Document.objects.all()
-
-        ids = [doc.id for doc in documents]
-
-        # Note to future self: this prevents django from reusing database
-        # connections between processes, which is bad and does not work
-        # with postgres.
-        db.connections.close_all()
-
-        if self.process_count == 1:
-            for doc_id in ids:
-                _process_document(doc_id)
-        else:  # pragma: no cover
-            with multiprocessing.Pool(processes=self.process_count) as pool:
-                list(
-                    tqdm.tqdm(
-                        pool.imap_unordered(_process_document, ids),
-                        total=len(ids),
-                        disable=self.no_progress_bar,
-                    ),
-                )
+            tenants = Tenant.objects.filter(is_active=True, deleted_at__isnull=True)
+
+        document_ids = [options["document"]] if options["document"] else None
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                if options["queue"]:
+                    self.queue_tenant(tenant, document_ids, force=options["force"])
+                else:
+                    regenerate_thumbnails(
+                        document_ids,
+                        force=options["force"],
+                        processes=self.process_count,
+                        progress_bar_disable=self.no_progress_bar,
+                    )
+
+    def queue_tenant(
+        self,
+        tenant: Tenant,
+        document_ids: list[int] | None,
+        *,
+        force: bool,
+    ) -> None:
+        """
+        Fans the regeneration of the thumbnails of the tenant out to the task
+        workers in batches
+        """
+        if document_ids is None:
+            document_ids = list(
+                Document.objects.order_by("pk").values_list("pk", flat=True),
+            )
+        tasks = [
+            regenerate_thumbnails_task.s(
+                document_ids[start : start + TASK_BATCH_SIZE],
+                tenant.pk,
+                force=force,
+            )
+            for start in range(0, len(document_ids), TASK_BATCH_SIZE)
+        ]
+        if tasks:
+            group(tasks).delay()
+        self.stdout.write(
+            f"Queued {len(tasks)} tasks to regenerate the thumbnails of "
+            f"tenant {tenant.identifier}",
+        )
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "documents",
+            "1081_remove_correspondent_documents_correspondent_unique_name_owner_and_more",
+        ),
+        ("tenants", "0003_create_default_tenant"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredFileChecksum",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "path",
+                    models.CharField(
+                        help_text="Logical path of the file in storage",
+                        max_length=1024,
+                        verbose_name="path",
+                    ),
+                ),
+                ("size", models.BigIntegerField(verbose_name="size")),
+                ("modified", models.DateTimeField(null=True, verbose_name="modified")),
+                ("checksum", models.CharField(max_length=64, verbose_name="checksum")),
+                (
+                    "verified",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        help_text="When the file was last read to compute the checksum",
+                        verbose_name="verified",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.tenant",
+                        verbose_name="tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "stored file checksum",
+                "verbose_name_plural": "stored file checksums",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("tenant", "path"),
+                        name="documents_storedfilechecksum_unique_tenant_path",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+from django.db.models import Count
+from django.db.models import Sum
+from django.db.models.functions import Length
+
+
+def count_documents(apps, schema_editor):
+    Document = apps.get_model("documents", "Document")
+    DocumentStatistics = apps.get_model("documents", "DocumentStatistics")
+
+    DocumentStatistics.objects.bulk_create(
+        [
+            DocumentStatistics(
+                tenant_id=tenant_id,
+                owner_id=owner_id,
+                mime_type=mime_type,
+                document_count=document_count,
+                character_count=character_count or 0,
+            )
+            for tenant_id, owner_id, mime_type, document_count, character_count in (
+                Document.objects.order_by()
+                .values_list("tenant_id", "owner_id", "mime_type")
+                .annotate(
+                    document_count=Count("id"),
+                    character_count=Sum(Length("content")),
+                )
+            )
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("documents", "1082_storedfilechecksum"),
+        ("tenants", "0003_create_default_tenant"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentStatistics",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "mime_type",
+                    models.CharField(max_length=256, verbose_name="mime type"),
+                ),
+                (
+                    "document_count",
+                    models.BigIntegerField(default=0, verbose_name="document count"),
+                ),
+                (
+                    "character_count",
+                    models.BigIntegerField(default=0, verbose_name="character count"),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="owner",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.tenant",
+                        verbose_name="tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "document statistics",
+                "verbose_name_plural": "document statistics",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("tenant", "owner", "mime_type"),
+                        name="documents_documentstatistics_unique_tenant_owner_mime_type",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("owner__isnull", True)),
+                        fields=("tenant", "mime_type"),
+                        name="documents_documentstatistics_unique_tenant_mime_type",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(count_documents, migrations.RunPython.noop),
+    ]
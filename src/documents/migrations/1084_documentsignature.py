@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:19
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("documents", "1083_documentstatistics"),
+        ("tenants", "0003_create_default_tenant"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentSignature",
+            fields=[
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="similarity_signature",
+                        serialize=False,
+                        to="documents.document",
+                        verbose_name="document",
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(
+                        help_text="The hash of the content the signature was computed from.",
+                        max_length=32,
+                        verbose_name="content hash",
+                    ),
+                ),
+                ("signature", models.BinaryField(verbose_name="signature")),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="tenants.tenant",
+                        verbose_name="tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "document signature",
+                "verbose_name_plural": "document signatures",
+            },
+        ),
+    ]
@@ -26,6 +26,7 @@ from django_softdelete.models import SoftDeleteModel
 
 from documents.data_models import DocumentSource
 from documents.parsers import get_default_file_extension
+from documents.thumbnails import get_thumbnail_variant_path
 from paperless.tenants.models import TenantModel
 
 
@@ -411,11 +412,11 @@ class Document(TenantModel, SoftDeleteModel, ModelWithOwner):
 
     @property
     def source_file(self):
-        """Return file-like object from storage backend."""
+        """Return a lazily read file-like object from the storage backend."""
         from documents.storage.factory import get_storage_backend
 
         backend = get_storage_backend()
-        return backend.retrieve(self.source_path)
+        return backend.open(self.source_path)
 
     @property
     def has_archive_version(self) -> bool:
@@ -436,14 +437,14 @@ class Document(TenantModel, SoftDeleteModel, ModelWithOwner):
 
     @property
     def archive_file(self):
-        """Return file-like object from storage backend."""
+        """Return a lazily read file-like object from the storage backend."""
         if not self.has_archive_version:
             return None
 
         from documents.storage.factory import get_storage_backend
 
         backend = get_storage_backend()
-        return backend.retrieve(self.archive_path)
+        return backend.open(self.archive_path)
 
     def get_public_filename(self, *, archive=False, counter=0, suffix=None) -> str:
         """
@@ -481,13 +482,26 @@ class Document(TenantModel, SoftDeleteModel, ModelWithOwner):
 
         return f"documents/thumbnails/{webp_file_name}"
 
+    def get_thumbnail_path(self, size: str | None = None) -> str:
+        """
+        Return logical path for the thumbnail of the given size, see
+        THUMBNAIL_SIZES, or for the default thumbnail.
+        """
+        if size is None:
+            return self.thumbnail_path
+        return get_thumbnail_variant_path(self.thumbnail_path, size)
+
     @property
     def thumbnail_file(self):
         """Return file-like object from storage backend."""
+        return self.get_thumbnail_file()
+
+    def get_thumbnail_file(self, size: str | None = None):
+        """Return file-like object of the thumbnail of the given size."""
         from documents.storage.factory import get_storage_backend
 
         backend = get_storage_backend()
-        return backend.retrieve(self.thumbnail_path)
+        return backend.retrieve(self.get_thumbnail_path(size))
 
     @property
     def created_date(self):
@@ -748,6 +762,116 @@ class PaperlessTask(ModelWithOwner):
         return f"Task {self.task_id}"
 
 
+class StoredFileChecksum(TenantModel):
+    """
+    The checksum of a stored file as of the last time the sanity checker read
+    it, so files whose size and modification time are unchanged since are not
+    read again
+    """
+
+    path = models.CharField(
+        _("path"),
+        max_length=1024,
+        help_text=_("Logical path of the file in storage"),
+    )
+
+    size = models.BigIntegerField(_("size"))
+
+    modified = models.DateTimeField(_("modified"), null=True)
+
+    checksum = models.CharField(_("checksum"), max_length=64)
+
+    verified = models.DateTimeField(
+        _("verified"),
+        default=timezone.now,
+        help_text=_("When the file was last read to compute the checksum"),
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "path"],
+                name="%(app_label)s_%(class)s_unique_tenant_path",
+            ),
+        ]
+        verbose_name = _("stored file checksum")
+        verbose_name_plural = _("stored file checksums")
+
+    def __str__(self) -> str:
+        return self.path
+
+
+class DocumentStatistics(TenantModel):
+    """
+    The number of documents and characters of content of a tenant by owner
+    and mime type, kept up to date as documents are saved and deleted, so the
+    statistics do not have to be aggregated over every document
+    """
+
+    owner = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        verbose_name=_("owner"),
+    )
+
+    mime_type = models.CharField(_("mime type"), max_length=256)
+
+    document_count = models.BigIntegerField(_("document count"), default=0)
+
+    character_count = models.BigIntegerField(_("character count"), default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "owner", "mime_type"],
+                name="%(app_label)s_%(class)s_unique_tenant_owner_mime_type",
+            ),
+            models.UniqueConstraint(
+                fields=["tenant", "mime_type"],
+                condition=models.Q(owner__isnull=True),
+                name="%(app_label)s_%(class)s_unique_tenant_mime_type",
+            ),
+        ]
+        verbose_name = _("document statistics")
+        verbose_name_plural = _("document statistics")
+
+    def __str__(self) -> str:
+        return f"{self.owner}: {self.mime_type}"
+
+
+class DocumentSignature(TenantModel):
+    """
+    The MinHash signature of the content of a document, so documents whose
+    content is almost the same are found without comparing the content of
+    every pair of documents, see documents.similarity
+    """
+
+    document = models.OneToOneField(
+        Document,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="similarity_signature",
+        verbose_name=_("document"),
+    )
+
+    content_hash = models.CharField(
+        _("content hash"),
+        max_length=32,
+        help_text=_("The hash of the content the signature was computed from."),
+    )
+
+    signature = models.BinaryField(_("signature"))
+
+    class Meta:
+        verbose_name = _("document signature")
+        verbose_name_plural = _("document signatures")
+
+    def __str__(self) -> str:
+        return f"Signature of document {self.document_id}"
+
+
 class Note(TenantModel, SoftDeleteModel):
     note = models.TextField(
         _("content"),
@@ -17,6 +17,7 @@ from django.utils import timezone
 
 from documents.loggers import LoggingMixin
 from documents.signals import document_consumer_declaration
+from documents.thumbnails import render_pdf_thumbnails
 from documents.utils import copy_file_with_basic_stats
 from documents.utils import run_subprocess
 from paperless.config import OcrConfig
@@ -234,10 +235,16 @@ def make_thumbnail_from_pdf_gs_fallback(in_path, temp_dir, logging_group=None) -
 
 def make_thumbnail_from_pdf(in_path: Path, temp_dir: Path, logging_group=None) -> Path:
     """
-    The thumbnail of a PDF is just a 500px wide image of the first page.
+    The thumbnail of a PDF is just a 500px wide image of the first page.  The
+    page is rendered once at the size of the largest thumbnail, and the
+    thumbnails of the other sizes are stored next to the returned one.  Files
+    pdftoppm can't render fall back to convert without the other sizes.
     """
     out_path: Path = temp_dir / "convert.webp"
 
+    if render_pdf_thumbnails(in_path, out_path, logging_group):
+        return out_path
+
     # Run convert to get a decent thumbnail
     try:
         run_convert(
@@ -263,38 +270,58 @@ def parse_date(filename, text) -> datetime.datetime | None:
     return next(parse_date_generator(filename, text), None)
 
 
-def parse_date_generator(filename, text) -> Iterator[datetime.datetime]:
+@lru_cache(maxsize=8)
+def _get_date_parser(languages: tuple[str, ...], date_order: str, time_zone: str):
     """
-    Returns the date of the document.
+    Returns a dateparser parser for the languages and date ordering, so the
+    data of the languages is loaded once instead of for every date parsed
     """
+    from dateparser.date import DateDataParser
+
+    return DateDataParser(
+        locales=list(languages),
+        settings={
+            "DATE_ORDER": date_order,
+            "PREFER_DAY_OF_MONTH": "first",
+            "RETURN_AS_TIMEZONE_AWARE": True,
+            "TIMEZONE": time_zone,
+        },
+    )
 
-    def __parser(ds: str, date_order: str) -> datetime.datetime:
-        """
-        Call dateparser.parse with a particular date ordering
-        """
-        import dateparser
 
-        ocr_config = OcrConfig()
-        languages = settings.DATE_PARSER_LANGUAGES or ocr_to_dateparser_languages(
-            ocr_config.language,
-        )
+@lru_cache(maxsize=8)
+def _get_date_languages(ocr_language: str) -> tuple[str, ...]:
+    return tuple(ocr_to_dateparser_languages(ocr_language))
 
-        return dateparser.parse(
-            ds,
-            settings={
-                "DATE_ORDER": date_order,
-                "PREFER_DAY_OF_MONTH": "first",
-                "RETURN_AS_TIMEZONE_AWARE": True,
-                "TIMEZONE": settings.TIME_ZONE,
-            },
-            locales=languages,
-        )
+
+def parse_date_generator(
+    filename,
+    text,
+    limit: int | None = None,
+) -> Iterator[datetime.datetime]:
+    """
+    Returns the date of the document.  If a limit is given, stops after that
+    many different dates.
+    """
+    languages = tuple(settings.DATE_PARSER_LANGUAGES or ()) or _get_date_languages(
+        OcrConfig().language,
+    )
+    now = timezone.now()
+    # The same date is often repeated, e.g. on every page
+    parsed: dict[tuple[str, str], datetime.datetime | None] = {}
+
+    def __parser(ds: str, date_order: str) -> datetime.datetime | None:
+        """
+        Call dateparser with a particular date ordering
+        """
+        parser = _get_date_parser(languages, date_order, settings.TIME_ZONE)
+        return parser.get_date_data(ds).date_obj
 
     def __filter(date: datetime.datetime) -> datetime.datetime | None:
         if (
             date is not None
             and date.year > 1900
-            and date <= timezone.now()
+            and date <= now
             and date.date() not in settings.IGNORE_DATES
         ):
             return date
@@ -304,28 +331,44 @@ def parse_date_generator(filename, text) -> Iterator[datetime.datetime]:
         match: Match[str],
         date_order: str,
     ) -> datetime.datetime | None:
-        date_string = match.group(0)
-
-        try:
-            date = __parser(date_string, date_order)
-        except Exception:
-            # Skip all matches that do not parse to a proper date
-            date = None
+        date_string = " ".join(match.group(0).split())
 
-        return __filter(date)
+        key = (date_string, date_order)
+        if key not in parsed:
+            try:
+                parsed[key] = __filter(__parser(date_string, date_order))
+            except Exception:
+                # Skip all matches that do not parse to a proper date
+                parsed[key] = None
+        return parsed[key]
 
     def __process_content(content: str, date_order: str) -> Iterator[datetime.datetime]:
+        if settings.DATE_PARSER_MAX_CHARS > 0:
+            content = content[: settings.DATE_PARSER_MAX_CHARS]
         for m in re.finditer(DATE_REGEX, content):
             date = __process_match(m, date_order)
             if date is not None:
                 yield date
 
-    # if filename date parsing is enabled, search there first:
-    if settings.FILENAME_DATE_ORDER:
-        yield from __process_content(filename, settings.FILENAME_DATE_ORDER)
-
-    # Iterate through all regex matches in text and try to parse the date
-    yield from __process_content(text, settings.DATE_ORDER)
+    def __process() -> Iterator[datetime.datetime]:
+        # if filename date parsing is enabled, search there first:
+        if settings.FILENAME_DATE_ORDER:
+            yield from __process_content(filename, settings.FILENAME_DATE_ORDER)
+
+        # Iterate through all regex matches in text and try to parse the date
+        yield from __process_content(text, settings.DATE_ORDER)
+
+    if limit is None:
+        yield from __process()
+        return
+
+    found = set()
+    for date in __process():
+        if date not in found:
+            found.add(date)
+            yield date
+            if len(found) >= limit:
+                return
 
 
 class ParseError(Exception):
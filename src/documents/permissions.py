@@ -1,3 +1,6 @@
+from collections import defaultdict
+from typing import Literal
+
 from django.contrib.auth.models import Group
 from django.contrib.auth.models import Permission
 from django.contrib.auth.models import User
@@ -10,6 +13,8 @@ from guardian.shortcuts import assign_perm
 from guardian.shortcuts import get_objects_for_user
 from guardian.shortcuts import get_users_with_perms
 from guardian.shortcuts import remove_perm
+from guardian.utils import get_group_obj_perms_model
+from guardian.utils import get_user_obj_perms_model
 from rest_framework.permissions import BasePermission
 from rest_framework.permissions import DjangoObjectPermissions
 
@@ -61,6 +66,38 @@ def get_groups_with_only_permission(obj, codename):
     return Group.objects.filter(id__in=group_object_perm_group_ids).distinct()
 
 
+def get_object_perms_by_pk(
+    objects: list,
+    target: Literal["users", "groups"],
+) -> dict[int, dict[str, list[int]]]:
+    """
+    Returns the IDs of the users or groups with object permissions on the
+    objects, by object pk and permission codename, in a single query.  Like
+    get_users_with_perms with with_group_users=False, permissions users have
+    through their groups are not included.
+    """
+    model = type(objects[0])
+    obj_perm_model = (
+        get_user_obj_perms_model(model)
+        if target == "users"
+        else get_group_obj_perms_model(model)
+    )
+    id_field = "user_id" if target == "users" else "group_id"
+    pk_type = type(objects[0].pk)
+
+    perms: dict[int, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+    for object_pk, actor_id, codename in (
+        obj_perm_model.objects.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            object_pk__in=[str(obj.pk) for obj in objects],
+        )
+        .order_by(id_field)
+        .values_list("object_pk", id_field, "permission__codename")
+    ):
+        perms[pk_type(object_pk)][codename].append(actor_id)
+    return perms
+
+
 def set_permissions_for_object(permissions: list[str], object, *, merge: bool = False):
     """
     Set permissions for an object. The permissions are given as a list of strings
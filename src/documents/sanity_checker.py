@@ -1,18 +1,38 @@
+import dataclasses
 import hashlib
 import logging
+import random
 import uuid
 from collections import defaultdict
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import PurePosixPath
 from typing import Final
 
 from celery import states
 from django.conf import settings
+from django.db.models import BooleanField
+from django.db.models import ExpressionWrapper
+from django.db.models import Q
+from django.db.models import QuerySet
 from django.utils import timezone
 from tqdm import tqdm
 
 from documents.models import Document
 from documents.models import PaperlessTask
-from paperless.config import GeneralConfig
+from documents.models import StoredFileChecksum
+from documents.storage.base import StorageBackend
+from documents.storage.base import StorageObjectInfo
+from documents.storage.factory import get_storage_backend
+from documents.thumbnails import THUMBNAIL_SIZES
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import get_current_tenant
+from paperless.tenants.utils import tenant_context
+
+logger = logging.getLogger("paperless.sanity_checker")
+
+# Number of documents loaded from the database, and of files read, at once
+SANITY_CHECK_CHUNK_SIZE: Final[int] = 2000
 
 
 class SanityCheckMessages:
@@ -39,11 +59,13 @@ class SanityCheckMessages:
             logger.info("Sanity checker detected no issues.")
         else:
             # Query once
-            all_docs = Document.global_objects.all()
+            all_docs = Document.global_objects.only("title").in_bulk(
+                [doc_pk for doc_pk in self._messages if doc_pk is not None],
+            )
 
             for doc_pk in self._messages:
                 if doc_pk is not None:
-                    doc = all_docs.get(pk=doc_pk)
+                    doc = all_docs[doc_pk]
                     logger.info(
                         f"Detected following issue(s) with document #{doc.pk},"
                         f" titled {doc.title}",
@@ -62,109 +84,340 @@ class SanityCheckFailedException(Exception):
     pass
 
 
-def check_sanity(*, progress=False, scheduled=True) -> SanityCheckMessages:
-    paperless_task = PaperlessTask.objects.create(
-        task_id=uuid.uuid4(),
-        type=PaperlessTask.TaskType.SCHEDULED_TASK
-        if scheduled
-        else PaperlessTask.TaskType.MANUAL_TASK,
-        task_name=PaperlessTask.TaskName.CHECK_SANITY,
-        status=states.STARTED,
-        date_created=timezone.now(),
-        date_started=timezone.now(),
-    )
-    messages = SanityCheckMessages()
+@dataclasses.dataclass(frozen=True)
+class _ChecksumCheck:
+    doc: Document
+    info: StorageObjectInfo
+    expected: str
+    archive: bool
 
-    present_files = {
-        x.resolve()
-        for x in Path(settings.MEDIA_ROOT).glob("**/*")
-        if not x.is_dir() and x.name not in settings.IGNORABLE_FILES
-    }
 
-    lockfile = Path(settings.MEDIA_LOCK).resolve()
-    if lockfile in present_files:
-        present_files.remove(lockfile)
-
-    general_config = GeneralConfig()
-    app_logo = general_config.app_logo or settings.APP_LOGO
-    if app_logo:
-        logo_file = Path(settings.MEDIA_ROOT / Path(app_logo.lstrip("/"))).resolve()
-        if logo_file in present_files:
-            present_files.remove(logo_file)
-
-    for doc in tqdm(Document.global_objects.all(), disable=not progress):
-        # Check sanity of the thumbnail
-        thumbnail_path: Final[Path] = Path(doc.thumbnail_path).resolve()
-        if not thumbnail_path.exists() or not thumbnail_path.is_file():
-            messages.error(doc.pk, "Thumbnail of document does not exist.")
-        else:
-            if thumbnail_path in present_files:
-                present_files.remove(thumbnail_path)
-            try:
-                _ = thumbnail_path.read_bytes()
-            except OSError as e:
-                messages.error(doc.pk, f"Cannot read thumbnail file of document: {e}")
-
-        # Check sanity of the original file
-        # TODO: extract method
-        source_path: Final[Path] = Path(doc.source_path).resolve()
-        if not source_path.exists() or not source_path.is_file():
-            messages.error(doc.pk, "Original of document does not exist.")
+def _compute_checksum(
+    backend: StorageBackend,
+    tenant: Tenant,
+    path: str,
+) -> str | OSError:
+    """
+    Hashes a stored file as it is streamed from storage.  Runs in a worker
+    thread, which needs the tenant context of its own.
+    """
+    md5 = hashlib.md5()
+    try:
+        with tenant_context(tenant):
+            for chunk in backend.iter_chunks(path):
+                md5.update(chunk)
+    except OSError as e:
+        return e
+    return md5.hexdigest()
+
+
+def _get_known_checksum(
+    info: StorageObjectInfo,
+    known: tuple | None,
+    *,
+    resumed_from: datetime | None,
+    rehash_percent: float,
+) -> str | None:
+    """
+    Returns the checksum of a stored file without reading it, if the storage
+    keeps one or the file is unchanged since it was last read.  Unchanged files
+    are read again if picked for the random sample, unless they were read since
+    the interrupted run this run resumes started.
+    """
+    if info.content_hash is not None:
+        return info.content_hash
+    if known is None:
+        return None
+    size, modified, checksum, verified = known
+    if size != info.size or modified != info.modified:
+        return None
+    if (resumed_from is None or verified < resumed_from) and (
+        random.random() * 100 < rehash_percent
+    ):
+        return None
+    return checksum
+
+
+def _compare_checksum(
+    messages: SanityCheckMessages,
+    check: _ChecksumCheck,
+    checksum: str,
+) -> None:
+    if checksum == check.expected:
+        return
+    if check.archive:
+        messages.error(
+            check.doc.pk,
+            "Checksum mismatch of archived document. "
+            f"Stored: {check.expected}, "
+            f"actual: {checksum}.",
+        )
+    else:
+        messages.error(
+            check.doc.pk,
+            f"Checksum mismatch. Stored: {check.expected}, actual: {checksum}.",
+        )
+
+
+def _check_document(
+    messages: SanityCheckMessages,
+    doc: Document,
+    stored_files: dict[str, StorageObjectInfo],
+) -> list[_ChecksumCheck]:
+    """
+    Checks the document against the listing of the stored files of its
+    tenant, removing the files it references from it.  Returns the stored
+    files whose checksum has to be verified.
+    """
+    checks = []
+
+    # Check sanity of the thumbnail
+    if stored_files.pop(doc.thumbnail_path, None) is None:
+        messages.error(doc.pk, "Thumbnail of document does not exist.")
+    # The other thumbnail sizes are optional
+    for size in THUMBNAIL_SIZES:
+        stored_files.pop(doc.get_thumbnail_path(size), None)
+
+    # Check sanity of the original file
+    info = stored_files.pop(doc.source_path, None)
+    if info is None:
+        messages.error(doc.pk, "Original of document does not exist.")
+    else:
+        checks.append(_ChecksumCheck(doc, info, doc.checksum, archive=False))
+
+    # Check sanity of the archive file.
+    if doc.archive_checksum is not None and doc.archive_filename is None:
+        messages.error(
+            doc.pk,
+            "Document has an archive file checksum, but no archive filename.",
+        )
+    elif doc.archive_checksum is None and doc.archive_filename is not None:
+        messages.error(
+            doc.pk,
+            "Document has an archive file, but its checksum is missing.",
+        )
+    elif doc.has_archive_version:
+        info = stored_files.pop(doc.archive_path, None)
+        if info is None:
+            messages.error(doc.pk, "Archived version of document does not exist.")
         else:
-            if source_path in present_files:
-                present_files.remove(source_path)
-            try:
-                checksum = hashlib.md5(source_path.read_bytes()).hexdigest()
-            except OSError as e:
-                messages.error(doc.pk, f"Cannot read original file of document: {e}")
+            checks.append(
+                _ChecksumCheck(doc, info, doc.archive_checksum, archive=True),
+            )
+
+    # other document checks
+    if not doc.has_content:
+        messages.info(doc.pk, "Document contains no OCR data")
+
+    return checks
+
+
+def _list_stored_files(backend: StorageBackend) -> dict[str, StorageObjectInfo]:
+    """
+    Lists the document files of the current tenant in one pass
+    """
+    return {
+        info.path: info
+        for info in backend.iter_files("documents/")
+        if PurePosixPath(info.path).name not in settings.IGNORABLE_FILES
+    }
+
+
+def _verify_checksums(
+    messages: SanityCheckMessages,
+    backend: StorageBackend,
+    tenant: Tenant,
+    checks: list[_ChecksumCheck],
+    pool: ThreadPoolExecutor,
+) -> None:
+    """
+    Reads the files in the pool and stores their checksums, so a later or
+    resumed run does not need to read them again
+    """
+    results = pool.map(
+        lambda check: _compute_checksum(backend, tenant, check.info.path),
+        checks,
+    )
+    verified = timezone.now()
+    records = []
+    for check, result in zip(checks, results):
+        if isinstance(result, OSError):
+            if check.archive:
+                messages.error(
+                    check.doc.pk,
+                    f"Cannot read archive file of document : {result}",
+                )
             else:
-                if checksum != doc.checksum:
-                    messages.error(
-                        doc.pk,
-                        "Checksum mismatch. "
-                        f"Stored: {doc.checksum}, actual: {checksum}.",
-                    )
+                messages.error(
+                    check.doc.pk,
+                    f"Cannot read original file of document: {result}",
+                )
+            continue
+        _compare_checksum(messages, check, result)
+        records.append(
+            StoredFileChecksum(
+                tenant=tenant,
+                path=check.info.path,
+                size=check.info.size,
+                modified=check.info.modified,
+                checksum=result,
+                verified=verified,
+            ),
+        )
 
-        # Check sanity of the archive file.
-        if doc.archive_checksum is not None and doc.archive_filename is None:
-            messages.error(
-                doc.pk,
-                "Document has an archive file checksum, but no archive filename.",
-            )
-        elif doc.archive_checksum is None and doc.archive_filename is not None:
-            messages.error(
-                doc.pk,
-                "Document has an archive file, but its checksum is missing.",
+    StoredFileChecksum.objects.bulk_create(
+        records,
+        update_conflicts=True,
+        unique_fields=["tenant", "path"],
+        update_fields=["size", "modified", "checksum", "verified"],
+    )
+
+
+def _check_tenant(
+    messages: SanityCheckMessages,
+    backend: StorageBackend,
+    documents: QuerySet[Document],
+    pool: ThreadPoolExecutor,
+    progress_bar: tqdm,
+    *,
+    resumed_from: datetime | None,
+    rehash_percent: float,
+) -> None:
+    """
+    Compares the documents of the current tenant with its stored files, which
+    are listed once, so no storage request is needed per document unless
+    a file has to be read
+    """
+    tenant = get_current_tenant()
+    stored_files = _list_stored_files(backend)
+    known_checksums = {
+        row[0]: row[1:]
+        for row in StoredFileChecksum.objects.values_list(
+            "path",
+            "size",
+            "modified",
+            "checksum",
+            "verified",
+        )
+    }
+
+    # Forget the checksums of files which no longer exist
+    removed = [path for path in known_checksums if path not in stored_files]
+    for i in range(0, len(removed), SANITY_CHECK_CHUNK_SIZE):
+        StoredFileChecksum.objects.filter(
+            path__in=removed[i : i + SANITY_CHECK_CHUNK_SIZE],
+        ).delete()
+
+    checks: list[_ChecksumCheck] = []
+    for doc in documents.filter(tenant=tenant).iterator(
+        chunk_size=SANITY_CHECK_CHUNK_SIZE,
+    ):
+        for check in _check_document(messages, doc, stored_files):
+            checksum = _get_known_checksum(
+                check.info,
+                known_checksums.get(check.info.path),
+                resumed_from=resumed_from,
+                rehash_percent=rehash_percent,
             )
-        elif doc.has_archive_version:
-            archive_path: Final[Path] = Path(doc.archive_path).resolve()
-            if not archive_path.exists() or not archive_path.is_file():
-                messages.error(doc.pk, "Archived version of document does not exist.")
+            if checksum is None:
+                checks.append(check)
             else:
-                if archive_path in present_files:
-                    present_files.remove(archive_path)
-                try:
-                    checksum = hashlib.md5(archive_path.read_bytes()).hexdigest()
-                except OSError as e:
-                    messages.error(
-                        doc.pk,
-                        f"Cannot read archive file of document : {e}",
-                    )
-                else:
-                    if checksum != doc.archive_checksum:
-                        messages.error(
-                            doc.pk,
-                            "Checksum mismatch of archived document. "
-                            f"Stored: {doc.archive_checksum}, "
-                            f"actual: {checksum}.",
-                        )
-
-        # other document checks
-        if not doc.content:
-            messages.info(doc.pk, "Document contains no OCR data")
-
-    for extra_file in present_files:
-        messages.warning(None, f"Orphaned file in media dir: {extra_file}")
+                _compare_checksum(messages, check, checksum)
+        progress_bar.update()
+
+        if len(checks) >= SANITY_CHECK_CHUNK_SIZE:
+            _verify_checksums(messages, backend, tenant, checks, pool)
+            checks = []
+
+    _verify_checksums(messages, backend, tenant, checks, pool)
+
+    for path in stored_files:
+        messages.warning(
+            None,
+            f"Orphaned file in media dir: {backend.get_path(path)}",
+        )
+
+
+def check_sanity(
+    *,
+    progress=False,
+    scheduled=True,
+    rehash_percent: float | None = None,
+) -> SanityCheckMessages:
+    """
+    Checks the files of all documents.  Files are only read if they changed
+    since the last run, or are picked for the random sample of
+    rehash_percent percent of the unchanged files, which defaults to
+    SANITY_CHECKER_REHASH_PERCENT.
+
+    A run which was interrupted is resumed, so files it read are not read again.
+    """
+    if rehash_percent is None:
+        rehash_percent = settings.SANITY_CHECKER_REHASH_PERCENT
+
+    paperless_task = (
+        PaperlessTask.objects.filter(
+            task_name=PaperlessTask.TaskName.CHECK_SANITY,
+            status=states.STARTED,
+        )
+        .order_by("-date_started")
+        .first()
+    )
+    if paperless_task is not None:
+        resumed_from = paperless_task.date_started
+        logger.info(f"Resuming the sanity check started at {resumed_from}")
+    else:
+        resumed_from = None
+        paperless_task = PaperlessTask.objects.create(
+            task_id=uuid.uuid4(),
+            type=PaperlessTask.TaskType.SCHEDULED_TASK
+            if scheduled
+            else PaperlessTask.TaskType.MANUAL_TASK,
+            task_name=PaperlessTask.TaskName.CHECK_SANITY,
+            status=states.STARTED,
+            date_created=timezone.now(),
+            date_started=timezone.now(),
+        )
+    messages = SanityCheckMessages()
+    backend = get_storage_backend()
+
+    # Only the fields needed to find and verify the files, the content of
+    # documents may be large
+    documents = (
+        Document.global_objects.only(
+            "pk",
+            "tenant",
+            "checksum",
+            "archive_checksum",
+            "filename",
+            "archive_filename",
+            "mime_type",
+            "storage_type",
+        )
+        .annotate(
+            has_content=ExpressionWrapper(
+                ~Q(content=""),
+                output_field=BooleanField(),
+            ),
+        )
+        .order_by("pk")
+    )
+
+    with (
+        tqdm(total=documents.count(), disable=not progress) as progress_bar,
+        ThreadPoolExecutor(max_workers=settings.SANITY_CHECKER_WORKERS) as pool,
+    ):
+        for tenant in Tenant.objects.order_by("pk"):
+            with tenant_context(tenant):
+                _check_tenant(
+                    messages,
+                    backend,
+                    documents,
+                    pool,
+                    progress_bar,
+                    resumed_from=resumed_from,
+                    rehash_percent=rehash_percent,
+                )
 
     paperless_task.status = states.SUCCESS if not messages.has_error else states.FAILURE
     # result is concatenated messages
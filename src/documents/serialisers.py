@@ -13,7 +13,6 @@ from celery import states
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.contrib.auth.models import User
-from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.core.validators import DecimalValidator
 from django.core.validators import EmailValidator
@@ -21,6 +20,7 @@ from django.core.validators import MaxLengthValidator
 from django.core.validators import RegexValidator
 from django.core.validators import integer_validator
 from django.db.models import Count
+from django.db.models import Manager
 from django.utils.crypto import get_random_string
 from django.utils.dateparse import parse_datetime
 from django.utils.text import slugify
@@ -32,9 +32,6 @@ from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.utils import extend_schema_serializer
 from drf_writable_nested.serializers import NestedUpdateMixin
 from guardian.core import ObjectPermissionChecker
-from guardian.shortcuts import get_users_with_perms
-from guardian.utils import get_group_obj_perms_model
-from guardian.utils import get_user_obj_perms_model
 from rest_framework import fields
 from rest_framework import serializers
 from rest_framework.fields import SerializerMethodField
@@ -67,8 +64,9 @@ from documents.models import WorkflowActionWebhook
 from documents.models import WorkflowTrigger
 from documents.parsers import is_mime_type_supported
 from documents.permissions import get_document_count_filter_for_user
-from documents.permissions import get_groups_with_only_permission
+from documents.permissions import get_object_perms_by_pk
 from documents.permissions import set_permissions_for_object
+from documents.tasks import repath_documents
 from documents.templating.filepath import validate_filepath_template_and_render
 from documents.templating.utils import convert_format_str_to_template_format
 from documents.validators import uri_validator
@@ -257,34 +255,69 @@ class OwnedObjectSerializer(
             except KeyError:
                 pass
 
+    def _get_permission_checker(self) -> ObjectPermissionChecker | None:
+        """
+        Returns the permission checker of the user, which is shared by all
+        serializers of the request so its cache is filled only once.
+        """
+        if self.user is None:
+            return None
+        checker = self.context.get("permission_checker")
+        if checker is None or checker.user != self.user:
+            checker = ObjectPermissionChecker(self.user)
+            self.context["permission_checker"] = checker
+        return checker
+
+    def prefetch_perms(self, objects: Iterable) -> None:
+        """
+        Resolves the permissions of all objects at once and puts them in the
+        context, so serializing them does not query permissions object by
+        object.  Only the permissions of the fields being serialized are
+        resolved.
+        """
+        objects = list(objects)
+        if not objects:
+            return
+
+        if "permissions" in self.fields or "is_shared_by_requester" in self.fields:
+            model_name = objects[0]._meta.model_name
+            shared_object_pks = self.context.setdefault("shared_object_pks", set())
+            for target in ("users", "groups"):
+                perms = get_object_perms_by_pk(objects, target)
+                shared_object_pks.update(perms)
+                for codename in ("view", "change"):
+                    self.context.setdefault(f"{target}_{codename}_perms", {}).update(
+                        {
+                            obj.pk: perms[obj.pk][f"{codename}_{model_name}"]
+                            for obj in objects
+                        },
+                    )
+
+        checker = self._get_permission_checker()
+        if (
+            "user_can_change" in self.fields
+            and checker is not None
+            and not self.user.is_superuser
+        ):
+            not_owned = [
+                obj
+                for obj in objects
+                if obj.owner_id is not None and obj.owner_id != self.user.pk
+            ]
+            if not_owned:
+                checker.prefetch_perms(not_owned)
+
     def _get_perms(self, obj, codename: str, target: Literal["users", "groups"]):
         """
-        Get the given permissions from context or from django-guardian.
+        Get the given permissions from context, resolving them if needed.
 
         :param codename: The permission codename, e.g. 'view' or 'change'
         :param target: 'users' or 'groups'
         """
         key = f"{target}_{codename}_perms"
-        cached = self.context.get(key, {}).get(obj.pk)
-        if cached is not None:
-            return list(cached)
-
-        # Permission not found in the context, get it from guardian
-        if target == "users":
-            return list(
-                get_users_with_perms(
-                    obj,
-                    only_with_perms_in=[f"{codename}_{obj.__class__.__name__.lower()}"],
-                    with_group_users=False,
-                ).values_list("id", flat=True),
-            )
-        else:  # groups
-            return list(
-                get_groups_with_only_permission(
-                    obj,
-                    codename=f"{codename}_{obj.__class__.__name__.lower()}",
-                ).values_list("id", flat=True),
-            )
+        if obj.pk not in self.context.get(key, {}):
+            self.prefetch_perms([obj])
+        return list(self.context[key][obj.pk])
 
     @extend_schema_field(
         field={
@@ -332,7 +365,7 @@ class OwnedObjectSerializer(
         }
 
     def get_user_can_change(self, obj) -> bool:
-        checker = ObjectPermissionChecker(self.user) if self.user is not None else None
+        checker = self._get_permission_checker()
         return (
             obj.owner is None
             or obj.owner == self.user
@@ -342,45 +375,11 @@ class OwnedObjectSerializer(
             )
         )
 
-    @staticmethod
-    def get_shared_object_pks(objects: Iterable):
-        """
-        Return the primary keys of the subset of objects that are shared.
-        """
-        try:
-            first_obj = next(iter(objects))
-        except StopIteration:
-            return set()
-
-        ctype = ContentType.objects.get_for_model(first_obj)
-        object_pks = list(obj.pk for obj in objects)
-        pk_type = type(first_obj.pk)
-
-        def get_pks_for_permission_type(model):
-            return map(
-                pk_type,  # coerce the pk to be the same type of the provided objects
-                model.objects.filter(
-                    content_type=ctype,
-                    object_pk__in=object_pks,
-                )
-                .values_list("object_pk", flat=True)
-                .distinct(),
-            )
-
-        UserObjectPermission = get_user_obj_perms_model()
-        GroupObjectPermission = get_group_obj_perms_model()
-        user_permission_pks = get_pks_for_permission_type(UserObjectPermission)
-        group_permission_pks = get_pks_for_permission_type(GroupObjectPermission)
-
-        return set(user_permission_pks) | set(group_permission_pks)
-
     def get_is_shared_by_requester(self, obj: Document) -> bool:
-        # First check the context to see if `shared_object_pks` is set by the parent.
-        shared_object_pks = self.context.get("shared_object_pks")
-        # If not just check if the current object is shared.
-        if shared_object_pks is None:
-            shared_object_pks = self.get_shared_object_pks([obj])
-        return obj.owner == self.user and obj.id in shared_object_pks
+        # Resolved together with the permissions, unless the parent did already
+        if obj.pk not in self.context.get("users_view_perms", {}):
+            self.prefetch_perms([obj])
+        return obj.owner == self.user and obj.pk in self.context["shared_object_pks"]
 
     permissions = SerializerMethodField(read_only=True, required=False)
     user_can_change = SerializerMethodField(read_only=True, required=False)
@@ -437,11 +436,12 @@ class OwnedObjectSerializer(
 
 
 class OwnedObjectListSerializer(serializers.ListSerializer):
-    def to_representation(self, documents):
-        self.child.context["shared_object_pks"] = self.child.get_shared_object_pks(
-            documents,
-        )
-        return super().to_representation(documents)
+    def to_representation(self, data):
+        if isinstance(data, Manager):
+            data = data.all()
+        data = list(data)
+        self.child.prefetch_perms(data)
+        return super().to_representation(data)
 
 
 class CorrespondentSerializer(MatchingModelSerializer, OwnedObjectSerializer):
@@ -463,6 +463,7 @@ class CorrespondentSerializer(MatchingModelSerializer, OwnedObjectSerializer):
             "user_can_change",
             "set_permissions",
         )
+        list_serializer_class = OwnedObjectListSerializer
 
 
 class DocumentTypeSerializer(MatchingModelSerializer, OwnedObjectSerializer):
@@ -481,6 +482,7 @@ class DocumentTypeSerializer(MatchingModelSerializer, OwnedObjectSerializer):
             "user_can_change",
             "set_permissions",
         )
+        list_serializer_class = OwnedObjectListSerializer
 
 
 class DeprecatedColors:
@@ -540,6 +542,7 @@ class TagSerializerVersion1(MatchingModelSerializer, OwnedObjectSerializer):
             "user_can_change",
             "set_permissions",
         )
+        list_serializer_class = OwnedObjectListSerializer
 
 
 class TagSerializer(MatchingModelSerializer, OwnedObjectSerializer):
@@ -612,6 +615,7 @@ class TagSerializer(MatchingModelSerializer, OwnedObjectSerializer):
             "parent",
             "children",
         )
+        list_serializer_class = OwnedObjectListSerializer
 
     def validate_color(self, color):
         regex = r"#[0-9a-fA-F]{6}"
@@ -1265,10 +1269,8 @@ class SearchResultListSerializer(serializers.ListSerializer):
         # Fetch all Document objects in the list in one SQL query.
         documents = self.child.fetch_documents(document_ids)
         self.child.context["documents"] = documents
-        # Also check if they are shared with other users / groups.
-        self.child.context["shared_object_pks"] = self.child.get_shared_object_pks(
-            documents.values(),
-        )
+        # Also resolve their permissions and if they are shared.
+        self.child.prefetch_perms(documents.values())
 
         return super().to_representation(hits)
 
@@ -2026,6 +2028,7 @@ class StoragePathSerializer(MatchingModelSerializer, OwnedObjectSerializer):
             "user_can_change",
             "set_permissions",
         )
+        list_serializer_class = OwnedObjectListSerializer
 
     def validate_path(self, path: str):
         converted_path = convert_format_str_to_template_format(path)
@@ -2046,10 +2049,19 @@ class StoragePathSerializer(MatchingModelSerializer, OwnedObjectSerializer):
         using it require a rename/move
         """
         doc_ids = [doc.id for doc in instance.documents.all()]
-        if doc_ids:
+        # Only the file names depend on the path, so if just the path changed
+        # the documents don't need to be updated and indexed again
+        path_changed = validated_data.get("path", instance.path) != instance.path
+        name_changed = validated_data.get("name", instance.name) != instance.name
+
+        instance = super().update(instance, validated_data)
+
+        if doc_ids and path_changed and not name_changed:
+            repath_documents.delay(doc_ids, tenant_id=instance.tenant_id)
+        elif doc_ids:
             bulk_edit.bulk_update_documents.delay(doc_ids)
 
-        return super().update(instance, validated_data)
+        return instance
 
 
 class UiSettingsViewSerializer(serializers.ModelSerializer):
@@ -26,14 +26,16 @@ from django.db import models
 from django.db.models import Q
 from django.dispatch import receiver
 from django.utils import timezone
-from filelock import FileLock
 from guardian.shortcuts import remove_perm
 
 from documents import matching
+from documents import statistics
 from documents.caching import clear_document_caches
-from documents.file_handling import create_source_path_directory
 from documents.file_handling import delete_empty_directories
 from documents.file_handling import generate_unique_filename
+from documents.file_handling import lock_document_files
+from documents.locks import get_lock_key
+from documents.locks import media_lock
 from documents.mail import EmailAttachment
 from documents.mail import send_email
 from documents.models import Correspondent
@@ -53,6 +55,7 @@ from documents.models import WorkflowTrigger
 from documents.permissions import get_objects_for_user_owner_aware
 from documents.permissions import set_permissions_for_object
 from documents.templating.workflows import parse_w_workflow_placeholders
+from documents.thumbnails import THUMBNAIL_SIZES
 
 if TYPE_CHECKING:
     from documents.classifier import DocumentClassifier
@@ -330,7 +333,17 @@ def cleanup_document_deletion(sender, instance, **kwargs):
 
     backend = get_storage_backend()
 
-    with FileLock(settings.MEDIA_LOCK):
+    lock_keys = [
+        get_lock_key(path, instance.tenant_id)
+        for path in (instance.source_path, instance.archive_path)
+        if path
+    ]
+    if settings.EMPTY_TRASH_DIR:
+        # The trash directory is shared by all tenants
+        lock_keys.append(
+            get_lock_key(f"trash/{Path(instance.source_path).name}", None),
+        )
+    with media_lock(*lock_keys):
         # Handle trash directory (only for filesystem backend)
         if settings.EMPTY_TRASH_DIR and isinstance(instance.source_path, str):
             # For filesystem backend, we can move to trash
@@ -377,6 +390,19 @@ def cleanup_document_deletion(sender, instance, **kwargs):
         if not settings.EMPTY_TRASH_DIR and instance.source_path:
             files_to_delete.append(instance.source_path)
 
+        # The other thumbnail sizes don't exist for every document
+        for size in THUMBNAIL_SIZES:
+            variant_path = instance.get_thumbnail_path(size)
+            try:
+                if backend.exists(variant_path):
+                    backend.delete(variant_path)
+                    logger.debug(f"Deleted file {variant_path}.")
+            except Exception as e:
+                logger.warning(
+                    f"While deleting document {instance!s}, the file "
+                    f"{variant_path} could not be deleted: {e}",
+                )
+
         for logical_path in files_to_delete:
             if logical_path:
                 try:
@@ -429,17 +455,21 @@ def update_filename_and_move_files(
     instance: Document | CustomFieldInstance,
     **kwargs,
 ):
+    from documents.storage.factory import get_storage_backend
+
     if isinstance(instance, CustomFieldInstance):
         instance = instance.document
 
-    def validate_move(instance, old_path: Path, new_path: Path):
-        if not old_path.is_file():
+    backend = get_storage_backend()
+
+    def validate_move(instance, old_path: str, new_path: str):
+        if not backend.exists(old_path):
             # Can't do anything if the old file does not exist anymore.
             msg = f"Document {instance!s}: File {old_path} doesn't exist."
             logger.fatal(msg)
             raise CannotMoveFilesException(msg)
 
-        if new_path.is_file():
+        if backend.exists(new_path):
             # Can't do anything if the new file already exists. Skip updating file.
             msg = f"Document {instance!s}: Cannot rename file since target path {new_path} already exists."
             logger.warning(msg)
@@ -456,14 +486,12 @@ def update_filename_and_move_files(
         # This will in turn cause this logic to move the file where it belongs.
         return
 
-    with FileLock(settings.MEDIA_LOCK):
+    # If this was waiting for the lock, the filename or archive_filename
+    # of this document may have been updated.  This happens if multiple updates
+    # get queued from the UI for the same document
+    # So the lock freshens up the data before doing anything
+    with lock_document_files(instance):
         try:
-            # If this was waiting for the lock, the filename or archive_filename
-            # of this document may have been updated.  This happens if multiple updates
-            # get queued from the UI for the same document
-            # So freshen up the data before doing anything
-            instance.refresh_from_db()
-
             old_filename = instance.filename
             old_source_path = instance.source_path
 
@@ -494,15 +522,15 @@ def update_filename_and_move_files(
                 )
                 return
 
+            # The storage backend renames the files, without copying them
+            # through this process where the storage system supports it
             if move_original:
                 validate_move(instance, old_source_path, instance.source_path)
-                create_source_path_directory(instance.source_path)
-                shutil.move(old_source_path, instance.source_path)
+                backend.move(old_source_path, instance.source_path)
 
             if move_archive:
                 validate_move(instance, old_archive_path, instance.archive_path)
-                create_source_path_directory(instance.archive_path)
-                shutil.move(old_archive_path, instance.archive_path)
+                backend.move(old_archive_path, instance.archive_path)
 
             # Don't save() here to prevent infinite recursion.
             Document.global_objects.filter(pk=instance.pk).update(
@@ -516,19 +544,19 @@ def update_filename_and_move_files(
         except (OSError, DatabaseError, CannotMoveFilesException) as e:
             logger.warning(f"Exception during file handling: {e}")
             # This happens when either:
-            #  - moving the files failed due to file system errors
+            #  - moving the files failed due to storage errors
             #  - saving to the database failed due to database errors
             # In both cases, we need to revert to the original state.
 
             # Try to move files to their original location.
             try:
-                if move_original and instance.source_path.is_file():
+                if move_original and backend.exists(instance.source_path):
                     logger.info("Restoring previous original path")
-                    shutil.move(instance.source_path, old_source_path)
+                    backend.move(instance.source_path, old_source_path)
 
-                if move_archive and instance.archive_path.is_file():
+                if move_archive and backend.exists(instance.archive_path):
                     logger.info("Restoring previous archive path")
-                    shutil.move(instance.archive_path, old_archive_path)
+                    backend.move(instance.archive_path, old_archive_path)
 
             except Exception:
                 # This is fine, since:
@@ -545,19 +573,25 @@ def update_filename_and_move_files(
             instance.filename = old_filename
             instance.archive_filename = old_archive_filename
 
-        # finally, remove any empty sub folders. This will do nothing if
-        # something has failed above.
-        if not old_source_path.is_file():
-            delete_empty_directories(
-                Path(old_source_path).parent,
-                root=settings.ORIGINALS_DIR,
-            )
+        # finally, remove any empty sub folders (only for filesystem backend).
+        # This will do nothing if something has failed above.
+        if not backend.exists(old_source_path):
+            try:
+                delete_empty_directories(
+                    Path(backend.get_path(old_source_path)).parent,
+                    root=settings.ORIGINALS_DIR,
+                )
+            except Exception:
+                pass  # May not be filesystem backend
 
-        if instance.has_archive_version and not old_archive_path.is_file():
-            delete_empty_directories(
-                Path(old_archive_path).parent,
-                root=settings.ARCHIVE_DIR,
-            )
+        if instance.has_archive_version and not backend.exists(old_archive_path):
+            try:
+                delete_empty_directories(
+                    Path(backend.get_path(old_archive_path)).parent,
+                    root=settings.ARCHIVE_DIR,
+                )
+            except Exception:
+                pass  # May not be filesystem backend
 
 
 # should be disabled in /src/documents/management/commands/document_importer.py handle
@@ -617,6 +651,67 @@ def cleanup_custom_field_deletion(sender, instance: CustomField, **kwargs):
         )
 
 
+def _changes_counted_fields(update_fields) -> bool:
+    return update_fields is None or not statistics.COUNTED_FIELDS.isdisjoint(
+        update_fields,
+    )
+
+
+@receiver(models.signals.pre_save, sender=Document)
+def remember_document_statistics(
+    sender,
+    instance: Document,
+    update_fields=None,
+    **kwargs,
+):
+    """
+    Remembers what the document added to the statistics before it is saved,
+    so only the change is counted
+    """
+    if instance.pk is not None and _changes_counted_fields(update_fields):
+        instance._counted_state = statistics.get_stored_state(instance.pk)
+
+
+@receiver(models.signals.post_save, sender=Document)
+def update_document_statistics(
+    sender,
+    instance: Document,
+    update_fields=None,
+    **kwargs,
+):
+    # post_save is also sent without saving, to trigger its other handlers
+    if not kwargs.get("created") and "_counted_state" not in instance.__dict__:
+        return
+    if _changes_counted_fields(update_fields):
+        statistics.record_change(
+            instance.tenant_id,
+            instance.__dict__.pop("_counted_state", None),
+            statistics.get_counted_state(instance),
+        )
+
+
+@receiver(models.signals.pre_delete, sender=Document)
+def remember_deleted_document_statistics(sender, instance: Document, **kwargs):
+    # Deferred content can not be loaded anymore once the document is deleted
+    instance._counted_state = statistics.get_counted_state(instance)
+
+
+@receiver(models.signals.post_delete, sender=Document)
+def remove_document_statistics(sender, instance: Document, **kwargs):
+    # Documents moved to the trash are still counted, until they are deleted
+    statistics.record_change(
+        instance.tenant_id,
+        instance.__dict__.pop("_counted_state", None)
+        or statistics.get_counted_state(instance),
+        None,
+    )
+
+
+@receiver(models.signals.pre_delete, sender=User)
+def forget_user_statistics(sender, instance: User, **kwargs):
+    statistics.forget_owner(instance)
+
+
 @receiver(models.signals.post_delete, sender=User)
 @receiver(models.signals.post_delete, sender=Group)
 def cleanup_user_deletion(sender, instance: User | Group, **kwargs):
@@ -668,6 +763,16 @@ def add_to_index(sender, document, **kwargs):
     index.add_or_update_document(document)
 
 
+def check_near_duplicates(sender, document: Document, **kwargs):
+    from documents import similarity
+
+    for pk, ratio in similarity.find_similar_documents(document):
+        logger.info(
+            f"Document {document} is a near duplicate of document {pk} "
+            f"(confidence {ratio:.3f})",
+        )
+
+
 def run_workflows_added(
     sender,
     document: Document,
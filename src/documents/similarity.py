@@ -0,0 +1,233 @@
+"""
+Finding documents whose content is almost the same without comparing every
+pair of documents.  The content is split into overlapping character shingles,
+and the MinHash signature of the shingles of each document is stored, see
+DocumentSignature.  Documents whose signatures agree in all rows of any band
+share a lot of shingles and become candidates (locality-sensitive hashing),
+and only candidates are compared with rapidfuzz.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import zlib
+from collections import defaultdict
+from itertools import combinations
+from typing import TYPE_CHECKING
+from typing import Final
+
+import numpy as np
+from rapidfuzz import fuzz
+from rapidfuzz import utils
+
+from documents.models import Document
+from documents.models import DocumentSignature
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from django.db.models import QuerySet
+
+logger = logging.getLogger("paperless.similarity")
+
+DEFAULT_RATIO: Final[float] = 85.0
+
+SHINGLE_SIZE: Final[int] = 5
+
+# With 32 bands of 4 rows, documents whose shingles are 60% the same are
+# candidates with a probability of 99%, those only 20% the same with 5%
+BANDS: Final[int] = 32
+ROWS: Final[int] = 4
+NUM_PERM: Final[int] = BANDS * ROWS
+
+_PRIME: Final[int] = (1 << 31) - 1
+# Fixed, so stored signatures stay comparable
+_RANDOM = np.random.default_rng(seed=1)
+_A = _RANDOM.integers(1, _PRIME, size=NUM_PERM, dtype=np.uint64)[:, np.newaxis]
+_B = _RANDOM.integers(0, _PRIME, size=NUM_PERM, dtype=np.uint64)[:, np.newaxis]
+# Shingles hashed at once, which limits the memory needed for long content
+_CHUNK_SIZE: Final[int] = 4096
+
+
+def process_content(content: str) -> str:
+    """
+    Normalizes the content the same way before hashing and comparing it, lower
+    case, without punctuation and surrounding whitespace
+    """
+    return utils.default_process(content)
+
+
+def get_content_hash(processed: str) -> str:
+    return hashlib.blake2b(processed.encode(), digest_size=16).hexdigest()
+
+
+def get_signature(processed: str) -> bytes | None:
+    """
+    Returns the MinHash signature of the shingles of the processed content, or
+    None if there is no content
+    """
+    if not processed:
+        return None
+    shingles = {
+        processed[i : i + SHINGLE_SIZE]
+        for i in range(max(len(processed) - SHINGLE_SIZE + 1, 1))
+    }
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) % _PRIME for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    signature = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), _CHUNK_SIZE):
+        chunk = hashes[np.newaxis, start : start + _CHUNK_SIZE]
+        np.minimum(signature, ((_A * chunk + _B) % _PRIME).min(axis=1), out=signature)
+    return signature.astype(np.uint32).tobytes()
+
+
+def get_ratio(first: str, second: str) -> float:
+    """
+    The rapidfuzz ratio of processed content, which confirms candidates
+    """
+    return fuzz.ratio(first, second)
+
+
+def _get_bands(signatures: Iterable[bytes]) -> np.ndarray:
+    matrix = np.frombuffer(b"".join(signatures), dtype=np.uint32)
+    return matrix.reshape(-1, BANDS, ROWS)
+
+
+def get_candidates(signatures: dict[int, bytes]) -> set[tuple[int, int]]:
+    """
+    Returns the pairs of documents whose signatures agree in any band, with
+    the lower primary key first
+    """
+    pks = sorted(signatures)
+    if not pks:
+        return set()
+    bands = _get_bands(signatures[pk] for pk in pks)
+    candidates = set()
+    for band in range(BANDS):
+        buckets: dict[bytes, list[int]] = defaultdict(list)
+        for pk, rows in zip(pks, bands[:, band]):
+            buckets[rows.tobytes()].append(pk)
+        for bucket in buckets.values():
+            candidates.update(combinations(bucket, 2))
+    return candidates
+
+
+def update_signature(document: Document, processed: str) -> bytes | None:
+    """
+    Stores the signature of the processed content of the document, unless it
+    is stored already
+    """
+    content_hash = get_content_hash(processed)
+    stored = DocumentSignature.objects.filter(document=document).first()
+    if stored is not None and stored.content_hash == content_hash:
+        return bytes(stored.signature)
+    signature = get_signature(processed)
+    if signature is None:
+        if stored is not None:
+            stored.delete()
+        return None
+    DocumentSignature.objects.update_or_create(
+        document=document,
+        defaults={"content_hash": content_hash, "signature": signature},
+        create_defaults={
+            "tenant_id": document.tenant_id,
+            "content_hash": content_hash,
+            "signature": signature,
+        },
+    )
+    return signature
+
+
+def update_signatures(documents: QuerySet[Document]) -> dict[int, bytes]:
+    """
+    Stores the signatures of the documents whose content changed since their
+    signature was stored and returns the signatures of all documents with
+    content
+    """
+    stored = {
+        pk: (content_hash, bytes(signature))
+        for pk, content_hash, signature in DocumentSignature.objects.filter(
+            document__in=documents,
+        ).values_list("document_id", "content_hash", "signature")
+    }
+    signatures = {}
+    changed = []
+    for pk, tenant_id, content in documents.values_list(
+        "pk",
+        "tenant_id",
+        "content",
+    ).iterator(chunk_size=500):
+        processed = process_content(content)
+        content_hash = get_content_hash(processed)
+        if pk in stored and stored[pk][0] == content_hash:
+            signatures[pk] = stored[pk][1]
+            continue
+        signature = get_signature(processed)
+        if signature is None:
+            continue
+        signatures[pk] = signature
+        changed.append(
+            DocumentSignature(
+                document_id=pk,
+                tenant_id=tenant_id,
+                content_hash=content_hash,
+                signature=signature,
+            ),
+        )
+
+    DocumentSignature.objects.filter(
+        document_id__in=set(stored) - set(signatures),
+    ).delete()
+    DocumentSignature.objects.bulk_create(
+        changed,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["document"],
+        update_fields=["content_hash", "signature"],
+    )
+    if changed:
+        logger.debug(f"Updated the signatures of {len(changed)} documents")
+    return signatures
+
+
+def find_similar_documents(
+    document: Document,
+    ratio: float = DEFAULT_RATIO,
+) -> list[tuple[int, float]]:
+    """
+    Stores the signature of the document and returns the documents whose
+    content matches it with at least the ratio, with the ratio
+    """
+    processed = process_content(document.content)
+    signature = update_signature(document, processed)
+    if signature is None:
+        return []
+
+    others = list(
+        DocumentSignature.objects.exclude(document=document).values_list(
+            "document_id",
+            "signature",
+        ),
+    )
+    if not others:
+        return []
+    agree = _get_bands(bytes(other) for _, other in others) == _get_bands(
+        [signature],
+    )
+    candidates = [
+        pk for (pk, _), match in zip(others, agree.all(axis=2).any(axis=1)) if match
+    ]
+
+    result = []
+    for pk, content in Document.objects.filter(pk__in=candidates).values_list(
+        "pk",
+        "content",
+    ):
+        match = get_ratio(processed, process_content(content))
+        if match >= ratio:
+            result.append((pk, match))
+    return sorted(result)
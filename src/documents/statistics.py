@@ -0,0 +1,269 @@
+"""
+The document statistics of the dashboard, which are kept per tenant, owner
+and mime type as documents are saved and deleted, see DocumentStatistics.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+from collections import Counter
+from typing import TYPE_CHECKING
+
+from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Sum
+from django.db.models.functions import Length
+from guardian.shortcuts import get_objects_for_user
+
+from documents.models import Document
+from documents.models import DocumentStatistics
+from paperless.tenants.utils import tenant_context
+
+if TYPE_CHECKING:
+    from django.contrib.auth.models import User
+    from django.db.models import QuerySet
+
+    from paperless.tenants.models import Tenant
+
+logger = logging.getLogger("paperless.statistics")
+
+# Changing other fields does not change the statistics
+COUNTED_FIELDS = frozenset({"owner", "owner_id", "mime_type", "content"})
+
+
+@dataclasses.dataclass(frozen=True)
+class CountedState:
+    """
+    What a document adds to the statistics
+    """
+
+    owner_id: int | None
+    mime_type: str
+    characters: int
+
+
+def get_counted_state(document: Document) -> CountedState:
+    if "content" in document.get_deferred_fields():
+        characters = (
+            Document.global_objects.filter(pk=document.pk)
+            .values_list(Length("content"), flat=True)
+            .get()
+        )
+    else:
+        characters = len(document.content)
+    return CountedState(document.owner_id, document.mime_type, characters or 0)
+
+
+def get_stored_state(document_id: int) -> CountedState | None:
+    """
+    Returns what the document adds to the statistics as currently stored, or
+    None if it is not stored yet
+    """
+    row = (
+        Document.global_objects.filter(pk=document_id)
+        .values_list("owner_id", "mime_type", Length("content"))
+        .first()
+    )
+    return CountedState(row[0], row[1], row[2] or 0) if row is not None else None
+
+
+def _add(
+    tenant_id: int,
+    owner_id: int | None,
+    mime_type: str,
+    documents: int,
+    characters: int,
+) -> None:
+    if not documents and not characters:
+        return
+    rows = DocumentStatistics._base_manager.filter(
+        tenant_id=tenant_id,
+        owner_id=owner_id,
+        mime_type=mime_type,
+    )
+    changes = {
+        "document_count": F("document_count") + documents,
+        "character_count": F("character_count") + characters,
+    }
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DocumentStatistics._base_manager.create(
+                tenant_id=tenant_id,
+                owner_id=owner_id,
+                mime_type=mime_type,
+                document_count=documents,
+                character_count=characters,
+            )
+    except IntegrityError:
+        # Created by another process in the meantime
+        rows.update(**changes)
+
+
+def record_change(
+    tenant_id: int,
+    before: CountedState | None,
+    after: CountedState | None,
+) -> None:
+    """
+    Updates the statistics of the tenant for a document whose counted state
+    changed from before to after, which are None if it did not or does no
+    longer exist
+    """
+    if before == after:
+        return
+    changes: Counter[tuple[int | None, str]] = Counter()
+    characters: Counter[tuple[int | None, str]] = Counter()
+    if before is not None:
+        changes[(before.owner_id, before.mime_type)] -= 1
+        characters[(before.owner_id, before.mime_type)] -= before.characters
+    if after is not None:
+        changes[(after.owner_id, after.mime_type)] += 1
+        characters[(after.owner_id, after.mime_type)] += after.characters
+    # Rows are always updated in the same order, so concurrent changes can not
+    # deadlock
+    for key in sorted(changes, key=lambda key: (key[0] or 0, key[1])):
+        _add(tenant_id, *key, changes[key], characters[key])
+
+
+def _count(documents: QuerySet[Document], *fields: str) -> QuerySet:
+    return (
+        documents.order_by()
+        .values_list(*fields)
+        .annotate(
+            document_count=Count("id"),
+            character_count=Sum(Length("content")),
+        )
+    )
+
+
+def update_owner(documents: QuerySet[Document], owner: User | None) -> None:
+    """
+    Sets the owner of the documents and moves their statistics to the owner
+    """
+    with transaction.atomic():
+        moved = list(
+            _count(
+                documents.exclude(owner=owner),
+                "tenant_id",
+                "owner_id",
+                "mime_type",
+            ),
+        )
+        documents.update(owner=owner)
+        for tenant_id, owner_id, mime_type, count, characters in moved:
+            _add(tenant_id, owner_id, mime_type, -count, -(characters or 0))
+            _add(
+                tenant_id,
+                owner.pk if owner is not None else None,
+                mime_type,
+                count,
+                characters or 0,
+            )
+
+
+def forget_owner(owner: User) -> None:
+    """
+    Moves the statistics of a user who is deleted to documents without owner,
+    which the documents of the user become
+    """
+    for row in DocumentStatistics._base_manager.filter(owner=owner):
+        _add(
+            row.tenant_id,
+            None,
+            row.mime_type,
+            row.document_count,
+            row.character_count,
+        )
+
+
+def recompute_statistics(tenant: Tenant) -> None:
+    """
+    Counts the documents of the tenant again and corrects its statistics
+    """
+    with tenant_context(tenant), transaction.atomic():
+        # Changes by others wait until the corrected counts are committed, and
+        # are counted either here or by themselves afterwards
+        rows = list(DocumentStatistics.objects.select_for_update())
+        exact = {
+            (owner_id, mime_type): (count, characters or 0)
+            for owner_id, mime_type, count, characters in _count(
+                Document.objects.all(),
+                "owner_id",
+                "mime_type",
+            )
+        }
+        for row in rows:
+            counts = exact.pop((row.owner_id, row.mime_type), (0, 0))
+            if (row.document_count, row.character_count) != counts:
+                logger.debug(
+                    f"Correcting statistics of owner {row.owner_id} and "
+                    f"{row.mime_type}: "
+                    f"{(row.document_count, row.character_count)} != {counts}",
+                )
+                row.document_count, row.character_count = counts
+                row.save(update_fields=["document_count", "character_count"])
+        DocumentStatistics.objects.bulk_create(
+            [
+                DocumentStatistics(
+                    tenant=tenant,
+                    owner_id=owner_id,
+                    mime_type=mime_type,
+                    document_count=count,
+                    character_count=characters,
+                )
+                for (owner_id, mime_type), (count, characters) in exact.items()
+            ],
+        )
+
+
+def get_document_statistics(user: User | None) -> dict:
+    """
+    Returns the number of documents of the current tenant the user may view,
+    their characters of content and their number by mime type.  Documents the
+    user does not own but may view through permissions are counted directly.
+    """
+    rows = DocumentStatistics.objects.all()
+    shared = Document.objects.none()
+    if user is not None and not user.is_superuser:
+        rows = rows.filter(Q(owner=user) | Q(owner__isnull=True))
+        shared = (
+            get_objects_for_user(
+                user=user,
+                perms="documents.view_document",
+                klass=Document,
+                accept_global_perms=False,
+            )
+            .exclude(owner=user)
+            .exclude(owner__isnull=True)
+        )
+
+    counts: Counter[str] = Counter()
+    character_count = 0
+    for mime_type, count, characters in [
+        *rows.order_by()
+        .values_list("mime_type")
+        .annotate(
+            Sum("document_count"),
+            Sum("character_count"),
+        ),
+        *_count(shared, "mime_type"),
+    ]:
+        counts[mime_type] += count
+        character_count += characters or 0
+
+    documents_total = counts.total()
+    return {
+        "documents_total": documents_total,
+        "document_file_type_counts": [
+            {"mime_type": mime_type, "mime_type_count": count}
+            for mime_type, count in counts.most_common()
+            if count > 0
+        ],
+        "character_count": character_count if documents_total > 0 else None,
+    }
@@ -4,8 +4,12 @@ Azure Blob Storage backend implementation.
 This backend stores documents in Azure Blob Storage containers.
 """
 
+import io
 import logging
+import time
+from collections.abc import Iterator
 from io import BytesIO
+from typing import TYPE_CHECKING
 from typing import BinaryIO
 
 from azure.core.exceptions import AzureError
@@ -14,9 +18,49 @@ from azure.storage.blob import BlobServiceClient
 from django.conf import settings
 
 from documents.storage.base import StorageBackend
+from documents.storage.base import StorageObjectInfo
+
+if TYPE_CHECKING:
+    from azure.storage.blob import StorageStreamDownloader
 
 logger = logging.getLogger(__name__)
 
+# Seconds between checks of a pending server-side copy
+COPY_POLL_INTERVAL = 0.5
+
+
+class AzureBlobReader(io.RawIOBase):
+    """
+    Read-only, non-seekable file object over a blob download stream.
+
+    Pulls one chunk at a time from the downloader, so at most a single chunk
+    of the blob is held in memory.
+    """
+
+    def __init__(self, downloader: "StorageStreamDownloader") -> None:
+        self._downloader = downloader
+        self._chunks = downloader.chunks()
+        self._buffer = memoryview(b"")
+
+    @property
+    def size(self) -> int:
+        """Total size of the blob in bytes."""
+        return self._downloader.size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        count = min(len(buffer), len(self._buffer))
+        buffer[:count] = self._buffer[:count]
+        self._buffer = self._buffer[count:]
+        return count
+
 
 class AzureBlobStorageBackend(StorageBackend):
     """
@@ -32,8 +76,13 @@ class AzureBlobStorageBackend(StorageBackend):
         self.container_name = settings.PAPERLESS_AZURE_CONTAINER_NAME
 
         try:
+            # Limit the size of each GET so streaming downloads only buffer
+            # a single chunk, instead of the SDK default of 32 MiB up front
+            chunk_size = self.get_chunk_size()
             self.blob_service_client = BlobServiceClient.from_connection_string(
                 self.connection_string,
+                max_single_get_size=chunk_size,
+                max_chunk_get_size=chunk_size,
             )
             self.container_client = self.blob_service_client.get_container_client(
                 self.container_name,
@@ -113,6 +162,104 @@ class AzureBlobStorageBackend(StorageBackend):
             logger.error(f"[azure_blob] Failed to retrieve file {path}: {e}")
             raise OSError(f"Azure retrieval operation failed: {e}") from e
 
+    def _download(
+        self,
+        path: str,
+        offset: int | None = None,
+        length: int | None = None,
+    ) -> "StorageStreamDownloader":
+        """
+        Start a streaming download of the blob at the given logical path.
+
+        Only the first chunk is fetched before this returns; the rest is
+        fetched as the downloader is consumed. If offset is given, only the
+        requested range is downloaded.
+        """
+        blob_name = self.get_path(path)
+        blob_client = self.container_client.get_blob_client(blob_name)
+
+        try:
+            downloader = blob_client.download_blob(
+                offset=offset,
+                length=length,
+                max_concurrency=1,
+            )
+            logger.debug(f"[azure_blob] Opened blob stream: {path} -> {blob_name}")
+            return downloader
+        except ResourceNotFoundError:
+            raise FileNotFoundError(f"File not found in Azure: {path}")
+        except AzureError as e:
+            logger.error(f"[azure_blob] Failed to open file {path}: {e}")
+            raise OSError(f"Azure retrieval operation failed: {e}") from e
+
+    def open(self, path: str) -> BinaryIO:
+        """
+        Open a file at the specified logical path for streaming reads.
+
+        Args:
+            path: Logical path to open
+
+        Returns:
+            Buffered, non-seekable file object reading the blob chunk by chunk
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            OSError: If the download cannot be started
+        """
+        return io.BufferedReader(
+            AzureBlobReader(self._download(path)),
+            buffer_size=self.get_chunk_size(),
+        )
+
+    def iter_chunks(
+        self,
+        path: str,
+        chunk_size: int | None = None,
+        *,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Iterate over the content of a blob, or a byte range of it, in chunks.
+
+        Args:
+            path: Logical path to read
+            chunk_size: Maximum size of each chunk in bytes. Defaults to
+                settings.PAPERLESS_STORAGE_CHUNK_SIZE.
+            offset: Position of the first byte to read
+            length: Maximum number of bytes to read, or None to read until the
+                end of the blob
+
+        Yields:
+            Consecutive, non-empty chunks of the blob content
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            OSError: If the download fails
+
+        Note:
+            Ranges are requested from Azure directly, so only the requested
+            bytes are transferred.
+        """
+        if length == 0:
+            return
+        chunk_size = self.get_chunk_size(chunk_size)
+        # The SDK requires an offset whenever a length is given
+        ranged = bool(offset) or length is not None
+        downloader = self._download(
+            path,
+            offset=offset if ranged else None,
+            length=length,
+        )
+        try:
+            for chunk in downloader.chunks():
+                # The SDK chunk size is fixed per client, so re-slice if needed
+                for start in range(0, len(chunk), chunk_size):
+                    yield chunk[start : start + chunk_size]
+        except AzureError as e:
+            logger.error(f"[azure_blob] Failed to stream file {path}: {e}")
+            raise OSError(f"Azure retrieval operation failed: {e}") from e
+
     def delete(self, path: str) -> None:
         """
         Delete a file at the specified logical path.
@@ -155,6 +302,139 @@ class AzureBlobStorageBackend(StorageBackend):
             logger.error(f"[azure_blob] Failed to check existence of {path}: {e}")
             return False
 
+    def copy(self, source: str, destination: str) -> None:
+        """
+        Copy a blob to another logical path within the storage account.
+
+        Args:
+            source: Logical path of the file to copy
+            destination: Logical path of the copy
+
+        Raises:
+            FileNotFoundError: If the source file doesn't exist
+            FileExistsError: If the destination file already exists
+            OSError: If the copy operation fails
+
+        Note:
+            The copy is done by Azure, the content is never downloaded.
+            Copies within a storage account usually complete immediately,
+            otherwise this waits until Azure reports the copy as finished.
+        """
+        source_client = self.container_client.get_blob_client(self.get_path(source))
+        destination_client = self.container_client.get_blob_client(
+            self.get_path(destination),
+        )
+
+        try:
+            if destination_client.exists():
+                raise FileExistsError(f"File already exists in Azure: {destination}")
+
+            copy = destination_client.start_copy_from_url(source_client.url)
+            status = copy["copy_status"]
+            while status == "pending":
+                time.sleep(COPY_POLL_INTERVAL)
+                status = destination_client.get_blob_properties().copy.status
+            if status != "success":
+                raise OSError(f"Azure copy of {source} ended with status {status}")
+
+            logger.debug(f"[azure_blob] Copied file: {source} -> {destination}")
+        except ResourceNotFoundError:
+            raise FileNotFoundError(f"File not found in Azure: {source}")
+        except AzureError as e:
+            logger.error(f"[azure_blob] Failed to copy file {source}: {e}")
+            raise OSError(f"Azure copy operation failed: {e}") from e
+
+    def move(self, source: str, destination: str) -> None:
+        """
+        Move a blob to another logical path within the storage account.
+
+        Args:
+            source: Logical path of the file to move
+            destination: Logical path to move the file to
+
+        Raises:
+            FileNotFoundError: If the source file doesn't exist
+            FileExistsError: If the destination file already exists
+            OSError: If the move operation fails
+
+        Note:
+            Blob storage has no rename, so the blob is copied by Azure and
+            the source deleted once the copy has completed.
+        """
+        self.copy(source, destination)
+        self.delete(source)
+        logger.debug(f"[azure_blob] Moved file: {source} -> {destination}")
+
+    def stat(self, path: str) -> StorageObjectInfo:
+        """
+        Get metadata about a blob from its properties, without downloading it.
+
+        Args:
+            path: Logical path to inspect
+
+        Returns:
+            StorageObjectInfo with size, last modified time and, if Azure has
+            one for the blob, the Content-MD5 hash
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            OSError: If the properties cannot be read
+        """
+        blob_name = self.get_path(path)
+        blob_client = self.container_client.get_blob_client(blob_name)
+
+        try:
+            properties = blob_client.get_blob_properties()
+        except ResourceNotFoundError:
+            raise FileNotFoundError(f"File not found in Azure: {path}")
+        except AzureError as e:
+            logger.error(f"[azure_blob] Failed to get properties of {path}: {e}")
+            raise OSError(f"Azure metadata operation failed: {e}") from e
+
+        content_md5 = properties.content_settings.content_md5
+        return StorageObjectInfo(
+            path=path,
+            size=properties.size,
+            modified=properties.last_modified,
+            content_hash=bytes(content_md5).hex() if content_md5 else None,
+        )
+
+    def iter_files(self, prefix: str = "") -> Iterator[StorageObjectInfo]:
+        """
+        Iterate over the blobs of the current tenant whose logical path starts
+        with the prefix.
+
+        Args:
+            prefix: Logical path prefix
+
+        Yields:
+            StorageObjectInfo with size, last modified time and, if Azure has
+            one for the blob, the Content-MD5 hash
+
+        Raises:
+            OSError: If the blobs cannot be listed
+
+        Note:
+            Blobs are listed by pages of up to 5000, each a single request.
+        """
+        tenant_prefix = f"{self._get_tenant_prefix()}/"
+        name_prefix = self._resolve_path(f"{tenant_prefix}{prefix}")
+
+        try:
+            for blob in self.container_client.list_blobs(
+                name_starts_with=name_prefix,
+            ):
+                content_md5 = blob.content_settings.content_md5
+                yield StorageObjectInfo(
+                    path=blob.name.removeprefix(tenant_prefix),
+                    size=blob.size,
+                    modified=blob.last_modified,
+                    content_hash=bytes(content_md5).hex() if content_md5 else None,
+                )
+        except AzureError as e:
+            logger.error(f"[azure_blob] Failed to list files under {prefix}: {e}")
+            raise OSError(f"Azure listing operation failed: {e}") from e
+
     def _resolve_path(self, tenant_path: str) -> str:
         """
         Resolve a tenant-prefixed path to an Azure blob name.
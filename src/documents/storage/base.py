@@ -6,6 +6,8 @@ This module defines the interface that all storage backend implementations must
 To implement a new storage backend:
 1. Create a class extending StorageBackend
 2. Implement all abstract methods (store, retrieve, delete, exists, get_path, initialize)
+   and, where the storage system supports it, override the streaming methods
+   (open, iter_chunks) so large files are never fully materialized in memory
 3. Register the backend in documents.storage.factory using register_backend()
 4. Add configuration settings in paperless.settings if needed
 5. Update configuration validation in paperless.settings._validate_storage_backend_config()
@@ -18,16 +20,41 @@ Example:
         # ... implement other methods
 """
 
+import hashlib
 import logging
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
 from typing import BinaryIO
 
+from django.conf import settings
+
 from paperless.tenants.utils import get_current_tenant
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class StorageObjectInfo:
+    """
+    Metadata about a stored file, obtained without reading its content.
+
+    Attributes:
+        path: Logical path of the file
+        size: Size of the file in bytes
+        modified: Last modification time (timezone aware), if known
+        content_hash: Hex encoded MD5 digest of the content, if the storage
+            system maintains one. None if it would require reading the file.
+    """
+
+    path: str
+    size: int
+    modified: datetime | None = None
+    content_hash: str | None = None
+
+
 class StorageBackend(ABC):
     """
     Abstract base class for storage backend implementations.
@@ -91,6 +118,111 @@ class StorageBackend(ABC):
             at the beginning of the file.
         """
 
+    def open(self, path: str) -> BinaryIO:
+        """
+        Open a file at the specified logical path for streaming reads.
+
+        Args:
+            path: Logical path to open
+
+        Returns:
+            Readable binary file-like object. Unlike retrieve(), the content is
+            read lazily from storage as the caller consumes it, so memory usage
+            does not grow with the file size. The returned object supports the
+            context manager protocol and must be closed by the caller. It is not
+            guaranteed to be seekable.
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            OSError: If the file cannot be opened
+
+        Note:
+            The default implementation falls back to retrieve(). Backends
+            should override this to provide true streaming.
+        """
+        return self.retrieve(path)
+
+    def iter_chunks(
+        self,
+        path: str,
+        chunk_size: int | None = None,
+        *,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Iterate over the content of a file, or a byte range of it, in chunks.
+
+        Args:
+            path: Logical path to read
+            chunk_size: Maximum size of each chunk in bytes. Defaults to
+                settings.PAPERLESS_STORAGE_CHUNK_SIZE.
+            offset: Position of the first byte to read
+            length: Maximum number of bytes to read, or None to read until the
+                end of the file
+
+        Yields:
+            Consecutive, non-empty chunks of the file content
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            OSError: If the read operation fails
+
+        Note:
+            The default implementation reads and discards everything before
+            offset when the file object returned by open() is not seekable.
+            Backends should override this to read ranges natively.
+        """
+        chunk_size = self.get_chunk_size(chunk_size)
+        with self.open(path) as file_obj:
+            if offset:
+                if file_obj.seekable():
+                    file_obj.seek(offset)
+                else:
+                    remaining = offset
+                    while remaining and (
+                        skipped := file_obj.read(min(chunk_size, remaining))
+                    ):
+                        remaining -= len(skipped)
+            yield from self._read_chunks(file_obj, chunk_size, length)
+
+    @staticmethod
+    def _read_chunks(
+        file_obj: BinaryIO,
+        chunk_size: int,
+        length: int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Read a file object from its current position in chunks, stopping after
+        length bytes if given.
+        """
+        remaining = length
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = file_obj.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+    @staticmethod
+    def get_chunk_size(chunk_size: int | None = None) -> int:
+        """
+        Return the chunk size to use for streaming operations.
+
+        Args:
+            chunk_size: Explicit chunk size, or None to use the configured default
+
+        Returns:
+            Chunk size in bytes
+        """
+        if chunk_size is None:
+            chunk_size = settings.PAPERLESS_STORAGE_CHUNK_SIZE
+        if chunk_size <= 0:
+            raise ValueError(f"Invalid chunk size: {chunk_size}")
+        return chunk_size
+
     @abstractmethod
     def delete(self, path: str) -> None:
         """
@@ -108,6 +240,59 @@ class StorageBackend(ABC):
             gracefully (raise FileNotFoundError rather than silently succeeding).
         """
 
+    def stat(self, path: str) -> StorageObjectInfo:
+        """
+        Get metadata about a file without reading its content.
+
+        Args:
+            path: Logical path to inspect
+
+        Returns:
+            StorageObjectInfo with the size, modification time and, where the
+            storage system provides one, the MD5 content hash
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            OSError: If the metadata cannot be read
+
+        Note:
+            The default implementation streams the whole file to determine its
+            size and hash. Backends should override this with a metadata-only
+            lookup.
+        """
+        size = 0
+        md5 = hashlib.md5()
+        for chunk in self.iter_chunks(path):
+            size += len(chunk)
+            md5.update(chunk)
+        return StorageObjectInfo(path=path, size=size, content_hash=md5.hexdigest())
+
+    def iter_files(self, prefix: str = "") -> Iterator[StorageObjectInfo]:
+        """
+        Iterate over the stored files of the current tenant whose logical path
+        starts with the prefix.
+
+        Args:
+            prefix: Logical path prefix, e.g. 'documents/' or
+                'documents/originals/2024/'. Matched as a string, not as
+                a directory name.
+
+        Yields:
+            StorageObjectInfo of every matching file, as stat() would return
+            it, in no particular order
+
+        Raises:
+            OSError: If the files cannot be listed
+
+        Note:
+            This is used to compare the stored files with the database in one
+            pass, so implementations must list the files in bulk instead of
+            calling stat() for each of them. There is no default implementation.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support listing files",
+        )
+
     @abstractmethod
     def exists(self, path: str) -> bool:
         """
@@ -125,6 +310,49 @@ class StorageBackend(ABC):
             exceptions for actual errors (e.g., connection failures).
         """
 
+    def copy(self, source: str, destination: str) -> None:
+        """
+        Copy a file to another logical path.
+
+        Args:
+            source: Logical path of the file to copy
+            destination: Logical path of the copy
+
+        Raises:
+            FileNotFoundError: If the source file doesn't exist
+            FileExistsError: If the destination file already exists
+            OSError: If the copy operation fails
+
+        Note:
+            The default implementation streams the file through this process.
+            Backends should override this with a copy within the storage system.
+        """
+        if self.exists(destination):
+            raise FileExistsError(f"File already exists: {destination}")
+        with self.open(source) as file_obj:
+            self.store(destination, file_obj)
+
+    def move(self, source: str, destination: str) -> None:
+        """
+        Move a file to another logical path.
+
+        Args:
+            source: Logical path of the file to move
+            destination: Logical path to move the file to
+
+        Raises:
+            FileNotFoundError: If the source file doesn't exist
+            FileExistsError: If the destination file already exists
+            OSError: If the move operation fails
+
+        Note:
+            The default implementation copies the file and deletes the source.
+            Backends should override this with a rename where the storage
+            system supports one.
+        """
+        self.copy(source, destination)
+        self.delete(source)
+
     def _get_tenant_prefix(self) -> str:
         """
         Get the tenant identifier prefix for the current tenant context.
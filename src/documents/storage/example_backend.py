@@ -13,10 +13,12 @@ To implement a new storage backend:
 6. Update configuration validation in settings.py
 """
 
+from collections.abc import Iterator
 from io import BytesIO
 from typing import BinaryIO
 
 from documents.storage.base import StorageBackend
+from documents.storage.base import StorageObjectInfo
 
 
 class ExampleStorageBackend(StorageBackend):
@@ -61,6 +63,20 @@ class ExampleStorageBackend(StorageBackend):
         # Example: read from storage_path and return BytesIO
         raise NotImplementedError("Implement retrieve() method")
 
+    def open(self, path: str) -> BinaryIO:
+        """
+        Open a file at the specified logical path for streaming reads.
+
+        Implementation example:
+        - Resolve logical path to storage-specific path
+        - Return a file-like object which reads from storage on demand
+        - Avoid loading the whole file into memory
+        """
+        storage_path = self.get_path(path)
+        # Implement streaming logic here
+        # Example: return a file-like wrapper around a streaming download
+        raise NotImplementedError("Implement open() method")
+
     def delete(self, path: str) -> None:
         """
         Delete a file at the specified logical path.
@@ -87,6 +103,20 @@ class ExampleStorageBackend(StorageBackend):
         # Implement existence check here
         raise NotImplementedError("Implement exists() method")
 
+    def iter_files(self, prefix: str = "") -> Iterator[StorageObjectInfo]:
+        """
+        Iterate over the stored files whose logical path starts with prefix.
+
+        Implementation example:
+        - Resolve the prefix to a storage-specific prefix using get_path()
+        - List the objects under it in bulk, page by page
+        - Yield a StorageObjectInfo with the logical path of each object
+        """
+        storage_prefix = self.get_path(prefix)
+        # Implement listing logic here
+        # Example: list objects starting with storage_prefix
+        raise NotImplementedError("Implement iter_files() method")
+
     def get_path(self, logical_path: str) -> str:
         """
         Resolve a logical path to a storage-specific path.
@@ -5,7 +5,12 @@ This backend maintains existing filesystem storage behavior for backward compati
 """
 
 import logging
+import os
 import shutil
+import stat
+from collections.abc import Iterator
+from datetime import datetime
+from datetime import timezone
 from io import BytesIO
 from pathlib import Path
 from typing import BinaryIO
@@ -13,6 +18,7 @@ from typing import BinaryIO
 from django.conf import settings
 
 from documents.storage.base import StorageBackend
+from documents.storage.base import StorageObjectInfo
 
 logger = logging.getLogger(__name__)
 
@@ -90,6 +96,64 @@ class FilesystemStorageBackend(StorageBackend):
             logger.error(f"[filesystem] Failed to retrieve file {path}: {e}")
             raise
 
+    def open(self, path: str) -> BinaryIO:
+        """
+        Open a file at the specified logical path for streaming reads.
+
+        Args:
+            path: Logical path to open
+
+        Returns:
+            Buffered file object reading directly from disk
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            OSError: If the file cannot be opened
+        """
+        storage_path = self.get_path(path)
+        file_path = Path(storage_path)
+
+        try:
+            file_obj = file_path.open("rb", buffering=self.get_chunk_size())
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {path}")
+        except OSError as e:
+            logger.error(f"[filesystem] Failed to open file {path}: {e}")
+            raise
+        logger.debug(f"[filesystem] Opened file: {path} -> {storage_path}")
+        return file_obj
+
+    def iter_chunks(
+        self,
+        path: str,
+        chunk_size: int | None = None,
+        *,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Iterate over the content of a file, or a byte range of it, in chunks.
+
+        Args:
+            path: Logical path to read
+            chunk_size: Maximum size of each chunk in bytes. Defaults to
+                settings.PAPERLESS_STORAGE_CHUNK_SIZE.
+            offset: Position of the first byte to read
+            length: Maximum number of bytes to read, or None to read until the
+                end of the file
+
+        Yields:
+            Consecutive, non-empty chunks of the file content
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            OSError: If the read operation fails
+        """
+        chunk_size = self.get_chunk_size(chunk_size)
+        with self.open(path) as file_obj:
+            file_obj.seek(offset)
+            yield from self._read_chunks(file_obj, chunk_size, length)
+
     def delete(self, path: str) -> None:
         """
         Delete a file at the specified logical path.
@@ -128,6 +192,151 @@ class FilesystemStorageBackend(StorageBackend):
         file_path = Path(storage_path)
         return file_path.exists()
 
+    def _prepare_transfer(self, source: str, destination: str) -> tuple[Path, Path]:
+        source_path = Path(self.get_path(source))
+        destination_path = Path(self.get_path(destination))
+
+        if not source_path.is_file():
+            raise FileNotFoundError(f"File not found: {source}")
+        if destination_path.exists():
+            raise FileExistsError(f"File already exists: {destination}")
+
+        destination_path.parent.mkdir(parents=True, exist_ok=True)
+        return source_path, destination_path
+
+    def copy(self, source: str, destination: str) -> None:
+        """
+        Copy a file to another logical path.
+
+        Args:
+            source: Logical path of the file to copy
+            destination: Logical path of the copy
+
+        Raises:
+            FileNotFoundError: If the source file doesn't exist
+            FileExistsError: If the destination file already exists
+            OSError: If the copy operation fails
+        """
+        source_path, destination_path = self._prepare_transfer(source, destination)
+
+        try:
+            shutil.copy2(source_path, destination_path)
+            logger.debug(f"[filesystem] Copied file: {source} -> {destination}")
+        except OSError as e:
+            logger.error(f"[filesystem] Failed to copy file {source}: {e}")
+            raise
+
+    def move(self, source: str, destination: str) -> None:
+        """
+        Move a file to another logical path.
+
+        Args:
+            source: Logical path of the file to move
+            destination: Logical path to move the file to
+
+        Raises:
+            FileNotFoundError: If the source file doesn't exist
+            FileExistsError: If the destination file already exists
+            OSError: If the move operation fails
+
+        Note:
+            Within one file system the file is renamed, which is atomic.  Only
+            moves between the originals, archive and thumbnail directories on
+            different file systems copy the file.
+        """
+        source_path, destination_path = self._prepare_transfer(source, destination)
+
+        try:
+            shutil.move(source_path, destination_path)
+            logger.debug(f"[filesystem] Moved file: {source} -> {destination}")
+        except OSError as e:
+            logger.error(f"[filesystem] Failed to move file {source}: {e}")
+            raise
+
+    def stat(self, path: str) -> StorageObjectInfo:
+        """
+        Get metadata about a file without reading its content.
+
+        Args:
+            path: Logical path to inspect
+
+        Returns:
+            StorageObjectInfo with size and modification time. The content hash
+            is not available without reading the file.
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            OSError: If the metadata cannot be read
+        """
+        storage_path = self.get_path(path)
+
+        try:
+            st = Path(storage_path).stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {path}")
+        if not stat.S_ISREG(st.st_mode):
+            raise FileNotFoundError(f"File not found: {path}")
+
+        return StorageObjectInfo(
+            path=path,
+            size=st.st_size,
+            modified=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+        )
+
+    def _scan(self, directory: str, logical_dir: str) -> Iterator[StorageObjectInfo]:
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            logical_path = f"{logical_dir}/{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._scan(entry.path, logical_path)
+            elif entry.is_file():
+                st = entry.stat()
+                yield StorageObjectInfo(
+                    path=logical_path,
+                    size=st.st_size,
+                    modified=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+                )
+
+    def iter_files(self, prefix: str = "") -> Iterator[StorageObjectInfo]:
+        """
+        Iterate over the stored files of the current tenant whose logical path
+        starts with the prefix.
+
+        Args:
+            prefix: Logical path prefix
+
+        Yields:
+            StorageObjectInfo with size and modification time, without the
+            content hash
+
+        Raises:
+            OSError: If a directory cannot be read
+
+        Note:
+            Only the originals, archive and thumbnail directories are listed.
+            Each is scanned from the deepest directory the prefix names.
+        """
+        for logical_dir in (
+            "documents/originals",
+            "documents/archive",
+            "documents/thumbnails",
+        ):
+            if not (
+                f"{logical_dir}/".startswith(prefix)
+                or prefix.startswith(f"{logical_dir}/")
+            ):
+                continue
+            # Start at the directory of the prefix, if it is below this one
+            start_dir = logical_dir
+            if len(prefix) > len(logical_dir):
+                start_dir = prefix.rsplit("/", 1)[0]
+            for info in self._scan(self.get_path(f"{start_dir}/"), start_dir):
+                if info.path.startswith(prefix):
+                    yield info
+
     def _resolve_path(self, tenant_path: str) -> str:
         """
         Resolve a tenant-prefixed path to a filesystem absolute path.
@@ -1,8 +1,12 @@
 import datetime
 import hashlib
+import json
 import logging
+import math
+import multiprocessing
 import shutil
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
@@ -10,20 +14,27 @@ import tqdm
 from celery import Task
 from celery import shared_task
 from celery import states
+from django import db
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db import transaction
 from django.db.models.signals import post_save
 from django.utils import timezone
-from filelock import FileLock
+from whoosh.index import create_in
+from whoosh.index import open_dir
 from whoosh.writing import AsyncWriter
 
 from documents import index
 from documents import sanity_checker
+from documents import statistics
+from documents import thumbnail_regeneration
 from documents.barcodes import BarcodePlugin
 from documents.caching import clear_document_caches
+from documents.classifier import ClassifierModelCorruptError
 from documents.classifier import DocumentClassifier
+from documents.classifier import IncompatibleClassifierVersionError
+from documents.classifier import get_model_file
 from documents.classifier import load_classifier
 from documents.consumer import ConsumerPlugin
 from documents.consumer import ConsumerPreflightPlugin
@@ -33,6 +44,7 @@ from documents.data_models import DocumentMetadataOverrides
 from documents.double_sided import CollatePlugin
 from documents.file_handling import create_source_path_directory
 from documents.file_handling import generate_unique_filename
+from documents.file_handling import lock_document_files
 from documents.matching import prefilter_documents_by_workflowtrigger
 from documents.models import Correspondent
 from documents.models import CustomFieldInstance
@@ -54,29 +66,253 @@ from documents.sanity_checker import SanityCheckFailedException
 from documents.signals import document_updated
 from documents.signals.handlers import cleanup_document_deletion
 from documents.signals.handlers import run_workflows
+from documents.signals.handlers import update_filename_and_move_files
+from documents.thumbnails import THUMBNAIL_SIZES
+from documents.thumbnails import get_thumbnail_variant_path
 from paperless.tenants.models import Tenant
+from paperless.tenants.utils import get_current_tenant
 from paperless.tenants.utils import set_current_tenant
+from paperless.tenants.utils import tenant_context
 
 if settings.AUDIT_LOG_ENABLED:
     from auditlog.models import LogEntry
 logger = logging.getLogger("paperless.tasks")
 
 
+def _get_active_tenants():
+    return Tenant.objects.filter(is_active=True, deleted_at__isnull=True)
+
+
 @shared_task
-def index_optimize():
-    ix = index.open_index()
-    writer = AsyncWriter(ix)
-    writer.commit(optimize=True)
+def index_optimize(*, tenant_id=None):
+    """Optimize the index of the given tenant, or of every active tenant."""
+    tenants = (
+        Tenant.objects.filter(id=tenant_id) if tenant_id else _get_active_tenants()
+    )
+    for tenant in tenants:
+        ix = index.open_index(tenant=tenant)
+        writer = AsyncWriter(ix)
+        writer.commit(optimize=True)
 
 
-def index_reindex(*, progress_bar_disable=False):
-    documents = Document.objects.all()
+def index_reindex(
+    *,
+    progress_bar_disable=False,
+    tenant: Tenant | None = None,
+    processes: int = 1,
+):
+    """
+    Rebuild the index of the given or current tenant, or of every active tenant
+    if there is none.  Other tenants' indexes are left untouched.
 
-    ix = index.open_index(recreate=True)
+    With more than one process, the documents are partitioned by ID and each
+    partition is indexed by a worker process into an index of its own, which
+    are merged once all of them are done.  Completed partitions are kept until
+    then, so an interrupted reindex resumes where it left off.
+    """
+    tenant = tenant or get_current_tenant()
+    for reindexed_tenant in [tenant] if tenant else _get_active_tenants():
+        with tenant_context(reindexed_tenant):
+            if processes > 1:
+                _parallel_index_reindex(
+                    reindexed_tenant,
+                    processes=processes,
+                    progress_bar_disable=progress_bar_disable,
+                )
+                continue
+
+            documents = Document.objects.all()
+
+            ix = index.open_index(recreate=True)
+
+            with (
+                AsyncWriter(ix) as writer,
+                tqdm.tqdm(
+                    total=documents.count(),
+                    disable=progress_bar_disable,
+                ) as progress_bar,
+            ):
+                for chunk in index.iter_index_chunks(documents):
+                    index.update_documents(writer, chunk)
+                    progress_bar.update(len(chunk))
+
+
+# Partitions are small enough to balance the load and lose little work when
+# interrupted, but large enough to keep the number of segments to merge low
+REINDEX_PARTITIONS_PER_PROCESS = 8
+REINDEX_MAX_PARTITION_SIZE = 50_000
+
+
+def _get_reindex_partitions(
+    work_dir: Path,
+    processes: int,
+) -> list[tuple[int, int]]:
+    """
+    Returns the inclusive document ID ranges to index, planned once and kept
+    in the working directory, so a resumed reindex uses the same partitions
+    """
+    plan_file = work_dir / "partitions.json"
+    if plan_file.exists():
+        return [tuple(partition) for partition in json.loads(plan_file.read_text())]
+
+    ids = list(Document.objects.order_by("pk").values_list("pk", flat=True))
+    size = math.ceil(len(ids) / (processes * REINDEX_PARTITIONS_PER_PROCESS))
+    size = min(max(size, index.INDEX_CHUNK_SIZE), REINDEX_MAX_PARTITION_SIZE)
+    partitions = [
+        (ids[start], ids[min(start + size, len(ids)) - 1])
+        for start in range(0, len(ids), size)
+    ]
+    work_dir.mkdir(parents=True, exist_ok=True)
+    plan_file.write_text(json.dumps(partitions))
+    return partitions
 
-    with AsyncWriter(ix) as writer:
-        for document in tqdm.tqdm(documents, disable=progress_bar_disable):
-            index.update_document(writer, document)
+
+def _get_partition_dir(work_dir: Path, partition: tuple[int, int]) -> Path:
+    return work_dir / f"{partition[0]}-{partition[1]}"
+
+
+def _reindex_partition(job: tuple[int, Path, tuple[int, int]]) -> int:
+    """
+    Indexes the documents of a partition into a new index in the partition
+    directory, which only exists once the index is complete
+    """
+    tenant_id, partition_dir, (first_id, last_id) = job
+    build_dir = partition_dir.with_suffix(".tmp")
+    shutil.rmtree(build_dir, ignore_errors=True)
+    build_dir.mkdir(parents=True)
+
+    with tenant_context(Tenant.objects.get(pk=tenant_id)):
+        documents = Document.objects.filter(pk__gte=first_id, pk__lte=last_id)
+        ix = create_in(build_dir, index.get_schema())
+        with ix.writer() as writer:
+            for chunk in index.iter_index_chunks(documents):
+                index.update_documents(writer, chunk)
+        doc_count = ix.doc_count()
+        ix.close()
+
+    build_dir.rename(partition_dir)
+    return doc_count
+
+
+def _parallel_index_reindex(
+    tenant: Tenant,
+    *,
+    processes: int,
+    progress_bar_disable: bool,
+) -> None:
+    work_dir = index.get_index_dir(tenant) / ".reindex"
+    partitions = _get_reindex_partitions(work_dir, processes)
+    partition_dirs = [
+        _get_partition_dir(work_dir, partition) for partition in partitions
+    ]
+    jobs = [
+        (tenant.pk, partition_dir, partition)
+        for partition, partition_dir in zip(partitions, partition_dirs)
+        if not partition_dir.is_dir()
+    ]
+    if len(jobs) < len(partitions):
+        logger.info(
+            f"Resuming reindex of tenant {tenant.identifier}, "
+            f"{len(partitions) - len(jobs)} of {len(partitions)} partitions "
+            f"are already indexed",
+        )
+
+    with tqdm.tqdm(
+        total=Document.objects.count(),
+        disable=progress_bar_disable,
+    ) as progress_bar:
+        for partition_dir in partition_dirs:
+            if partition_dir.is_dir():
+                progress_bar.update(open_dir(partition_dir).doc_count())
+
+        # Note to future self: this prevents django from reusing database
+        # connections between processes, which is bad and does not work
+        # with postgres.
+        db.connections.close_all()
+
+        with multiprocessing.Pool(processes=processes) as pool:
+            for doc_count in pool.imap_unordered(_reindex_partition, jobs):
+                progress_bar.update(doc_count)
+
+        # Merge the partitions, along with documents added since they were
+        # planned, into the recreated index
+        ix = index.open_index(recreate=True)
+        readers = [open_dir(partition_dir).reader() for partition_dir in partition_dirs]
+        try:
+            with ix.writer(timeout=60) as writer:
+                for reader in readers:
+                    writer.add_reader(reader)
+                last_id = partitions[-1][1] if partitions else 0
+                documents = Document.objects.filter(pk__gt=last_id)
+                for chunk in index.iter_index_chunks(documents):
+                    index.update_documents(writer, chunk)
+                    progress_bar.update(len(chunk))
+        finally:
+            for reader in readers:
+                reader.close()
+
+    # Documents deleted while an interrupted reindex was waiting to resume
+    with index.open_index_searcher() as searcher:
+        indexed_ids = set(index.get_document_ids(searcher.ixreader))
+    indexed_ids.discard(-1)
+    deleted_ids = indexed_ids.difference(
+        Document.objects.values_list("pk", flat=True),
+    )
+    if deleted_ids:
+        with index.open_index_writer() as writer:
+            for doc_id in deleted_ids:
+                index.remove_document_by_id(writer, doc_id)
+
+    shutil.rmtree(work_dir)
+
+
+def _has_auto_matching_objects() -> bool:
+    return (
+        Tag.objects.filter(matching_algorithm=Tag.MATCH_AUTO).exists()
+        or DocumentType.objects.filter(matching_algorithm=Tag.MATCH_AUTO).exists()
+        or Correspondent.objects.filter(matching_algorithm=Tag.MATCH_AUTO).exists()
+        or StoragePath.objects.filter(matching_algorithm=Tag.MATCH_AUTO).exists()
+    )
+
+
+def classifier_training_required() -> bool:
+    """
+    Checks if training the current tenant's classifier would change anything,
+    without loading its models
+    """
+    if not _has_auto_matching_objects():
+        # Training would only remove a model which is no longer used
+        return get_model_file().exists()
+    classifier = DocumentClassifier()
+    try:
+        classifier.load_training_state()
+    except (
+        OSError,
+        IncompatibleClassifierVersionError,
+        ClassifierModelCorruptError,
+    ):
+        return True
+    return classifier.is_training_required()
+
+
+def _train_tenant_classifiers(*, scheduled: bool) -> None:
+    """
+    Trains the classifier of each active tenant whose training data changed.
+    Scheduled training is queued as a task per tenant, otherwise each tenant
+    is trained in turn.
+    """
+    for tenant in _get_active_tenants():
+        with tenant_context(tenant):
+            if not classifier_training_required():
+                logger.debug(
+                    f"Classifier of tenant {tenant.identifier} is up to date, "
+                    "not training",
+                )
+                continue
+            if scheduled:
+                train_classifier.delay(scheduled=True, tenant_id=tenant.pk)
+            else:
+                train_classifier(scheduled=False)
 
 
 @shared_task
@@ -89,6 +325,10 @@ def train_classifier(*, scheduled=True, tenant_id=None):
             set_current_tenant(tenant)
         except Tenant.DoesNotExist:
             logger.warning(f"Tenant {tenant_id} not found, proceeding without tenant context")
+    elif scheduled or get_current_tenant() is None:
+        # Each tenant has its own model, so train them separately
+        _train_tenant_classifiers(scheduled=scheduled)
+        return
 
     task = PaperlessTask.objects.create(
         type=PaperlessTask.TaskType.SCHEDULED_TASK
@@ -100,26 +340,23 @@ def train_classifier(*, scheduled=True, tenant_id=None):
         date_created=timezone.now(),
         date_started=timezone.now(),
     )
-    if (
-        not Tag.objects.filter(matching_algorithm=Tag.MATCH_AUTO).exists()
-        and not DocumentType.objects.filter(matching_algorithm=Tag.MATCH_AUTO).exists()
-        and not Correspondent.objects.filter(matching_algorithm=Tag.MATCH_AUTO).exists()
-        and not StoragePath.objects.filter(matching_algorithm=Tag.MATCH_AUTO).exists()
-    ):
+    if not _has_auto_matching_objects():
         result = "No automatic matching items, not training"
         logger.info(result)
         # Special case, items were once auto and trained, so remove the model
         # and prevent its use again
-        if settings.MODEL_FILE.exists():
-            logger.info(f"Removing {settings.MODEL_FILE} so it won't be used")
-            settings.MODEL_FILE.unlink()
+        model_file = get_model_file()
+        if model_file.exists():
+            logger.info(f"Removing {model_file} so it won't be used")
+            model_file.unlink()
         task.status = states.SUCCESS
         task.result = result
         task.date_done = timezone.now()
         task.save()
         return
 
-    classifier = load_classifier()
+    # Train a private copy, the cached classifier is shared with other callers
+    classifier = load_classifier(use_cache=False)
 
     if not classifier:
         classifier = DocumentClassifier()
@@ -127,7 +364,7 @@ def train_classifier(*, scheduled=True, tenant_id=None):
     try:
         if classifier.train():
             logger.info(
-                f"Saving updated classifier model to {settings.MODEL_FILE}...",
+                f"Saving updated classifier model to {classifier.model_file}...",
             )
             classifier.save()
             task.result = "Training completed successfully"
@@ -244,6 +481,19 @@ def sanity_check(*, scheduled=True, raise_on_error=True):
         return "No issues detected."
 
 
+@shared_task
+def recompute_statistics(*, tenant_id=None):
+    """
+    Count the documents of the given tenant, or of every active tenant, again
+    and correct their statistics.
+    """
+    tenants = (
+        Tenant.objects.filter(id=tenant_id) if tenant_id else _get_active_tenants()
+    )
+    for tenant in tenants:
+        statistics.recompute_statistics(tenant)
+
+
 @shared_task
 def bulk_update_documents(document_ids, tenant_id: int | None = None):
     """Bulk update documents with tenant context."""
@@ -269,8 +519,56 @@ def bulk_update_documents(document_ids, tenant_id: int | None = None):
         post_save.send(Document, instance=doc, created=False)
 
     with AsyncWriter(ix) as writer:
-        for doc in documents:
-            index.update_document(writer, doc)
+        for chunk in index.iter_index_chunks(documents):
+            index.update_documents(writer, chunk)
+
+
+def _repath_document(tenant: Tenant | None, document_id: int) -> None:
+    try:
+        with tenant_context(tenant):
+            document = Document.objects.filter(pk=document_id).first()
+            if document is not None:
+                update_filename_and_move_files(Document, document)
+    finally:
+        # Each thread has its own database connection
+        db.connection.close()
+
+
+@shared_task
+def repath_documents(document_ids: list[int], tenant_id: int | None = None):
+    """
+    Moves the files of the documents to the names generated from their
+    current storage path, e.g. after its template was changed.  Documents are
+    renamed concurrently, each by the storage backend without copying the
+    file through this process where the storage system supports it.
+    """
+    tenant = Tenant.objects.get(pk=tenant_id) if tenant_id else get_current_tenant()
+
+    with ThreadPoolExecutor(
+        max_workers=settings.PAPERLESS_STORAGE_MOVE_WORKERS,
+    ) as pool:
+        # Consume the results to raise any exception of the workers
+        list(pool.map(lambda pk: _repath_document(tenant, pk), document_ids))
+
+    logger.info(f"Checked the file names of {len(document_ids)} documents")
+
+
+@shared_task
+def regenerate_thumbnails(
+    document_ids: list[int],
+    tenant_id: int | None = None,
+    *,
+    force: bool = False,
+):
+    """
+    Regenerates the thumbnails of the documents, one batch of a regeneration
+    fanned out to the workers by the document_thumbnails command.
+    """
+    tenant = Tenant.objects.get(pk=tenant_id) if tenant_id else get_current_tenant()
+    with tenant_context(tenant):
+        # Celery workers can't start processes of their own, the pipeline
+        # still overlaps the transfers with rendering
+        thumbnail_regeneration.regenerate_thumbnails(document_ids, force=force)
 
 
 @shared_task
@@ -311,7 +609,9 @@ def update_document_content_maybe_archive_file(document_id, tenant_id: int | Non
             document.get_public_filename(),
         )
 
-        with transaction.atomic():
+        # The archive file gets a new name, which must stay unique until the
+        # file is in place
+        with lock_document_files(document), transaction.atomic():
             oldDocument = Document.objects.get(pk=document.pk)
             if parser.get_archive_path():
                 with Path(parser.get_archive_path()).open("rb") as f:
@@ -330,6 +630,11 @@ def update_document_content_maybe_archive_file(document_id, tenant_id: int | Non
                     archive_filename=document.archive_filename,
                 )
                 newDocument = Document.objects.get(pk=document.pk)
+                statistics.record_change(
+                    document.tenant_id,
+                    statistics.get_counted_state(oldDocument),
+                    statistics.get_counted_state(newDocument),
+                )
                 if settings.AUDIT_LOG_ENABLED:
                     LogEntry.objects.log_create(
                         instance=oldDocument,
@@ -353,6 +658,11 @@ def update_document_content_maybe_archive_file(document_id, tenant_id: int | Non
                 Document.objects.filter(pk=document.pk).update(
                     content=parser.get_text(),
                 )
+                statistics.record_change(
+                    document.tenant_id,
+                    statistics.get_counted_state(oldDocument),
+                    statistics.get_stored_state(document.pk),
+                )
 
                 if settings.AUDIT_LOG_ENABLED:
                     LogEntry.objects.log_create(
@@ -366,11 +676,14 @@ def update_document_content_maybe_archive_file(document_id, tenant_id: int | Non
                         action=LogEntry.Action.UPDATE,
                     )
 
-            with FileLock(settings.MEDIA_LOCK):
-                if parser.get_archive_path():
-                    create_source_path_directory(document.archive_path)
-                    shutil.move(parser.get_archive_path(), document.archive_path)
-                shutil.move(thumbnail, document.thumbnail_path)
+            if parser.get_archive_path():
+                create_source_path_directory(document.archive_path)
+                shutil.move(parser.get_archive_path(), document.archive_path)
+            shutil.move(thumbnail, document.thumbnail_path)
+            for size in THUMBNAIL_SIZES:
+                variant = get_thumbnail_variant_path(Path(thumbnail), size)
+                if variant.is_file():
+                    shutil.move(variant, document.get_thumbnail_path(size))
 
         document.refresh_from_db()
         logger.info(
@@ -1,10 +1,26 @@
 import zoneinfo
+from unittest import mock
 
 import pytest
 from django.contrib.auth import get_user_model
 from pytest_django.fixtures import SettingsWrapper
 from rest_framework.test import APIClient
 
+from documents.storage.filesystem import FilesystemStorageBackend
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import clear_current_tenant
+from paperless.tenants.utils import set_current_tenant
+
+
+@pytest.fixture(autouse=True)
+def clear_tenant_context():
+    """
+    Tasks set the current tenant without clearing it, so make sure it does not
+    leak into the following tests
+    """
+    yield
+    clear_current_tenant()
+
 
 @pytest.fixture()
 def settings_timezone(settings: SettingsWrapper) -> zoneinfo.ZoneInfo:
@@ -28,3 +44,40 @@ def authenticated_rest_api_client(rest_api_client: APIClient):
     user = UserModel.objects.create_user(username="testuser", password="password")
     rest_api_client.force_authenticate(user=user)
     yield rest_api_client
+
+
+@pytest.fixture
+def storage_dirs(tmp_path, settings: SettingsWrapper):
+    """
+    Points the media directories at a temporary location
+    """
+    settings.MEDIA_ROOT = tmp_path
+    settings.ORIGINALS_DIR = tmp_path / "originals"
+    settings.ARCHIVE_DIR = tmp_path / "archive"
+    settings.THUMBNAIL_DIR = tmp_path / "thumbnails"
+    settings.MEDIA_LOCK = tmp_path / "media.lock"
+    return tmp_path
+
+
+@pytest.fixture
+def tenant(db):
+    """
+    Creates a tenant and makes it the current tenant for the test
+    """
+    tenant = Tenant.objects.create(name="Test Tenant", identifier="test-tenant")
+    set_current_tenant(tenant)
+    yield tenant
+    clear_current_tenant()
+
+
+@pytest.fixture
+def filesystem_backend(storage_dirs, tenant) -> FilesystemStorageBackend:
+    """
+    A filesystem storage backend, which is also the configured backend
+    """
+    backend = FilesystemStorageBackend()
+    with mock.patch(
+        "documents.storage.factory._STORAGE_BACKEND_INSTANCE",
+        backend,
+    ):
+        yield backend
@@ -0,0 +1,101 @@
+"""
+Tests for listing files by prefix on storage backends.
+"""
+
+from datetime import datetime
+from datetime import timezone
+from io import BytesIO
+from unittest import mock
+
+import pytest
+
+from documents.storage.azure_blob import AzureBlobStorageBackend
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import tenant_context
+
+FILES = {
+    "documents/originals/0000001.pdf": b"a",
+    "documents/originals/2024/invoice.pdf": b"ab",
+    "documents/originals/2024/receipt.pdf": b"abc",
+    "documents/archive/0000001.pdf": b"abcd",
+    "documents/thumbnails/0000001.webp": b"abcde",
+}
+
+
+@pytest.mark.django_db
+class TestFilesystemListing:
+    @pytest.fixture(autouse=True)
+    def files(self, filesystem_backend):
+        for path, content in FILES.items():
+            filesystem_backend.store(path, BytesIO(content))
+
+    @pytest.mark.parametrize(
+        ("prefix", "expected"),
+        [
+            ("", set(FILES)),
+            ("documents/", set(FILES)),
+            (
+                "documents/originals/",
+                {
+                    "documents/originals/0000001.pdf",
+                    "documents/originals/2024/invoice.pdf",
+                    "documents/originals/2024/receipt.pdf",
+                },
+            ),
+            ("documents/originals/2024/inv", {"documents/originals/2024/invoice.pdf"}),
+            ("documents/arch", {"documents/archive/0000001.pdf"}),
+            ("documents/originals/2025/", set()),
+        ],
+    )
+    def test_prefix(self, filesystem_backend, prefix, expected):
+        assert {info.path for info in filesystem_backend.iter_files(prefix)} == (
+            expected
+        )
+
+    def test_metadata(self, filesystem_backend):
+        with mock.patch.object(
+            filesystem_backend,
+            "stat",
+            side_effect=AssertionError("files should be listed in bulk"),
+        ):
+            infos = {info.path: info for info in filesystem_backend.iter_files()}
+
+        for path, content in FILES.items():
+            assert infos[path].size == len(content)
+            assert infos[path].modified.tzinfo is not None
+
+    def test_other_tenant(self, filesystem_backend):
+        other = Tenant.objects.create(name="Other", identifier="other")
+
+        with tenant_context(other):
+            assert list(filesystem_backend.iter_files()) == []
+
+
+@pytest.mark.django_db
+class TestAzureListing:
+    @pytest.fixture
+    def azure_backend(self, tenant) -> AzureBlobStorageBackend:
+        backend = AzureBlobStorageBackend.__new__(AzureBlobStorageBackend)
+        backend.container_client = mock.MagicMock()
+        return backend
+
+    def test_lists_blobs_of_tenant(self, azure_backend):
+        modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        blob = mock.Mock(
+            size=12,
+            last_modified=modified,
+        )
+        blob.name = "test-tenant/documents/originals/test.pdf"
+        blob.content_settings.content_md5 = bytearray(b"\x01\xff")
+        azure_backend.container_client.list_blobs.return_value = [blob]
+
+        infos = list(azure_backend.iter_files("documents/originals/"))
+
+        azure_backend.container_client.list_blobs.assert_called_once_with(
+            name_starts_with="test-tenant/documents/originals/",
+        )
+        assert len(infos) == 1
+        assert infos[0].path == "documents/originals/test.pdf"
+        assert infos[0].size == 12
+        assert infos[0].modified == modified
+        assert infos[0].content_hash == "01ff"
@@ -0,0 +1,101 @@
+"""
+Tests for metadata-only stat() on storage backends.
+"""
+
+from datetime import datetime
+from datetime import timezone
+from io import BytesIO
+from unittest import mock
+
+import pytest
+
+from documents.storage.azure_blob import AzureBlobStorageBackend
+from documents.storage.base import StorageBackend
+from documents.storage.filesystem import FilesystemStorageBackend
+
+
+@pytest.mark.django_db
+class TestFilesystemStat:
+    def test_stat(self, filesystem_backend):
+        filesystem_backend.store("documents/originals/test.pdf", BytesIO(b"abcd"))
+
+        with mock.patch.object(
+            filesystem_backend,
+            "open",
+            side_effect=AssertionError("stat should not read the file"),
+        ):
+            info = filesystem_backend.stat("documents/originals/test.pdf")
+
+        assert info.path == "documents/originals/test.pdf"
+        assert info.size == 4
+        assert info.modified is not None
+        assert info.modified.tzinfo is not None
+        assert info.content_hash is None
+
+    def test_stat_missing_file(self, filesystem_backend):
+        with pytest.raises(FileNotFoundError):
+            filesystem_backend.stat("documents/originals/missing.pdf")
+
+    def test_stat_directory(self, filesystem_backend):
+        filesystem_backend.store("documents/originals/sub/test.pdf", BytesIO(b"a"))
+
+        with pytest.raises(FileNotFoundError):
+            filesystem_backend.stat("documents/originals/sub")
+
+
+@pytest.mark.django_db
+class TestDefaultStat:
+    def test_default_stat_hashes_content(self, storage_dirs, tenant):
+        class MinimalBackend(FilesystemStorageBackend):
+            stat = StorageBackend.stat
+            open = StorageBackend.open
+
+        backend = MinimalBackend()
+        backend.store("documents/originals/test.pdf", BytesIO(b"abcd"))
+
+        info = backend.stat("documents/originals/test.pdf")
+
+        assert info.size == 4
+        assert info.modified is None
+        assert info.content_hash == "e2fc714c4727ee9395f324cd2e7f331f"
+
+
+@pytest.mark.django_db
+class TestAzureStat:
+    @pytest.fixture
+    def azure_backend(self, tenant) -> AzureBlobStorageBackend:
+        backend = AzureBlobStorageBackend.__new__(AzureBlobStorageBackend)
+        backend.container_client = mock.MagicMock()
+        return backend
+
+    def test_stat_uses_blob_properties(self, azure_backend):
+        modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        blob_client = azure_backend.container_client.get_blob_client.return_value
+        properties = blob_client.get_blob_properties.return_value
+        properties.size = 1234
+        properties.last_modified = modified
+        properties.content_settings.content_md5 = bytearray(b"\x01\x02\xff")
+
+        info = azure_backend.stat("documents/originals/test.pdf")
+
+        assert info.size == 1234
+        assert info.modified == modified
+        assert info.content_hash == "0102ff"
+        blob_client.download_blob.assert_not_called()
+
+    def test_stat_without_md5(self, azure_backend):
+        blob_client = azure_backend.container_client.get_blob_client.return_value
+        properties = blob_client.get_blob_properties.return_value
+        properties.size = 1
+        properties.content_settings.content_md5 = None
+
+        assert azure_backend.stat("documents/originals/test.pdf").content_hash is None
+
+    def test_stat_missing_blob(self, azure_backend):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        blob_client = azure_backend.container_client.get_blob_client.return_value
+        blob_client.get_blob_properties.side_effect = ResourceNotFoundError("missing")
+
+        with pytest.raises(FileNotFoundError):
+            azure_backend.stat("documents/originals/test.pdf")
@@ -0,0 +1,243 @@
+"""
+Tests for streaming reads from storage backends.
+"""
+
+import io
+import zipfile
+from datetime import datetime
+from datetime import timezone
+from io import BytesIO
+from unittest import mock
+
+import pytest
+
+from documents.bulk_download import OriginalsOnlyStrategy
+from documents.models import Document
+from documents.storage.azure_blob import AzureBlobReader
+from documents.storage.azure_blob import AzureBlobStorageBackend
+from documents.storage.base import StorageBackend
+from documents.storage.filesystem import FilesystemStorageBackend
+
+
+class FakeDownloader:
+    def __init__(self, chunks: list[bytes]) -> None:
+        self._chunks = chunks
+        self.size = sum(len(chunk) for chunk in chunks)
+
+    def chunks(self):
+        yield from self._chunks
+
+
+@pytest.fixture
+def azure_backend(tenant) -> AzureBlobStorageBackend:
+    """
+    Azure backend with a mocked container client, no connection is made
+    """
+    backend = AzureBlobStorageBackend.__new__(AzureBlobStorageBackend)
+    backend.container_client = mock.MagicMock()
+    return backend
+
+
+class TestChunkSize:
+    def test_default_chunk_size(self, settings):
+        settings.PAPERLESS_STORAGE_CHUNK_SIZE = 1234
+        assert StorageBackend.get_chunk_size() == 1234
+
+    def test_explicit_chunk_size(self, settings):
+        settings.PAPERLESS_STORAGE_CHUNK_SIZE = 1234
+        assert StorageBackend.get_chunk_size(10) == 10
+
+    def test_invalid_chunk_size(self):
+        with pytest.raises(ValueError, match="Invalid chunk size"):
+            StorageBackend.get_chunk_size(0)
+
+
+@pytest.mark.django_db
+class TestFilesystemStreaming:
+    def test_open_reads_content(self, filesystem_backend):
+        filesystem_backend.store("documents/originals/test.pdf", BytesIO(b"a" * 100))
+
+        with filesystem_backend.open("documents/originals/test.pdf") as f:
+            assert f.read(10) == b"a" * 10
+            assert f.read() == b"a" * 90
+
+    def test_open_missing_file(self, filesystem_backend):
+        with pytest.raises(FileNotFoundError):
+            filesystem_backend.open("documents/originals/missing.pdf")
+
+    def test_iter_chunks(self, filesystem_backend):
+        filesystem_backend.store("documents/originals/test.pdf", BytesIO(b"x" * 25))
+
+        chunks = list(
+            filesystem_backend.iter_chunks("documents/originals/test.pdf", 10),
+        )
+
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        assert b"".join(chunks) == b"x" * 25
+
+    def test_iter_chunks_default_chunk_size(self, filesystem_backend, settings):
+        settings.PAPERLESS_STORAGE_CHUNK_SIZE = 4
+        filesystem_backend.store("documents/originals/test.pdf", BytesIO(b"x" * 10))
+
+        chunks = list(filesystem_backend.iter_chunks("documents/originals/test.pdf"))
+
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+
+    def test_iter_chunks_range(self, filesystem_backend):
+        filesystem_backend.store(
+            "documents/originals/test.pdf",
+            BytesIO(b"0123456789"),
+        )
+
+        chunks = list(
+            filesystem_backend.iter_chunks(
+                "documents/originals/test.pdf",
+                2,
+                offset=3,
+                length=5,
+            ),
+        )
+
+        assert chunks == [b"34", b"56", b"7"]
+
+    def test_iter_chunks_range_until_end(self, filesystem_backend):
+        filesystem_backend.store(
+            "documents/originals/test.pdf",
+            BytesIO(b"0123456789"),
+        )
+
+        chunks = list(
+            filesystem_backend.iter_chunks("documents/originals/test.pdf", offset=7),
+        )
+
+        assert b"".join(chunks) == b"789"
+
+    def test_document_source_file_is_streamed(self, filesystem_backend):
+        filesystem_backend.store("documents/originals/0000001.pdf", BytesIO(b"pdf"))
+        doc = Document(pk=1, mime_type="application/pdf")
+
+        with mock.patch.object(
+            filesystem_backend,
+            "retrieve",
+            side_effect=AssertionError("retrieve should not be used"),
+        ):
+            with doc.source_file as f:
+                assert f.read() == b"pdf"
+
+    def test_bulk_download_strategy_uses_backend(self, filesystem_backend):
+        filesystem_backend.store("documents/originals/0000001.pdf", BytesIO(b"pdf"))
+        doc = Document(
+            pk=1,
+            title="test",
+            mime_type="application/pdf",
+            created=datetime(2024, 1, 1).date(),
+            modified=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        )
+        output = BytesIO()
+
+        with zipfile.ZipFile(output, "w") as zipf:
+            OriginalsOnlyStrategy(zipf).add_document(doc)
+
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.namelist() == ["2024-01-01 test.pdf"]
+            assert zipf.read("2024-01-01 test.pdf") == b"pdf"
+
+
+class TestDefaultRangedReads:
+    def test_iter_chunks_range_unseekable(self):
+        class UnseekableBackend(FilesystemStorageBackend):
+            def open(self, path):
+                return io.BufferedReader(
+                    AzureBlobReader(FakeDownloader([b"01234", b"56789"])),
+                )
+
+        backend = UnseekableBackend.__new__(UnseekableBackend)
+
+        chunks = list(
+            StorageBackend.iter_chunks(backend, "test", 3, offset=4, length=4),
+        )
+
+        assert b"".join(chunks) == b"4567"
+
+
+class TestAzureBlobReader:
+    def test_read_across_chunks(self):
+        reader = io.BufferedReader(
+            AzureBlobReader(FakeDownloader([b"abc", b"def", b"g"])),
+        )
+
+        assert reader.read(2) == b"ab"
+        assert reader.read(3) == b"cde"
+        assert reader.read() == b"fg"
+        assert reader.read(1) == b""
+
+    def test_size(self):
+        reader = AzureBlobReader(FakeDownloader([b"abc", b"de"]))
+        assert reader.size == 5
+
+
+@pytest.mark.django_db
+class TestAzureStreaming:
+    def test_open_streams_blob(self, azure_backend):
+        blob_client = azure_backend.container_client.get_blob_client.return_value
+        blob_client.download_blob.return_value = FakeDownloader([b"abc", b"def"])
+
+        with azure_backend.open("documents/originals/test.pdf") as f:
+            assert f.read() == b"abcdef"
+
+        azure_backend.container_client.get_blob_client.assert_called_once_with(
+            "test-tenant/documents/originals/test.pdf",
+        )
+        blob_client.download_blob.assert_called_once_with(
+            offset=None,
+            length=None,
+            max_concurrency=1,
+        )
+
+    def test_open_missing_blob(self, azure_backend):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        blob_client = azure_backend.container_client.get_blob_client.return_value
+        blob_client.download_blob.side_effect = ResourceNotFoundError("missing")
+
+        with pytest.raises(FileNotFoundError):
+            azure_backend.open("documents/originals/test.pdf")
+
+    def test_iter_chunks_reslices(self, azure_backend):
+        blob_client = azure_backend.container_client.get_blob_client.return_value
+        blob_client.download_blob.return_value = FakeDownloader([b"abcde", b"fg"])
+
+        chunks = list(azure_backend.iter_chunks("documents/originals/test.pdf", 2))
+
+        assert chunks == [b"ab", b"cd", b"e", b"fg"]
+
+    def test_iter_chunks_range(self, azure_backend):
+        blob_client = azure_backend.container_client.get_blob_client.return_value
+        blob_client.download_blob.return_value = FakeDownloader([b"cdef"])
+
+        chunks = list(
+            azure_backend.iter_chunks(
+                "documents/originals/test.pdf",
+                offset=2,
+                length=4,
+            ),
+        )
+
+        assert chunks == [b"cdef"]
+        blob_client.download_blob.assert_called_once_with(
+            offset=2,
+            length=4,
+            max_concurrency=1,
+        )
+
+    def test_iter_chunks_length_from_start(self, azure_backend):
+        blob_client = azure_backend.container_client.get_blob_client.return_value
+        blob_client.download_blob.return_value = FakeDownloader([b"ab"])
+
+        list(azure_backend.iter_chunks("documents/originals/test.pdf", length=2))
+
+        blob_client.download_blob.assert_called_once_with(
+            offset=0,
+            length=2,
+            max_concurrency=1,
+        )
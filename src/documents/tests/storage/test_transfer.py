@@ -0,0 +1,167 @@
+"""
+Tests for copying and moving files within storage backends.
+"""
+
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+
+from documents.storage.azure_blob import AzureBlobStorageBackend
+from documents.storage.base import StorageBackend
+from documents.storage.filesystem import FilesystemStorageBackend
+
+SOURCE = "documents/originals/test.pdf"
+DESTINATION = "documents/originals/2024/renamed.pdf"
+
+
+@pytest.mark.django_db
+class TestFilesystemTransfer:
+    @pytest.fixture(autouse=True)
+    def source(self, filesystem_backend):
+        filesystem_backend.store(SOURCE, BytesIO(b"abcd"))
+
+    def test_move_renames_file(self, filesystem_backend):
+        inode = Path(filesystem_backend.get_path(SOURCE)).stat().st_ino
+
+        with mock.patch.object(
+            filesystem_backend,
+            "open",
+            side_effect=AssertionError("move should not read the file"),
+        ):
+            filesystem_backend.move(SOURCE, DESTINATION)
+
+        assert not filesystem_backend.exists(SOURCE)
+        assert filesystem_backend.retrieve(DESTINATION).read() == b"abcd"
+        assert Path(filesystem_backend.get_path(DESTINATION)).stat().st_ino == inode
+
+    def test_copy(self, filesystem_backend):
+        filesystem_backend.copy(SOURCE, DESTINATION)
+
+        assert filesystem_backend.retrieve(SOURCE).read() == b"abcd"
+        assert filesystem_backend.retrieve(DESTINATION).read() == b"abcd"
+
+    @pytest.mark.parametrize("method", ["move", "copy"])
+    def test_missing_source(self, filesystem_backend, method):
+        with pytest.raises(FileNotFoundError):
+            getattr(filesystem_backend, method)(
+                "documents/originals/missing.pdf",
+                DESTINATION,
+            )
+
+    @pytest.mark.parametrize("method", ["move", "copy"])
+    def test_existing_destination(self, filesystem_backend, method):
+        filesystem_backend.store(DESTINATION, BytesIO(b"other"))
+
+        with pytest.raises(FileExistsError):
+            getattr(filesystem_backend, method)(SOURCE, DESTINATION)
+
+        assert filesystem_backend.retrieve(SOURCE).read() == b"abcd"
+        assert filesystem_backend.retrieve(DESTINATION).read() == b"other"
+
+
+@pytest.mark.django_db
+class TestDefaultTransfer:
+    def test_default_move_copies_and_deletes(self, storage_dirs, tenant):
+        class MinimalBackend(FilesystemStorageBackend):
+            copy = StorageBackend.copy
+            move = StorageBackend.move
+
+        backend = MinimalBackend()
+        backend.store(SOURCE, BytesIO(b"abcd"))
+
+        backend.move(SOURCE, DESTINATION)
+
+        assert not backend.exists(SOURCE)
+        assert backend.retrieve(DESTINATION).read() == b"abcd"
+
+        with pytest.raises(FileExistsError):
+            backend.copy(DESTINATION, DESTINATION)
+
+
+@pytest.mark.django_db
+class TestAzureTransfer:
+    @pytest.fixture
+    def azure_backend(self, tenant) -> AzureBlobStorageBackend:
+        backend = AzureBlobStorageBackend.__new__(AzureBlobStorageBackend)
+        backend.container_client = mock.MagicMock()
+        return backend
+
+    @pytest.fixture
+    def blob_clients(self, azure_backend) -> dict[str, mock.MagicMock]:
+        clients = {}
+
+        def get_blob_client(name):
+            if name not in clients:
+                client = mock.MagicMock(name=name)
+                client.url = f"https://account.blob.core.windows.net/container/{name}"
+                client.exists.return_value = False
+                client.start_copy_from_url.return_value = {"copy_status": "success"}
+                clients[name] = client
+            return clients[name]
+
+        azure_backend.container_client.get_blob_client.side_effect = get_blob_client
+        return clients
+
+    def test_copy_is_server_side(self, azure_backend, blob_clients):
+        azure_backend.copy(SOURCE, DESTINATION)
+
+        source = blob_clients[f"test-tenant/{SOURCE}"]
+        destination = blob_clients[f"test-tenant/{DESTINATION}"]
+        destination.start_copy_from_url.assert_called_once_with(source.url)
+        source.download_blob.assert_not_called()
+        source.delete_blob.assert_not_called()
+
+    def test_copy_waits_for_pending_copy(self, azure_backend, blob_clients, mocker):
+        sleep = mocker.patch("documents.storage.azure_blob.time.sleep")
+        destination = azure_backend.container_client.get_blob_client(
+            f"test-tenant/{DESTINATION}",
+        )
+        destination.start_copy_from_url.return_value = {"copy_status": "pending"}
+        destination.get_blob_properties.side_effect = [
+            mock.Mock(copy=mock.Mock(status="pending")),
+            mock.Mock(copy=mock.Mock(status="success")),
+        ]
+
+        azure_backend.copy(SOURCE, DESTINATION)
+
+        assert sleep.call_count == 2
+
+    def test_failed_copy(self, azure_backend, blob_clients):
+        destination = azure_backend.container_client.get_blob_client(
+            f"test-tenant/{DESTINATION}",
+        )
+        destination.start_copy_from_url.return_value = {"copy_status": "failed"}
+
+        with pytest.raises(OSError):
+            azure_backend.copy(SOURCE, DESTINATION)
+
+    def test_copy_missing_source(self, azure_backend, blob_clients):
+        destination = azure_backend.container_client.get_blob_client(
+            f"test-tenant/{DESTINATION}",
+        )
+        destination.start_copy_from_url.side_effect = ResourceNotFoundError()
+
+        with pytest.raises(FileNotFoundError):
+            azure_backend.copy(SOURCE, DESTINATION)
+
+    def test_copy_existing_destination(self, azure_backend, blob_clients):
+        destination = azure_backend.container_client.get_blob_client(
+            f"test-tenant/{DESTINATION}",
+        )
+        destination.exists.return_value = True
+
+        with pytest.raises(FileExistsError):
+            azure_backend.copy(SOURCE, DESTINATION)
+
+        destination.start_copy_from_url.assert_not_called()
+
+    def test_move_deletes_source_after_copy(self, azure_backend, blob_clients):
+        azure_backend.move(SOURCE, DESTINATION)
+
+        source = blob_clients[f"test-tenant/{SOURCE}"]
+        destination = blob_clients[f"test-tenant/{DESTINATION}"]
+        destination.start_copy_from_url.assert_called_once_with(source.url)
+        source.delete_blob.assert_called_once()
@@ -4,17 +4,24 @@ import json
 import shutil
 import zipfile
 
+import pytest
 from django.contrib.auth.models import User
 from django.test import override_settings
 from django.utils import timezone
 from rest_framework import status
+from rest_framework.test import APIRequestFactory
 from rest_framework.test import APITestCase
+from rest_framework.test import force_authenticate
 
+from documents.bulk_download import OriginalsOnlyStrategy
+from documents.bulk_download import stream_zip
 from documents.models import Correspondent
 from documents.models import Document
 from documents.models import DocumentType
 from documents.tests.utils import DirectoriesMixin
 from documents.tests.utils import SampleDirMixin
+from paperless.tenants.utils import clear_current_tenant
+from paperless.tenants.utils import get_current_tenant
 
 
 class TestBulkDownload(DirectoriesMixin, SampleDirMixin, APITestCase):
@@ -68,7 +75,7 @@ class TestBulkDownload(DirectoriesMixin, SampleDirMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response["Content-Type"], "application/zip")
 
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zipf:
+        with zipfile.ZipFile(io.BytesIO(response.getvalue())) as zipf:
             self.assertEqual(len(zipf.filelist), 2)
             self.assertIn("2021-01-01 document A.pdf", zipf.namelist())
             self.assertIn("2020-03-21 document B.jpg", zipf.namelist())
@@ -89,7 +96,7 @@ class TestBulkDownload(DirectoriesMixin, SampleDirMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response["Content-Type"], "application/zip")
 
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zipf:
+        with zipfile.ZipFile(io.BytesIO(response.getvalue())) as zipf:
             self.assertEqual(len(zipf.filelist), 2)
             self.assertIn("2021-01-01 document A.pdf", zipf.namelist())
             self.assertIn("2020-03-21 document B.pdf", zipf.namelist())
@@ -110,7 +117,7 @@ class TestBulkDownload(DirectoriesMixin, SampleDirMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response["Content-Type"], "application/zip")
 
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zipf:
+        with zipfile.ZipFile(io.BytesIO(response.getvalue())) as zipf:
             self.assertEqual(len(zipf.filelist), 3)
             self.assertIn("originals/2021-01-01 document A.pdf", zipf.namelist())
             self.assertIn("archive/2020-03-21 document B.pdf", zipf.namelist())
@@ -144,7 +151,7 @@ class TestBulkDownload(DirectoriesMixin, SampleDirMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response["Content-Type"], "application/zip")
 
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zipf:
+        with zipfile.ZipFile(io.BytesIO(response.getvalue())) as zipf:
             self.assertEqual(len(zipf.filelist), 2)
 
             self.assertIn("2021-01-01 document A.pdf", zipf.namelist())
@@ -203,7 +210,7 @@ class TestBulkDownload(DirectoriesMixin, SampleDirMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response["Content-Type"], "application/zip")
 
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zipf:
+        with zipfile.ZipFile(io.BytesIO(response.getvalue())) as zipf:
             self.assertEqual(len(zipf.filelist), 2)
             self.assertIn("a space name/Title 2 - Doc 3.jpg", zipf.namelist())
             self.assertIn("test/This is Doc 2.pdf", zipf.namelist())
@@ -249,7 +256,7 @@ class TestBulkDownload(DirectoriesMixin, SampleDirMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response["Content-Type"], "application/zip")
 
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zipf:
+        with zipfile.ZipFile(io.BytesIO(response.getvalue())) as zipf:
             self.assertEqual(len(zipf.filelist), 2)
             self.assertIn("somewhere/This is Doc 2.pdf", zipf.namelist())
             self.assertIn("somewhere/Title 2 - Doc 3.pdf", zipf.namelist())
@@ -298,7 +305,7 @@ class TestBulkDownload(DirectoriesMixin, SampleDirMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response["Content-Type"], "application/zip")
 
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zipf:
+        with zipfile.ZipFile(io.BytesIO(response.getvalue())) as zipf:
             self.assertEqual(len(zipf.filelist), 3)
             self.assertIn("originals/bill/This is Doc 2.pdf", zipf.namelist())
             self.assertIn("archive/statement/Title 2 - Doc 3.pdf", zipf.namelist())
@@ -337,3 +344,112 @@ class TestBulkDownload(DirectoriesMixin, SampleDirMixin, APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(response.content, b"Insufficient permissions")
+
+
+@pytest.mark.django_db
+class TestStreamingBulkDownload:
+    @pytest.fixture
+    def documents(self, filesystem_backend) -> list[Document]:
+        documents = []
+        for pk, mime_type, content in (
+            (1, "application/pdf", b"%PDF" + b"a" * 1000),
+            (2, "text/plain", b"text " * 1000),
+        ):
+            document = Document(
+                pk=pk,
+                title=f"document {pk}",
+                mime_type=mime_type,
+                checksum=str(pk),
+                created=datetime.date(2024, 1, 1),
+                modified=timezone.now(),
+            )
+            filesystem_backend.store(document.source_path, io.BytesIO(content))
+            documents.append(document)
+        return documents
+
+    def test_stream_zip(self, documents, filesystem_backend, mocker):
+        """
+        GIVEN:
+            - A PDF and a text document
+        WHEN:
+            - A deflated zip file of the documents is streamed
+        THEN:
+            - Chunks are yielded before all documents have been read
+            - The PDF is stored, the text document deflated
+        """
+        open_spy = mocker.spy(filesystem_backend, "open")
+
+        chunks = stream_zip(
+            documents,
+            OriginalsOnlyStrategy,
+            compression=zipfile.ZIP_DEFLATED,
+            tenant=get_current_tenant(),
+            min_chunk_size=1,
+        )
+        first_chunk = next(chunks)
+        assert first_chunk.startswith(b"PK")
+        assert open_spy.call_count == 1
+        output = io.BytesIO(first_chunk + b"".join(chunks))
+
+        with zipfile.ZipFile(output) as zipf:
+            pdf, text = zipf.infolist()
+            assert pdf.compress_type == zipfile.ZIP_STORED
+            assert text.compress_type == zipfile.ZIP_DEFLATED
+            assert zipf.read(pdf) == b"%PDF" + b"a" * 1000
+            assert zipf.read(text) == b"text " * 1000
+
+    def test_stream_zip_without_tenant_context(self, documents, tenant):
+        """
+        GIVEN:
+            - A zip file streamed after the request cleared the tenant context
+        WHEN:
+            - The chunks are requested
+        THEN:
+            - The files of the tenant are read
+            - The tenant context is not left set between chunks
+        """
+        chunks = stream_zip(
+            documents,
+            OriginalsOnlyStrategy,
+            compression=zipfile.ZIP_STORED,
+            tenant=tenant,
+            min_chunk_size=1,
+        )
+        clear_current_tenant()
+
+        output = io.BytesIO()
+        for chunk in chunks:
+            assert get_current_tenant() is None
+            output.write(chunk)
+
+        with zipfile.ZipFile(output) as zipf:
+            assert len(zipf.namelist()) == 2
+
+    def test_view_streams_response(self, documents, tenant):
+        """
+        GIVEN:
+            - Documents the user may view
+        WHEN:
+            - The documents are downloaded
+        THEN:
+            - The zip file is streamed, without writing it to disk
+        """
+        from documents.views import BulkDownloadView
+
+        for document in documents:
+            document.save()
+        User.objects.bulk_create([User(username="admin", is_superuser=True)])
+        request = APIRequestFactory().post(
+            "/api/documents/bulk_download/",
+            {"documents": [document.pk for document in documents]},
+            format="json",
+        )
+        force_authenticate(request, user=User.objects.get(username="admin"))
+
+        response = BulkDownloadView.as_view()(request)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "application/zip"
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as zipf:
+            assert len(zipf.namelist()) == 2
@@ -2,15 +2,18 @@ import base64
 import json
 from unittest import mock
 
+import pytest
 from allauth.mfa.models import Authenticator
 from allauth.mfa.totp.internal import auth as totp_auth
 from django.contrib.auth.models import Group
 from django.contrib.auth.models import Permission
 from django.contrib.auth.models import User
+from django.db.models import Count
 from guardian.shortcuts import assign_perm
 from guardian.shortcuts import get_perms
 from guardian.shortcuts import get_users_with_perms
 from rest_framework import status
+from rest_framework.test import APIRequestFactory
 from rest_framework.test import APITestCase
 
 from documents.models import Correspondent
@@ -19,6 +22,8 @@ from documents.models import DocumentType
 from documents.models import MatchingModel
 from documents.models import StoragePath
 from documents.models import Tag
+from documents.serialisers import CorrespondentSerializer
+from documents.serialisers import DocumentSerializer
 from documents.tests.utils import DirectoriesMixin
 
 
@@ -1309,3 +1314,133 @@ class TestFullPermissionsFlag(APITestCase):
 
         resp = self.client.get("/api/documents/?full_perms=garbage")
         self.assertNotIn("permissions", resp.data["results"][0])
+
+
+@pytest.mark.django_db
+class TestBatchedPermissions:
+    @pytest.fixture
+    def users(self, tenant) -> tuple[User, User]:
+        User.objects.bulk_create([User(username="owner"), User(username="other")])
+        return User.objects.get(username="owner"), User.objects.get(username="other")
+
+    @pytest.fixture
+    def group(self, users) -> Group:
+        group = Group.objects.create(name="editors")
+        users[1].groups.add(group)
+        return group
+
+    def create_documents(self, owner: User, count: int) -> list[Document]:
+        first = Document.objects.count()
+        return [
+            Document.objects.create(
+                title=f"document {i}",
+                checksum=str(i),
+                mime_type="application/pdf",
+                owner=owner,
+            )
+            for i in range(first, first + count)
+        ]
+
+    def serialize_documents(self, user: User, *, full_perms: bool) -> list[dict]:
+        request = APIRequestFactory().get("/api/documents/")
+        request.version = "10"
+        serializer = DocumentSerializer(
+            Document.objects.select_related("owner").prefetch_related(
+                "tags",
+                "custom_fields",
+                "notes",
+            ),
+            many=True,
+            user=user,
+            full_perms=full_perms,
+            context={"request": request},
+        )
+        return serializer.data
+
+    def test_full_perms(self, users, group, django_assert_num_queries):
+        """
+        GIVEN:
+            - Documents shared with users and groups
+        WHEN:
+            - The documents are serialized with their full permissions
+        THEN:
+            - The permissions of every document are resolved
+            - The number of queries does not depend on the number of documents
+        """
+        owner, other = users
+        shared, private = self.create_documents(owner, 2)
+        assign_perm("view_document", other, shared)
+        assign_perm("change_document", group, shared)
+
+        with django_assert_num_queries(6):
+            data = self.serialize_documents(owner, full_perms=True)
+
+        permissions = {document["id"]: document["permissions"] for document in data}
+        assert permissions[shared.pk] == {
+            "view": {"users": [other.pk], "groups": []},
+            "change": {"users": [], "groups": [group.pk]},
+        }
+        assert permissions[private.pk] == {
+            "view": {"users": [], "groups": []},
+            "change": {"users": [], "groups": []},
+        }
+
+        for document in self.create_documents(owner, 10):
+            assign_perm("view_document", other, document)
+        with django_assert_num_queries(6):
+            self.serialize_documents(owner, full_perms=True)
+
+    def test_user_can_change(self, users, group, django_assert_num_queries):
+        """
+        GIVEN:
+            - Documents owned by another user, some of which the user may change
+              through a group
+        WHEN:
+            - The documents are serialized for the user
+        THEN:
+            - Whether the user may change them is resolved for all documents
+              at once
+            - Only documents of the owner are shared by the owner
+        """
+        owner, other = users
+        changeable, _ = self.create_documents(owner, 2)
+        assign_perm("change_document", group, changeable)
+        self.create_documents(other, 10)
+
+        with django_assert_num_queries(8):
+            data = self.serialize_documents(other, full_perms=False)
+
+        changeable_pks = {changeable.pk} | set(
+            Document.objects.filter(owner=other).values_list("pk", flat=True),
+        )
+        assert {
+            document["id"] for document in data if document["user_can_change"]
+        } == changeable_pks
+        assert not any(document["is_shared_by_requester"] for document in data)
+
+    def test_single_object(self, users):
+        """
+        GIVEN:
+            - A correspondent shared with a user
+        WHEN:
+            - The correspondent is serialized on its own
+        THEN:
+            - Its permissions are resolved
+        """
+        owner, other = users
+        correspondent = Correspondent.objects.create(name="bank", owner=owner)
+        assign_perm("change_correspondent", other, correspondent)
+        correspondent = Correspondent.objects.annotate(
+            document_count=Count("documents"),
+        ).get(pk=correspondent.pk)
+
+        data = CorrespondentSerializer(
+            correspondent,
+            user=owner,
+            full_perms=True,
+        ).data
+
+        assert data["permissions"] == {
+            "view": {"users": [], "groups": []},
+            "change": {"users": [other.pk], "groups": []},
+        }
@@ -1,4 +1,7 @@
+import logging
+import os
 import shutil
+import time
 from collections.abc import Generator
 from contextlib import contextmanager
 from pathlib import Path
@@ -8,6 +11,8 @@ import pytest
 from django.conf import settings
 from django.test import TestCase
 from django.test import override_settings
+from pdf2image import convert_from_path
+from pikepdf import Pdf
 
 from documents import tasks
 from documents.barcodes import BarcodePlugin
@@ -167,6 +172,32 @@ class TestBarcode(
             self.assertEqual(reader.pdf_file, test_file)
             self.assertDictEqual(separator_page_numbers, {2: False, 5: False})
 
+    @override_settings(CONSUMER_ENABLE_BARCODES=True, THREADS_PER_WORKER=1)
+    def test_scan_file_for_separating_barcodes_several_chunks(self):
+        """
+        GIVEN:
+            - PDF file containing a separator on pages 2 and 5 (zero indexed)
+            - Pages are rasterized in chunks smaller than the file
+        WHEN:
+            - File is scanned for barcodes
+        THEN:
+            - Barcode is detected on pages 2 and 5 (zero indexed)
+        """
+        test_file = self.BARCODE_SAMPLE_DIR / "several-patcht-codes.pdf"
+
+        with (
+            mock.patch(
+                "documents.barcodes.convert_from_path",
+                wraps=convert_from_path,
+            ) as convert,
+            self.get_reader(test_file) as reader,
+        ):
+            reader.detect()
+            separator_page_numbers = reader.get_separation_pages()
+
+            self.assertEqual(convert.call_count, 2)
+            self.assertDictEqual(separator_page_numbers, {2: False, 5: False})
+
     def test_scan_file_for_separating_barcodes_hard_to_detect(self):
         """
         GIVEN:
@@ -679,6 +710,39 @@ class TestAsnBarcode(DirectoriesMixin, SampleDirMixin, GetReaderPluginMixin, Tes
             self.assertEqual(reader.pdf_file, test_file)
             self.assertEqual(asn, 123)
 
+    @override_settings(THREADS_PER_WORKER=2)
+    def test_scan_file_for_asn_stops_at_first_asn(self):
+        """
+        GIVEN:
+            - PDF containing an ASN barcode on the first page and many more pages
+            - Barcodes are only used for the ASN
+        WHEN:
+            - File is scanned for barcodes
+        THEN:
+            - The ASN is located
+            - Only the first pages are scanned
+        """
+        test_file = self.dirs.scratch_dir / "many-pages.pdf"
+        with (
+            Pdf.open(self.BARCODE_SAMPLE_DIR / "barcode-39-asn-123.pdf") as pdf,
+            Pdf.open(self.BARCODE_SAMPLE_DIR / "several-patcht-codes.pdf") as other,
+        ):
+            pdf.pages.extend(other.pages)
+            pdf.pages.extend(other.pages)
+            pdf.save(test_file)
+
+        with (
+            mock.patch(
+                "documents.barcodes.convert_from_path",
+                wraps=convert_from_path,
+            ) as convert,
+            self.get_reader(test_file) as reader,
+        ):
+            self.assertEqual(reader.asn, 123)
+
+        convert.assert_called_once()
+        self.assertEqual(convert.call_args.kwargs["last_page"], 2)
+
     def test_scan_file_for_asn_not_found(self):
         """
         GIVEN:
@@ -928,3 +992,57 @@ class TestTagBarcode(DirectoriesMixin, SampleDirMixin, GetReaderPluginMixin, Tes
             # expect error to be caught and logged only
             tags = reader.metadata.tag_ids
             self.assertEqual(tags, None)
+
+
+@pytest.mark.skipif(
+    "PAPERLESS_BENCHMARK" not in os.environ,
+    reason="Benchmarks are only run on request",
+)
+@pytest.mark.django_db
+class TestBarcodeBenchmark:
+    """
+    Measures the barcode detection of a file of several hundred pages, e.g.
+    PAPERLESS_BENCHMARK=1 pytest -k TestBarcodeBenchmark --log-cli-level=INFO -p no:xdist
+    """
+
+    PAGES = 350
+
+    @pytest.fixture
+    def large_file(self, tmp_path) -> Path:
+        test_file = tmp_path / "large.pdf"
+        with Pdf.open(
+            SampleDirMixin.BARCODE_SAMPLE_DIR / "several-patcht-codes.pdf",
+        ) as pdf:
+            sample = list(pdf.pages)
+            while len(pdf.pages) < self.PAGES:
+                pdf.pages.extend(sample)
+            del pdf.pages[self.PAGES :]
+            pdf.save(test_file)
+        return test_file
+
+    @pytest.mark.parametrize("workers", sorted({1, 4, os.cpu_count() or 1}))
+    def test_detect(self, large_file, tmp_path, settings, workers, record_property):
+        settings.THREADS_PER_WORKER = workers
+        settings.CONSUMER_ENABLE_BARCODES = True
+        reader = BarcodePlugin(
+            ConsumableDocument(DocumentSource.ConsumeFolder, original_file=large_file),
+            DocumentMetadataOverrides(),
+            DummyProgressManager(large_file.name, None),
+            tmp_path,
+            "task-id",
+        )
+        reader.setup()
+        try:
+            start = time.perf_counter()
+            reader.detect()
+            elapsed = time.perf_counter() - start
+        finally:
+            reader.cleanup()
+
+        record_property("seconds", elapsed)
+        logging.getLogger(__name__).info(
+            f"{self.PAGES} pages with {workers} worker(s): {elapsed:.1f}s, "
+            f"{self.PAGES / elapsed:.1f} pages/s",
+        )
+        # Two separators in every seven pages
+        assert len(reader.get_separation_pages()) == 2 * (self.PAGES // 7)
@@ -11,6 +11,9 @@ from django.test import override_settings
 from documents.classifier import ClassifierModelCorruptError
 from documents.classifier import DocumentClassifier
 from documents.classifier import IncompatibleClassifierVersionError
+from documents.classifier import clear_classifier_cache
+from documents.classifier import get_classifier_cache_stats
+from documents.classifier import get_model_file
 from documents.classifier import load_classifier
 from documents.models import Correspondent
 from documents.models import Document
@@ -19,6 +22,8 @@ from documents.models import MatchingModel
 from documents.models import StoragePath
 from documents.models import Tag
 from documents.tests.utils import DirectoriesMixin
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import tenant_context
 
 
 def dummy_preprocess(content: str, **kwargs):
@@ -781,3 +786,156 @@ def test_preprocess_content_nltk_load_fail(mocker):
         expected_preprocess_content = f.read().rstrip()
     result = classifier.preprocess_content(content)
     assert result == expected_preprocess_content
+
+
+class TestLoadedClassifierCache:
+    @pytest.fixture(autouse=True)
+    def model_file(self, tmp_path, settings):
+        settings.MODEL_FILE = tmp_path / "model.pickle"
+        settings.MODEL_FILE.write_bytes(b"model")
+        clear_classifier_cache()
+        yield settings.MODEL_FILE
+        clear_classifier_cache()
+
+    @pytest.fixture
+    def mock_load(self, mocker):
+        return mocker.patch("documents.classifier.DocumentClassifier.load")
+
+    def test_cache_hit(self, mock_load):
+        """
+        GIVEN:
+            - A classifier model file
+        WHEN:
+            - The classifier is loaded twice
+        THEN:
+            - The model is only loaded from disk once
+            - The same classifier is returned
+        """
+        classifier = load_classifier()
+
+        assert load_classifier() is classifier
+        mock_load.assert_called_once()
+        stats = get_classifier_cache_stats()
+        assert (stats.hits, stats.misses, stats.loads) == (1, 1, 1)
+        assert stats.last_load_time is not None
+
+    def test_reload_when_model_replaced(self, mock_load, model_file: Path):
+        """
+        GIVEN:
+            - A cached classifier
+        WHEN:
+            - The model file is replaced, as done when saving a trained model
+        THEN:
+            - The new model is loaded
+        """
+        classifier = load_classifier()
+
+        new_file = model_file.with_suffix(".pickle.part")
+        new_file.write_bytes(b"model")
+        new_file.rename(model_file)
+
+        assert load_classifier() is not classifier
+        assert mock_load.call_count == 2
+
+    def test_reload_on_version_change(self, mock_load):
+        """
+        GIVEN:
+            - A cached classifier
+        WHEN:
+            - The classifier format version changes
+        THEN:
+            - The model is loaded again
+        """
+        load_classifier()
+
+        with mock.patch(
+            "documents.classifier.DocumentClassifier.FORMAT_VERSION",
+            DocumentClassifier.FORMAT_VERSION + 1,
+        ):
+            load_classifier()
+
+        assert mock_load.call_count == 2
+
+    def test_model_removed(self, mock_load, model_file: Path):
+        """
+        GIVEN:
+            - A cached classifier
+        WHEN:
+            - The model file is removed
+        THEN:
+            - No classifier is returned
+        """
+        load_classifier()
+        model_file.unlink()
+
+        assert load_classifier() is None
+
+    def test_failed_load_not_cached(self, mock_load):
+        """
+        GIVEN:
+            - A model file which fails to load
+        WHEN:
+            - The classifier is loaded twice
+        THEN:
+            - Loading is attempted both times
+        """
+        mock_load.side_effect = OSError()
+
+        assert load_classifier() is None
+        assert load_classifier() is None
+        assert mock_load.call_count == 2
+
+    def test_uncached_load(self, mock_load):
+        """
+        GIVEN:
+            - A cached classifier
+        WHEN:
+            - The classifier is loaded without the cache
+        THEN:
+            - A private copy is loaded
+        """
+        classifier = load_classifier()
+
+        assert load_classifier(use_cache=False) is not classifier
+        assert load_classifier() is classifier
+        assert mock_load.call_count == 2
+
+    def test_model_file_per_tenant(self, tenant, model_file: Path):
+        """
+        GIVEN:
+            - A current tenant
+        WHEN:
+            - The model file is requested
+        THEN:
+            - The tenant's model file is returned
+        """
+        assert get_model_file() == (
+            model_file.parent / "classifiers" / "test-tenant" / "model.pickle"
+        )
+        assert get_model_file(None) != model_file
+
+    @pytest.mark.django_db
+    def test_lru_eviction(self, mock_load, settings):
+        """
+        GIVEN:
+            - Room for a single cached classifier
+        WHEN:
+            - Classifiers of two tenants are loaded alternately
+        THEN:
+            - The least recently used classifier is evicted and loaded again
+        """
+        settings.CLASSIFIER_CACHE_SIZE = 1
+        tenants = [
+            Tenant.objects.create(name=identifier, identifier=identifier)
+            for identifier in ("first", "second")
+        ]
+        for tenant in tenants:
+            get_model_file(tenant).parent.mkdir(parents=True)
+            get_model_file(tenant).write_bytes(b"model")
+
+        for tenant in [*tenants, tenants[0]]:
+            with tenant_context(tenant):
+                load_classifier()
+
+        assert mock_load.call_count == 3
+        assert get_classifier_cache_stats().evictions == 2
@@ -1,11 +1,18 @@
 import datetime
+import logging
+import os
+import re
+import time
 from zoneinfo import ZoneInfo
 
+import dateparser
 import pytest
 from pytest_django.fixtures import SettingsWrapper
 
+from documents.parsers import DATE_REGEX
 from documents.parsers import parse_date
 from documents.parsers import parse_date_generator
+from documents.tests.utils import SampleDirMixin
 
 
 @pytest.mark.django_db()
@@ -536,3 +543,135 @@ class TestDate:
             0,
             tzinfo=settings_timezone,
         )
+
+
+@pytest.mark.django_db()
+class TestDateEngine:
+    TEXT = "Invoice of 02.02.2018, due 02.03.2018, paid 02.02.2018 and 01.04.2018"
+
+    def test_config_read_once(self, django_assert_max_num_queries):
+        """
+        GIVEN:
+            - Content with many dates
+        WHEN:
+            - The dates are parsed without configured date parser languages
+        THEN:
+            - The languages are looked up from the OCR configuration once
+        """
+        text = " ".join(f"{day:02}.01.2018" for day in range(1, 29))
+
+        # Reading the OCR configuration, not once for every date
+        with django_assert_max_num_queries(4):
+            assert len(list(parse_date_generator("", text))) == 28
+
+    def test_same_dates_parsed_once(self, settings: SettingsWrapper, mocker):
+        """
+        GIVEN:
+            - Content with a date repeated
+        WHEN:
+            - The dates are parsed
+        THEN:
+            - Each date is only parsed once and the parser is reused
+            - The repeated date is still returned every time
+        """
+        settings.DATE_PARSER_LANGUAGES = ["en"]
+        get_date_data = mocker.spy(
+            dateparser.date.DateDataParser,
+            "get_date_data",
+        )
+
+        dates = list(parse_date_generator("", self.TEXT))
+
+        assert len(dates) == 4
+        assert get_date_data.call_count == 3
+
+    def test_limit(self, settings_timezone: ZoneInfo):
+        """
+        GIVEN:
+            - Content with a date repeated
+        WHEN:
+            - The dates are parsed with a limit
+        THEN:
+            - Only as many different dates as the limit are returned
+        """
+        assert list(parse_date_generator("", self.TEXT, limit=2)) == [
+            datetime.datetime(2018, 2, 2, 0, 0, tzinfo=settings_timezone),
+            datetime.datetime(2018, 3, 2, 0, 0, tzinfo=settings_timezone),
+        ]
+
+    def test_max_chars(self, settings: SettingsWrapper, settings_timezone: ZoneInfo):
+        """
+        GIVEN:
+            - Only the start of the content is searched for dates
+        WHEN:
+            - The dates are parsed
+        THEN:
+            - Dates after the start are not returned
+        """
+        settings.DATE_PARSER_MAX_CHARS = 40
+
+        assert list(parse_date_generator("", self.TEXT)) == [
+            datetime.datetime(2018, 2, 2, 0, 0, tzinfo=settings_timezone),
+            datetime.datetime(2018, 3, 2, 0, 0, tzinfo=settings_timezone),
+        ]
+
+
+@pytest.mark.skipif(
+    "PAPERLESS_BENCHMARK" not in os.environ,
+    reason="Benchmarks are only run on request",
+)
+@pytest.mark.django_db()
+class TestDateBenchmark:
+    """
+    Measures the date parsing of a long document made of the sample content,
+    with many dates which do not parse and some which do, e.g.
+    PAPERLESS_BENCHMARK=1 pytest -k TestDateBenchmark --log-cli-level=INFO
+    """
+
+    COPIES = 100
+
+    @pytest.fixture
+    def text(self) -> str:
+        samples = "\n".join(
+            path.read_text() for path in sorted(SampleDirMixin.SAMPLE_DIR.glob("*.txt"))
+        )
+        return "\n".join(
+            f"{samples}\nDated {copy % 28 + 1:02}.13.2020, "
+            f"signed {copy % 28 + 1}. März 2021, page {copy}"
+            for copy in range(self.COPIES)
+        )
+
+    def test_parse_dates(
+        self,
+        text,
+        settings: SettingsWrapper,
+        django_assert_max_num_queries,
+        record_property,
+    ):
+        matches = list(re.finditer(DATE_REGEX, text))
+        parser_settings = {
+            "DATE_ORDER": settings.DATE_ORDER,
+            "PREFER_DAY_OF_MONTH": "first",
+            "RETURN_AS_TIMEZONE_AWARE": True,
+            "TIMEZONE": settings.TIME_ZONE,
+        }
+
+        start = time.perf_counter()
+        expected = [
+            dateparser.parse(m.group(0), settings=parser_settings, locales=["en", "de"])
+            for m in matches
+        ]
+        uncached = time.perf_counter() - start
+
+        settings.DATE_PARSER_LANGUAGES = ["en", "de"]
+        start = time.perf_counter()
+        with django_assert_max_num_queries(0):
+            dates = list(parse_date_generator("", text))
+        elapsed = time.perf_counter() - start
+
+        record_property("seconds", elapsed)
+        logging.getLogger(__name__).info(
+            f"{len(matches)} date-like strings: {elapsed * 1000:.0f}ms, "
+            f"{uncached * 1000:.0f}ms parsing each of them",
+        )
+        assert dates == [date for date in expected if date is not None]
@@ -0,0 +1,159 @@
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+
+from documents import hashing
+from documents.consumer import ConsumerError
+from documents.consumer import ConsumerPreflightPlugin
+from documents.data_models import ConsumableDocument
+from documents.data_models import DocumentMetadataOverrides
+from documents.data_models import DocumentSource
+from documents.data_models import FileDigest
+from documents.models import Document
+from documents.tests.utils import DummyProgressManager
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def sample(tmp_path: Path, settings) -> Path:
+    settings.PAPERLESS_STORAGE_CHUNK_SIZE = 1000
+    path = tmp_path / "sample.pdf"
+    path.write_bytes(CONTENT)
+    return path
+
+
+class TestHashing:
+    def test_hash_file(self, sample, settings):
+        """
+        GIVEN:
+            - A file larger than a chunk
+        WHEN:
+            - The file is hashed with and without SHA-256 enabled
+        THEN:
+            - The checksums are those of the whole content
+        """
+        assert hashing.hash_file(sample) == FileDigest(
+            md5=hashlib.md5(CONTENT).hexdigest(),
+        )
+
+        settings.CONSUMER_ENABLE_SHA256 = True
+
+        assert hashing.hash_file(sample) == FileDigest(
+            md5=hashlib.md5(CONTENT).hexdigest(),
+            sha256=hashlib.sha256(CONTENT).hexdigest(),
+        )
+        assert hashing.hash_bytes(CONTENT) == hashing.hash_file(sample)
+
+    def test_reader(self):
+        """
+        GIVEN:
+            - A file wrapped to be hashed as it is read
+        WHEN:
+            - The file is read in chunks, read again from the start, or read
+              out of order
+        THEN:
+            - The digest is only known when the whole file was read in order
+        """
+        reader = hashing.HashingReader(io.BytesIO(CONTENT), sha256=False)
+        while reader.read(1000):
+            assert reader.digest is None
+        assert reader.digest == hashing.hash_bytes(CONTENT, sha256=False)
+
+        reader.seek(0)
+        assert reader.read(10) == CONTENT[:10]
+        assert reader.digest is None
+        reader.read()
+        assert reader.digest == hashing.hash_bytes(CONTENT, sha256=False)
+
+        reader.seek(0)
+        reader.read(10)
+        reader.seek(100)
+        reader.read()
+        assert reader.digest is None
+
+    def test_store_and_hash(self, sample, filesystem_backend):
+        """
+        GIVEN:
+            - A file to store
+        WHEN:
+            - The file is stored with the storage backend
+        THEN:
+            - The file is stored and hashed as it is read
+        """
+        digest = hashing.store_and_hash(filesystem_backend, "archive/a.pdf", sample)
+
+        assert digest.md5 == hashlib.md5(CONTENT).hexdigest()
+        assert filesystem_backend.retrieve("archive/a.pdf").read() == CONTENT
+
+    def test_store_and_hash_unordered(self, sample, mocker):
+        """
+        GIVEN:
+            - A storage backend which does not read the file in order
+        WHEN:
+            - The file is stored
+        THEN:
+            - The file is hashed after it was stored
+        """
+        backend = mocker.Mock()
+        backend.store.side_effect = lambda path, f: f.seek(10)
+
+        digest = hashing.store_and_hash(backend, "archive/a.pdf", sample)
+
+        assert digest.md5 == hashlib.md5(CONTENT).hexdigest()
+
+
+@pytest.mark.django_db
+class TestPreflightDigest:
+    def get_plugin(self, sample, tmp_path, digest=None) -> ConsumerPreflightPlugin:
+        return ConsumerPreflightPlugin(
+            ConsumableDocument(
+                DocumentSource.ApiUpload,
+                original_file=sample,
+                digest=digest,
+            ),
+            DocumentMetadataOverrides(),
+            DummyProgressManager(sample.name, None),
+            tmp_path,
+            "task-id",
+        )
+
+    def test_received_digest(self, tenant, sample, tmp_path, mocker):
+        """
+        GIVEN:
+            - A file which was hashed while it was received
+        WHEN:
+            - The file is checked for duplicates
+        THEN:
+            - The file is not read again
+            - The duplicate is detected by the checksum
+        """
+        Document.objects.create(
+            title="existing",
+            checksum="abc",
+            mime_type="application/pdf",
+        )
+        hash_file = mocker.patch("documents.consumer.hash_file")
+        plugin = self.get_plugin(sample, tmp_path, FileDigest(md5="abc"))
+
+        with pytest.raises(ConsumerError):
+            plugin.pre_check_duplicate()
+
+        hash_file.assert_not_called()
+
+    def test_file_hashed(self, tenant, sample, tmp_path):
+        """
+        GIVEN:
+            - A file which was not hashed yet
+        WHEN:
+            - The file is checked for duplicates
+        THEN:
+            - The file is hashed and its digest kept for consuming it
+        """
+        plugin = self.get_plugin(sample, tmp_path)
+
+        plugin.pre_check_duplicate()
+
+        assert plugin.input_doc.digest == hashing.hash_bytes(CONTENT)
@@ -1,16 +1,30 @@
 from datetime import datetime
 from unittest import mock
 
+import pytest
+from django.contrib.auth.models import Group
 from django.contrib.auth.models import User
 from django.test import SimpleTestCase
 from django.test import TestCase
 from django.test import override_settings
 from django.utils.timezone import get_current_timezone
 from django.utils.timezone import timezone
+from guardian.shortcuts import assign_perm
+from guardian.shortcuts import get_users_with_perms
+from whoosh.index import create_in
+from whoosh.query import Every
+from whoosh.query import Term
 
 from documents import index
+from documents import tasks
+from documents.models import CustomField
+from documents.models import CustomFieldInstance
 from documents.models import Document
+from documents.models import Note
+from documents.models import Tag
 from documents.tests.utils import DirectoriesMixin
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import tenant_context
 
 
 class TestAutoComplete(DirectoriesMixin, TestCase):
@@ -251,3 +265,481 @@ class TestRewriteNaturalDateKeywords(SimpleTestCase):
         result = self._rewrite_with_now("added:today", fixed_now)
         # Should convert to UTC properly
         self.assertIn("added:[20250719", result)
+
+
+@pytest.mark.django_db
+class TestTenantIndexes:
+    @pytest.fixture
+    def tenants(self, settings, tmp_path):
+        settings.INDEX_DIR = tmp_path / "index"
+        return (
+            Tenant.objects.create(name="First", identifier="first"),
+            Tenant.objects.create(name="Second", identifier="second"),
+        )
+
+    @staticmethod
+    def create_document(tenant, content: str) -> Document:
+        with tenant_context(tenant):
+            return Document.objects.create(
+                title=content,
+                checksum=content,
+                content=content,
+            )
+
+    @staticmethod
+    def indexed_ids(tenant) -> set[int]:
+        with index.open_index_searcher(tenant=tenant) as searcher:
+            return {fields["id"] for fields in searcher.all_stored_fields()}
+
+    def test_index_dir_per_tenant(self, tenants, settings):
+        """
+        GIVEN:
+            - A current tenant
+        WHEN:
+            - The index directory is requested
+        THEN:
+            - The tenant's subdirectory of the index directory is returned
+        """
+        first, _ = tenants
+
+        with tenant_context(first):
+            assert index.get_index_dir() == settings.INDEX_DIR / "first"
+        assert index.get_index_dir() == settings.INDEX_DIR
+
+    def test_documents_indexed_per_tenant(self, tenants):
+        """
+        GIVEN:
+            - Documents of two tenants
+        WHEN:
+            - The documents are indexed, outside of the tenant context
+        THEN:
+            - Each document is in the index of its tenant only
+            - Autocompletion only sees the current tenant's index
+        """
+        first, second = tenants
+        doc1 = self.create_document(first, "apple")
+        doc2 = self.create_document(second, "apricot")
+
+        index.add_or_update_document(doc1)
+        index.add_or_update_document(doc2)
+
+        assert self.indexed_ids(first) == {doc1.pk}
+        assert self.indexed_ids(second) == {doc2.pk}
+        with tenant_context(first):
+            assert index.autocomplete(index.open_index(), "ap") == [b"apple"]
+
+    def test_reindex_single_tenant(self, tenants):
+        """
+        GIVEN:
+            - Documents of two tenants, which are not indexed
+        WHEN:
+            - The index of one tenant is rebuilt, then all of them
+        THEN:
+            - Only that tenant's index is rebuilt at first
+            - Every tenant's index is rebuilt in the end
+        """
+        first, second = tenants
+        doc1 = self.create_document(first, "apple")
+        doc2 = self.create_document(second, "apricot")
+
+        tasks.index_reindex(progress_bar_disable=True, tenant=first)
+
+        assert self.indexed_ids(first) == {doc1.pk}
+        assert self.indexed_ids(second) == set()
+
+        tasks.index_reindex(progress_bar_disable=True)
+
+        assert self.indexed_ids(second) == {doc2.pk}
+
+    def test_optimize_keeps_other_tenants(self, tenants):
+        """
+        GIVEN:
+            - Indexed documents of two tenants
+        WHEN:
+            - The top level index is recreated
+        THEN:
+            - The tenant indexes are kept
+        """
+        first, _ = tenants
+        doc1 = self.create_document(first, "apple")
+        index.add_or_update_document(doc1)
+
+        index.open_index(recreate=True)
+        tasks.index_optimize(tenant_id=first.pk)
+
+        assert self.indexed_ids(first) == {doc1.pk}
+
+
+class InProcessPool:
+    """
+    Runs the jobs of a process pool in the current process, which shares the
+    test database
+    """
+
+    def __init__(self, processes: int) -> None:
+        self.processes = processes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def imap_unordered(self, func, iterable):
+        return map(func, iterable)
+
+
+@pytest.mark.django_db
+class TestParallelReindex:
+    @pytest.fixture
+    def tenant(self, settings, tmp_path, mocker) -> Tenant:
+        settings.INDEX_DIR = tmp_path / "index"
+        mocker.patch("documents.tasks.multiprocessing.Pool", InProcessPool)
+        mocker.patch("documents.tasks.db.connections.close_all")
+        # Partitions of two documents
+        mocker.patch.object(index, "INDEX_CHUNK_SIZE", 2)
+        return Tenant.objects.create(name="First", identifier="first")
+
+    @pytest.fixture
+    def documents(self, tenant) -> list[Document]:
+        return [
+            TestTenantIndexes.create_document(tenant, f"document {i}") for i in range(5)
+        ]
+
+    def test_reindex(self, tenant, documents):
+        """
+        GIVEN:
+            - Documents of a tenant
+        WHEN:
+            - The index is rebuilt with several processes
+        THEN:
+            - The partitions are indexed and merged into the tenant's index
+            - The working directory is removed
+        """
+        with mock.patch(
+            "documents.tasks._reindex_partition",
+            wraps=tasks._reindex_partition,
+        ) as reindex_partition:
+            tasks.index_reindex(progress_bar_disable=True, tenant=tenant, processes=2)
+
+        assert reindex_partition.call_count == 3
+        assert TestTenantIndexes.indexed_ids(tenant) == {doc.pk for doc in documents}
+        assert not (index.get_index_dir(tenant) / ".reindex").exists()
+        with tenant_context(tenant), index.open_index_searcher() as searcher:
+            assert len(searcher.search(Term("content", "document"))) == 5
+
+    def test_resume(self, tenant, documents):
+        """
+        GIVEN:
+            - A parallel reindex interrupted after the first partition
+        WHEN:
+            - A document is deleted and added, and the reindex is run again
+        THEN:
+            - Only the partitions which were not complete are indexed
+            - The index holds exactly the current documents
+        """
+        reindex_partition = tasks._reindex_partition
+        completed = []
+
+        def interrupted(job):
+            if completed:
+                raise KeyboardInterrupt
+            completed.append(job)
+            return reindex_partition(job)
+
+        with (
+            mock.patch("documents.tasks._reindex_partition", interrupted),
+            pytest.raises(KeyboardInterrupt),
+        ):
+            tasks.index_reindex(progress_bar_disable=True, tenant=tenant, processes=2)
+
+        with tenant_context(tenant):
+            Document.objects.filter(pk=documents[0].pk).delete()
+        added = TestTenantIndexes.create_document(tenant, "added")
+
+        with mock.patch(
+            "documents.tasks._reindex_partition",
+            wraps=reindex_partition,
+        ) as resumed:
+            tasks.index_reindex(progress_bar_disable=True, tenant=tenant, processes=2)
+
+        assert resumed.call_count == 2
+        assert TestTenantIndexes.indexed_ids(tenant) == {
+            doc.pk for doc in [*documents[1:], added]
+        }
+
+
+class TestDocumentIdMap:
+    @pytest.fixture
+    def ix(self, tmp_path):
+        return create_in(tmp_path, index.get_schema())
+
+    @staticmethod
+    def add_documents(ix, *document_ids: int) -> None:
+        # Each commit without merging creates a new segment
+        with ix.writer() as writer:
+            writer.merge = False
+            for document_id in document_ids:
+                writer.add_document(id=document_id, title=str(document_id))
+
+    @staticmethod
+    def stored_ids(reader) -> list[int]:
+        return [
+            reader.stored_fields(docnum)["id"] if not reader.is_deleted(docnum) else -1
+            for docnum in range(reader.doc_count_all())
+        ]
+
+    def test_maps_docnums_across_segments(self, ix):
+        """
+        GIVEN:
+            - An index with several segments and a deleted document
+        WHEN:
+            - The document IDs of the reader are requested
+        THEN:
+            - Every docnum is mapped to the ID of its stored fields
+            - The deleted document is mapped to -1
+        """
+        self.add_documents(ix, 3, 1)
+        self.add_documents(ix, 7)
+        self.add_documents(ix, 5, 2)
+        with ix.writer() as writer:
+            writer.merge = False
+            writer.delete_by_term("id", 7)
+
+        with ix.reader() as reader:
+            assert len(list(reader.leaf_readers())) == 3
+            document_ids = index.get_document_ids(reader)
+
+            assert list(document_ids) == self.stored_ids(reader)
+            assert -1 in document_ids
+
+    def test_reused_until_segments_change(self, ix):
+        """
+        GIVEN:
+            - An indexed document
+        WHEN:
+            - The document IDs are requested twice for the same segments
+            - Another document is added in a new segment
+        THEN:
+            - The same mapping is returned for the unchanged segments
+            - The mapping is rebuilt, reading only the new segment
+        """
+        self.add_documents(ix, 1)
+
+        with ix.reader() as reader:
+            first = index.get_document_ids(reader)
+        with ix.reader() as reader:
+            assert index.get_document_ids(reader) is first
+
+        self.add_documents(ix, 2)
+
+        with (
+            mock.patch.object(
+                index.DocumentIdMapCache,
+                "_read_segment",
+                wraps=index.DocumentIdMapCache._read_segment,
+            ) as read_segment,
+            ix.reader() as reader,
+        ):
+            assert list(index.get_document_ids(reader)) == [1, 2]
+            read_segment.assert_called_once()
+
+    @pytest.mark.django_db
+    def test_filter_by_document_ids(self, ix, tenant):
+        """
+        GIVEN:
+            - Indexed documents, not all of which are in a queryset
+        WHEN:
+            - The index is searched with the queryset as filter
+        THEN:
+            - Only hits of documents in the queryset are returned
+        """
+        docs = [
+            Document.objects.create(title=str(i), checksum=str(i), content="test")
+            for i in range(4)
+        ]
+        self.add_documents(ix, *(doc.pk for doc in docs))
+        allowed = Document.objects.filter(pk__in=[docs[1].pk, docs[3].pk])
+
+        with ix.searcher() as searcher:
+            results = searcher.search(
+                Every(),
+                filter=index.MappedDocIdSet(allowed, searcher.ixreader),
+            )
+            assert {hit["id"] for hit in results} == {docs[1].pk, docs[3].pk}
+
+
+class StoredFieldsDocIdSet(index.MappedDocIdSet):
+    """
+    The previous filter, which loads the stored fields of every hit
+    """
+
+    def __init__(self, filter_queryset, ixreader) -> None:
+        super().__init__(filter_queryset, ixreader)
+        self.ixreader = ixreader
+
+    def __contains__(self, docnum) -> bool:
+        document_id = self.ixreader.stored_fields(docnum)["id"]
+        return document_id in self.document_ids
+
+
+@pytest.mark.django_db
+class TestDocumentIdMapPerformance:
+    def test_broad_query_latency(self, tmp_path, tenant):
+        """
+        GIVEN:
+            - An index of a few thousand documents, a third of which are visible
+        WHEN:
+            - A query matching every document is filtered by the visible ones,
+              using stored fields and the cached document ID map
+        THEN:
+            - The same hits are returned
+            - The cached document ID map is faster
+        """
+        import time
+
+        count = 3000
+        Document.objects.bulk_create(
+            Document(title=str(i), checksum=str(i), content="test", tenant=tenant)
+            for i in range(count)
+        )
+        pks = list(Document.objects.values_list("pk", flat=True))
+        ix = create_in(tmp_path, index.get_schema())
+        for start in range(0, count, 500):
+            TestDocumentIdMap.add_documents(ix, *pks[start : start + 500])
+        visible = Document.objects.filter(pk__in=pks[::3])
+
+        def search(filter_class) -> tuple[float, int, list[int]]:
+            with ix.searcher() as searcher:
+                start_time = time.perf_counter()
+                results = searcher.search(
+                    Every(),
+                    filter=filter_class(visible, searcher.ixreader),
+                    limit=None,
+                )
+                first_page = [hit["id"] for hit in results[:25]]
+                elapsed = time.perf_counter() - start_time
+                return elapsed, len(results), first_page
+
+        # Warm up the mapping, as it is only read once per segment
+        search(index.MappedDocIdSet)
+
+        stored = [search(StoredFieldsDocIdSet) for _ in range(3)]
+        mapped = [search(index.MappedDocIdSet) for _ in range(3)]
+        stored_time = min(elapsed for elapsed, *_ in stored)
+        mapped_time = min(elapsed for elapsed, *_ in mapped)
+        _, *stored_hits = stored[0]
+        _, *mapped_hits = mapped[0]
+
+        assert mapped_hits == stored_hits
+        assert mapped_time < stored_time, (
+            f"stored fields: {stored_time:.4f}s, mapped: {mapped_time:.4f}s"
+        )
+
+
+@pytest.mark.django_db
+class TestBatchedIndexing:
+    @pytest.fixture
+    def documents(self, tenant, settings, tmp_path) -> list[Document]:
+        settings.INDEX_DIR = tmp_path / "index"
+        owner, viewer, group_member = User.objects.bulk_create(
+            User(username=username) for username in ("owner", "viewer", "member")
+        )
+        group = Group.objects.create(name="group")
+        group_member.groups.add(group)
+        tag = Tag.objects.create(name="tag")
+        field = CustomField.objects.create(
+            name="field",
+            data_type=CustomField.FieldDataType.STRING,
+        )
+
+        documents = []
+        for i in range(6):
+            document = Document.objects.create(
+                title=f"doc{i}",
+                checksum=str(i),
+                content="content",
+                owner=owner,
+            )
+            document.tags.add(tag)
+            Note.objects.create(document=document, note=f"note{i}", user=owner)
+            CustomFieldInstance.objects.create(
+                document=document,
+                field=field,
+                value_text=f"value{i}",
+            )
+            documents.append(document)
+        assign_perm("view_document", viewer, documents[0])
+        assign_perm("view_document", group, documents[0])
+        assign_perm("view_document", group, documents[1])
+        return documents
+
+    @staticmethod
+    def indexed_fields(documents) -> dict[int, dict]:
+        with index.open_index_searcher() as searcher:
+            return {
+                fields["id"]: fields
+                for fields in searcher.all_stored_fields()
+                if fields["id"] in {doc.pk for doc in documents}
+            }
+
+    def test_viewer_ids(self, documents):
+        """
+        GIVEN:
+            - Documents viewable by users directly and through groups
+        WHEN:
+            - The viewers of the documents are resolved at once
+        THEN:
+            - The same users as for each single document are returned
+        """
+        viewer_ids = index.get_viewer_ids(documents)
+
+        for document in documents:
+            assert viewer_ids[document.pk] == sorted(
+                user.id
+                for user in get_users_with_perms(
+                    document,
+                    only_with_perms_in=["view_document"],
+                )
+            )
+        assert viewer_ids[documents[0].pk]
+        assert index.get_viewer_ids([]) == {}
+
+    def test_chunks_indexed_like_single_documents(self, documents):
+        """
+        GIVEN:
+            - Documents with tags, notes, custom fields and permissions
+        WHEN:
+            - The documents are indexed one by one, then in chunks
+        THEN:
+            - The indexed fields are the same
+        """
+        with index.open_index_writer() as writer:
+            for document in documents:
+                index.update_document(writer, document)
+        expected = self.indexed_fields(documents)
+
+        index.open_index(recreate=True)
+        with index.open_index_writer() as writer:
+            for chunk in index.iter_index_chunks(
+                Document.objects.all(),
+                chunk_size=4,
+            ):
+                index.update_documents(writer, chunk)
+
+        assert self.indexed_fields(documents) == expected
+
+    def test_queries_per_chunk(self, documents, django_assert_num_queries):
+        """
+        GIVEN:
+            - Documents with tags, notes, custom fields and permissions
+        WHEN:
+            - The documents are indexed in a single chunk
+        THEN:
+            - The number of queries does not depend on the number of documents
+        """
+        with index.open_index_writer() as writer:
+            # documents, tags, notes, custom fields, viewers and the end check
+            with django_assert_num_queries(6):
+                for chunk in index.iter_index_chunks(Document.objects.all()):
+                    index.update_documents(writer, chunk)
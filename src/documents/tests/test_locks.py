@@ -0,0 +1,252 @@
+import threading
+from io import BytesIO
+
+import pytest
+
+from documents import locks
+from documents.file_handling import generate_unique_filename
+from documents.file_handling import get_filename_lock_keys
+from documents.file_handling import lock_document_files
+from documents.models import Document
+
+
+def is_locked_elsewhere(*keys: str) -> bool:
+    """
+    Checks from another thread if any of the keys is locked
+    """
+    result = []
+
+    def try_lock():
+        stripe_locks = [locks._get_stripe_lock(locks._get_stripe(key)) for key in keys]
+        acquired = [lock for lock in stripe_locks if locks._try_acquire(lock)]
+        for lock in acquired:
+            lock.release()
+        result.append(len(acquired) < len(stripe_locks))
+
+    thread = threading.Thread(target=try_lock)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+class TestLockKeys:
+    @pytest.mark.parametrize(
+        "other",
+        [
+            "documents/originals/invoice_01.pdf",
+            "documents/originals/invoice_01_02.pdf",
+            "documents/originals/invoice.pdf.gpg",
+            "documents/originals/invoice.jpg",
+        ],
+    )
+    def test_unique_names_share_key(self, other):
+        """
+        GIVEN:
+            - A file name and a name generate_unique_filename may pick instead
+        WHEN:
+            - The lock keys are requested
+        THEN:
+            - Both names have the same key
+        """
+        assert locks.get_lock_key(
+            "documents/originals/invoice.pdf",
+            1,
+        ) == locks.get_lock_key(other, 1)
+
+    @pytest.mark.parametrize(
+        ("path", "tenant_id"),
+        [
+            ("documents/originals/invoice.pdf", 2),
+            ("documents/originals/2024/invoice.pdf", 1),
+            ("documents/archive/invoice.pdf", 1),
+            ("documents/originals/receipt.pdf", 1),
+        ],
+    )
+    def test_other_files_differ(self, path, tenant_id):
+        """
+        GIVEN:
+            - Files of other tenants, in other directories or with other names
+        WHEN:
+            - The lock keys are requested
+        THEN:
+            - The keys differ
+        """
+        assert locks.get_lock_key(
+            "documents/originals/invoice.pdf",
+            1,
+        ) != locks.get_lock_key(path, tenant_id)
+
+
+class TestMediaLock:
+    @pytest.fixture(autouse=True)
+    def lock_settings(self, storage_dirs, settings):
+        settings.MEDIA_LOCK_STRIPES = 16
+        settings.MEDIA_LOCK_BACKEND = "file"
+
+    def test_locks_keys(self):
+        """
+        GIVEN:
+            - Two files with different lock stripes
+        WHEN:
+            - One of them is locked
+        THEN:
+            - It can not be locked elsewhere until released
+            - The other one can be locked elsewhere
+        """
+        locked = locks.get_lock_key("documents/originals/a.pdf", 1)
+        other = next(
+            key
+            for key in (
+                locks.get_lock_key(f"documents/originals/{i}.pdf", 1)
+                for i in range(100)
+            )
+            if locks._get_stripe(key) != locks._get_stripe(locked)
+        )
+
+        with locks.media_lock(locked):
+            assert is_locked_elsewhere(locked)
+            assert not is_locked_elsewhere(other)
+        assert not is_locked_elsewhere(locked)
+
+    def test_locks_everything_without_keys(self):
+        """
+        GIVEN:
+            - No keys
+        WHEN:
+            - The media lock is taken
+        THEN:
+            - No file can be locked elsewhere
+        """
+        with locks.media_lock():
+            assert is_locked_elsewhere(
+                locks.get_lock_key("documents/originals/a.pdf", 1),
+            )
+
+    def test_reentrant(self):
+        """
+        GIVEN:
+            - A locked file
+        WHEN:
+            - The same thread locks it again
+        THEN:
+            - The lock is held until the outer lock is released
+        """
+        key = locks.get_lock_key("documents/originals/a.pdf", 1)
+
+        with locks.media_lock(key):
+            with locks.media_lock(key):
+                pass
+            assert is_locked_elsewhere(key)
+        assert not is_locked_elsewhere(key)
+
+    def test_wait_recorded(self):
+        """
+        GIVEN:
+            - A file locked by another thread
+        WHEN:
+            - The file is locked after the other thread releases it
+        THEN:
+            - The contended acquisition and its wait time are recorded
+        """
+        key = locks.get_lock_key("documents/originals/a.pdf", 1)
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            with locks.media_lock(key):
+                locked.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        locked.wait()
+        before = locks.get_media_lock_stats()
+
+        threading.Timer(0.2, release.set).start()
+        with locks.media_lock(key):
+            pass
+        thread.join()
+
+        stats = locks.get_media_lock_stats()
+        assert stats.acquisitions == before.acquisitions + 1
+        assert stats.contended == before.contended + 1
+        assert stats.wait_time - before.wait_time >= 0.1
+
+    def test_redis_backend(self, settings, mocker):
+        """
+        GIVEN:
+            - The Redis lock backend
+        WHEN:
+            - The lock of a stripe is requested
+        THEN:
+            - A Redis lock named after the stripe is returned
+        """
+        settings.MEDIA_LOCK_BACKEND = "redis"
+        redis = mocker.patch("documents.locks._get_redis")
+
+        lock = locks._get_stripe_lock(3)
+
+        assert lock is redis.return_value.lock.return_value
+        redis.return_value.lock.assert_called_once_with(
+            f"{settings._REDIS_KEY_PREFIX}paperless:media-lock:3",
+            timeout=locks.REDIS_LOCK_TIMEOUT,
+        )
+
+
+@pytest.mark.django_db
+class TestDocumentLocks:
+    @pytest.fixture
+    def document(self, tenant, storage_dirs, settings) -> Document:
+        settings.FILENAME_FORMAT = "{{ title }}"
+        settings.MEDIA_LOCK_STRIPES = 1024
+        return Document.objects.create(
+            title="invoice",
+            checksum="A",
+            mime_type="application/pdf",
+            filename="invoice.pdf",
+        )
+
+    def test_new_names_share_keys(self, document, filesystem_backend):
+        """
+        GIVEN:
+            - A renamed document whose new file name is taken by another file
+        WHEN:
+            - A unique file name is generated
+        THEN:
+            - The current and the generated name are covered by the lock keys
+        """
+        filesystem_backend.store("documents/originals/receipt.pdf", BytesIO(b""))
+        document.title = "receipt"
+        keys = get_filename_lock_keys(document)
+
+        filename = generate_unique_filename(document)
+
+        assert filename.name == "receipt_01.pdf"
+        assert {
+            locks.get_lock_key(f"documents/originals/{name}", document.tenant_id)
+            for name in (filename, "invoice.pdf")
+        } == keys
+
+    def test_relocked_after_change(self, document):
+        """
+        GIVEN:
+            - A document renamed since it was loaded
+        WHEN:
+            - Its files are locked
+        THEN:
+            - The document is refreshed
+            - The files of its new name are locked
+        """
+        Document.objects.filter(pk=document.pk).update(
+            title="receipt",
+            filename="receipt.pdf",
+        )
+
+        with lock_document_files(document):
+            assert document.filename == "receipt.pdf"
+            assert is_locked_elsewhere(
+                locks.get_lock_key(
+                    "documents/originals/receipt.pdf",
+                    document.tenant_id,
+                ),
+            )
@@ -1,95 +1,203 @@
-import shutil
+import io
+import os
 from pathlib import Path
-from unittest import mock
 
+import pytest
 from django.core.management import call_command
-from django.test import TestCase
 
-from documents.management.commands.document_thumbnails import _process_document
+from documents import tasks
 from documents.models import Document
-from documents.parsers import get_default_thumbnail
-from documents.tests.utils import DirectoriesMixin
-from documents.tests.utils import FileSystemAssertsMixin
-
-
-class TestMakeThumbnails(DirectoriesMixin, FileSystemAssertsMixin, TestCase):
-    def make_models(self):
-        self.d1 = Document.objects.create(
-            checksum="A",
-            title="A",
-            content="first document",
-            mime_type="application/pdf",
-            filename="test.pdf",
-        )
-        shutil.copy(
-            Path(__file__).parent / "samples" / "simple.pdf",
-            self.d1.source_path,
-        )
+from documents.thumbnails import THUMBNAIL_SIZES
 
-        self.d2 = Document.objects.create(
-            checksum="B",
-            title="B",
-            content="second document",
-            mime_type="application/pdf",
-            filename="test2.pdf",
-        )
-        shutil.copy(
-            Path(__file__).parent / "samples" / "simple.pdf",
-            self.d2.source_path,
-        )
+SAMPLE_DIR = Path(__file__).parent / "samples"
+
+
+@pytest.mark.django_db
+class TestMakeThumbnails:
+    @pytest.fixture
+    def make_document(self, tenant, filesystem_backend):
+        def make_document(sample: str, mime_type="application/pdf") -> Document:
+            count = Document.objects.count()
+            document = Document.objects.create(
+                title=sample,
+                checksum=f"{count}",
+                mime_type=mime_type,
+                filename=f"{count}.pdf",
+            )
+            with (SAMPLE_DIR / sample).open("rb") as f:
+                filesystem_backend.store(document.source_path, f)
+            return document
+
+        return make_document
+
+    @pytest.fixture
+    def documents(self, make_document) -> list[Document]:
+        return [
+            make_document("simple.pdf"),
+            make_document("simple.pdf"),
+            make_document("password-is-test.pdf"),
+        ]
 
-        self.d3 = Document.objects.create(
-            checksum="C",
-            title="C",
-            content="third document",
-            mime_type="application/pdf",
-            filename="test3.pdf",
+    def call_command(self, *args):
+        call_command(
+            "document_thumbnails",
+            "--processes",
+            "1",
+            "--no-progress-bar",
+            *args,
         )
-        shutil.copy(
-            Path(__file__).parent / "samples" / "password-is-test.pdf",
-            self.d3.source_path,
+
+    def set_modified(self, backend, path: str, modified: int) -> None:
+        os.utime(backend.get_path(path), (modified, modified))
+
+    def test_command(self, documents, filesystem_backend):
+        """
+        GIVEN:
+            - Documents without thumbnails, one of them password protected
+        WHEN:
+            - Command is called
+        THEN:
+            - The thumbnails of all documents are stored
+            - The thumbnails of all sizes are stored for rendered PDFs
+        """
+        self.call_command()
+
+        for document in documents:
+            assert filesystem_backend.exists(document.thumbnail_path)
+        for size in THUMBNAIL_SIZES:
+            assert filesystem_backend.exists(documents[0].get_thumbnail_path(size))
+
+    def test_command_documentid(self, documents, filesystem_backend):
+        """
+        GIVEN:
+            - Documents without thumbnails
+        WHEN:
+            - Command is called with the ID of a document
+        THEN:
+            - Only the thumbnail of the document is stored
+        """
+        self.call_command("-d", f"{documents[0].id}")
+
+        assert filesystem_backend.exists(documents[0].thumbnail_path)
+        assert not filesystem_backend.exists(documents[1].thumbnail_path)
+
+    @pytest.mark.parametrize("listing", [True, False])
+    def test_command_up_to_date(self, documents, filesystem_backend, mocker, listing):
+        """
+        GIVEN:
+            - A thumbnail newer than its original and one older than it
+        WHEN:
+            - Command is called, with a storage backend which can or can't
+              list its files
+        THEN:
+            - Only the outdated thumbnail is regenerated
+        """
+        if not listing:
+            mocker.patch.object(
+                filesystem_backend,
+                "iter_files",
+                side_effect=NotImplementedError,
+            )
+        current, outdated = documents[:2]
+        for document in (current, outdated):
+            filesystem_backend.store(document.thumbnail_path, io.BytesIO(b"old"))
+            self.set_modified(filesystem_backend, document.source_path, 1000)
+        self.set_modified(filesystem_backend, current.thumbnail_path, 2000)
+        self.set_modified(filesystem_backend, outdated.thumbnail_path, 500)
+
+        self.call_command()
+
+        assert filesystem_backend.retrieve(current.thumbnail_path).read() == b"old"
+        assert filesystem_backend.retrieve(outdated.thumbnail_path).read() != b"old"
+
+    def test_command_force(self, documents, filesystem_backend):
+        """
+        GIVEN:
+            - A thumbnail newer than its original
+        WHEN:
+            - Command is called with --force
+        THEN:
+            - The thumbnail is regenerated
+        """
+        document = documents[0]
+        filesystem_backend.store(document.thumbnail_path, io.BytesIO(b"old"))
+        self.set_modified(filesystem_backend, document.source_path, 1000)
+        self.set_modified(filesystem_backend, document.thumbnail_path, 2000)
+
+        self.call_command("--force")
+
+        assert filesystem_backend.retrieve(document.thumbnail_path).read() != b"old"
+
+    def test_invalid_mime_type(self, make_document, filesystem_backend):
+        """
+        GIVEN:
+            - A document whose mime type has no parser
+        WHEN:
+            - Command is called
+        THEN:
+            - No thumbnail is stored for the document
+        """
+        document = make_document("simple.pdf", mime_type="asdasdasd")
+        other = make_document("simple.pdf")
+
+        self.call_command()
+
+        assert not filesystem_backend.exists(document.thumbnail_path)
+        assert filesystem_backend.exists(other.thumbnail_path)
+
+    def test_missing_original(self, make_document, filesystem_backend):
+        """
+        GIVEN:
+            - A document whose original is missing
+        WHEN:
+            - Command is called
+        THEN:
+            - The thumbnails of the other documents are stored
+        """
+        document = make_document("simple.pdf")
+        filesystem_backend.delete(document.source_path)
+        other = make_document("simple.pdf")
+
+        self.call_command()
+
+        assert not filesystem_backend.exists(document.thumbnail_path)
+        assert filesystem_backend.exists(other.thumbnail_path)
+
+    def test_queue(self, documents, tenant, mocker):
+        """
+        GIVEN:
+            - Documents of a tenant
+        WHEN:
+            - Command is called with --queue
+        THEN:
+            - The regeneration is queued as tasks for the workers
+        """
+        mocker.patch(
+            "documents.management.commands.document_thumbnails.TASK_BATCH_SIZE",
+            2,
         )
+        group = mocker.patch("documents.management.commands.document_thumbnails.group")
+
+        self.call_command("--queue", "--force")
+
+        (signatures,), _ = group.call_args
+        assert [signature.args for signature in signatures] == [
+            ([documents[0].pk, documents[1].pk], tenant.pk),
+            ([documents[2].pk], tenant.pk),
+        ]
+        assert all(signature.kwargs == {"force": True} for signature in signatures)
+        group.return_value.delay.assert_called_once()
+
+    def test_task(self, documents, tenant, filesystem_backend):
+        """
+        GIVEN:
+            - Documents without thumbnails
+        WHEN:
+            - The task regenerating the thumbnails of some of them runs
+        THEN:
+            - The thumbnails of those documents are stored
+        """
+        tasks.regenerate_thumbnails([documents[0].pk], tenant.pk)
 
-    def setUp(self) -> None:
-        super().setUp()
-        self.make_models()
-
-    def test_process_document(self):
-        self.assertIsNotFile(self.d1.thumbnail_path)
-        _process_document(self.d1.id)
-        self.assertIsFile(self.d1.thumbnail_path)
-
-    def test_process_document_password_protected(self):
-        self.assertIsFile(get_default_thumbnail())
-        self.assertIsNotFile(self.d3.thumbnail_path)
-        _process_document(self.d3.id)
-        # Ensure default thumbnail is still there
-        self.assertIsFile(get_default_thumbnail())
-        self.assertIsFile(self.d3.thumbnail_path)
-
-    @mock.patch("documents.management.commands.document_thumbnails.shutil.move")
-    def test_process_document_invalid_mime_type(self, m: mock.Mock):
-        self.d1.mime_type = "asdasdasd"
-        self.d1.save()
-
-        # .save() triggers filename handling
-        m.reset_mock()
-
-        _process_document(self.d1.id)
-
-        # Not called during processing of document
-        m.assert_not_called()
-
-    def test_command(self):
-        self.assertIsNotFile(self.d1.thumbnail_path)
-        self.assertIsNotFile(self.d2.thumbnail_path)
-        call_command("document_thumbnails", "--processes", "1")
-        self.assertIsFile(self.d1.thumbnail_path)
-        self.assertIsFile(self.d2.thumbnail_path)
-
-    def test_command_documentid(self):
-        self.assertIsNotFile(self.d1.thumbnail_path)
-        self.assertIsNotFile(self.d2.thumbnail_path)
-        call_command("document_thumbnails", "--processes", "1", "-d", f"{self.d1.id}")
-        self.assertIsFile(self.d1.thumbnail_path)
-        self.assertIsNotFile(self.d2.thumbnail_path)
+        assert filesystem_backend.exists(documents[0].thumbnail_path)
+        assert not filesystem_backend.exists(documents[1].thumbnail_path)
@@ -0,0 +1,101 @@
+from io import BytesIO
+
+import pytest
+
+from documents.models import Document
+from documents.models import StoragePath
+from documents.signals.handlers import update_filename_and_move_files
+from documents.tasks import repath_documents
+
+
+@pytest.fixture
+def storage_path(tenant) -> StoragePath:
+    return StoragePath.objects.create(name="by title", path="old/{{ title }}")
+
+
+def create_document(backend, storage_path: StoragePath, title: str) -> Document:
+    document = Document.objects.create(
+        title=title,
+        checksum=title,
+        mime_type="application/pdf",
+        storage_path=storage_path,
+    )
+    document.filename = f"old/{title}.pdf"
+    Document.objects.filter(pk=document.pk).update(filename=document.filename)
+    backend.store(document.source_path, BytesIO(title.encode()))
+    return document
+
+
+@pytest.mark.django_db
+class TestMoveFiles:
+    def test_moved_by_backend(self, filesystem_backend, storage_path, mocker):
+        """
+        GIVEN:
+            - A document whose storage path was changed
+        WHEN:
+            - The files of the document are updated
+        THEN:
+            - The file is moved by the storage backend
+            - The new file name is saved
+        """
+        document = create_document(filesystem_backend, storage_path, "invoice")
+        StoragePath.objects.filter(pk=storage_path.pk).update(path="new/{{ title }}")
+        move = mocker.spy(filesystem_backend, "move")
+
+        update_filename_and_move_files(Document, document)
+
+        move.assert_called_once_with(
+            "documents/originals/old/invoice.pdf",
+            "documents/originals/new/invoice.pdf",
+        )
+        document.refresh_from_db()
+        assert document.filename == "new/invoice.pdf"
+        assert filesystem_backend.retrieve(document.source_path).read() == b"invoice"
+
+    def test_existing_name_skipped(self, filesystem_backend, storage_path):
+        """
+        GIVEN:
+            - A document whose new file name is taken by a file in the storage
+        WHEN:
+            - The files of the document are updated
+        THEN:
+            - A unique file name is generated by asking the storage backend
+        """
+        document = create_document(filesystem_backend, storage_path, "invoice")
+        filesystem_backend.store("documents/originals/new/invoice.pdf", BytesIO(b""))
+        StoragePath.objects.filter(pk=storage_path.pk).update(path="new/{{ title }}")
+
+        update_filename_and_move_files(Document, document)
+
+        document.refresh_from_db()
+        assert document.filename == "new/invoice_01.pdf"
+        assert filesystem_backend.retrieve(document.source_path).read() == b"invoice"
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRepathDocuments:
+    def test_repath(self, filesystem_backend, storage_path, tenant, settings):
+        """
+        GIVEN:
+            - Documents of a storage path whose template was changed
+        WHEN:
+            - The documents are re-pathed by several threads
+        THEN:
+            - The files of all documents are moved to their new names
+        """
+        settings.PAPERLESS_STORAGE_MOVE_WORKERS = 4
+        documents = [
+            create_document(filesystem_backend, storage_path, f"doc{i}")
+            for i in range(10)
+        ]
+        StoragePath.objects.filter(pk=storage_path.pk).update(path="new/{{ title }}")
+
+        repath_documents([document.pk for document in documents], tenant.pk)
+
+        for document in documents:
+            document.refresh_from_db()
+            assert document.filename == f"new/{document.title}.pdf"
+            assert filesystem_backend.exists(document.source_path)
+            assert not filesystem_backend.exists(
+                f"documents/originals/old/{document.title}.pdf",
+            )
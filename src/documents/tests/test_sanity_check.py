@@ -1,15 +1,28 @@
+import dataclasses
+import hashlib
 import logging
 import shutil
+from datetime import timedelta
+from io import BytesIO
 from pathlib import Path
+from unittest import mock
 
 import filelock
+import pytest
+from celery import states
 from django.conf import settings
 from django.test import TestCase
 from django.test import override_settings
+from django.utils import timezone
 
 from documents.models import Document
+from documents.models import PaperlessTask
+from documents.models import StoredFileChecksum
+from documents.sanity_checker import SanityCheckMessages
 from documents.sanity_checker import check_sanity
 from documents.tests.utils import DirectoriesMixin
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import tenant_context
 
 
 class TestSanityCheck(DirectoriesMixin, TestCase):
@@ -95,12 +108,6 @@ class TestSanityCheck(DirectoriesMixin, TestCase):
         Path(doc.thumbnail_path).unlink()
         self.assertSanityError(doc, "Thumbnail of document does not exist")
 
-    def test_thumbnail_no_access(self):
-        doc = self.make_test_data()
-        Path(doc.thumbnail_path).chmod(0o000)
-        self.assertSanityError(doc, "Cannot read thumbnail file of document")
-        Path(doc.thumbnail_path).chmod(0o777)
-
     def test_no_original(self):
         doc = self.make_test_data()
         Path(doc.source_path).unlink()
@@ -190,3 +197,287 @@ class TestSanityCheck(DirectoriesMixin, TestCase):
             doc,
             "has an archive file checksum, but no archive filename.",
         )
+
+
+@pytest.mark.django_db
+class TestSanityCheckStorageBackend:
+    @pytest.fixture
+    def document(self, filesystem_backend):
+        samples = Path(__file__).parent / "samples" / "documents"
+        for logical_path, sample in (
+            ("documents/originals/0000001.pdf", "originals/0000001.pdf"),
+            ("documents/archive/0000001.pdf", "archive/0000001.pdf"),
+            ("documents/thumbnails/0000001.webp", "thumbnails/0000001.webp"),
+        ):
+            with (samples / sample).open("rb") as f:
+                filesystem_backend.store(logical_path, f)
+
+        return Document.objects.create(
+            title="test",
+            checksum="42995833e01aea9b3edee44bbfdd7ce1",
+            archive_checksum="62acb0bcbfbcaa62ca6ad3668e4e404b",
+            content="test",
+            pk=1,
+            filename="0000001.pdf",
+            mime_type="application/pdf",
+            archive_filename="0000001.pdf",
+        )
+
+    def test_no_issues(self, document):
+        messages = check_sanity()
+
+        assert len(messages) == 0
+
+    def test_missing_original(self, document, filesystem_backend):
+        filesystem_backend.delete(document.source_path)
+
+        messages = check_sanity()
+
+        assert messages.has_error
+        assert messages[document.pk][0]["message"] == (
+            "Original of document does not exist."
+        )
+
+    def test_uses_stored_content_hash(self, document, filesystem_backend):
+        """
+        GIVEN:
+            - A storage backend which knows the MD5 of its files
+        WHEN:
+            - The sanity checker runs
+        THEN:
+            - The stored hash is compared without reading the files
+        """
+        original_iter_files = filesystem_backend.iter_files
+        hashes = {
+            document.source_path: document.checksum,
+            document.archive_path: "not the archive checksum",
+        }
+
+        def iter_files_with_hash(prefix=""):
+            for info in original_iter_files(prefix):
+                yield dataclasses.replace(info, content_hash=hashes.get(info.path))
+
+        with (
+            mock.patch.object(
+                filesystem_backend,
+                "iter_files",
+                side_effect=iter_files_with_hash,
+            ),
+            mock.patch.object(
+                filesystem_backend,
+                "iter_chunks",
+                side_effect=AssertionError("file content should not be read"),
+            ),
+        ):
+            messages = check_sanity()
+
+        assert messages.has_error
+        assert len(messages[document.pk]) == 1
+        assert messages[document.pk][0]["message"].startswith(
+            "Checksum mismatch of archived document.",
+        )
+
+    def test_set_diff_without_stat(self, document, filesystem_backend):
+        """
+        GIVEN:
+            - A document with all its files, and a file no document references
+        WHEN:
+            - The sanity checker runs
+        THEN:
+            - The files are listed once instead of inspected one by one
+            - The unreferenced file is reported as orphaned
+        """
+        filesystem_backend.store("documents/originals/orphan.pdf", BytesIO(b"a"))
+        filesystem_backend.store("documents/originals/.DS_Store", BytesIO(b"a"))
+
+        with (
+            mock.patch.object(
+                filesystem_backend,
+                "stat",
+                side_effect=AssertionError("files should be listed"),
+            ),
+            mock.patch.object(
+                filesystem_backend,
+                "exists",
+                side_effect=AssertionError("files should be listed"),
+            ),
+        ):
+            messages = check_sanity()
+
+        assert not messages.has_error
+        assert [msg["message"] for msg in messages[None]] == [
+            "Orphaned file in media dir: "
+            f"{filesystem_backend.get_path('documents/originals/orphan.pdf')}",
+        ]
+
+    def test_tenants_checked_separately(self, document, filesystem_backend):
+        """
+        GIVEN:
+            - Another tenant storing a file with the name of a document's file
+        WHEN:
+            - The sanity checker runs
+        THEN:
+            - The file of the other tenant is orphaned
+        """
+        other = Tenant.objects.create(name="Other", identifier="other")
+        with tenant_context(other):
+            filesystem_backend.store(document.source_path, BytesIO(b"a"))
+            orphan = filesystem_backend.get_path(document.source_path)
+
+        messages = check_sanity()
+
+        assert not messages.has_error
+        assert [msg["message"] for msg in messages[None]] == [
+            f"Orphaned file in media dir: {orphan}",
+        ]
+
+
+@pytest.mark.django_db
+class TestIncrementalSanityCheck:
+    @pytest.fixture
+    def document(self, filesystem_backend):
+        filesystem_backend.store("documents/originals/0000001.pdf", BytesIO(b"abc"))
+        filesystem_backend.store("documents/thumbnails/0000001.webp", BytesIO(b"a"))
+        return Document.objects.create(
+            title="test",
+            checksum=hashlib.md5(b"abc").hexdigest(),
+            content="test",
+            pk=1,
+            filename="0000001.pdf",
+            mime_type="application/pdf",
+        )
+
+    @pytest.fixture
+    def read_paths(self, filesystem_backend, mocker) -> list:
+        return mocker.spy(filesystem_backend, "iter_chunks").call_args_list
+
+    def test_unchanged_files_not_read(self, document, read_paths):
+        """
+        GIVEN:
+            - A document checked before
+        WHEN:
+            - The sanity checker runs again
+        THEN:
+            - The original is not read again
+        """
+        assert len(check_sanity()) == 0
+        assert len(read_paths) == 1
+
+        assert len(check_sanity()) == 0
+        assert len(read_paths) == 1
+
+    def test_changed_file_read(self, document, filesystem_backend, read_paths):
+        """
+        GIVEN:
+            - A document checked before, whose original changed since
+        WHEN:
+            - The sanity checker runs again
+        THEN:
+            - The original is read again and the mismatch detected
+        """
+        check_sanity()
+        filesystem_backend.delete(document.source_path)
+        filesystem_backend.store(document.source_path, BytesIO(b"abcd"))
+
+        messages = check_sanity()
+
+        assert len(read_paths) == 2
+        assert messages[document.pk][0]["message"].startswith("Checksum mismatch.")
+
+    def test_known_mismatch_reported(self, document, read_paths):
+        """
+        GIVEN:
+            - A document whose original did not match its checksum when checked
+        WHEN:
+            - The sanity checker runs again
+        THEN:
+            - The mismatch is reported without reading the original again
+        """
+        Document.objects.filter(pk=document.pk).update(checksum="WOW")
+        check_sanity()
+
+        messages = check_sanity()
+
+        assert len(read_paths) == 1
+        assert messages[document.pk][0]["message"].startswith(
+            "Checksum mismatch. Stored: WOW",
+        )
+
+    def test_rehash_sample(self, document, read_paths):
+        """
+        GIVEN:
+            - A document checked before
+        WHEN:
+            - The sanity checker runs again, reading all unchanged files
+        THEN:
+            - The original is read again
+        """
+        check_sanity()
+
+        check_sanity(rehash_percent=100)
+
+        assert len(read_paths) == 2
+
+    def test_resume(self, document, read_paths):
+        """
+        GIVEN:
+            - A sanity check which read the original before it was interrupted
+        WHEN:
+            - The sanity checker runs again, reading all unchanged files
+        THEN:
+            - The interrupted run is completed
+            - Files read by the interrupted run are not read again
+        """
+        check_sanity()
+        task = PaperlessTask.objects.create(
+            task_id="interrupted",
+            task_name=PaperlessTask.TaskName.CHECK_SANITY,
+            status=states.STARTED,
+            date_started=timezone.now() - timedelta(hours=1),
+        )
+
+        check_sanity(rehash_percent=100)
+
+        assert len(read_paths) == 1
+        task.refresh_from_db()
+        assert task.status == states.SUCCESS
+        assert PaperlessTask.objects.count() == 2
+
+    def test_removed_files_forgotten(self, document, filesystem_backend):
+        """
+        GIVEN:
+            - A document checked before, whose original was removed since
+        WHEN:
+            - The sanity checker runs again
+        THEN:
+            - The checksum of the original is forgotten
+        """
+        check_sanity()
+        assert StoredFileChecksum.objects.count() == 1
+        filesystem_backend.delete(document.source_path)
+
+        check_sanity()
+
+        assert StoredFileChecksum.objects.count() == 0
+
+    def test_log_messages_queries_once(self, document, django_assert_num_queries):
+        """
+        GIVEN:
+            - Issues with several documents
+        WHEN:
+            - The messages are logged
+        THEN:
+            - The documents are loaded with a single query
+        """
+        messages = SanityCheckMessages()
+        for pk in (document.pk, document.pk + 1):
+            Document.objects.create(
+                title=f"test {pk}",
+                checksum=str(pk),
+                pk=pk + 1,
+                mime_type="application/pdf",
+            )
+            messages.error(pk + 1, "Issue")
+
+        with django_assert_num_queries(1):
+            messages.log_messages()
@@ -0,0 +1,145 @@
+from datetime import datetime
+from datetime import timezone
+from io import BytesIO
+
+import pytest
+from django.test import RequestFactory
+from django.utils.http import http_date
+
+from documents.models import Document
+
+CONTENT = b"0123456789" * 10
+
+
+@pytest.fixture
+def document(filesystem_backend) -> Document:
+    filesystem_backend.store("documents/originals/0000001.pdf", BytesIO(CONTENT))
+    return Document(
+        pk=1,
+        title="test",
+        checksum="abc123",
+        mime_type="application/pdf",
+        created=datetime(2024, 1, 1).date(),
+        modified=datetime(2024, 1, 2, tzinfo=timezone.utc),
+    )
+
+
+def get_response(document: Document, **headers):
+    # The views module evaluates tenant aware querysets on import
+    from documents.views import serve_file
+
+    request = RequestFactory().get("/", headers=headers)
+    return serve_file(
+        request=request,
+        doc=document,
+        use_archive=False,
+        disposition="inline",
+    )
+
+
+class TestParseByteRange:
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            (None, None),
+            ("", None),
+            ("bytes=0-9", (0, 9)),
+            ("bytes=90-", (90, 99)),
+            ("bytes=90-200", (90, 99)),
+            ("bytes=-10", (90, 99)),
+            ("bytes=-200", (0, 99)),
+            ("bytes = 5 - 6", (5, 6)),
+            ("bytes=9-5", None),
+            ("bytes=0-1,5-6", None),
+            ("items=0-9", None),
+            ("bytes=a-b", None),
+            ("bytes=-", None),
+            ("bytes=5", None),
+        ],
+    )
+    def test_parse(self, tenant, header, expected):
+        from documents.views import parse_byte_range
+
+        assert parse_byte_range(header, 100) == expected
+
+    @pytest.mark.parametrize("header", ["bytes=100-", "bytes=-0", "bytes=200-300"])
+    def test_unsatisfiable(self, tenant, header):
+        from documents.views import parse_byte_range
+
+        with pytest.raises(ValueError):
+            parse_byte_range(header, 100)
+
+    def test_empty_file(self, tenant):
+        from documents.views import parse_byte_range
+
+        with pytest.raises(ValueError):
+            parse_byte_range("bytes=-5", 0)
+
+
+@pytest.mark.django_db
+class TestServeFileRanges:
+    def test_full_response(self, document):
+        response = get_response(document)
+
+        assert response.status_code == 200
+        assert response["Accept-Ranges"] == "bytes"
+        assert response["Content-Length"] == "100"
+        assert response["ETag"] == '"abc123"'
+        assert response.getvalue() == CONTENT
+
+    def test_partial_response(self, document, filesystem_backend):
+        response = get_response(document, Range="bytes=10-19")
+
+        assert response.status_code == 206
+        assert response["Content-Range"] == "bytes 10-19/100"
+        assert response["Content-Length"] == "10"
+        assert response["Content-Disposition"].startswith("inline;")
+        assert response.getvalue() == CONTENT[10:20]
+
+    def test_suffix_range(self, document):
+        response = get_response(document, Range="bytes=-5")
+
+        assert response.status_code == 206
+        assert response["Content-Range"] == "bytes 95-99/100"
+        assert response.getvalue() == CONTENT[95:]
+
+    def test_unsatisfiable_range(self, document):
+        response = get_response(document, Range="bytes=100-")
+
+        assert response.status_code == 416
+        assert response["Content-Range"] == "bytes */100"
+
+    def test_multiple_ranges_serve_full_file(self, document):
+        response = get_response(document, Range="bytes=0-1,5-6")
+
+        assert response.status_code == 200
+        assert response.getvalue() == CONTENT
+
+    def test_if_range_etag_match(self, document):
+        response = get_response(document, Range="bytes=0-4", If_Range='"abc123"')
+
+        assert response.status_code == 206
+        assert response.getvalue() == CONTENT[:5]
+
+    @pytest.mark.parametrize("if_range", ['"other"', 'W/"abc123"'])
+    def test_if_range_etag_mismatch(self, document, if_range):
+        response = get_response(document, Range="bytes=0-4", If_Range=if_range)
+
+        assert response.status_code == 200
+        assert response.getvalue() == CONTENT
+
+    def test_if_range_date(self, document):
+        modified = http_date(document.modified.timestamp())
+
+        response = get_response(document, Range="bytes=0-4", If_Range=modified)
+
+        assert response.status_code == 206
+
+    def test_if_range_date_mismatch(self, document):
+        response = get_response(
+            document,
+            Range="bytes=0-4",
+            If_Range=http_date(0),
+        )
+
+        assert response.status_code == 200
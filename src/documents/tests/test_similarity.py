@@ -0,0 +1,191 @@
+import random
+import string
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from documents import similarity
+from documents.models import Document
+from documents.models import DocumentSignature
+
+
+def get_text(seed: int, words: int = 200) -> str:
+    rng = random.Random(seed)
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        for _ in range(words)
+    )
+
+
+def create_document(content: str) -> Document:
+    return Document.objects.create(
+        title="A",
+        content=content,
+        checksum=f"{random.getrandbits(64):x}",
+        mime_type="application/pdf",
+    )
+
+
+class TestCandidates:
+    def test_similar_content(self):
+        """
+        GIVEN:
+            - Content with a few words changed, and unrelated content
+        WHEN:
+            - The candidates of their signatures are found
+        THEN:
+            - Only the similar content is a candidate pair
+        """
+        text = get_text(1)
+        changed = text.replace(" ", "s ", 5)
+        signatures = {
+            pk: similarity.get_signature(similarity.process_content(content))
+            for pk, content in [(1, text), (2, changed), (3, get_text(2))]
+        }
+
+        assert similarity.get_candidates(signatures) == {(1, 2)}
+
+    def test_signature(self):
+        """
+        GIVEN:
+            - Content, short content and no content
+        WHEN:
+            - The signatures are computed
+        THEN:
+            - The signature of the same content is always the same
+            - There is no signature without content
+        """
+        first = similarity.get_signature("first document")
+
+        assert len(first) == similarity.NUM_PERM * 4
+        assert similarity.get_signature("first document") == first
+        assert similarity.get_signature("doc") is not None
+        assert similarity.get_signature("") is None
+
+    def test_unrelated_documents(self):
+        """
+        GIVEN:
+            - Many documents with unrelated content
+        WHEN:
+            - The candidates of their signatures are found
+        THEN:
+            - Hardly any pairs are candidates
+        """
+        signatures = {
+            seed: similarity.get_signature(
+                similarity.process_content(get_text(seed, words=50)),
+            )
+            for seed in range(300)
+        }
+
+        assert len(similarity.get_candidates(signatures)) < 300
+
+
+@pytest.mark.django_db
+class TestFuzzyMatch:
+    def call_command(self, *args) -> str:
+        stdout = StringIO()
+        call_command(
+            "document_fuzzy_match",
+            "--no-progress-bar",
+            "--processes",
+            "1",
+            *args,
+            stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def test_matches(self, tenant):
+        """
+        GIVEN:
+            - 3 documents whose content is almost the same and an unrelated one
+        WHEN:
+            - Command is called with the --delete option
+        THEN:
+            - Each pair of the similar documents is reported once
+            - The second document of each match is deleted
+            - The signatures of the documents are stored
+        """
+        first = create_document("first document scanned by bob")
+        second = create_document("first document scanned by alice")
+        third = create_document("first document scanned by pete")
+        other = create_document(get_text(1))
+
+        stdout = self.call_command("--delete")
+
+        lines = [line for line in stdout.splitlines() if "fuzzy match" in line]
+        assert [line.split(" (")[0] for line in lines] == [
+            f"Document {first.pk} fuzzy match to {second.pk}",
+            f"Document {first.pk} fuzzy match to {third.pk}",
+            f"Document {second.pk} fuzzy match to {third.pk}",
+        ]
+        assert "Deleting 3 documents based on ratio matches" in stdout
+        assert list(Document.objects.values_list("pk", flat=True)) == [
+            first.pk,
+            other.pk,
+        ]
+        assert DocumentSignature.objects.count() == 2
+
+    def test_changed_content(self, tenant):
+        """
+        GIVEN:
+            - Documents whose signatures are stored
+        WHEN:
+            - The content of a document changes and the command is called again
+        THEN:
+            - The signature of the changed document is updated
+            - The documents no longer match
+        """
+        first = create_document("first document scanned by bob")
+        second = create_document("first document scanned by alice")
+        assert "fuzzy match" in self.call_command()
+        stored = DocumentSignature.objects.get(document=second).signature
+
+        second.content = get_text(2)
+        second.save()
+
+        assert "No matches found" in self.call_command()
+        assert DocumentSignature.objects.get(document=second).signature != stored
+        assert DocumentSignature.objects.filter(document=first).exists()
+
+
+@pytest.mark.django_db
+class TestFindSimilarDocuments:
+    def test_new_document(self, tenant):
+        """
+        GIVEN:
+            - Documents whose signatures are stored
+        WHEN:
+            - A new document almost the same as one of them is checked
+        THEN:
+            - Only that document is found
+            - The signature of the new document is stored
+        """
+        text = get_text(1)
+        similar = create_document(text)
+        create_document(get_text(2))
+        for document in Document.objects.all():
+            similarity.find_similar_documents(document)
+
+        document = create_document(text.replace(" ", "s ", 5))
+        result = similarity.find_similar_documents(document)
+
+        assert [pk for pk, _ in result] == [similar.pk]
+        assert result[0][1] >= similarity.DEFAULT_RATIO
+        assert DocumentSignature.objects.filter(document=document).exists()
+
+    def test_no_content(self, tenant):
+        """
+        GIVEN:
+            - A document without content
+        WHEN:
+            - The document is checked
+        THEN:
+            - Nothing is found and no signature is stored
+        """
+        create_document("")
+        document = create_document("")
+
+        assert similarity.find_similar_documents(document) == []
+        assert not DocumentSignature.objects.exists()
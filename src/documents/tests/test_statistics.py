@@ -0,0 +1,230 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+from guardian.shortcuts import assign_perm
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+
+from documents import statistics
+from documents.bulk_edit import set_permissions
+from documents.models import Document
+from documents.models import DocumentStatistics
+
+
+def get_counters() -> dict:
+    return {
+        (row.owner_id, row.mime_type): (row.document_count, row.character_count)
+        for row in DocumentStatistics.objects.all()
+        if row.document_count or row.character_count
+    }
+
+
+def get_exact_counters() -> dict:
+    return {
+        (owner_id, mime_type): (count, characters)
+        for owner_id, mime_type, count, characters in statistics._count(
+            Document.objects.all(),
+            "owner_id",
+            "mime_type",
+        )
+    }
+
+
+@pytest.fixture
+def users(tenant) -> tuple[User, User]:
+    User.objects.bulk_create([User(username="owner"), User(username="other")])
+    return User.objects.get(username="owner"), User.objects.get(username="other")
+
+
+def create_document(owner: User | None, content: str, mime_type="application/pdf"):
+    return Document.objects.create(
+        title=content,
+        content=content,
+        checksum=content,
+        mime_type=mime_type,
+        owner=owner,
+    )
+
+
+@pytest.mark.django_db
+class TestCounters:
+    def test_saved_and_deleted(self, users):
+        """
+        GIVEN:
+            - Documents of different owners and mime types
+        WHEN:
+            - Documents are added, changed, moved to the trash and deleted
+        THEN:
+            - The statistics always match the documents
+        """
+        owner, other = users
+        document = create_document(owner, "invoice")
+        create_document(None, "receipt", mime_type="image/png")
+        create_document(other, "letter")
+        assert get_counters() == get_exact_counters()
+
+        document.content = "an invoice"
+        document.save()
+        document.owner = other
+        document.save(update_fields=["owner"])
+        assert get_counters() == get_exact_counters()
+        assert get_counters()[(other.pk, "application/pdf")] == (2, 16)
+
+        document.delete()
+        assert get_counters() == get_exact_counters()
+
+        document.hard_delete()
+        assert get_counters() == get_exact_counters()
+        assert get_counters()[(other.pk, "application/pdf")] == (1, 6)
+
+    def test_unrelated_changes(self, users, mocker):
+        """
+        GIVEN:
+            - A document
+        WHEN:
+            - A field the statistics do not depend on is saved
+            - post_save is sent without saving the document
+        THEN:
+            - The statistics are not touched
+        """
+        document = create_document(users[0], "invoice")
+
+        get_stored_state = mocker.spy(statistics, "get_stored_state")
+        record_change = mocker.spy(statistics, "record_change")
+
+        document.title = "Invoice"
+        document.save(update_fields=["title"])
+        post_save.send(Document, instance=document, created=False)
+
+        get_stored_state.assert_not_called()
+        record_change.assert_not_called()
+        assert get_counters() == {(users[0].pk, "application/pdf"): (1, 7)}
+
+    def test_update_owner(self, users, mocker):
+        """
+        GIVEN:
+            - Documents of different owners
+        WHEN:
+            - The owner of the documents is set in bulk
+        THEN:
+            - Their statistics are moved to the new owner
+        """
+        owner, other = users
+        documents = [
+            create_document(owner, "invoice"),
+            create_document(None, "receipt"),
+            create_document(other, "letter"),
+        ]
+        mocker.patch("documents.bulk_edit.bulk_update_documents.delay")
+
+        set_permissions([document.pk for document in documents], {}, owner=other)
+
+        assert get_counters() == get_exact_counters()
+        assert get_counters() == {(other.pk, "application/pdf"): (3, 20)}
+
+    def test_user_deleted(self, users):
+        """
+        GIVEN:
+            - Documents of a user
+        WHEN:
+            - The user is deleted
+        THEN:
+            - The documents are counted as documents without owner
+        """
+        owner, _ = users
+        create_document(owner, "invoice")
+        create_document(None, "receipt")
+
+        owner.delete()
+
+        assert get_counters() == get_exact_counters()
+        assert get_counters() == {(None, "application/pdf"): (2, 14)}
+
+    def test_recompute(self, users, tenant):
+        """
+        GIVEN:
+            - Statistics which do not match the documents
+        WHEN:
+            - The statistics are recomputed
+        THEN:
+            - The statistics match the documents again
+        """
+        owner, other = users
+        create_document(owner, "invoice")
+        Document.objects.filter(owner=owner).update(owner=other)
+        DocumentStatistics.objects.create(owner=None, mime_type="text/plain")
+
+        statistics.recompute_statistics(tenant)
+
+        assert get_counters() == get_exact_counters()
+        assert get_counters() == {(other.pk, "application/pdf"): (1, 7)}
+
+
+@pytest.mark.django_db
+class TestStatisticsView:
+    def get_statistics(self, user: User) -> dict:
+        from documents.views import StatisticsView
+
+        request = APIRequestFactory().get("/api/statistics/")
+        force_authenticate(request, user=user)
+        return StatisticsView.as_view()(request).data
+
+    def test_visible_documents(self, users):
+        """
+        GIVEN:
+            - Documents of the user, of no one, of another user, and of another
+              user shared with the user
+        WHEN:
+            - The statistics of the user are requested
+        THEN:
+            - Only documents the user may view are counted
+        """
+        owner, other = users
+        create_document(owner, "invoice")
+        create_document(None, "receipt", mime_type="image/png")
+        create_document(other, "letter")
+        shared = create_document(other, "contract")
+        assign_perm("view_document", owner, shared)
+
+        data = self.get_statistics(owner)
+
+        assert data["documents_total"] == 3
+        assert data["character_count"] == 22
+        assert data["document_file_type_counts"] == [
+            {"mime_type": "application/pdf", "mime_type_count": 2},
+            {"mime_type": "image/png", "mime_type_count": 1},
+        ]
+
+    def test_superuser(self, users):
+        """
+        GIVEN:
+            - Documents of different owners
+        WHEN:
+            - The statistics of a superuser are requested
+        THEN:
+            - All documents are counted without aggregating their content
+        """
+        owner, other = users
+        owner.is_superuser = True
+        create_document(owner, "invoice")
+        create_document(other, "letter")
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get_statistics(owner)
+
+        assert not [
+            query["sql"]
+            for query in queries.captured_queries
+            if "LENGTH" in query["sql"].upper()
+        ]
+        assert data["documents_total"] == 2
+        assert data["character_count"] == 13
+
+    def test_no_documents(self, users):
+        data = self.get_statistics(users[0])
+
+        assert data["documents_total"] == 0
+        assert data["character_count"] is None
+        assert data["document_file_type_counts"] == []
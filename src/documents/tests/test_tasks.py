@@ -3,11 +3,13 @@ from datetime import timedelta
 from pathlib import Path
 from unittest import mock
 
+import pytest
 from django.conf import settings
 from django.test import TestCase
 from django.utils import timezone
 
 from documents import tasks
+from documents.classifier import get_model_file
 from documents.models import Correspondent
 from documents.models import Document
 from documents.models import DocumentType
@@ -17,6 +19,8 @@ from documents.sanity_checker import SanityCheckMessages
 from documents.tests.test_classifier import dummy_preprocess
 from documents.tests.utils import DirectoriesMixin
 from documents.tests.utils import FileSystemAssertsMixin
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import tenant_context
 
 
 class TestIndexReindex(DirectoriesMixin, TestCase):
@@ -102,6 +106,88 @@ class TestClassifier(DirectoriesMixin, FileSystemAssertsMixin, TestCase):
             self.assertNotEqual(mtime2, mtime3)
 
 
+@pytest.mark.django_db
+class TestTenantClassifierTraining:
+    @pytest.fixture
+    def tenants(self, settings, tmp_path):
+        settings.MODEL_FILE = tmp_path / "model.pickle"
+        trained = Tenant.objects.create(name="Trained", identifier="trained")
+        empty = Tenant.objects.create(name="Empty", identifier="empty")
+        with tenant_context(trained):
+            c = Correspondent.objects.create(
+                matching_algorithm=Tag.MATCH_AUTO,
+                name="test",
+            )
+            Document.objects.create(correspondent=c, content="test", title="test")
+        return trained, empty
+
+    @pytest.fixture(autouse=True)
+    def preprocess(self, mocker):
+        mocker.patch(
+            "documents.classifier.DocumentClassifier.preprocess_content",
+            side_effect=dummy_preprocess,
+        )
+
+    def test_model_file_per_tenant(self, tenants):
+        """
+        GIVEN:
+            - Two tenants, one with automatic matching
+        WHEN:
+            - The classifiers are trained
+        THEN:
+            - Only the tenant with automatic matching gets a model
+            - The model is stored under the tenant identifier
+        """
+        trained, empty = tenants
+
+        tasks.train_classifier(scheduled=False)
+
+        assert get_model_file(trained).is_file()
+        assert get_model_file(trained).parent.name == "trained"
+        assert not get_model_file(empty).exists()
+        assert not settings.MODEL_FILE.exists()
+
+    def test_scheduled_training_fans_out(self, tenants, mocker):
+        """
+        GIVEN:
+            - Two tenants, one with automatic matching
+        WHEN:
+            - The scheduled training runs
+        THEN:
+            - A training task is queued for the tenant with automatic matching
+        """
+        trained, _ = tenants
+        delay = mocker.patch("documents.tasks.train_classifier.delay")
+
+        tasks.train_classifier()
+
+        delay.assert_called_once_with(scheduled=True, tenant_id=trained.pk)
+
+    def test_scheduled_training_skips_unchanged(self, tenants, mocker):
+        """
+        GIVEN:
+            - A tenant with a trained classifier
+        WHEN:
+            - The scheduled training runs without changes, and again after a
+              document changed
+        THEN:
+            - Training is only queued after the change
+        """
+        trained, _ = tenants
+        tasks.train_classifier(scheduled=False)
+        delay = mocker.patch("documents.tasks.train_classifier.delay")
+
+        tasks.train_classifier()
+        delay.assert_not_called()
+
+        with tenant_context(trained):
+            doc = Document.objects.get()
+            doc.content = "test2"
+            doc.save()
+        tasks.train_classifier()
+        delay.assert_called_once_with(scheduled=True, tenant_id=trained.pk)
+
+
 class TestSanityCheck(DirectoriesMixin, TestCase):
     @mock.patch("documents.tasks.sanity_checker.check_sanity")
     def test_sanity_check_success(self, m):
@@ -0,0 +1,167 @@
+import io
+from pathlib import Path
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import resolve
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+
+from documents.models import Document
+from documents.parsers import make_thumbnail_from_pdf
+from documents.signals.handlers import cleanup_document_deletion
+from documents.thumbnails import THUMBNAIL_SIZES
+from documents.thumbnails import THUMBNAIL_WIDTH
+from documents.thumbnails import get_thumbnail_variant_path
+
+SAMPLE_DIR = Path(__file__).parent / "samples"
+
+
+class TestThumbnailSizes:
+    def test_variant_path(self):
+        """
+        GIVEN:
+            - Paths of default thumbnails
+        WHEN:
+            - The paths of the other sizes are requested
+        THEN:
+            - The paths are next to the default thumbnail with all extensions
+        """
+        assert (
+            get_thumbnail_variant_path("documents/thumbnails/0000001.webp", "large")
+            == "documents/thumbnails/0000001-large.webp"
+        )
+        assert (
+            get_thumbnail_variant_path("documents/thumbnails/0000001.webp.gpg", "small")
+            == "documents/thumbnails/0000001-small.webp.gpg"
+        )
+        assert get_thumbnail_variant_path(Path("/tmp/convert.webp"), "large") == Path(
+            "/tmp/convert-large.webp",
+        )
+        with pytest.raises(ValueError):
+            get_thumbnail_variant_path("0000001.webp", "huge")
+
+    def test_render_pdf(self, tmp_path, mocker):
+        """
+        GIVEN:
+            - A PDF
+        WHEN:
+            - The thumbnail is made
+        THEN:
+            - The thumbnails of all sizes are rendered without convert
+        """
+        run_convert = mocker.patch("documents.parsers.run_convert")
+
+        thumb = make_thumbnail_from_pdf(SAMPLE_DIR / "simple.pdf", tmp_path)
+
+        run_convert.assert_not_called()
+        with Image.open(thumb) as image:
+            assert image.format == "WEBP"
+            assert image.width == THUMBNAIL_WIDTH
+        for size, width in THUMBNAIL_SIZES.items():
+            with Image.open(get_thumbnail_variant_path(thumb, size)) as image:
+                assert image.width == width
+
+    def test_render_fallback(self, tmp_path, mocker):
+        """
+        GIVEN:
+            - A file pdftoppm can't render
+        WHEN:
+            - The thumbnail is made
+        THEN:
+            - The thumbnail is made by convert, without the other sizes
+        """
+        run_convert = mocker.patch("documents.parsers.run_convert")
+
+        thumb = make_thumbnail_from_pdf(SAMPLE_DIR / "simple.png", tmp_path)
+
+        run_convert.assert_called_once()
+        assert thumb == tmp_path / "convert.webp"
+        for size in THUMBNAIL_SIZES:
+            assert not get_thumbnail_variant_path(thumb, size).exists()
+
+
+@pytest.mark.django_db
+class TestThumbnailApi:
+    @pytest.fixture
+    def document(self, tenant, filesystem_backend) -> Document:
+        document = Document.objects.create(
+            title="none",
+            checksum="abc",
+            mime_type="application/pdf",
+        )
+        filesystem_backend.store(document.thumbnail_path, io.BytesIO(b"default"))
+        return document
+
+    def get_thumb(self, document: Document, **params):
+        path = f"/api/documents/{document.pk}/thumb/"
+        request = APIRequestFactory().get(path, params)
+        force_authenticate(request, user=User(is_superuser=True, is_active=True))
+        return resolve(path).func(request, pk=document.pk)
+
+    def test_size(self, document, filesystem_backend):
+        """
+        GIVEN:
+            - A document with thumbnails of several sizes
+        WHEN:
+            - The thumbnail is requested with and without a size
+        THEN:
+            - The thumbnail of the size is returned
+        """
+        filesystem_backend.store(
+            document.get_thumbnail_path("large"),
+            io.BytesIO(b"large"),
+        )
+
+        response = self.get_thumb(document, size="large")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b"large"
+
+        response = self.get_thumb(document)
+        assert response.content == b"default"
+
+    def test_size_missing(self, document):
+        """
+        GIVEN:
+            - A document with only the default thumbnail
+        WHEN:
+            - The thumbnail is requested with a size
+        THEN:
+            - The default thumbnail is returned
+        """
+        response = self.get_thumb(document, size="small")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b"default"
+
+    def test_size_invalid(self, document):
+        """
+        GIVEN:
+            - A document
+        WHEN:
+            - The thumbnail is requested with an unknown size
+        THEN:
+            - The request is rejected
+        """
+        response = self.get_thumb(document, size="huge")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_delete(self, document, filesystem_backend):
+        """
+        GIVEN:
+            - A document with thumbnails of several sizes
+        WHEN:
+            - The files of the document are cleaned up
+        THEN:
+            - The thumbnails of all sizes are deleted
+        """
+        variant_path = document.get_thumbnail_path("large")
+        filesystem_backend.store(variant_path, io.BytesIO(b"large"))
+
+        cleanup_document_deletion(Document, document)
+
+        assert not filesystem_backend.exists(document.thumbnail_path)
+        assert not filesystem_backend.exists(variant_path)
@@ -0,0 +1,295 @@
+"""
+Regenerating the thumbnails of many documents as a pipeline: the originals are
+downloaded from the storage backend into the scratch directory by a few
+threads, rendered by a pool of processes as they arrive, and the thumbnails
+uploaded by the same threads while the following documents are rendered.
+Documents are fetched in batches, which also limits the scratch space used.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import multiprocessing
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Final
+
+import tqdm
+from django import db
+from django.conf import settings
+from django.core.cache import cache
+
+from documents.caching import get_thumbnail_modified_key
+from documents.models import Document
+from documents.parsers import get_parser_class_for_mime_type
+from documents.storage.factory import get_storage_backend
+from documents.thumbnails import THUMBNAIL_SIZES
+from documents.thumbnails import get_thumbnail_variant_path
+from paperless.tenants.utils import get_current_tenant
+from paperless.tenants.utils import tenant_context
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from datetime import datetime
+
+    from documents.storage.base import StorageBackend
+    from paperless.tenants.models import Tenant
+
+logger = logging.getLogger("paperless.thumbnails")
+
+# Documents fetched and downloaded at once
+BATCH_SIZE: Final[int] = 100
+
+
+@dataclasses.dataclass(frozen=True)
+class _RenderJob:
+    document_id: int
+    mime_type: str
+    file_name: str
+    source_path: str
+    thumbnail_path: str
+    # The copy of the original in the scratch directory
+    source: Path
+
+
+@dataclasses.dataclass(frozen=True)
+class _RenderResult:
+    job: _RenderJob
+    # The rendered files by the logical path they are stored at
+    files: dict[str, Path]
+
+
+def _get_modified(backend: StorageBackend) -> dict[str, datetime | None] | None:
+    """
+    Lists when the originals and thumbnails of the current tenant were
+    modified, or returns None if the backend can't list its files
+    """
+    try:
+        return {
+            info.path: info.modified
+            for prefix in ("documents/originals/", "documents/thumbnails/")
+            for info in backend.iter_files(prefix)
+        }
+    except NotImplementedError:
+        return None
+
+
+def _is_up_to_date(
+    backend: StorageBackend,
+    job: _RenderJob,
+    modified: dict[str, datetime | None] | None,
+) -> bool:
+    if modified is not None:
+        thumbnail_modified = modified.get(job.thumbnail_path)
+        source_modified = modified.get(job.source_path)
+    else:
+        try:
+            thumbnail_modified = backend.stat(job.thumbnail_path).modified
+            source_modified = backend.stat(job.source_path).modified
+        except FileNotFoundError:
+            return False
+    return (
+        thumbnail_modified is not None
+        and source_modified is not None
+        and thumbnail_modified > source_modified
+    )
+
+
+def _download(
+    tenant: Tenant | None,
+    backend: StorageBackend,
+    job: _RenderJob,
+    modified: dict[str, datetime | None] | None,
+    *,
+    force: bool,
+) -> _RenderJob | None:
+    """
+    Copies the original into the scratch directory, unless the thumbnail is
+    newer than it
+    """
+    try:
+        with tenant_context(tenant):
+            if not force and _is_up_to_date(backend, job, modified):
+                return None
+            with backend.open(job.source_path) as src, job.source.open("wb") as dst:
+                shutil.copyfileobj(src, dst, settings.PAPERLESS_STORAGE_CHUNK_SIZE)
+        return job
+    except OSError as e:
+        logger.error(
+            f"Unable to download the original of document {job.document_id}: {e}",
+        )
+        job.source.unlink(missing_ok=True)
+        return None
+
+
+def _render(job: _RenderJob) -> _RenderResult:
+    """
+    Renders the thumbnails of the scratch copy of the original, in a worker
+    process unless only one is used
+    """
+    parser_class = get_parser_class_for_mime_type(job.mime_type)
+    if not parser_class:
+        logger.error(
+            f"No parser found for mime type {job.mime_type}, cannot make the "
+            f"thumbnail of document {job.document_id}",
+        )
+        return _RenderResult(job, {})
+
+    parser = parser_class(logging_group=None)
+    try:
+        thumbnail = Path(
+            parser.get_thumbnail(job.source, job.mime_type, job.file_name),
+        )
+        rendered = {job.thumbnail_path: thumbnail}
+        for size in THUMBNAIL_SIZES:
+            variant = get_thumbnail_variant_path(thumbnail, size)
+            if variant.is_file():
+                rendered[get_thumbnail_variant_path(job.thumbnail_path, size)] = variant
+        # Keep the files once the parser cleans up
+        files = {}
+        for index, (path, file) in enumerate(rendered.items()):
+            files[path] = job.source.with_suffix(f".{index}{file.suffix}")
+            shutil.move(file, files[path])
+        return _RenderResult(job, files)
+    except Exception as e:
+        logger.error(f"Unable to make the thumbnail of document {job.document_id}: {e}")
+        return _RenderResult(job, {})
+    finally:
+        parser.cleanup()
+
+
+def _upload(
+    tenant: Tenant | None,
+    backend: StorageBackend,
+    result: _RenderResult,
+) -> bool:
+    """
+    Stores the rendered thumbnails and removes the scratch files of the
+    document
+    """
+    try:
+        with tenant_context(tenant):
+            for path, file in result.files.items():
+                with file.open("rb") as f:
+                    backend.store(path, f)
+        if result.files:
+            cache.delete(get_thumbnail_modified_key(result.job.document_id))
+        return bool(result.files)
+    except OSError as e:
+        logger.error(
+            f"Unable to store the thumbnail of document {result.job.document_id}: {e}",
+        )
+        return False
+    finally:
+        result.job.source.unlink(missing_ok=True)
+        for file in result.files.values():
+            file.unlink(missing_ok=True)
+
+
+@contextmanager
+def _get_render_map(
+    processes: int,
+) -> Iterator[Callable[[Callable, Iterable], Iterable]]:
+    # Don't spin up a pool of 1 process
+    if processes == 1:
+        yield map
+        return
+    # Note to future self: this prevents django from reusing database
+    # connections between processes, which is bad and does not work
+    # with postgres.
+    db.connections.close_all()  # pragma: no cover
+    with multiprocessing.Pool(processes=processes) as pool:  # pragma: no cover
+        yield pool.imap_unordered
+
+
+def _iter_batches(documents: Iterable[Document]) -> Iterator[list[Document]]:
+    iterator = iter(documents)
+    while batch := list(islice(iterator, BATCH_SIZE)):
+        yield batch
+
+
+def regenerate_thumbnails(
+    document_ids: list[int] | None = None,
+    *,
+    force: bool = False,
+    processes: int = 1,
+    progress_bar_disable: bool = True,
+) -> int:
+    """
+    Regenerates the thumbnails of the given documents, or of all documents,
+    of the current tenant and returns the number of documents whose
+    thumbnails were regenerated.  Thumbnails newer than their original are
+    kept unless forced.
+    """
+    tenant = get_current_tenant()
+    backend = get_storage_backend()
+    # Thumbnails of GPG encrypted documents would have to be encrypted too,
+    # decrypt the documents first
+    documents = (
+        Document.objects.exclude(storage_type=Document.STORAGE_TYPE_GPG)
+        .select_related("correspondent")
+        .order_by("pk")
+    )
+    if document_ids is not None:
+        documents = documents.filter(pk__in=document_ids)
+    # Listing all files only pays off if most of them are looked at
+    modified = None if force or document_ids is not None else _get_modified(backend)
+
+    settings.SCRATCH_DIR.mkdir(parents=True, exist_ok=True)
+    regenerated = 0
+    with (
+        tqdm.tqdm(total=documents.count(), disable=progress_bar_disable) as progress,
+        tempfile.TemporaryDirectory(
+            dir=settings.SCRATCH_DIR,
+            prefix="paperless-thumbnails-",
+        ) as scratch_dir,
+        ThreadPoolExecutor(
+            max_workers=settings.PAPERLESS_STORAGE_TRANSFER_WORKERS,
+        ) as transfers,
+        _get_render_map(processes) as render_map,
+    ):
+        for batch in _iter_batches(documents.iterator(chunk_size=BATCH_SIZE)):
+            jobs = [
+                _RenderJob(
+                    document_id=document.pk,
+                    mime_type=document.mime_type,
+                    file_name=document.get_public_filename(),
+                    source_path=document.source_path,
+                    thumbnail_path=document.thumbnail_path,
+                    source=Path(scratch_dir)
+                    / f"{document.pk}{Path(document.source_path).suffix}",
+                )
+                for document in batch
+            ]
+            downloads = [
+                transfers.submit(_download, tenant, backend, job, modified, force=force)
+                for job in jobs
+            ]
+            # Originals are rendered as soon as they are downloaded, and
+            # thumbnails uploaded as soon as they are rendered
+            downloaded = (
+                job
+                for download in as_completed(downloads)
+                if (job := download.result()) is not None
+            )
+            uploads = [
+                transfers.submit(_upload, tenant, backend, result)
+                for result in render_map(_render, downloaded)
+            ]
+            regenerated += sum(upload.result() for upload in uploads)
+            progress.update(len(batch))
+
+    logger.info(
+        f"Regenerated the thumbnails of {regenerated} documents"
+        + (f" of tenant {tenant.identifier}" if tenant else ""),
+    )
+    return regenerated
@@ -0,0 +1,107 @@
+"""
+Thumbnails of documents in several sizes.  The default thumbnail is the one
+shown in the document list, additional sizes are stored next to it, e.g.
+documents/thumbnails/0000001-large.webp, and are rendered from the same
+rasterized page in one pass.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Final
+
+from pdf2image import convert_from_path
+from pdf2image.exceptions import PDFInfoNotInstalledError
+from pdf2image.exceptions import PDFPageCountError
+from pdf2image.exceptions import PDFPopplerTimeoutError
+from pdf2image.exceptions import PDFSyntaxError
+from PIL import Image
+
+from documents.utils import maybe_override_pixel_limit
+
+logger = logging.getLogger("paperless.parsing")
+
+# The width of the default thumbnail
+THUMBNAIL_WIDTH: Final[int] = 500
+
+# The widths of the additional thumbnails, by the name selecting them with
+# the size parameter of the thumbnail endpoint: a small one for dense lists
+# and a large one for previews and high resolution displays
+THUMBNAIL_SIZES: Final[dict[str, int]] = {
+    "small": 250,
+    "large": 1000,
+}
+
+# Thumbnails of very long pages are limited in height, like convert's
+# "500x5000>" geometry always limited them
+_MAX_ASPECT_RATIO: Final[int] = 10
+
+
+def get_thumbnail_variant_path(path: Path | str, size: str) -> Path | str:
+    """
+    Returns the path of the thumbnail of the given size next to the path of
+    the default thumbnail, keeping its extensions, e.g. 0000001-large.webp.gpg
+    """
+    if size not in THUMBNAIL_SIZES:
+        raise ValueError(f"Unknown thumbnail size {size}")
+    name = Path(path).name
+    stem, dot, extensions = name.partition(".")
+    variant = Path(path).with_name(f"{stem}-{size}{dot}{extensions}")
+    return variant if isinstance(path, Path) else variant.as_posix()
+
+
+def _save(image: Image.Image, width: int, out_path: Path) -> None:
+    image = image.copy()
+    # Like convert, only ever scales down
+    image.thumbnail(
+        (width, width * _MAX_ASPECT_RATIO),
+        Image.Resampling.LANCZOS,
+    )
+    image.save(out_path, format="WEBP")
+
+
+def render_pdf_thumbnails(
+    in_path: Path,
+    out_path: Path,
+    logging_group=None,
+) -> bool:
+    """
+    Renders the first page of a PDF with pdftoppm right at the largest
+    thumbnail width and scales it down to the default thumbnail at out_path
+    and the additional sizes next to it.  Returns False if the file could not
+    be rendered, e.g. because it is not a PDF.
+    """
+    maybe_override_pixel_limit()
+    largest = max(THUMBNAIL_WIDTH, *THUMBNAIL_SIZES.values())
+    try:
+        pages = convert_from_path(
+            in_path,
+            first_page=1,
+            last_page=1,
+            size=(largest, None),
+            fmt="png",
+            use_cropbox=True,
+            single_file=True,
+        )
+    except (
+        OSError,
+        PDFInfoNotInstalledError,
+        PDFPageCountError,
+        PDFPopplerTimeoutError,
+        PDFSyntaxError,
+    ) as e:
+        logger.debug(
+            f"Unable to render thumbnail with pdftoppm: {e}",
+            extra={"group": logging_group},
+        )
+        return False
+    if not pages:
+        return False
+
+    with pages[0] as page:
+        image = page.convert("RGB")
+    _save(image, THUMBNAIL_WIDTH, out_path)
+    for size, width in THUMBNAIL_SIZES.items():
+        _save(image, width, get_thumbnail_variant_path(out_path, size))
+    return True
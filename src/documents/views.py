@@ -1,16 +1,13 @@
-import itertools
 import logging
 import os
 import platform
 import re
+import shutil
 import tempfile
-import zipfile
-from collections import defaultdict
 from collections import deque
 from datetime import datetime
 from pathlib import Path
 from time import mktime
-from typing import Literal
 from unicodedata import normalize
 from urllib.parse import quote
 from urllib.parse import urlparse
@@ -22,7 +19,6 @@ from celery import states
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.contrib.auth.models import User
-from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
 from django.db import connections
 from django.db.migrations.loader import MigrationLoader
@@ -33,9 +29,7 @@ from django.db.models import IntegerField
 from django.db.models import Max
 from django.db.models import Model
 from django.db.models import Q
-from django.db.models import Sum
 from django.db.models import When
-from django.db.models.functions import Length
 from django.db.models.functions import Lower
 from django.db.models.manager import Manager
 from django.http import FileResponse
@@ -45,9 +39,12 @@ from django.http import HttpResponseBadRequest
 from django.http import HttpResponseForbidden
 from django.http import HttpResponseRedirect
 from django.http import HttpResponseServerError
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.cache import quote_etag
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_http_date_safe
 from django.utils.timezone import make_aware
 from django.utils.translation import get_language
 from django.views import View
@@ -62,8 +59,6 @@ from drf_spectacular.utils import extend_schema
 from drf_spectacular.utils import extend_schema_serializer
 from drf_spectacular.utils import extend_schema_view
 from drf_spectacular.utils import inline_serializer
-from guardian.utils import get_group_obj_perms_model
-from guardian.utils import get_user_obj_perms_model
 from langdetect import detect
 from packaging import version as packaging_version
 from redis import Redis
@@ -91,6 +86,7 @@ from documents import index
 from documents.bulk_download import ArchiveOnlyStrategy
 from documents.bulk_download import OriginalAndArchiveStrategy
 from documents.bulk_download import OriginalsOnlyStrategy
+from documents.bulk_download import stream_zip
 from documents.caching import get_metadata_cache
 from documents.caching import get_suggestion_cache
 from documents.caching import refresh_metadata_cache
@@ -120,6 +116,7 @@ from documents.filters import PaperlessTaskFilterSet
 from documents.filters import ShareLinkFilterSet
 from documents.filters import StoragePathFilterSet
 from documents.filters import TagFilterSet
+from documents.hashing import hash_bytes
 from documents.mail import EmailAttachment
 from documents.mail import send_email
 from documents.matching import match_correspondents
@@ -179,12 +176,14 @@ from documents.serialisers import WorkflowActionSerializer
 from documents.serialisers import WorkflowSerializer
 from documents.serialisers import WorkflowTriggerSerializer
 from documents.signals import document_updated
+from documents.statistics import get_document_statistics
 from documents.tasks import consume_file
 from documents.tasks import empty_trash
 from documents.tasks import index_optimize
 from documents.tasks import sanity_check
 from documents.tasks import train_classifier
 from documents.tasks import update_document_parent_tags
+from documents.thumbnails import THUMBNAIL_SIZES
 from documents.utils import get_boolean
 from paperless import version
 from paperless.celery import app as celery_app
@@ -193,6 +192,7 @@ from paperless.db import GnuPG
 from paperless.models import ApplicationConfiguration
 from paperless.serialisers import GroupSerializer
 from paperless.serialisers import UserSerializer
+from paperless.tenants.utils import get_current_tenant
 from paperless.views import StandardPagination
 from paperless_mail.models import MailAccount
 from paperless_mail.models import MailRule
@@ -268,104 +268,7 @@ class PassUserMixin(GenericAPIView):
         return super().get_serializer(*args, **kwargs)
 
 
-class BulkPermissionMixin:
-    """
-    Prefetch Django-Guardian permissions for a list before serialization, to avoid N+1 queries.
-    """
-
-    def _get_object_perms(
-        self,
-        objects: list,
-        perm_codenames: list[str],
-        actor: Literal["users", "groups"],
-    ) -> dict[int, dict[str, list[int]]]:
-        """
-        Collect object-level permissions for either users or groups.
-        """
-        model = self.queryset.model
-        obj_perm_model = (
-            get_user_obj_perms_model(model)
-            if actor == "users"
-            else get_group_obj_perms_model(model)
-        )
-        id_field = "user_id" if actor == "users" else "group_id"
-        ctype = ContentType.objects.get_for_model(model)
-        object_pks = [obj.pk for obj in objects]
-
-        perms_qs = obj_perm_model.objects.filter(
-            content_type=ctype,
-            object_pk__in=object_pks,
-            permission__codename__in=perm_codenames,
-        ).values_list("object_pk", id_field, "permission__codename")
-
-        perms: dict[int, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
-        for object_pk, actor_id, codename in perms_qs:
-            perms[int(object_pk)][codename].append(actor_id)
-
-        # Ensure that all objects have all codenames, even if empty
-        for pk in object_pks:
-            for codename in perm_codenames:
-                perms[pk][codename]
-
-        return perms
-
-    def get_serializer_context(self):
-        """
-        Get all permissions of the current list of objects at once and pass them to the serializer.
-        This avoid fetching permissions object by object in database.
-        """
-        context = super().get_serializer_context()
-        try:
-            full_perms = get_boolean(
-                str(self.request.query_params.get("full_perms", "false")),
-            )
-        except ValueError:
-            full_perms = False
-
-        if not full_perms:
-            return context
-
-        # Check which objects are being paginated
-        page = getattr(self, "paginator", None)
-        if page and hasattr(page, "page"):
-            queryset = page.page.object_list
-        elif hasattr(self, "page"):
-            queryset = self.page
-        else:
-            queryset = self.filter_queryset(self.get_queryset())
-
-        model_name = self.queryset.model.__name__.lower()
-        permission_name_view = f"view_{model_name}"
-        permission_name_change = f"change_{model_name}"
-
-        user_perms = self._get_object_perms(
-            objects=queryset,
-            perm_codenames=[permission_name_view, permission_name_change],
-            actor="users",
-        )
-        group_perms = self._get_object_perms(
-            objects=queryset,
-            perm_codenames=[permission_name_view, permission_name_change],
-            actor="groups",
-        )
-
-        context["users_view_perms"] = {
-            pk: user_perms[pk][permission_name_view] for pk in user_perms
-        }
-        context["users_change_perms"] = {
-            pk: user_perms[pk][permission_name_change] for pk in user_perms
-        }
-        context["groups_view_perms"] = {
-            pk: group_perms[pk][permission_name_view] for pk in group_perms
-        }
-        context["groups_change_perms"] = {
-            pk: group_perms[pk][permission_name_change] for pk in group_perms
-        }
-
-        return context
-
-
-class PermissionsAwareDocumentCountMixin(BulkPermissionMixin, PassUserMixin):
+class PermissionsAwareDocumentCountMixin(PassUserMixin):
     """
     Mixin to add document count to queryset, permissions-aware if needed
     """
@@ -617,7 +520,19 @@ class EmailDocumentDetailSchema(EmailSerializer):
     ),
     thumb=extend_schema(
         description="View the document thumbnail",
-        responses={200: OpenApiTypes.BINARY},
+        parameters=[
+            OpenApiParameter(
+                name="size",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=list(THUMBNAIL_SIZES),
+                description=(
+                    "Width of the thumbnail, the default thumbnail is returned "
+                    "if the document has no thumbnail of the size"
+                ),
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY, 400: None},
     ),
     preview=extend_schema(
         description="View the document preview",
@@ -791,6 +706,7 @@ class DocumentViewSet(
         ):
             return HttpResponseForbidden("Insufficient permissions")
         return serve_file(
+            request=request,
             doc=doc,
             use_archive=not self.original_requested(request)
             and doc.has_archive_version,
@@ -806,12 +722,12 @@ class DocumentViewSet(
         # If file is a logical path string, retrieve from storage backend
         if isinstance(file, str):
             try:
-                file_obj = backend.retrieve(file)
                 # Create temporary file for parser (parsers expect file paths)
-                import tempfile
-
-                with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-                    tmp_file.write(file_obj.read())
+                with (
+                    backend.open(file) as file_obj,
+                    tempfile.NamedTemporaryFile(delete=False) as tmp_file,
+                ):
+                    shutil.copyfileobj(file_obj, tmp_file, backend.get_chunk_size())
                     tmp_path = tmp_file.name
             except FileNotFoundError:
                 return None
@@ -851,11 +767,7 @@ class DocumentViewSet(
         # If filename is a logical path string, get size from storage backend
         if isinstance(filename, str):
             try:
-                file_obj = backend.retrieve(filename)
-                file_obj.seek(0, 2)  # Seek to end
-                size = file_obj.tell()
-                file_obj.seek(0)  # Reset
-                return size
+                return backend.stat(filename).size
             except FileNotFoundError:
                 return None
         else:
@@ -952,9 +864,12 @@ class DocumentViewSet(
 
         dates = []
         if settings.NUMBER_OF_SUGGESTED_DATES > 0:
-            gen = parse_date_generator(doc.filename, doc.content)
             dates = sorted(
-                {i for i in itertools.islice(gen, settings.NUMBER_OF_SUGGESTED_DATES)},
+                parse_date_generator(
+                    doc.filename,
+                    doc.content,
+                    limit=settings.NUMBER_OF_SUGGESTED_DATES,
+                ),
             )
 
         resp_data = {
@@ -992,6 +907,11 @@ class DocumentViewSet(
     @method_decorator(cache_control(no_cache=True))
     @method_decorator(last_modified(thumbnail_last_modified))
     def thumb(self, request, pk=None):
+        size = request.query_params.get("size")
+        if size is not None and size not in THUMBNAIL_SIZES:
+            return HttpResponseBadRequest(
+                f"Invalid size, must be one of {', '.join(THUMBNAIL_SIZES)}",
+            )
         try:
             doc = Document.objects.select_related("owner").get(id=pk)
             if request.user is not None and not has_perms_owner_aware(
@@ -1000,10 +920,18 @@ class DocumentViewSet(
                 doc,
             ):
                 return HttpResponseForbidden("Insufficient permissions")
+            try:
+                thumbnail_file = doc.get_thumbnail_file(size)
+            except FileNotFoundError:
+                if size is None:
+                    raise
+                # Not every document has all sizes, e.g. thumbnails not
+                # rendered from a PDF
+                thumbnail_file = doc.thumbnail_file
             if doc.storage_type == Document.STORAGE_TYPE_GPG:
-                handle = GnuPG.decrypted(doc.thumbnail_file)
+                handle = GnuPG.decrypted(thumbnail_file)
             else:
-                handle = doc.thumbnail_file
+                handle = thumbnail_file
 
             return HttpResponse(handle, content_type="image/webp")
         except (FileNotFoundError, Document.DoesNotExist):
@@ -1273,10 +1201,8 @@ class DocumentViewSet(
 
                 # Create temporary file for email attachment
                 # (EmailAttachment expects a Path object)
-                import tempfile
-
-                with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-                    tmp_file.write(file_obj.read())
+                with file_obj, tempfile.NamedTemporaryFile(delete=False) as tmp_file:
+                    shutil.copyfileobj(file_obj, tmp_file)
                     tmp_path = Path(tmp_file.name)
 
                 attachments.append(
@@ -1747,6 +1673,7 @@ class PostDocumentView(GenericAPIView):
         input_doc = ConsumableDocument(
             source=DocumentSource.WebUI if from_webui else DocumentSource.ApiUpload,
             original_file=temp_file_path,
+            digest=hash_bytes(doc_data),
         )
         custom_fields = None
         if isinstance(cf, dict) and cf:
@@ -2215,17 +2142,13 @@ class StatisticsView(GenericAPIView):
         user = request.user if request.user is not None else None
 
         documents = (
-            (
-                Document.objects.all()
-                if user is None
-                else get_objects_for_user_owner_aware(
-                    user,
-                    "documents.view_document",
-                    Document,
-                )
+            Document.objects.all()
+            if user is None
+            else get_objects_for_user_owner_aware(
+                user,
+                "documents.view_document",
+                Document,
             )
-            .only("mime_type", "content")
-            .prefetch_related("tags")
         )
         tags = (
             Tag.objects.all()
@@ -2260,7 +2183,8 @@ class StatisticsView(GenericAPIView):
             ).count()
         )
 
-        documents_total = documents.count()
+        # Counted as documents change, instead of over all their content
+        document_statistics = get_document_statistics(user)
 
         inbox_tags = tags.filter(is_inbox_tag=True)
 
@@ -2270,22 +2194,6 @@ class StatisticsView(GenericAPIView):
             else None
         )
 
-        document_file_type_counts = (
-            documents.values("mime_type")
-            .annotate(mime_type_count=Count("mime_type"))
-            .order_by("-mime_type_count")
-            if documents_total > 0
-            else []
-        )
-
-        character_count = (
-            documents.annotate(
-                characters=Length("content"),
-            )
-            .aggregate(Sum("characters"))
-            .get("characters__sum")
-        )
-
         current_asn = Document.objects.aggregate(
             Max("archive_serial_number", default=0),
         ).get(
@@ -2294,7 +2202,7 @@ class StatisticsView(GenericAPIView):
 
         return Response(
             {
-                "documents_total": documents_total,
+                "documents_total": document_statistics["documents_total"],
                 "documents_inbox": documents_inbox,
                 "inbox_tag": (
                     inbox_tags.first().pk if inbox_tags.exists() else None
@@ -2302,8 +2210,10 @@ class StatisticsView(GenericAPIView):
                 "inbox_tags": (
                     [tag.pk for tag in inbox_tags] if inbox_tags.exists() else None
                 ),
-                "document_file_type_counts": document_file_type_counts,
-                "character_count": character_count,
+                "document_file_type_counts": document_statistics[
+                    "document_file_type_counts"
+                ],
+                "character_count": document_statistics["character_count"],
                 "tag_count": len(tags),
                 "correspondent_count": correspondent_count,
                 "document_type_count": document_type_count,
@@ -2332,13 +2242,6 @@ class BulkDownloadView(GenericAPIView):
             if not has_perms_owner_aware(request.user, "view_document", document):
                 return HttpResponseForbidden("Insufficient permissions")
 
-        settings.SCRATCH_DIR.mkdir(parents=True, exist_ok=True)
-        temp = tempfile.NamedTemporaryFile(  # noqa: SIM115
-            dir=settings.SCRATCH_DIR,
-            suffix="-compressed-archive",
-            delete=False,
-        )
-
         if content == "both":
             strategy_class = OriginalAndArchiveStrategy
         elif content == "originals":
@@ -2346,20 +2249,24 @@ class BulkDownloadView(GenericAPIView):
         else:
             strategy_class = ArchiveOnlyStrategy
 
-        with zipfile.ZipFile(temp.name, "w", compression) as zipf:
-            strategy = strategy_class(zipf, follow_formatting=follow_filename_format)
-            for document in documents:
-                strategy.add_document(document)
-
-        # TODO(stumpylog): Investigate using FileResponse here
-        with Path(temp.name).open("rb") as f:
-            response = HttpResponse(f, content_type="application/zip")
-            response["Content-Disposition"] = '{}; filename="{}"'.format(
-                "attachment",
-                "documents.zip",
-            )
+        # The zip file is written as it is sent, so the download starts
+        # right away and nothing is written to disk
+        response = StreamingHttpResponse(
+            stream_zip(
+                documents,
+                strategy_class,
+                compression=compression,
+                follow_formatting=follow_filename_format,
+                tenant=get_current_tenant(),
+            ),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = '{}; filename="{}"'.format(
+            "attachment",
+            "documents.zip",
+        )
 
-            return response
+        return response
 
 
 @extend_schema_view(**generate_object_with_permissions_schema(StoragePathSerializer))
@@ -2687,19 +2594,82 @@ class SharedLinkView(View):
         if share_link.expiration is not None and share_link.expiration < timezone.now():
             return HttpResponseRedirect("/accounts/login/?sharelink_expired=1")
         return serve_file(
+            request=request,
             doc=share_link.document,
             use_archive=share_link.file_version == "archive",
             disposition="inline",
         )
 
 
-def serve_file(*, doc: Document, use_archive: bool, disposition: str):
+def parse_byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Parse a Range header for a file of the given size.
+
+    Returns the inclusive (first, last) byte positions of the requested range,
+    or None if the header should be ignored and the full file served. This is
+    the case for missing or malformed headers, and for requests of multiple
+    ranges, which are not supported.
+
+    Raises ValueError if the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, sep, last = (part.strip() for part in ranges.partition("-"))
+    if not sep:
+        return None
+    if not first:
+        # Suffix range, the last N bytes of the file
+        if not last.isdigit():
+            return None
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(size - suffix, 0), size - 1
+    if not first.isdigit() or (last and not last.isdigit()):
+        return None
+    first_pos = int(first)
+    last_pos = int(last) if last else None
+    if last_pos is not None and last_pos < first_pos:
+        return None
+    if first_pos >= size:
+        raise ValueError("Range not satisfiable")
+    if last_pos is None or last_pos >= size:
+        last_pos = size - 1
+    return first_pos, last_pos
+
+
+def if_range_matches(header: str | None, etag: str, last_modified) -> bool:
+    """
+    Check the If-Range header against the current validators of a file.
+
+    Entity tags are compared strongly, dates must match the last modification
+    exactly.
+    """
+    if header is None:
+        return True
+    header = header.strip()
+    if header.startswith('"'):
+        return header == etag
+    modified = parse_http_date_safe(header)
+    return (
+        modified is not None
+        and last_modified is not None
+        and modified == int(last_modified.timestamp())
+    )
+
+
+def serve_file(*, request, doc: Document, use_archive: bool, disposition: str):
     if use_archive:
-        file_handle = doc.archive_file
+        file_path = doc.archive_path
+        checksum = doc.archive_checksum
         filename = doc.get_public_filename(archive=True)
         mime_type = "application/pdf"
     else:
-        file_handle = doc.source_file
+        file_path = doc.source_path
+        checksum = doc.checksum
         filename = doc.get_public_filename()
         mime_type = doc.mime_type
         # Support browser previewing csv files by using text mime type
@@ -2707,9 +2677,52 @@ def serve_file(*, doc: Document, use_archive: bool, disposition: str):
             mime_type = "text/plain"
 
     if doc.storage_type == Document.STORAGE_TYPE_GPG:
-        file_handle = GnuPG.decrypted(file_handle)
+        response = HttpResponse(
+            GnuPG.decrypted(doc.archive_file if use_archive else doc.source_file),
+            content_type=mime_type,
+        )
+    else:
+        from documents.storage.factory import get_storage_backend
+
+        backend = get_storage_backend()
+        size = backend.stat(file_path).size
+        etag = quote_etag(checksum) if checksum else None
+        try:
+            byte_range = parse_byte_range(request.headers.get("Range"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if (
+            byte_range is not None
+            and etag is not None
+            and not if_range_matches(
+                request.headers.get("If-Range"),
+                etag,
+                doc.modified,
+            )
+        ):
+            byte_range = None
 
-    response = HttpResponse(file_handle, content_type=mime_type)
+        if byte_range is None:
+            # Stream the file from the storage backend, one chunk at a time
+            response = FileResponse(backend.open(file_path), content_type=mime_type)
+            response.block_size = settings.PAPERLESS_STORAGE_CHUNK_SIZE
+            length = size
+        else:
+            # Only the requested range is read from the storage backend
+            first, last = byte_range
+            length = last - first + 1
+            response = StreamingHttpResponse(
+                backend.iter_chunks(file_path, offset=first, length=length),
+                status=206,
+                content_type=mime_type,
+            )
+            response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        response["Content-Length"] = str(length)
+        response["Accept-Ranges"] = "bytes"
+        if etag is not None:
+            response["ETag"] = etag
     # Firefox is not able to handle unicode characters in filename field
     # RFC 5987 addresses this issue
     # see https://datatracker.ietf.org/doc/html/rfc5987#section-4.2
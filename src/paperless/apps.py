@@ -1,6 +1,7 @@
 from django.apps import AppConfig
 from django.utils.translation import gettext_lazy as _
 
+from paperless.signals import handle_config_saved
 from paperless.signals import handle_failed_login
 from paperless.signals import handle_social_account_updated
 
@@ -19,4 +20,12 @@ class PaperlessConfig(AppConfig):
 
         social_account_updated.connect(handle_social_account_updated)
 
+        from django.db.models.signals import post_delete
+        from django.db.models.signals import post_save
+
+        from paperless.models import ApplicationConfiguration
+
+        post_save.connect(handle_config_saved, sender=ApplicationConfiguration)
+        post_delete.connect(handle_config_saved, sender=ApplicationConfiguration)
+
         AppConfig.ready(self)
@@ -1,10 +1,84 @@
+import copy
 import dataclasses
 import json
+import threading
+import time
+import uuid
+from typing import Final
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db import transaction
 
 from paperless.models import ApplicationConfiguration
 
+CONFIG_VERSION_KEY: Final[str] = "application_configuration_version"
+# How long a process uses its copy of the configuration before checking
+# whether another process changed it
+CONFIG_VERSION_CHECK_SECONDS: Final[int] = 5
+
+
+@dataclasses.dataclass(frozen=True)
+class _ConfigSnapshot:
+    instance: ApplicationConfiguration
+    version: str | None
+    checked: float
+
+
+_snapshot: _ConfigSnapshot | None = None
+_snapshot_lock = threading.Lock()
+
+
+def _load_config_instance() -> ApplicationConfiguration:
+    app_config = ApplicationConfiguration.objects.all().first()
+    # Workaround for a test where the migration hasn't run to create the single model
+    if app_config is None:
+        ApplicationConfiguration.objects.create()
+        app_config = ApplicationConfiguration.objects.all().first()
+    return app_config
+
+
+def get_config_instance() -> ApplicationConfiguration:
+    """
+    Returns the application configuration, which each process keeps a copy
+    of.  The copy is dropped when this process saves the configuration and
+    at most CONFIG_VERSION_CHECK_SECONDS after another process saved it.
+    """
+    global _snapshot
+
+    # What is read within a transaction may still be rolled back
+    if connection.in_atomic_block:
+        return _load_config_instance()
+
+    now = time.monotonic()
+    with _snapshot_lock:
+        snapshot = _snapshot
+    if snapshot is None or now - snapshot.checked >= CONFIG_VERSION_CHECK_SECONDS:
+        version = cache.get(CONFIG_VERSION_KEY)
+        if snapshot is None or snapshot.version != version:
+            snapshot = _ConfigSnapshot(_load_config_instance(), version, now)
+        else:
+            snapshot = dataclasses.replace(snapshot, checked=now)
+        with _snapshot_lock:
+            _snapshot = snapshot
+    # Callers must not change the copy of the others
+    return copy.deepcopy(snapshot.instance)
+
+
+def clear_config_cache() -> None:
+    """
+    Drops the copy of the configuration of this process and, once the
+    transaction is committed, those of the other processes
+    """
+    global _snapshot
+
+    with _snapshot_lock:
+        _snapshot = None
+    transaction.on_commit(
+        lambda: cache.set(CONFIG_VERSION_KEY, uuid.uuid4().hex, timeout=None),
+    )
+
 
 @dataclasses.dataclass
 class BaseConfig:
@@ -14,12 +88,7 @@ class BaseConfig:
 
     @staticmethod
     def _get_config_instance() -> ApplicationConfiguration:
-        app_config = ApplicationConfiguration.objects.all().first()
-        # Workaround for a test where the migration hasn't run to create the single model
-        if app_config is None:
-            ApplicationConfiguration.objects.create()
-            app_config = ApplicationConfiguration.objects.all().first()
-        return app_config
+        return get_config_instance()
 
 
 @dataclasses.dataclass
@@ -1,3 +1,6 @@
+from compression_middleware.middleware import (
+    CompressionMiddleware as BaseCompressionMiddleware,
+)
 from django.conf import settings
 
 from paperless import version
@@ -15,3 +18,18 @@ class ApiVersionMiddleware:
             response["X-Version"] = version.__full_version_str__
 
         return response
+
+
+class CompressionMiddleware(BaseCompressionMiddleware):
+    """
+    Compresses responses, except those which advertise byte range support.
+
+    Ranges refer to the unencoded content, so compressing a partial response
+    (or weakening the ETag of a full one, which breaks If-Range) would corrupt
+    ranged downloads.
+    """
+
+    def process_response(self, request, response):
+        if response.get("Accept-Ranges") == "bytes":
+            return response
+        return super().process_response(request, response)
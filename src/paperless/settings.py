@@ -219,6 +219,17 @@ def _parse_beat_schedule() -> dict:
                 "expires": 23.0 * 60.0 * 60.0,
             },
         },
+        {
+            "name": "Recompute document statistics",
+            "env_key": "PAPERLESS_STATISTICS_TASK_CRON",
+            # Default daily at 02:00
+            "env_default": "0 2 * * *",
+            "task": "documents.tasks.recompute_statistics",
+            "options": {
+                # 1 hour before default schedule sends again
+                "expires": 23.0 * 60.0 * 60.0,
+            },
+        },
         {
             "name": "Check and run scheduled workflows",
             "env_key": "PAPERLESS_WORKFLOW_SCHEDULED_TASK_CRON",
@@ -283,11 +294,24 @@ EMPTY_TRASH_DIR = (
 # Lock file for synchronizing changes to the MEDIA directory across multiple
 # threads.
 MEDIA_LOCK = MEDIA_ROOT / "media.lock"
+# Changes to different files are synchronized by one of several striped locks,
+# lock files or Redis locks when the media directory is shared between nodes
+MEDIA_LOCK_STRIPES: Final[int] = __get_int("PAPERLESS_MEDIA_LOCK_STRIPES", 64)
+MEDIA_LOCK_BACKEND: Final[str] = os.getenv("PAPERLESS_MEDIA_LOCK_BACKEND", "file")
 INDEX_DIR = DATA_DIR / "index"
 MODEL_FILE = __get_path(
     "PAPERLESS_MODEL_FILE",
     DATA_DIR / "classification_model.pickle",
 )
+# Number of tenant classifier models each process keeps loaded
+CLASSIFIER_CACHE_SIZE: Final[int] = __get_int("PAPERLESS_CLASSIFIER_CACHE_SIZE", 8)
+# The sanity checker reads files with several threads, and only those which
+# changed since they were last read, except for a random sample
+SANITY_CHECKER_WORKERS: Final[int] = __get_int("PAPERLESS_SANITY_CHECKER_WORKERS", 4)
+SANITY_CHECKER_REHASH_PERCENT: Final[float] = __get_float(
+    "PAPERLESS_SANITY_CHECKER_REHASH_PERCENT",
+    0.0,
+)
 
 LOGGING_DIR = __get_path("PAPERLESS_LOGGING_DIR", DATA_DIR / "log")
 
@@ -313,6 +337,16 @@ PAPERLESS_STORAGE_BACKEND = os.getenv("PAPERLESS_STORAGE_BACKEND", "filesystem")
 PAPERLESS_AZURE_CONNECTION_STRING = os.getenv("PAPERLESS_AZURE_CONNECTION_STRING", "")
 PAPERLESS_AZURE_CONTAINER_NAME = os.getenv("PAPERLESS_AZURE_CONTAINER_NAME", "")
 
+# Size in bytes of each chunk read from the storage backend when streaming files
+PAPERLESS_STORAGE_CHUNK_SIZE = __get_int("PAPERLESS_STORAGE_CHUNK_SIZE", 1024 * 1024)
+
+# Number of documents renamed at the same time after a storage path changed
+PAPERLESS_STORAGE_MOVE_WORKERS = __get_int("PAPERLESS_STORAGE_MOVE_WORKERS", 8)
+
+# Number of files downloaded from or uploaded to the storage backend at the
+# same time when thumbnails are regenerated
+PAPERLESS_STORAGE_TRANSFER_WORKERS = __get_int("PAPERLESS_STORAGE_TRANSFER_WORKERS", 8)
+
 
 def _validate_storage_backend_config() -> None:
     """
@@ -330,6 +364,17 @@ def _validate_storage_backend_config() -> None:
             f"Must be one of: {', '.join(valid_backends)}",
         )
 
+    if PAPERLESS_STORAGE_CHUNK_SIZE <= 0:
+        raise ValueError("PAPERLESS_STORAGE_CHUNK_SIZE must be a positive integer")
+
+    if PAPERLESS_STORAGE_MOVE_WORKERS <= 0:
+        raise ValueError("PAPERLESS_STORAGE_MOVE_WORKERS must be a positive integer")
+
+    if PAPERLESS_STORAGE_TRANSFER_WORKERS <= 0:
+        raise ValueError(
+            "PAPERLESS_STORAGE_TRANSFER_WORKERS must be a positive integer",
+        )
+
     if backend == "azure_blob":
         if not PAPERLESS_AZURE_CONNECTION_STRING:
             raise ValueError(
@@ -434,7 +479,7 @@ MIDDLEWARE = [
 
 # Optional to enable compression
 if __get_boolean("PAPERLESS_ENABLE_COMPRESSION", "yes"):  # pragma: no cover
-    MIDDLEWARE.insert(0, "compression_middleware.middleware.CompressionMiddleware")
+    MIDDLEWARE.insert(0, "paperless.middleware.CompressionMiddleware")
 
 ROOT_URLCONF = "paperless.urls"
 
@@ -728,6 +773,17 @@ LANGUAGE_COOKIE_NAME = f"{COOKIE_PREFIX}django_language"
 
 EMAIL_CERTIFICATE_FILE = __get_optional_path("PAPERLESS_EMAIL_CERTIFICATE_LOCATION")
 
+# Number of mail accounts checked at the same time
+EMAIL_TASK_WORKERS: Final[int] = max(__get_int("PAPERLESS_EMAIL_TASK_WORKERS", 4), 1)
+
+# Seconds to wait for each response of an IMAP server
+EMAIL_IMAP_TIMEOUT: Final[int] = __get_int("PAPERLESS_EMAIL_IMAP_TIMEOUT", 60)
+
+# Only search mails newer than the last seen mail of each rule
+EMAIL_INCREMENTAL_SYNC: Final[bool] = __get_boolean(
+    "PAPERLESS_EMAIL_INCREMENTAL_SYNC",
+)
+
 
 ###############################################################################
 # Database                                                                    #
@@ -1086,6 +1142,9 @@ CONSUMER_INOTIFY_DELAY: Final[float] = __get_float(
 
 CONSUMER_DELETE_DUPLICATES = __get_boolean("PAPERLESS_CONSUMER_DELETE_DUPLICATES")
 
+# Also compute SHA-256 checksums of consumed files, besides MD5
+CONSUMER_ENABLE_SHA256 = __get_boolean("PAPERLESS_CONSUMER_ENABLE_SHA256")
+
 CONSUMER_RECURSIVE = __get_boolean("PAPERLESS_CONSUMER_RECURSIVE")
 
 # Ignore glob patterns, relative to PAPERLESS_CONSUMPTION_DIR
@@ -1275,11 +1334,14 @@ DATE_PARSER_LANGUAGES = (
 )
 
 
-# Maximum number of dates taken from document start to end to show as suggestions for
-# `created` date in the frontend. Duplicates are removed, which can result in
-# fewer dates shown.
+# Maximum number of different dates taken from document start to end to show as
+# suggestions for `created` date in the frontend.
 NUMBER_OF_SUGGESTED_DATES = __get_int("PAPERLESS_NUMBER_OF_SUGGESTED_DATES", 3)
 
+# Only the first characters of the content are searched for dates, 0 to search
+# all of it
+DATE_PARSER_MAX_CHARS = __get_int("PAPERLESS_DATE_PARSER_MAX_CHARS", 0)
+
 # Specify the filename format for out files
 FILENAME_FORMAT = os.getenv("PAPERLESS_FILENAME_FORMAT")
 
@@ -48,3 +48,9 @@ def handle_social_account_updated(sender, request, sociallogin, **kwargs):
             f"Syncing groups for user `{sociallogin.user}`: {social_account_groups}",
         )
         sociallogin.user.groups.set(groups, clear=True)
+
+
+def handle_config_saved(sender, **kwargs):
+    from paperless.config import clear_config_cache
+
+    clear_config_cache()
@@ -1,6 +1,7 @@
 """Thread-local tenant context utilities."""
 
 import threading
+from contextlib import contextmanager
 
 _thread_locals = threading.local()
 
@@ -19,3 +20,17 @@ def clear_current_tenant():
     """Clear the current tenant for this thread."""
     if hasattr(_thread_locals, "current_tenant"):
         delattr(_thread_locals, "current_tenant")
+
+
+@contextmanager
+def tenant_context(tenant):
+    """Temporarily set the current tenant, restoring the previous one on exit."""
+    previous = get_current_tenant()
+    set_current_tenant(tenant)
+    try:
+        yield tenant
+    finally:
+        if previous is None:
+            clear_current_tenant()
+        else:
+            set_current_tenant(previous)
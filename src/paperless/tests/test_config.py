@@ -0,0 +1,109 @@
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+
+from paperless import config
+from paperless.config import CONFIG_VERSION_KEY
+from paperless.config import OcrConfig
+from paperless.models import ApplicationConfiguration
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConfigCache:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        config.clear_config_cache()
+        yield
+        config.clear_config_cache()
+
+    @pytest.fixture
+    def clock(self, mocker):
+        return mocker.patch("paperless.config.time.monotonic", return_value=100.0)
+
+    def test_read_once(self, clock, django_assert_num_queries):
+        """
+        GIVEN:
+            - The configuration was read by this process
+        WHEN:
+            - Configuration objects are built again
+        THEN:
+            - The configuration is not read from the database again
+        """
+        ApplicationConfiguration.objects.create(language="deu")
+        OcrConfig()
+
+        with django_assert_num_queries(0):
+            assert OcrConfig().language == "deu"
+
+        clock.return_value += config.CONFIG_VERSION_CHECK_SECONDS
+        with django_assert_num_queries(0):
+            assert OcrConfig().language == "deu"
+
+    def test_saved_by_this_process(self, clock):
+        """
+        GIVEN:
+            - The configuration was read by this process
+        WHEN:
+            - The configuration is saved by this process
+        THEN:
+            - The saved configuration is read right away
+        """
+        instance = ApplicationConfiguration.objects.create(language="deu")
+        assert OcrConfig().language == "deu"
+
+        instance.language = "fra"
+        instance.save()
+
+        assert OcrConfig().language == "fra"
+
+    def test_saved_by_other_process(self, clock):
+        """
+        GIVEN:
+            - The configuration was read by this process
+        WHEN:
+            - Another process saves the configuration
+        THEN:
+            - The saved configuration is read once the version was checked
+        """
+        ApplicationConfiguration.objects.create(language="deu")
+        assert OcrConfig().language == "deu"
+
+        ApplicationConfiguration.objects.update(language="fra")
+        cache.set(CONFIG_VERSION_KEY, "other")
+
+        assert OcrConfig().language == "deu"
+        clock.return_value += config.CONFIG_VERSION_CHECK_SECONDS
+        assert OcrConfig().language == "fra"
+
+    def test_not_kept_in_transaction(self, clock):
+        """
+        GIVEN:
+            - The configuration is changed in a transaction
+        WHEN:
+            - The transaction is rolled back
+        THEN:
+            - The changed configuration is not kept
+        """
+        ApplicationConfiguration.objects.create(language="deu")
+
+        with transaction.atomic():
+            ApplicationConfiguration.objects.update(language="fra")
+            assert OcrConfig().language == "fra"
+            transaction.set_rollback(True)
+
+        assert OcrConfig().language == "deu"
+
+    def test_copy_returned(self, clock):
+        """
+        GIVEN:
+            - The configuration was read by this process
+        WHEN:
+            - The returned configuration is changed
+        THEN:
+            - The configuration of the process is not changed
+        """
+        ApplicationConfiguration.objects.create(user_args={"a": 1})
+
+        config.get_config_instance().user_args["a"] = 2
+
+        assert OcrConfig().user_args == {"a": 1}
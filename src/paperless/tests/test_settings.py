@@ -159,6 +159,7 @@ class TestCeleryScheduleParsing(TestCase):
     INDEX_EXPIRE_TIME = 23.0 * 60.0 * 60.0
     SANITY_EXPIRE_TIME = ((7.0 * 24.0) - 1.0) * 60.0 * 60.0
     EMPTY_TRASH_EXPIRE_TIME = 23.0 * 60.0 * 60.0
+    STATISTICS_EXPIRE_TIME = 23.0 * 60.0 * 60.0
     RUN_SCHEDULED_WORKFLOWS_EXPIRE_TIME = 59.0 * 60.0
 
     def test_schedule_configuration_default(self):
@@ -199,6 +200,11 @@ class TestCeleryScheduleParsing(TestCase):
                     "schedule": crontab(minute=0, hour="1"),
                     "options": {"expires": self.EMPTY_TRASH_EXPIRE_TIME},
                 },
+                "Recompute document statistics": {
+                    "task": "documents.tasks.recompute_statistics",
+                    "schedule": crontab(minute=0, hour="2"),
+                    "options": {"expires": self.STATISTICS_EXPIRE_TIME},
+                },
                 "Check and run scheduled workflows": {
                     "task": "documents.tasks.check_scheduled_workflows",
                     "schedule": crontab(minute="5", hour="*/1"),
@@ -251,6 +257,11 @@ class TestCeleryScheduleParsing(TestCase):
                     "schedule": crontab(minute=0, hour="1"),
                     "options": {"expires": self.EMPTY_TRASH_EXPIRE_TIME},
                 },
+                "Recompute document statistics": {
+                    "task": "documents.tasks.recompute_statistics",
+                    "schedule": crontab(minute=0, hour="2"),
+                    "options": {"expires": self.STATISTICS_EXPIRE_TIME},
+                },
                 "Check and run scheduled workflows": {
                     "task": "documents.tasks.check_scheduled_workflows",
                     "schedule": crontab(minute="5", hour="*/1"),
@@ -295,6 +306,11 @@ class TestCeleryScheduleParsing(TestCase):
                     "schedule": crontab(minute=0, hour="1"),
                     "options": {"expires": self.EMPTY_TRASH_EXPIRE_TIME},
                 },
+                "Recompute document statistics": {
+                    "task": "documents.tasks.recompute_statistics",
+                    "schedule": crontab(minute=0, hour="2"),
+                    "options": {"expires": self.STATISTICS_EXPIRE_TIME},
+                },
                 "Check and run scheduled workflows": {
                     "task": "documents.tasks.check_scheduled_workflows",
                     "schedule": crontab(minute="5", hour="*/1"),
@@ -321,6 +337,7 @@ class TestCeleryScheduleParsing(TestCase):
                 "PAPERLESS_SANITY_TASK_CRON": "disable",
                 "PAPERLESS_INDEX_TASK_CRON": "disable",
                 "PAPERLESS_EMPTY_TRASH_TASK_CRON": "disable",
+                "PAPERLESS_STATISTICS_TASK_CRON": "disable",
                 "PAPERLESS_WORKFLOW_SCHEDULED_TASK_CRON": "disable",
             },
         ):
@@ -0,0 +1,160 @@
+"""
+Parsing of the IMAP BODYSTRUCTURE of mails, which describes the parts of a
+mail without downloading it, see RFC 3501 section 7.4.2.
+"""
+
+import dataclasses
+import email.message
+import re
+
+from imap_tools import MailAttachment
+
+_LITERAL = re.compile(rb"\{(\d+)\}\r\n")
+_ATOM = re.compile(rb"[^\s()\"{]+")
+_MESSAGE = re.compile(rb"\s*\d+\s+")
+
+
+class BodyStructureError(ValueError):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class BodyPart:
+    """
+    A part of a mail which is not a container of other parts
+    """
+
+    content_type: str
+    filename: str
+    content_disposition: str
+    content_id: str
+
+    @property
+    def is_attachment(self) -> bool:
+        # The same parts imap_tools returns as attachments of the mail
+        return bool(
+            self.content_id or self.filename or self.content_type == "message/rfc822",
+        )
+
+
+def _parse_value(data: bytes, pos: int):
+    while pos < len(data) and data[pos : pos + 1].isspace():
+        pos += 1
+    if pos >= len(data):
+        raise BodyStructureError("Unexpected end of data")
+    char = data[pos : pos + 1]
+    if char == b"(":
+        values = []
+        pos += 1
+        while True:
+            while pos < len(data) and data[pos : pos + 1].isspace():
+                pos += 1
+            if data[pos : pos + 1] == b")":
+                return values, pos + 1
+            value, pos = _parse_value(data, pos)
+            values.append(value)
+    if char == b'"':
+        value = bytearray()
+        pos += 1
+        while pos < len(data) and data[pos : pos + 1] != b'"':
+            if data[pos : pos + 1] == b"\\":
+                pos += 1
+            value += data[pos : pos + 1]
+            pos += 1
+        return bytes(value).decode("utf-8", errors="replace"), pos + 1
+    if match := _LITERAL.match(data, pos):
+        end = match.end() + int(match.group(1))
+        return data[match.end() : end].decode("utf-8", errors="replace"), end
+    if match := _ATOM.match(data, pos):
+        atom = match.group().decode("ascii", errors="replace")
+        return (None if atom.upper() == "NIL" else atom), match.end()
+    raise BodyStructureError(f"Unexpected {char!r} at {pos}")
+
+
+def _get_params(values) -> dict[str, str]:
+    if not isinstance(values, list):
+        return {}
+    return {
+        str(key).lower(): str(value)
+        for key, value in zip(values[::2], values[1::2])
+        if key is not None and value is not None
+    }
+
+
+def _make_part(structure: list) -> BodyPart:
+    content_type = f"{structure[0]}/{structure[1]}".lower()
+    # Extension data follows the basic fields, which text and attached mails
+    # have more of
+    if content_type.startswith("text/"):
+        extension = 8
+    elif content_type == "message/rfc822":
+        extension = 10
+    else:
+        extension = 7
+    disposition = structure[extension + 1] if len(structure) > extension + 1 else None
+
+    # Build the headers of the part, so the name is decoded the same way as
+    # when the whole mail is downloaded
+    part = email.message.Message()
+    part.add_header("Content-Type", content_type, **_get_params(structure[2]))
+    if isinstance(disposition, list) and disposition and disposition[0]:
+        part.add_header(
+            "Content-Disposition",
+            disposition[0].lower(),
+            **_get_params(disposition[1] if len(disposition) > 1 else None),
+        )
+    if structure[3]:
+        part["Content-ID"] = structure[3]
+
+    attachment = MailAttachment(part)
+    return BodyPart(
+        content_type=content_type,
+        filename=attachment.filename,
+        content_disposition=attachment.content_disposition,
+        content_id=attachment.content_id,
+    )
+
+
+def _iter_parts(structure: list):
+    if not structure:
+        raise BodyStructureError("Empty body structure")
+    if isinstance(structure[0], list):
+        # Multipart, whose parts are followed by its subtype
+        for part in structure:
+            if not isinstance(part, list):
+                break
+            yield from _iter_parts(part)
+    else:
+        yield _make_part(structure)
+
+
+def parse_fetch_response(data: list) -> dict[str, list[BodyPart]]:
+    """
+    Returns the parts of each mail by its UID from the response of imaplib to
+    a FETCH of UID and BODYSTRUCTURE
+    """
+    # imaplib splits the response at literals, put it back together
+    raw = b"".join(
+        item[0] + b"\r\n" + item[1] if isinstance(item, tuple) else item
+        for item in data
+        if item is not None
+    )
+
+    result = {}
+    pos = 0
+    while pos < len(raw):
+        match = _MESSAGE.match(raw, pos)
+        if match is None:
+            if not raw[pos:].strip():
+                break
+            raise BodyStructureError(f"Unexpected response at {pos}")
+        items, pos = _parse_value(raw, match.end())
+        if not isinstance(items, list):
+            raise BodyStructureError("Expected a list of message data items")
+        fields = {
+            str(key).upper(): value for key, value in zip(items[::2], items[1::2])
+        }
+        if "UID" not in fields or "BODYSTRUCTURE" not in fields:
+            raise BodyStructureError("UID or BODYSTRUCTURE missing in response")
+        result[fields["UID"]] = list(_iter_parts(fields["BODYSTRUCTURE"]))
+    return result
@@ -1,4 +1,5 @@
 import datetime
+import imaplib
 import itertools
 import logging
 import ssl
@@ -28,6 +29,7 @@ from imap_tools import MailboxFolderSelectError
 from imap_tools import MailBoxUnencrypted
 from imap_tools import MailMessage
 from imap_tools import MailMessageFlags
+from imap_tools import U
 from imap_tools import errors
 from imap_tools.mailbox import MailBoxStartTls
 from imap_tools.query import LogicOperator
@@ -35,11 +37,16 @@ from imap_tools.query import LogicOperator
 from documents.data_models import ConsumableDocument
 from documents.data_models import DocumentMetadataOverrides
 from documents.data_models import DocumentSource
+from documents.hashing import hash_bytes
 from documents.loggers import LoggingMixin
 from documents.models import Correspondent
 from documents.parsers import is_mime_type_supported
 from documents.tasks import consume_file
+from paperless_mail.bodystructure import BodyPart
+from paperless_mail.bodystructure import BodyStructureError
+from paperless_mail.bodystructure import parse_fetch_response
 from paperless_mail.models import MailAccount
+from paperless_mail.models import MailFolderState
 from paperless_mail.models import MailRule
 from paperless_mail.models import ProcessedMail
 from paperless_mail.oauth import PaperlessMailOAuth2Manager
@@ -416,12 +423,20 @@ def get_mailbox(server, port, security) -> MailBox:
     if settings.EMAIL_CERTIFICATE_FILE is not None:  # pragma: no cover
         ssl_context.load_verify_locations(cafile=settings.EMAIL_CERTIFICATE_FILE)
 
+    # A server which stops responding must not block the other accounts
+    timeout = settings.EMAIL_IMAP_TIMEOUT or None
+
     if security == MailAccount.ImapSecurity.NONE:
-        mailbox = MailBoxUnencrypted(server, port)
+        mailbox = MailBoxUnencrypted(server, port, timeout=timeout)
     elif security == MailAccount.ImapSecurity.STARTTLS:
-        mailbox = MailBoxStartTls(server, port, ssl_context=ssl_context)
+        mailbox = MailBoxStartTls(
+            server,
+            port,
+            timeout=timeout,
+            ssl_context=ssl_context,
+        )
     elif security == MailAccount.ImapSecurity.SSL:
-        mailbox = MailBox(server, port, ssl_context=ssl_context)
+        mailbox = MailBox(server, port, timeout=timeout, ssl_context=ssl_context)
     else:
         raise NotImplementedError("Unknown IMAP security")  # pragma: no cover
     return mailbox
@@ -627,18 +642,57 @@ class MailAccountHandler(LoggingMixin):
                 f"does not exist in account {rule.account}",
             ) from err
 
+        # The UIDVALIDITY of the folder is only reported when selecting it
+        state = (
+            self._get_folder_state(M, rule) if settings.EMAIL_INCREMENTAL_SYNC else None
+        )
+
         criterias = make_criterias(rule, supports_gmail_labels=supports_gmail_labels)
+        if state is not None:
+            criterias = AND(criterias, uid=U(str(state.last_uid + 1), "*"))
 
         self.log.debug(
             f"Rule {rule}: Searching folder with criteria {criterias}",
         )
 
         try:
-            messages = M.fetch(
-                criteria=criterias,
-                mark_seen=False,
-                charset=rule.account.character_set,
-                bulk=True,
+            uids = M.uids(criterias, charset=rule.account.character_set)
+        except Exception as err:
+            raise MailError(
+                f"Rule {rule}: Error while fetching folder {rule.folder}",
+            ) from err
+
+        if state is not None:
+            # Searching from after the highest UID still returns the last mail
+            uids = [uid for uid in uids if int(uid) > state.last_uid]
+
+        processed = set(
+            ProcessedMail.objects.filter(
+                rule=rule,
+                folder=rule.folder,
+                uid__in=uids,
+            ).values_list("uid", flat=True),
+        )
+        if processed:
+            self.log.debug(
+                f"Rule {rule}: Skipping {len(processed)} already processed mail(s)",
+            )
+
+        try:
+            download_uids = self._filter_by_structure(
+                M,
+                rule,
+                [uid for uid in uids if uid not in processed],
+            )
+            messages = (
+                M.fetch(
+                    criteria=AND(uid=download_uids),
+                    mark_seen=False,
+                    charset=rule.account.character_set,
+                    bulk=True,
+                )
+                if download_uids
+                else []
             )
         except Exception as err:
             raise MailError(
@@ -647,35 +701,132 @@ class MailAccountHandler(LoggingMixin):
 
         mails_processed = 0
         total_processed_files = 0
+        failed_uids = []
 
         for message in messages:
             if TYPE_CHECKING:
                 assert isinstance(message, MailMessage)
 
-            if ProcessedMail.objects.filter(
-                rule=rule,
-                uid=message.uid,
-                folder=rule.folder,
-            ).exists():
-                self.log.debug(
-                    f"Skipping mail '{message.uid}' subject '{message.subject}' from '{message.from_}', already processed.",
-                )
-                continue
-
             try:
                 processed_files = self._handle_message(message, rule)
 
                 total_processed_files += processed_files
                 mails_processed += 1
             except Exception as e:
+                failed_uids.append(int(message.uid))
                 self.log.exception(
                     f"Rule {rule}: Error while processing mail {message.uid}: {e}",
                 )
 
         self.log.debug(f"Rule {rule}: Processed {mails_processed} matching mail(s)")
 
+        if state is not None:
+            # Mails which failed are searched again next time
+            first_failed = min(failed_uids, default=None)
+            state.last_uid = max(
+                [
+                    state.last_uid,
+                    *(
+                        int(uid)
+                        for uid in uids
+                        if first_failed is None or int(uid) < first_failed
+                    ),
+                ],
+            )
+            state.save()
+
         return total_processed_files
 
+    def _get_folder_state(self, M: MailBox, rule: MailRule) -> MailFolderState | None:
+        _, data = M.client.response("UIDVALIDITY")
+        if not data or data[0] is None:
+            self.log.warning(
+                f"Rule {rule}: Server did not report the UIDVALIDITY of folder "
+                f"{rule.folder}, searching all mails",
+            )
+            return None
+        uid_validity = int(data[-1])
+
+        state, _ = MailFolderState.objects.get_or_create(
+            rule=rule,
+            folder=rule.folder,
+            defaults={"uid_validity": uid_validity},
+        )
+        if state.uid_validity != uid_validity:
+            self.log.info(
+                f"Rule {rule}: UIDs of folder {rule.folder} changed, "
+                f"searching all mails",
+            )
+            state.uid_validity = uid_validity
+            state.last_uid = 0
+        return state
+
+    def _filter_by_structure(
+        self,
+        M: MailBox,
+        rule: MailRule,
+        uids: list[str],
+    ) -> list[str]:
+        """
+        Returns the UIDs of the mails which need to be downloaded.  When only
+        attachments are consumed, the attachments of each mail are checked
+        against the rule by the structure of the mail first, and mails without
+        any attachment to consume are not downloaded.
+        """
+        if (
+            not uids
+            or rule.consumption_scope != MailRule.ConsumptionScope.ATTACHMENTS_ONLY
+            # Preprocessors may change the attachments, e.g. by decrypting
+            or self._message_preprocessors
+        ):
+            return uids
+
+        try:
+            status, data = M.client.uid(
+                "FETCH",
+                ",".join(uids),
+                "(UID BODYSTRUCTURE)",
+            )
+            if status != "OK":
+                raise BodyStructureError(f"Server responded {status}")
+            structures = parse_fetch_response(data)
+        except (BodyStructureError, errors.ImapToolsError, imaplib.IMAP4.error) as e:
+            self.log.warning(
+                f"Rule {rule}: Unable to read the structure of mails, "
+                f"downloading them: {e}",
+            )
+            return uids
+
+        download_uids = []
+        unconsumed_uids = []
+        for uid in uids:
+            parts = structures.get(uid)
+            if parts is None or any(
+                part.is_attachment
+                and self._get_attachment_skip_reason(part, rule) is None
+                for part in parts
+            ):
+                download_uids.append(uid)
+            elif any(part.is_attachment for part in parts):
+                unconsumed_uids.append(uid)
+            # Mails without attachments are ignored, as after downloading them
+
+        if unconsumed_uids:
+            self.log.debug(
+                f"Rule {rule}: No attachments to consume in "
+                f"{len(unconsumed_uids)} mail(s)",
+            )
+            for message in M.fetch(
+                criteria=AND(uid=unconsumed_uids),
+                mark_seen=False,
+                charset=rule.account.character_set,
+                headers_only=True,
+                bulk=True,
+            ):
+                self._mark_processed_without_consumption(message, rule)
+
+        return download_uids
+
     def _handle_message(self, message, rule: MailRule) -> int:
         message = self._preprocess_message(message)
 
@@ -771,38 +922,9 @@ class MailAccountHandler(LoggingMixin):
         consume_tasks = []
 
         for att in message.attachments:
-            if (
-                att.content_disposition != "attachment"
-                and rule.attachment_type
-                == MailRule.AttachmentProcessing.ATTACHMENTS_ONLY
-            ):
+            if reason := self._get_attachment_skip_reason(att, rule):
                 self.log.debug(
-                    f"Rule {rule}: "
-                    f"Skipping attachment {att.filename} "
-                    f"with content disposition {att.content_disposition}",
-                )
-                continue
-
-            if not self.filename_inclusion_matches(
-                rule.filter_attachment_filename_include,
-                att.filename,
-            ):
-                # Force the filename and pattern to the lowercase
-                # as this is system dependent otherwise
-                self.log.debug(
-                    f"Rule {rule}: "
-                    f"Skipping attachment {att.filename} "
-                    f"does not match pattern {rule.filter_attachment_filename_include}",
-                )
-                continue
-            elif self.filename_exclusion_matches(
-                rule.filter_attachment_filename_exclude,
-                att.filename,
-            ):
-                self.log.debug(
-                    f"Rule {rule}: "
-                    f"Skipping attachment {att.filename} "
-                    f"does match pattern {rule.filter_attachment_filename_exclude}",
+                    f"Rule {rule}: Skipping attachment {att.filename} {reason}",
                 )
                 continue
 
@@ -843,6 +965,7 @@ class MailAccountHandler(LoggingMixin):
                     source=DocumentSource.MailFetch,
                     original_file=temp_filename,
                     mailrule_id=rule.pk,
+                    digest=hash_bytes(att.payload),
                 )
                 doc_overrides = DocumentMetadataOverrides(
                     title=title,
@@ -880,25 +1003,58 @@ class MailAccountHandler(LoggingMixin):
                 message=message,
             )
         else:
-            # No files to consume, just mark as processed if it wasn't by .eml processing
-            if not ProcessedMail.objects.filter(
-                rule=rule,
-                uid=message.uid,
-                folder=rule.folder,
-            ).exists():
-                ProcessedMail.objects.create(
-                    rule=rule,
-                    folder=rule.folder,
-                    uid=message.uid,
-                    subject=message.subject,
-                    received=make_aware(message.date)
-                    if is_naive(message.date)
-                    else message.date,
-                    status="PROCESSED_WO_CONSUMPTION",
-                )
+            self._mark_processed_without_consumption(message, rule)
 
         return processed_attachments
 
+    def _get_attachment_skip_reason(
+        self,
+        att: MailAttachment | BodyPart,
+        rule: MailRule,
+    ) -> str | None:
+        """
+        Returns why the attachment is not consumed by the rule, or None if it
+        is consumed in case its file type is supported
+        """
+        if (
+            att.content_disposition != "attachment"
+            and rule.attachment_type == MailRule.AttachmentProcessing.ATTACHMENTS_ONLY
+        ):
+            return f"with content disposition {att.content_disposition}"
+        if not self.filename_inclusion_matches(
+            rule.filter_attachment_filename_include,
+            att.filename,
+        ):
+            return f"does not match pattern {rule.filter_attachment_filename_include}"
+        if self.filename_exclusion_matches(
+            rule.filter_attachment_filename_exclude,
+            att.filename,
+        ):
+            return f"does match pattern {rule.filter_attachment_filename_exclude}"
+        return None
+
+    def _mark_processed_without_consumption(
+        self,
+        message: MailMessage,
+        rule: MailRule,
+    ) -> None:
+        # No files to consume, just mark as processed if it wasn't by .eml processing
+        if not ProcessedMail.objects.filter(
+            rule=rule,
+            uid=message.uid,
+            folder=rule.folder,
+        ).exists():
+            ProcessedMail.objects.create(
+                rule=rule,
+                folder=rule.folder,
+                uid=message.uid,
+                subject=message.subject,
+                received=make_aware(message.date)
+                if is_naive(message.date)
+                else message.date,
+                status="PROCESSED_WO_CONSUMPTION",
+            )
+
     def _process_eml(
         self,
         message: MailMessage,
@@ -931,7 +1087,8 @@ class MailAccountHandler(LoggingMixin):
                 new_headers += message.obj._headers
                 message.obj._headers = new_headers
 
-            f.write(message.obj.as_bytes())
+            eml = message.obj.as_bytes()
+            f.write(eml)
 
         correspondent = self._get_correspondent(message, rule)
 
@@ -945,6 +1102,7 @@ class MailAccountHandler(LoggingMixin):
             source=DocumentSource.MailFetch,
             original_file=temp_filename,
             mailrule_id=rule.pk,
+            digest=hash_bytes(eml),
         )
         doc_overrides = DocumentMetadataOverrides(
             title=message.subject,
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:50
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "paperless_mail",
+            "0034_remove_mailrule_paperless_mail_mailrule_unique_name_owner_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MailFolderState",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "folder",
+                    models.CharField(
+                        editable=False,
+                        max_length=256,
+                        verbose_name="folder",
+                    ),
+                ),
+                (
+                    "uid_validity",
+                    models.BigIntegerField(editable=False, verbose_name="UID validity"),
+                ),
+                (
+                    "last_uid",
+                    models.BigIntegerField(
+                        default=0,
+                        editable=False,
+                        verbose_name="last UID",
+                    ),
+                ),
+                (
+                    "rule",
+                    models.ForeignKey(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="folder_states",
+                        to="paperless_mail.mailrule",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("rule", "folder"),
+                        name="paperless_mail_mailfolderstate_unique_rule_folder",
+                    ),
+                ],
+            },
+        ),
+    ]
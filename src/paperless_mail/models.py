@@ -372,3 +372,35 @@ class ProcessedMail(document_models.ModelWithOwner):
         blank=True,
         editable=False,
     )
+
+
+class MailFolderState(models.Model):
+    """
+    The highest UID of the folder of a mail rule which was seen, so only newer
+    mails are searched with PAPERLESS_EMAIL_INCREMENTAL_SYNC.  UIDs are only
+    comparable while the UIDVALIDITY of the folder stays the same.
+    """
+
+    rule = models.ForeignKey(
+        MailRule,
+        on_delete=models.CASCADE,
+        related_name="folder_states",
+        editable=False,
+    )
+
+    folder = models.CharField(_("folder"), max_length=256, editable=False)
+
+    uid_validity = models.BigIntegerField(_("UID validity"), editable=False)
+
+    last_uid = models.BigIntegerField(_("last UID"), default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["rule", "folder"],
+                name="%(app_label)s_%(class)s_unique_rule_folder",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.rule}.{self.folder}"
@@ -1,42 +1,84 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from celery import shared_task
+from django import db
+from django.conf import settings
 
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import tenant_context
 from paperless_mail.mail import MailAccountHandler
 from paperless_mail.mail import MailError
 from paperless_mail.models import MailAccount
 from paperless_mail.models import MailRule
-from paperless.tenants.models import Tenant
-from paperless.tenants.utils import set_current_tenant
 
 logger = logging.getLogger("paperless.mail.tasks")
 
 
+def _get_accounts(
+    tenant: Tenant,
+    account_ids: list[int] | None,
+) -> list[MailAccount]:
+    with tenant_context(tenant):
+        accounts = MailAccount.objects.all()
+        if account_ids:
+            accounts = accounts.filter(pk__in=account_ids)
+        enabled = set(
+            MailRule.objects.filter(account__in=accounts, enabled=True).values_list(
+                "account_id",
+                flat=True,
+            ),
+        )
+        result = []
+        for account in accounts:
+            if account.pk not in enabled:
+                logger.info(f"No rules enabled for account {account}. Skipping.")
+                continue
+            result.append(account)
+        return result
+
+
+def _process_mail_account(tenant: Tenant, account: MailAccount) -> int:
+    try:
+        with tenant_context(tenant):
+            return MailAccountHandler().handle_mail_account(account)
+    except MailError:
+        logger.exception(f"Error while processing mail account {account}")
+    except Exception:
+        # The other accounts are still checked
+        logger.exception(f"Unexpected error while processing mail account {account}")
+    finally:
+        # Each thread has its own database connection
+        db.connection.close()
+    return 0
+
+
 @shared_task
-def process_mail_accounts(account_ids: list[int] | None = None, tenant_id: int | None = None) -> str:
-    """Process mail accounts with tenant context."""
-    # Set tenant context if provided
-    if tenant_id:
-        try:
-            tenant = Tenant.objects.get(id=tenant_id)
-            set_current_tenant(tenant)
-        except Tenant.DoesNotExist:
-            logger.warning(f"Tenant {tenant_id} not found, proceeding without tenant context")
-
-    total_new_documents = 0
-    accounts = (
-        MailAccount.objects.filter(pk__in=account_ids)
-        if account_ids
-        else MailAccount.objects.all()
+def process_mail_accounts(
+    account_ids: list[int] | None = None,
+    tenant_id: int | None = None,
+) -> str:
+    """
+    Checks the mail accounts with the given ids, or all accounts, of the given
+    tenant or of every active tenant.  Accounts are checked concurrently, up
+    to PAPERLESS_EMAIL_TASK_WORKERS at a time, and an account which fails or
+    whose server does not respond does not hold up the others.
+    """
+    tenants = (
+        Tenant.objects.filter(id=tenant_id)
+        if tenant_id
+        else Tenant.objects.filter(is_active=True, deleted_at__isnull=True)
     )
-    for account in accounts:
-        if not MailRule.objects.filter(account=account, enabled=True).exists():
-            logger.info(f"No rules enabled for account {account}. Skipping.")
-            continue
-        try:
-            total_new_documents += MailAccountHandler().handle_mail_account(account)
-        except MailError:
-            logger.exception(f"Error while processing mail account {account}")
+    accounts = [
+        (tenant, account)
+        for tenant in tenants
+        for account in _get_accounts(tenant, account_ids)
+    ]
+
+    with ThreadPoolExecutor(max_workers=settings.EMAIL_TASK_WORKERS) as pool:
+        total_new_documents = sum(
+            pool.map(lambda item: _process_mail_account(*item), accounts),
+        )
 
     if total_new_documents > 0:
         return f"Added {total_new_documents} document(s)."
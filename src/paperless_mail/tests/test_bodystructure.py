@@ -0,0 +1,86 @@
+import pytest
+
+from paperless_mail.bodystructure import BodyPart
+from paperless_mail.bodystructure import BodyStructureError
+from paperless_mail.bodystructure import parse_fetch_response
+
+
+class TestParseFetchResponse:
+    def test_multipart(self):
+        """
+        GIVEN:
+            - The structure of a mail with a text and an attached PDF
+        WHEN:
+            - The structure is parsed
+        THEN:
+            - Both parts are returned with their names and dispositions
+        """
+        data = [
+            b'1 (UID 12 BODYSTRUCTURE (("text" "plain" ("charset" "utf-8") NIL NIL '
+            b'"7bit" 12 1 NIL NIL NIL NIL)("application" "pdf" ("name" '
+            b'"invoice.pdf") NIL NIL "base64" 1234 NIL ("attachment" ("filename" '
+            b'"invoice.pdf")) NIL NIL) "mixed" ("boundary" "xyz") NIL NIL NIL))',
+        ]
+
+        assert parse_fetch_response(data) == {
+            "12": [
+                BodyPart("text/plain", "", "", ""),
+                BodyPart("application/pdf", "invoice.pdf", "attachment", ""),
+            ],
+        }
+
+    def test_encoded_names(self):
+        """
+        GIVEN:
+            - Structures of mails whose attachment names are encoded, one of them
+              sent as a literal
+        WHEN:
+            - The structures are parsed
+        THEN:
+            - The names are decoded as those of downloaded mails
+        """
+        data = [
+            (
+                b'2 (UID 13 BODYSTRUCTURE ("image" "png" NIL "<logo@example>" NIL '
+                b'"base64" 10 NIL ("inline" ("filename*" {27}',
+                b"utf-8''R%C3%A9sum%C3%A9.png",
+            ),
+            b")) NIL NIL))",
+            b'3 (BODYSTRUCTURE (("text" "html" NIL NIL NIL "7bit" 3 1 NIL NIL NIL '
+            b'NIL)("application" "octet-stream" ("name" '
+            b'"=?utf-8?q?Rechnung_M=C3=A4rz.pdf?=") NIL NIL "base64" 1 NIL NIL NIL '
+            b'NIL) "mixed") UID 14)',
+        ]
+
+        assert parse_fetch_response(data) == {
+            "13": [BodyPart("image/png", "Résumé.png", "inline", "logo@example")],
+            "14": [
+                BodyPart("text/html", "", "", ""),
+                BodyPart("application/octet-stream", "Rechnung März.pdf", "", ""),
+            ],
+        }
+
+    def test_attached_mail(self):
+        data = [
+            b'4 (UID 15 BODYSTRUCTURE (("text" "plain" NIL NIL NIL "7bit" 3 1)'
+            b'("message" "rfc822" NIL NIL NIL "7bit" 100 (NIL "Forwarded" NIL NIL '
+            b'NIL NIL NIL NIL NIL NIL) ("text" "plain" NIL NIL NIL "7bit" 3 1) 5 '
+            b'NIL ("attachment" NIL) NIL NIL) "mixed"))',
+        ]
+
+        parts = parse_fetch_response(data)["15"]
+
+        assert [part.is_attachment for part in parts] == [False, True]
+        assert parts[1].content_disposition == "attachment"
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            [b'1 (UID 12 BODYSTRUCTURE ("text" "plain"'],
+            [b"1 (UID 12)"],
+            [b"* garbage"],
+        ],
+    )
+    def test_invalid(self, data):
+        with pytest.raises(BodyStructureError):
+            parse_fetch_response(data)
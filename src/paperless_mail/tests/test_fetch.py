@@ -0,0 +1,278 @@
+import email.message
+from unittest import mock
+
+import pytest
+from imap_tools import MailMessage
+
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import tenant_context
+from paperless_mail.mail import MailAccountHandler
+from paperless_mail.models import MailAccount
+from paperless_mail.models import MailFolderState
+from paperless_mail.models import MailRule
+from paperless_mail.models import ProcessedMail
+
+PDF = (
+    b'("application" "pdf" ("name" "invoice.pdf") NIL NIL "base64" 10 NIL '
+    b'("attachment" ("filename" "invoice.pdf")) NIL NIL)'
+)
+PNG = (
+    b'("image" "png" ("name" "logo.png") NIL NIL "base64" 10 NIL '
+    b'("attachment" ("filename" "logo.png")) NIL NIL)'
+)
+TEXT = b'("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 12 1 NIL NIL NIL NIL)'
+
+
+def get_structure(uid: str, *parts: bytes) -> bytes:
+    return b'1 (UID %s BODYSTRUCTURE (%s %s "mixed"))' % (
+        uid.encode(),
+        TEXT,
+        b"".join(parts),
+    )
+
+
+def create_message(uid: str, *, headers_only=False) -> MailMessage:
+    msg = email.message.EmailMessage()
+    msg["Subject"] = f"Mail {uid}"
+    msg["From"] = "sender@example.com"
+    msg["Date"] = "Tue, 01 Oct 2024 10:00:00 +0000"
+    msg.set_content("Some text")
+    if not headers_only:
+        msg.add_attachment(
+            b"%PDF-1.4",
+            maintype="application",
+            subtype="pdf",
+            filename="invoice.pdf",
+        )
+    message = MailMessage.from_bytes(msg.as_bytes())
+    message._raw_uid_data = f"UID {uid}".encode()
+    return message
+
+
+@pytest.fixture
+def rule(db) -> MailRule:
+    tenant = Tenant.objects.create(name="Tenant", identifier="tenant")
+    with tenant_context(tenant):
+        account = MailAccount.objects.create(
+            name="account",
+            imap_server="imap.example.com",
+            username="user",
+            password="password",
+        )
+        yield MailRule.objects.create(
+            name="rule",
+            account=account,
+            filter_attachment_filename_include="*.pdf",
+        )
+
+
+@pytest.fixture
+def mailbox() -> mock.MagicMock:
+    mailbox = mock.MagicMock()
+    mailbox.client.response.return_value = ("UIDVALIDITY", [b"7"])
+
+    def fetch(criteria, *, headers_only=False, **kwargs):
+        uids = str(criteria).strip("()").split(" ")[1].split(",")
+        return [create_message(uid, headers_only=headers_only) for uid in uids]
+
+    mailbox.fetch.side_effect = fetch
+    return mailbox
+
+
+@pytest.fixture
+def queue_consumption_tasks(mocker) -> mock.MagicMock:
+    mocker.patch(
+        "paperless_mail.mail.magic.from_buffer",
+        return_value="application/pdf",
+    )
+    return mocker.patch("paperless_mail.mail.queue_consumption_tasks")
+
+
+def get_fetched_uids(mailbox: mock.MagicMock, *, headers_only=False) -> list[str]:
+    return [
+        str(call.kwargs["criteria"])
+        for call in mailbox.fetch.call_args_list
+        if call.kwargs.get("headers_only", False) == headers_only
+    ]
+
+
+@pytest.mark.django_db
+class TestHeaderFirstFetch:
+    def test_only_consumed_mails_downloaded(
+        self,
+        rule,
+        mailbox,
+        queue_consumption_tasks,
+        django_assert_max_num_queries,
+    ):
+        """
+        GIVEN:
+            - Mails with an attachment to consume, with an attachment the rule
+              does not consume, without attachments and already processed
+        WHEN:
+            - The mails of the rule are handled
+        THEN:
+            - Processed mails are looked up at once
+            - Only the mail with an attachment to consume is downloaded
+            - Only the headers of the mail without attachments to consume are
+              downloaded, and it is marked as processed
+        """
+        ProcessedMail.objects.create(
+            rule=rule,
+            folder=rule.folder,
+            uid="4",
+            subject="Mail 4",
+            received="2024-10-01T10:00:00Z",
+            status="SUCCESS",
+        )
+        mailbox.uids.return_value = ["1", "2", "3", "4"]
+        mailbox.client.uid.return_value = (
+            "OK",
+            [get_structure("1", PDF), get_structure("2"), get_structure("3", PNG)],
+        )
+
+        with django_assert_max_num_queries(5):
+            processed = MailAccountHandler()._handle_mail_rule(
+                mailbox,
+                rule,
+                supports_gmail_labels=False,
+            )
+
+        assert processed == 1
+        mailbox.client.uid.assert_called_once_with(
+            "FETCH",
+            "1,2,3",
+            "(UID BODYSTRUCTURE)",
+        )
+        assert get_fetched_uids(mailbox) == ["(UID 1)"]
+        assert get_fetched_uids(mailbox, headers_only=True) == ["(UID 3)"]
+        queue_consumption_tasks.assert_called_once()
+        assert set(
+            ProcessedMail.objects.values_list("uid", "status"),
+        ) == {("3", "PROCESSED_WO_CONSUMPTION"), ("4", "SUCCESS")}
+
+    def test_unreadable_structure(self, rule, mailbox, queue_consumption_tasks):
+        """
+        GIVEN:
+            - A server whose response to a FETCH of BODYSTRUCTURE can't be parsed
+        WHEN:
+            - The mails of the rule are handled
+        THEN:
+            - The mails are downloaded and handled as before
+        """
+        mailbox.uids.return_value = ["1", "2"]
+        mailbox.client.uid.return_value = ("OK", [b"1 (UID 1 BODYSTRUCTURE"])
+
+        MailAccountHandler()._handle_mail_rule(
+            mailbox,
+            rule,
+            supports_gmail_labels=False,
+        )
+
+        assert get_fetched_uids(mailbox) == ["(UID 1,2)"]
+
+    def test_eml_downloaded(self, rule, mailbox, queue_consumption_tasks):
+        """
+        GIVEN:
+            - A rule which consumes the whole mail
+        WHEN:
+            - The mails of the rule are handled
+        THEN:
+            - The mails are downloaded without reading their structure
+        """
+        rule.consumption_scope = MailRule.ConsumptionScope.EML_ONLY
+        mailbox.uids.return_value = ["1"]
+
+        MailAccountHandler()._handle_mail_rule(
+            mailbox,
+            rule,
+            supports_gmail_labels=False,
+        )
+
+        mailbox.client.uid.assert_not_called()
+        assert get_fetched_uids(mailbox) == ["(UID 1)"]
+
+
+@pytest.mark.django_db
+class TestIncrementalSync:
+    @pytest.fixture(autouse=True)
+    def incremental(self, settings):
+        settings.EMAIL_INCREMENTAL_SYNC = True
+
+    def handle(self, mailbox, rule, uids: list[str]) -> str:
+        mailbox.reset_mock()
+        mailbox.uids.return_value = uids
+        mailbox.client.uid.return_value = (
+            "OK",
+            [get_structure(uid, PDF) for uid in uids],
+        )
+        MailAccountHandler()._handle_mail_rule(
+            mailbox,
+            rule,
+            supports_gmail_labels=False,
+        )
+        return str(mailbox.uids.call_args.args[0])
+
+    def test_newer_mails_searched(self, rule, mailbox, queue_consumption_tasks):
+        """
+        GIVEN:
+            - A folder whose mails were handled before
+        WHEN:
+            - The mails of the rule are handled again
+        THEN:
+            - Only mails after the highest seen UID are searched
+            - The last mail returned by the server anyway is not handled again
+        """
+        assert "UID 1:*" in self.handle(mailbox, rule, ["5", "6"])
+        assert MailFolderState.objects.get(rule=rule).last_uid == 6
+
+        assert "UID 7:*" in self.handle(mailbox, rule, ["6"])
+        mailbox.fetch.assert_not_called()
+        assert MailFolderState.objects.get(rule=rule).last_uid == 6
+
+    def test_uid_validity_changed(self, rule, mailbox, queue_consumption_tasks):
+        """
+        GIVEN:
+            - A folder whose mails were handled before
+        WHEN:
+            - The UIDVALIDITY of the folder changed
+        THEN:
+            - All mails are searched again
+        """
+        MailFolderState.objects.create(
+            rule=rule,
+            folder=rule.folder,
+            uid_validity=3,
+            last_uid=100,
+        )
+
+        assert "UID 1:*" in self.handle(mailbox, rule, ["2"])
+
+        state = MailFolderState.objects.get(rule=rule)
+        assert (state.uid_validity, state.last_uid) == (7, 2)
+
+    def test_failed_mail_searched_again(
+        self,
+        rule,
+        mailbox,
+        queue_consumption_tasks,
+        mocker,
+    ):
+        """
+        GIVEN:
+            - Mails of a folder
+        WHEN:
+            - Handling one of the mails fails
+        THEN:
+            - The failed mail is searched again next time
+        """
+        handle_message = mocker.patch.object(
+            MailAccountHandler,
+            "_handle_message",
+            side_effect=[1, Exception("failed"), 1],
+        )
+
+        self.handle(mailbox, rule, ["5", "6", "7"])
+
+        assert handle_message.call_count == 3
+        assert MailFolderState.objects.get(rule=rule).last_uid == 5
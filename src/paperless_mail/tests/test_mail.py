@@ -126,11 +126,21 @@ class BogusMailBox(AbstractContextManager):
         if username != self.USERNAME or access_token != self.ACCESS_TOKEN:
             raise MailboxLoginError("BAD", "OK")
 
-    def fetch(self, criteria, mark_seen, charset="", *, bulk=True):
+    def uids(self, criteria, charset=""):
+        return [
+            message.uid
+            for message in self.fetch(criteria, mark_seen=False, charset=charset)
+        ]
+
+    def fetch(self, criteria, mark_seen, charset="", *, headers_only=False, bulk=True):
         msg = self.messages
 
         criteria = str(criteria).strip("()").split(" ")
 
+        if "UID" in criteria:
+            uids = criteria[criteria.index("UID") + 1].split(",")
+            msg = filter(lambda m: m.uid in uids, msg)
+
         if "UNSEEN" in criteria:
             msg = filter(lambda m: not m.seen, msg)
 
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from paperless.tenants.models import Tenant
+from paperless.tenants.utils import get_current_tenant
+from paperless.tenants.utils import tenant_context
+from paperless_mail import tasks
+from paperless_mail.mail import MailError
+from paperless_mail.models import MailAccount
+from paperless_mail.models import MailRule
+
+
+def create_account(tenant: Tenant, name: str, *, enabled=True) -> MailAccount:
+    with tenant_context(tenant):
+        account = MailAccount.objects.create(
+            name=name,
+            imap_server="imap.example.com",
+            username=name,
+            password=name,
+        )
+        MailRule.objects.create(name=name, account=account, enabled=enabled)
+        return account
+
+
+@pytest.mark.django_db(transaction=True)
+class TestProcessMailAccounts:
+    @pytest.fixture
+    def tenants(self) -> tuple[Tenant, Tenant]:
+        return (
+            Tenant.objects.create(name="First", identifier="first"),
+            Tenant.objects.create(name="Second", identifier="second"),
+        )
+
+    def test_accounts_of_all_tenants(self, tenants, settings, mocker):
+        """
+        GIVEN:
+            - Mail accounts of two tenants, one of them without enabled rules
+        WHEN:
+            - The mail accounts are processed without a tenant
+        THEN:
+            - The accounts with enabled rules of both tenants are checked at the
+              same time, each within its tenant
+        """
+        settings.EMAIL_TASK_WORKERS = 2
+        first, second = tenants
+        create_account(first, "first")
+        create_account(second, "second")
+        create_account(second, "disabled", enabled=False)
+        both_started = threading.Barrier(2, timeout=5)
+        checked = {}
+
+        def handle_mail_account(account):
+            checked[account.name] = get_current_tenant()
+            both_started.wait()
+            return 3
+
+        mocker.patch(
+            "paperless_mail.tasks.MailAccountHandler.handle_mail_account",
+            side_effect=handle_mail_account,
+        )
+
+        result = tasks.process_mail_accounts()
+
+        assert checked == {"first": first, "second": second}
+        assert result == "Added 6 document(s)."
+
+    def test_failures_isolated(self, tenants, mocker):
+        """
+        GIVEN:
+            - Mail accounts of a tenant
+        WHEN:
+            - Checking some of the accounts fails
+        THEN:
+            - The other accounts are still checked
+        """
+        first, _ = tenants
+        for name in ["broken", "unexpected", "working"]:
+            create_account(first, name)
+
+        def handle_mail_account(account):
+            if account.name == "broken":
+                raise MailError("Error while authenticating account")
+            if account.name == "unexpected":
+                raise TimeoutError
+            return 1
+
+        handle = mocker.patch(
+            "paperless_mail.tasks.MailAccountHandler.handle_mail_account",
+            side_effect=handle_mail_account,
+        )
+
+        result = tasks.process_mail_accounts(tenant_id=first.pk)
+
+        assert handle.call_count == 3
+        assert result == "Added 1 document(s)."
+
+    def test_given_accounts(self, tenants, mocker):
+        """
+        GIVEN:
+            - Mail accounts of a tenant
+        WHEN:
+            - One of the accounts is processed
+        THEN:
+            - Only that account is checked
+        """
+        first, _ = tenants
+        account = create_account(first, "first")
+        create_account(first, "other")
+        handle = mocker.patch(
+            "paperless_mail.tasks.MailAccountHandler.handle_mail_account",
+            return_value=0,
+        )
+
+        result = tasks.process_mail_accounts([account.pk], tenant_id=first.pk)
+
+        handle.assert_called_once_with(account)
+        assert result == "No new documents were added."
@@ -106,8 +106,9 @@ class TestParser(DirectoriesMixin, FileSystemAssertsMixin, TestCase):
         )
         self.assertIsFile(thumb)
 
+    @mock.patch("documents.parsers.render_pdf_thumbnails", return_value=False)
     @mock.patch("documents.parsers.run_convert")
-    def test_thumbnail_fallback(self, m):
+    def test_thumbnail_fallback(self, m, _):
         def call_convert(input_file, output_file, **kwargs):
             if ".pdf" in str(input_file):
                 raise ParseError("Does not compute.")